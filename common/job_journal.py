@@ -0,0 +1,234 @@
+"""
+批处理作业日志：记录每个工作单元（模块 × 阶段）的输入哈希和状态，
+重启时跳过已完成的单元，失败的单元在尝试次数上限内重试
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# 每个工作单元（相同输入）最多的尝试次数
+JOB_MAX_ATTEMPTS = 3
+
+DONE = "done"
+FAILED = "failed"
+PENDING = "pending"
+
+
+def inputs_hash(*parts: Any) -> str:
+    """工作单元输入的哈希；输入变化后已完成的单元会重新执行"""
+    data = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def atomic_write_text(path: Path, text: str, encoding: str = "utf-8"):
+    """先写临时文件再替换，进程中断或断电时不会留下写了一半的文件
+
+    替换前把临时文件刷到磁盘，替换后再同步所在目录，保证重命名本身也已落盘。
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding=encoding) as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    _fsync_dir(path.parent)
+
+
+def _fsync_dir(directory: Path):
+    """同步目录项；不支持打开目录的平台（如 Windows）直接跳过"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_json(path: Path, data: Any, **kwargs):
+    kwargs.setdefault("ensure_ascii", False)
+    kwargs.setdefault("indent", 2)
+    atomic_write_text(path, json.dumps(data, **kwargs))
+
+
+def read_jsonl_log(path: Path) -> List[Dict]:
+    """读取追加写入的 JSONL 日志
+
+    进程中断时最后一行可能不完整：跳过它并把文件截断到最后一个完整行，
+    避免之后追加的记录接在残缺的行后面。
+    """
+    path = Path(path)
+    if not path.exists():
+        return []
+    records = []
+    with open(path, "rb") as f:
+        data = f.read()
+    complete = data.rfind(b"\n") + 1
+    for line in data[:complete].splitlines():
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            print(f"⚠️ 跳过无法解析的日志记录: {path}")
+    if complete < len(data):
+        print(f"⚠️ 跳过不完整的日志记录: {path}")
+        with open(path, "r+b") as f:
+            f.truncate(complete)
+    return records
+
+
+class JobJournal:
+    """可恢复的批处理作业日志
+
+    每次状态变化向 JSONL 文件追加一行并立即落盘，启动时按顺序重放得到每个单元的最新状态
+    （进程中断时最后一行可能不完整，会被跳过）。单元的状态与输入哈希绑定：
+    - 相同输入已完成的单元直接跳过，可取回完成时记录的结果
+    - 失败次数达到 max_attempts 的单元不再自动重试，输入变化后重新计数
+    - 正在执行时中断的单元没有记录，重启后照常执行
+    """
+
+    def __init__(self, path: Path, max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.path = Path(path)
+        self.max_attempts = max(1, max_attempts)
+        self.entries: Dict[str, Dict] = {}
+        self._file = None
+        self.load()
+
+    @staticmethod
+    def key(unit: str, stage: str) -> str:
+        return f"{stage}:{unit}"
+
+    def load(self):
+        self.entries = {}
+        for record in read_jsonl_log(self.path):
+            self._apply(record)
+
+    def _apply(self, record: Dict):
+        key = self.key(record["unit"], record["stage"])
+        entry = self.entries.get(key)
+        if entry is None or entry["inputs"] != record["inputs"]:
+            entry = {"unit": record["unit"], "stage": record["stage"], "inputs": record["inputs"],
+                     "status": PENDING, "attempts": 0, "result": None, "error": None}
+            self.entries[key] = entry
+        entry["status"] = record["status"]
+        if record["status"] == FAILED:
+            entry["attempts"] += 1
+            entry["error"] = record.get("error")
+        elif record["status"] == DONE:
+            entry["attempts"] = 0
+            entry["result"] = record.get("result")
+            entry["error"] = None
+
+    def _append(self, record: Dict):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._apply(record)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # ---- 查询 ----
+
+    def entry(self, unit: str, stage: str, inputs: str) -> Optional[Dict]:
+        """相同输入下的记录，输入变化或没有记录时返回 None"""
+        entry = self.entries.get(self.key(unit, stage))
+        if entry is None or entry["inputs"] != inputs:
+            return None
+        return entry
+
+    def is_done(self, unit: str, stage: str, inputs: str) -> bool:
+        entry = self.entry(unit, stage, inputs)
+        return entry is not None and entry["status"] == DONE
+
+    def is_exhausted(self, unit: str, stage: str, inputs: str) -> bool:
+        """失败次数已达上限"""
+        entry = self.entry(unit, stage, inputs)
+        return entry is not None and entry["status"] == FAILED and entry["attempts"] >= self.max_attempts
+
+    def should_run(self, unit: str, stage: str, inputs: str) -> bool:
+        return not self.is_done(unit, stage, inputs) and not self.is_exhausted(unit, stage, inputs)
+
+    def result(self, unit: str, stage: str, inputs: str) -> Any:
+        entry = self.entry(unit, stage, inputs)
+        return entry["result"] if entry is not None and entry["status"] == DONE else None
+
+    # ---- 记录 ----
+
+    def complete(self, unit: str, stage: str, inputs: str, result: Any = None):
+        """记录单元完成；应在单元的输出（原子地）写出之后调用"""
+        self._append({"unit": unit, "stage": stage, "inputs": inputs, "status": DONE, "result": result})
+
+    def fail(self, unit: str, stage: str, inputs: str, error: Any):
+        self._append({"unit": unit, "stage": stage, "inputs": inputs, "status": FAILED, "error": str(error)})
+
+    def invalidate(self, unit: str, stage: str, inputs: str):
+        """把已完成的单元标记为待执行（例如其输出文件已被删除），不计入失败次数"""
+        if self.is_done(unit, stage, inputs):
+            self._append({"unit": unit, "stage": stage, "inputs": inputs, "status": PENDING})
+
+    async def run(self, unit: str, stage: str, inputs: str, func: Callable[[], Awaitable[Any]]) -> Dict:
+        """执行单元：已完成的跳过，失败时在尝试次数上限内重试
+
+        Returns:
+            {"status": "skipped"/"done"/"failed"/"exhausted", "result": ..., "error": ...}
+        """
+        if self.is_done(unit, stage, inputs):
+            return {"status": "skipped", "result": self.result(unit, stage, inputs)}
+        error = None
+        while not self.is_exhausted(unit, stage, inputs):
+            try:
+                result = await func()
+            except Exception as e:
+                error = e
+                print(f"⚠️ [JOB] {stage} '{unit}' 失败: {str(e)}")
+                self.fail(unit, stage, inputs, e)
+                continue
+            self.complete(unit, stage, inputs, result)
+            return {"status": "done", "result": result}
+        if error is None:
+            entry = self.entry(unit, stage, inputs)
+            return {"status": "exhausted", "error": entry["error"] if entry else None}
+        return {"status": "failed", "error": str(error)}
+
+    def summary(self, stage: Optional[str] = None) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for entry in self.entries.values():
+            if stage is None or entry["stage"] == stage:
+                status = entry["status"]
+                if status == FAILED and entry["attempts"] >= self.max_attempts:
+                    status = "exhausted"
+                counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def compact(self):
+        """只保留每个单元的最新状态，原子地重写日志"""
+        self.close()
+        lines = []
+        for entry in self.entries.values():
+            base = {"unit": entry["unit"], "stage": entry["stage"], "inputs": entry["inputs"]}
+            if entry["status"] == FAILED:
+                lines.extend(json.dumps({**base, "status": FAILED, "error": entry["error"]}, ensure_ascii=False)
+                             for _ in range(entry["attempts"]))
+            else:
+                lines.append(json.dumps({**base, "status": entry["status"], "result": entry["result"]},
+                                        ensure_ascii=False, default=str))
+        atomic_write_text(self.path, "".join(line + "\n" for line in lines))
@@ -0,0 +1,277 @@
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from .cycle_analysis import analyze_cycles
+from .module_checks import NAMING_STYLE_LABELS, ArchitectureIssue, _WORD_PATTERN, naming_style
+from .similarity import similar_pairs
+
+ALL_CHECKS = (
+    "circular_dependencies",
+    "naming_inconsistencies",
+    "layer_violations",
+    "responsibility_overlaps",
+    "consistency_issues",
+)
+
+
+def compile_layer_rules(architecture_patterns: Dict, keys: List[Tuple[str, str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """将架构模式的层级依赖规则编译为 (模式, 层级) × (模式, 层级) 的允许矩阵
+
+    Args:
+        architecture_patterns: ArchitectureIndex.architecture_patterns
+        keys: 需要编译的 (模式, 层级) 列表，矩阵下标与之对应
+
+    Returns:
+        (checked, allowed)：checked[i] 表示该 (模式, 层级) 的依赖需要检查（模式已定义且层级非空），
+        allowed[i, j] 表示 i 可以依赖 j（同一模式内的同层或规则允许的层级）
+    """
+    size = len(keys)
+    checked = np.zeros(size, dtype=bool)
+    allowed = np.zeros((size, size), dtype=bool)
+    by_pattern: Dict[str, List[int]] = {}
+    for j, (pattern, _) in enumerate(keys):
+        by_pattern.setdefault(pattern, []).append(j)
+
+    for i, (pattern, layer) in enumerate(keys):
+        pattern_info = architecture_patterns.get(pattern)
+        checked[i] = pattern_info is not None and bool(layer)
+        if not checked[i]:
+            continue
+        allowed_layers = set(pattern_info.get("dependencies", {}).get(layer, []))
+        allowed_layers.add(layer)
+        for j in by_pattern[pattern]:
+            allowed[i, j] = keys[j][1] in allowed_layers
+    return checked, allowed
+
+
+class ArchitectureAnalyzer:
+    """一次遍历依赖图完成全部架构检查
+
+    遍历时为每个模块记录命名风格、(模式, 层级) 编号、职责和依赖边，随后：
+    - 依赖边用编译好的允许矩阵批量判断层级违规
+    - 依赖边同时用于 Tarjan 强连通分量分析
+    - 职责经倒排表找出相似职责
+    结果为 ArchitectureIssue 列表，str(issue) 与原先各项检查的描述一致。
+    """
+
+    def __init__(self, index, similarity_threshold: float = 0.7, max_cycles_per_component: int = 0):
+        self.index = index
+        self.similarity_threshold = similarity_threshold
+        self.max_cycles_per_component = max_cycles_per_component
+
+    def analyze(self, checks: Iterable[str] = ALL_CHECKS) -> Dict[str, List[ArchitectureIssue]]:
+        """执行指定的检查，返回 {检查名: [ArchitectureIssue, ...]}"""
+        checks = set(checks)
+        graph = self.index.dependency_graph
+        patterns = self.index.architecture_patterns
+
+        names: List[str] = []
+        ids: Dict[str, int] = {}
+        for name in graph:
+            ids[name] = len(names)
+            names.append(name)
+
+        # ---- 单次遍历 ----
+        key_ids: Dict[Tuple[str, str], int] = {}
+        node_keys: List[int] = []
+        succ: List[List[int]] = []
+        edge_src: List[int] = []
+        edge_dst: List[int] = []
+        missing: List[ArchitectureIssue] = []
+        styles: List[str] = []
+        layer_prefixes: Dict[str, Dict[str, int]] = {}
+        naming_by_responsibility: List[ArchitectureIssue] = []
+        responsibility_map: Dict[str, List[str]] = {}
+
+        for node, (name, info) in enumerate(graph.items()):
+            pattern = info.get("pattern")
+            layer = info.get("layer")
+            key = (pattern, layer)
+            key_id = key_ids.get(key)
+            if key_id is None:
+                key_id = key_ids[key] = len(key_ids)
+            node_keys.append(key_id)
+
+            targets = []
+            for dep in info.get("depends_on", ()):
+                target = ids.get(dep)
+                if target is None:
+                    missing.append(ArchitectureIssue(
+                        "missing_dependency", [name], f"模块 {name} 依赖的模块 {dep} 不存在", {"dependency": dep}
+                    ))
+                    continue
+                targets.append(target)
+                edge_src.append(node)
+                edge_dst.append(target)
+            succ.append(targets)
+
+            short_name = name.split('.')[-1]
+            styles.append(naming_style(name))
+            if layer:
+                prefix = short_name[:3] if len(short_name) > 3 else short_name
+                prefixes = layer_prefixes.setdefault(layer, {})
+                prefixes[prefix] = prefixes.get(prefix, 0) + 1
+
+            responsibilities = info.get("responsibilities", [])
+            if responsibilities:
+                lowered = [resp.lower() for resp in responsibilities]
+                for resp in lowered:
+                    responsibility_map.setdefault(resp, []).append(name)
+                lower_name = short_name.lower()
+                if not any(
+                    word.lower() in lower_name
+                    for resp in lowered
+                    for word in _WORD_PATTERN.findall(resp) if len(word) > 3
+                ):
+                    naming_by_responsibility.append(ArchitectureIssue(
+                        "naming_responsibility", [name], f"模块 '{name}' 的命名可能不能充分反映其职责"
+                    ))
+
+        results: Dict[str, List[ArchitectureIssue]] = {}
+        if "circular_dependencies" in checks:
+            results["circular_dependencies"] = self._cycle_issues(names, succ)
+        if "naming_inconsistencies" in checks:
+            results["naming_inconsistencies"] = self._naming_issues(names, styles, layer_prefixes) + naming_by_responsibility
+        if "layer_violations" in checks:
+            results["layer_violations"] = self._layer_issues(
+                graph, patterns, names, list(key_ids), node_keys, edge_src, edge_dst
+            )
+        if "responsibility_overlaps" in checks:
+            results["responsibility_overlaps"] = self._overlap_issues(responsibility_map)
+        if "consistency_issues" in checks:
+            results["consistency_issues"] = self._layer_responsibility_issues(patterns) + missing
+        return {check: results[check] for check in ALL_CHECKS if check in results}
+
+    def _cycle_issues(self, names: List[str], succ: List[List[int]]) -> List[ArchitectureIssue]:
+        issues = []
+        for component in analyze_cycles(names, succ, self.max_cycles_per_component):
+            for cycle in component["cycles"] or [component["shortest_cycle"]]:
+                issues.append(ArchitectureIssue(
+                    "circular_dependency", cycle[:-1], " -> ".join(cycle),
+                    {"cycle": cycle, "component": component["modules"], "truncated": component["truncated"]}
+                ))
+        return issues
+
+    def _naming_issues(self, names: List[str], styles: List[str],
+                       layer_prefixes: Dict[str, Dict[str, int]]) -> List[ArchitectureIssue]:
+        issues = []
+        if not names:
+            return issues
+        counts = {"camel_case": 0, "pascal_case": 0, "snake_case": 0, "other": 0}
+        for style in styles:
+            counts[style] += 1
+        dominant_style = max(counts, key=counts.get)
+        if dominant_style == "other" or counts[dominant_style] < len(names) * 0.7:
+            issues.append(ArchitectureIssue(
+                "naming_style_mixed", [], "模块命名风格不一致，建议统一使用同一种命名风格", {"styles": counts}
+            ))
+        if dominant_style != "other":
+            label = NAMING_STYLE_LABELS[dominant_style]
+            for name, style in zip(names, styles):
+                if style != dominant_style:
+                    issues.append(ArchitectureIssue(
+                        "naming_style", [name], f"模块 '{name}' 不符合{label}",
+                        {"style": style, "dominant_style": dominant_style}
+                    ))
+        for layer, prefixes in layer_prefixes.items():
+            if len(prefixes) > 3:  # 一个层级有超过3种不同的前缀
+                most_common_prefix = max(prefixes, key=prefixes.get)
+                if prefixes[most_common_prefix] < sum(prefixes.values()) * 0.5:
+                    issues.append(ArchitectureIssue(
+                        "layer_prefix", [], f"层级 '{layer}' 的模块命名前缀不一致", {"layer": layer, "prefixes": prefixes}
+                    ))
+        return issues
+
+    def _layer_issues(self, graph, patterns: Dict, names: List[str], keys: List[Tuple[str, str]],
+                      node_keys: List[int], edge_src: List[int], edge_dst: List[int]) -> List[ArchitectureIssue]:
+        if not edge_src:
+            return []
+        checked, allowed = compile_layer_rules(patterns, keys)
+        node_keys = np.asarray(node_keys, dtype=np.int64)
+        src = np.asarray(edge_src, dtype=np.int64)
+        dst = np.asarray(edge_dst, dtype=np.int64)
+        src_keys, dst_keys = node_keys[src], node_keys[dst]
+        flagged = np.flatnonzero(checked[src_keys] & ~allowed[src_keys, dst_keys])
+        if not flagged.size:
+            return []
+
+        # 按架构模式的定义顺序输出，同一模式内保持模块和依赖的顺序
+        pattern_rank = {pattern: rank for rank, pattern in enumerate(patterns)}
+        key_rank = np.array([pattern_rank.get(pattern, len(pattern_rank)) for pattern, _ in keys], dtype=np.int64)
+        flagged = flagged[np.argsort(key_rank[src_keys[flagged]], kind="stable")]
+
+        issues = []
+        for edge in flagged.tolist():
+            module, dep = names[edge_src[edge]], names[edge_dst[edge]]
+            pattern, layer = keys[node_keys[edge_src[edge]]]
+            dep_pattern, dep_layer = keys[node_keys[edge_dst[edge]]]
+            if dep_pattern != pattern:
+                issues.append(ArchitectureIssue(
+                    "cross_pattern_dependency", [module, dep], f"模块 '{module}' 依赖了不同架构模式的模块 '{dep}'",
+                    {"pattern": pattern, "dependency_pattern": dep_pattern}
+                ))
+            else:
+                issues.append(ArchitectureIssue(
+                    "layer_dependency", [module, dep],
+                    f"模块 '{module}' ({layer}) 依赖了不允许的层级 '{dep_layer}' 中的模块 '{dep}'",
+                    {"layer": layer, "dependency_layer": dep_layer}
+                ))
+        return issues
+
+    def _overlap_issues(self, responsibility_map: Dict[str, List[str]]) -> List[ArchitectureIssue]:
+        issues = []
+        for resp, modules in responsibility_map.items():
+            if len(modules) > 1:
+                issues.append(ArchitectureIssue(
+                    "duplicate_responsibility", list(dict.fromkeys(modules)),
+                    f"职责 '{resp}' 在多个模块中重复: {', '.join(modules)}", {"responsibility": resp}
+                ))
+
+        all_responsibilities = list(responsibility_map)
+        pairs = similar_pairs([set(resp.split()) for resp in all_responsibilities], self.similarity_threshold)
+        for i, j in pairs:
+            resp1, resp2 = all_responsibilities[i], all_responsibilities[j]
+            modules1, modules2 = set(responsibility_map[resp1]), set(responsibility_map[resp2])
+            if modules1 == modules2:
+                continue
+            issues.append(ArchitectureIssue(
+                "similar_responsibility", sorted(modules1 | modules2),
+                f"职责 '{resp1}' 和 '{resp2}' 高度相似，但分别属于不同模块: "
+                f"{', '.join(sorted(modules1))} 和 {', '.join(sorted(modules2))}",
+                {"responsibilities": [resp1, resp2]}
+            ))
+        return issues
+
+    def _layer_responsibility_issues(self, patterns: Dict) -> List[ArchitectureIssue]:
+        """不同层级间的职责重叠（基于层级索引）"""
+        layer_responsibilities: Dict[str, set] = {}
+        for pattern, info in patterns.items():
+            for layer in info["layers"]:
+                layer_key = f"{pattern}.{layer}"
+                resps = layer_responsibilities[layer_key] = set()
+                for module in self.index.layer_index.get(layer_key, {}).values():
+                    resps.update(module.get("responsibilities", []))
+
+        # 倒排：职责 -> 层级，只比较共享职责的层级对
+        resp_layers: Dict[str, List[str]] = {}
+        for layer_key, resps in layer_responsibilities.items():
+            for resp in resps:
+                resp_layers.setdefault(resp, []).append(layer_key)
+        overlapping = set()
+        for layers in resp_layers.values():
+            for layer1 in layers:
+                for layer2 in layers:
+                    if layer1 != layer2:
+                        overlapping.add((layer1, layer2))
+
+        issues = []
+        for layer1, resps1 in layer_responsibilities.items():
+            for layer2, resps2 in layer_responsibilities.items():
+                if (layer1, layer2) in overlapping:
+                    overlap = sorted(resps1 & resps2)
+                    issues.append(ArchitectureIssue(
+                        "layer_responsibility_overlap", [], f"层级 {layer1} 和 {layer2} 存在职责重叠: {', '.join(overlap)}",
+                        {"layers": [layer1, layer2], "responsibilities": overlap}
+                    ))
+        return issues
@@ -1,16 +1,129 @@
-from typing import Dict, List, Set
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from pathlib import Path
-import json
+import sys
 import uuid
 import traceback
-from datetime import datetime
+import asyncio
+from core.clarifier.state_journal import StateJournal
+from core.clarifier.state_snapshot import build_architecture_state, export_state_json
+from core.clarifier.registry import KeyedRegistry
+from core.clarifier.compact_graph import CompactDependencyGraph
+from core.clarifier.keyword_index import KeywordIndex, tokenize
+from memory.module_store import get_module_store
+
+class DependencyOrder:
+    """依赖图的在线拓扑序（Pearce-Kelly 增量算法）
+
+    边 A -> B 表示 A 依赖 B，始终保持 ord[A] < ord[B]。加边时只在
+    [ord[B], ord[A]] 区间内搜索和重排受影响的节点，无需对整张图做 DFS。
+    """
+
+    def __init__(self):
+        self.ord: Dict[str, int] = {}
+        self.succ: Dict[str, Set[str]] = {}
+        self.pred: Dict[str, Set[str]] = {}
+        self.cyclic_edges: Set[tuple] = set()  # 会形成环而未纳入拓扑序的边
+        self._next_ord = 0
+
+    def _ensure_node(self, node: str):
+        if node not in self.ord:
+            self.ord[node] = self._next_ord
+            self._next_ord += 1
+            self.succ[node] = set()
+            self.pred[node] = set()
+
+    def _reach(self, start: str, adjacency: Dict[str, Set[str]], keep, goal: Optional[str] = None):
+        """从 start 沿 adjacency 遍历满足 keep 的节点，返回 (访问顺序, 到 goal 的路径或 None)"""
+        parent = {start: None}
+        stack = [start]
+        visited = []
+        while stack:
+            node = stack.pop()
+            visited.append(node)
+            if node == goal:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = parent[node]
+                return visited, path[::-1]
+            for nxt in adjacency[node]:
+                if nxt not in parent and keep(nxt):
+                    parent[nxt] = node
+                    stack.append(nxt)
+        return visited, None
+
+    def find_cycle(self, source: str, target: str) -> Optional[List[str]]:
+        """若加入边 source -> target 会形成环，返回环路径 [source, target, ..., source]；不修改结构"""
+        if source == target:
+            return [source, source]
+        if source not in self.ord or target not in self.ord:
+            return None
+        upper = self.ord[source]
+        if self.ord[target] > upper:
+            return None
+        _, path = self._reach(target, self.succ, lambda n: self.ord[n] <= upper, goal=source)
+        return [source] + path if path else None
+
+    def add_edge(self, source: str, target: str) -> Optional[List[str]]:
+        """加入边 source -> target；会形成环时不加入拓扑序并返回环路径"""
+        self._ensure_node(source)
+        self._ensure_node(target)
+        if target in self.succ[source] or (source, target) in self.cyclic_edges:
+            return None
+        if source == target:
+            self.cyclic_edges.add((source, target))
+            return [source, source]
+
+        lower, upper = self.ord[target], self.ord[source]
+        if lower < upper:
+            forward, path = self._reach(target, self.succ, lambda n: self.ord[n] <= upper, goal=source)
+            if path:
+                self.cyclic_edges.add((source, target))
+                return [source] + path
+            backward, _ = self._reach(source, self.pred, lambda n: self.ord[n] >= lower)
+            # 受影响区域内：先放能到达 source 的节点，再放从 target 可达的节点
+            backward.sort(key=self.ord.__getitem__)
+            forward.sort(key=self.ord.__getitem__)
+            slots = sorted(self.ord[n] for n in backward + forward)
+            for node, slot in zip(backward + forward, slots):
+                self.ord[node] = slot
+
+        self.succ[source].add(target)
+        self.pred[target].add(source)
+        return None
+
+    def remove_edge(self, source: str, target: str):
+        """删除边不会破坏拓扑序，直接移除"""
+        self.cyclic_edges.discard((source, target))
+        if source in self.succ:
+            self.succ[source].discard(target)
+            self.pred[target].discard(source)
+
+    def set_dependencies(self, node: str, dependencies) -> List[List[str]]:
+        """将 node 的出边替换为 dependencies，返回新形成的环"""
+        self._ensure_node(node)
+        dependencies = set(dependencies)
+        current = self.succ[node] | {t for s, t in self.cyclic_edges if s == node}
+        for dep in current - dependencies:
+            self.remove_edge(node, dep)
+        cycles = []
+        for dep in sorted(dependencies - current):
+            cycle = self.add_edge(node, dep)
+            if cycle:
+                cycles.append(cycle)
+        return cycles
+
 
 class ArchitectureIndex:
     def __init__(self):
         self.requirement_module_index = {}
         self.responsibility_index = {}
-        self.dependency_graph = {}
-        self.keyword_mapping = {}
+        self.dependency_graph = CompactDependencyGraph()
+        self.keyword_index = KeywordIndex()
+        self.dependency_order = DependencyOrder()
+        self._order_graph = self.dependency_graph
+        self._order_size = 0
+        self._order_version = 0
         
         # 更灵活的架构层级定义
         self.architecture_patterns = {
@@ -64,9 +177,31 @@ class ArchitectureIndex:
             for layer in config["layers"]:
                 self.layer_index[f"{pattern}.{layer}"] = {}
 
+    @property
+    def dependency_graph(self) -> CompactDependencyGraph:
+        """以整数ID存储的依赖图，读写方式与 {name: {"depends_on", "depended_by", ...}} 相同"""
+        return self._dependency_graph
+
+    @dependency_graph.setter
+    def dependency_graph(self, graph):
+        # 整体赋值普通字典时转换为紧凑存储，反向边自动补全
+        if not isinstance(graph, CompactDependencyGraph):
+            graph = CompactDependencyGraph(graph)
+        self._dependency_graph = graph
+
+    @property
+    def keyword_mapping(self) -> Dict[str, Set[str]]:
+        """关键字 -> 模块集合，由 keyword_index 维护"""
+        return self.keyword_index.mapping
+
+    @keyword_mapping.setter
+    def keyword_mapping(self, mapping: Dict[str, Set[str]]):
+        self.keyword_index.load_mapping(mapping)
+
     def add_module(self, module: Dict, requirements: List[str]):
         """添加新模块到索引"""
-        module_name = module['name']
+        # 驻留模块名，各索引共享同一个字符串对象
+        module_name = sys.intern(module['name'])
         
         # 1. 更新需求索引
         for req in requirements:
@@ -85,20 +220,19 @@ class ArchitectureIndex:
             self.responsibility_index[resp]["modules"].add(module_name)
             self.responsibility_index[resp]["patterns"].add(module.get('pattern', ''))
         
-        # 3. 更新依赖图
+        # 3. 更新依赖图（同时增量维护拓扑序；depended_by 由依赖图自动维护）
+        dependency_order = self.get_dependency_order()
         self.dependency_graph[module_name] = {
-            "depends_on": set(module.get('dependencies', [])),
-            "depended_by": set(),
+            "depends_on": module.get('dependencies', []),
             "pattern": module.get('pattern', ''),  # 记录架构模式
             "layer": module.get('layer', '')       # 记录层级
         }
+        dependency_order.set_dependencies(module_name, self.dependency_graph[module_name]["depends_on"])
+        self._order_size = len(self.dependency_graph)
+        self._order_version = self.dependency_graph._version
         
-        # 4. 更新关键字映射
-        keywords = self._extract_keywords(module.get('description', ''))
-        for keyword in keywords:
-            if keyword not in self.keyword_mapping:
-                self.keyword_mapping[keyword] = set()
-            self.keyword_mapping[keyword].add(module_name)
+        # 4. 更新关键字倒排索引（重复添加时替换该模块原有的关键字）
+        self.keyword_index.add(module_name, module.get('description', ''))
         
         # 5. 更新层级索引
         pattern = module.get('pattern', '')
@@ -107,11 +241,27 @@ class ArchitectureIndex:
         if layer_key in self.layer_index:
             self.layer_index[layer_key][module_name] = module
 
+    def get_dependency_order(self) -> DependencyOrder:
+        """返回与 dependency_graph 同步的在线拓扑序；依赖图被整体替换或在 add_module 之外被修改时重新构建"""
+        graph = self.dependency_graph
+        if (self._order_graph is not graph or self._order_size != len(graph)
+                or self._order_version != graph._version):
+            self.dependency_order = DependencyOrder()
+            for name, info in graph.items():
+                self.dependency_order.set_dependencies(name, info.get("depends_on", []))
+            self._order_graph = graph
+            self._order_size = len(graph)
+            self._order_version = graph._version
+        return self.dependency_order
+
     def _extract_keywords(self, text: str) -> Set[str]:
-        """从文本中提取关键字"""
-        # TODO: 实现关键字提取逻辑
-        # 可以使用NLP库或简单的词频分析
-        return set(text.lower().split())
+        """从文本中提取关键字（去除停用词，汉字按二元组切分）"""
+        return set(tokenize(text))
+
+    def find_related_modules(self, text: str, top_k: int = 10,
+                             predicate: Optional[Callable[[str], bool]] = None) -> List[Tuple[str, float, List[str]]]:
+        """按 TF-IDF 返回与文本最相关的前 top_k 个模块 [(模块名, 得分, 命中关键字)]"""
+        return self.keyword_index.query(text, top_k=top_k, predicate=predicate)
 
     def get_allowed_dependencies(self, pattern: str, layer: str) -> List[str]:
         """获取特定架构模式和层级允许的依赖"""
@@ -181,39 +331,19 @@ class ArchitectureValidator:
         return overlaps
 
     def _check_circular_dependencies(self, module: Dict) -> List[str]:
-        """检查循环依赖"""
+        """检查循环依赖
+
+        基于索引维护的在线拓扑序，只在受影响的序区间内搜索，返回形成的环路径
+        """
         cycles = []
         module_name = module['name']
-        dependencies = set(module.get('dependencies', []))
-        
-        # 模拟添加新模块后的依赖图
-        temp_graph = self.index.dependency_graph.copy()
-        temp_graph[module_name] = {"depends_on": dependencies, "depended_by": set()}
-        
-        # 检查是否形成环
-        visited = set()
-        path = []
-        
-        def dfs(current: str) -> bool:
-            if current in path:
-                cycle_start = path.index(current)
-                cycles.append(" -> ".join(path[cycle_start:] + [current]))
-                return True
-            
-            if current in visited:
-                return False
-                
-            visited.add(current)
-            path.append(current)
-            
-            for dep in temp_graph[current]["depends_on"]:
-                if dep in temp_graph and dfs(dep):
-                    return True
-                    
-            path.pop()
-            return False
-            
-        dfs(module_name)
+        dependency_order = self.index.get_dependency_order()
+
+        for dep in sorted(set(module.get('dependencies', []))):
+            path = dependency_order.find_cycle(module_name, dep)
+            if path:
+                cycles.append(" -> ".join(path))
+
         return cycles
         
     def _check_layer_violations(self, module: Dict) -> List[str]:
@@ -239,12 +369,14 @@ class ArchitectureManager:
         self.validator = ArchitectureValidator(self.index)
         self.output_path = Path("data/output/architecture")
         self.output_path.mkdir(parents=True, exist_ok=True)
-        self.modules = []  # 存储所有模块
-        self.requirements = []  # 存储所有需求
+        self.modules = []  # 存储所有模块（按名称索引）
+        self.requirements = []  # 存储所有需求（按ID索引）
         self.system_overview = {}  # 系统概述
         self.functional_requirements = {}  # 功能需求
         self.technology_stack = {}  # 技术栈
         self.architecture_pattern = {}  # 架构模式
+        self._journal = None  # 架构状态日志，首次保存时创建
+        self._write_lock = asyncio.Lock()  # 验证并写入模块的操作串行执行，避免并发写索引
 
     def get_validation_issues(self) -> Dict:
         """获取所有架构验证问题"""
@@ -252,27 +384,45 @@ class ArchitectureManager:
             return self.validator.get_validation_issues()
         return {}
     
+    @property
+    def modules(self) -> KeyedRegistry:
+        return self._modules
+
+    @modules.setter
+    def modules(self, modules: List[Dict]):
+        self._modules = KeyedRegistry(modules, key="name", indexed_fields=("layer", "pattern", "domain"))
+
+    @property
+    def requirements(self) -> KeyedRegistry:
+        return self._requirements
+
+    @requirements.setter
+    def requirements(self, requirements: List[Dict]):
+        self._requirements = KeyedRegistry(requirements, key="id")
+
     def add_module(self, module_data: Dict) -> None:
         """添加或更新模块
         
         Args:
             module_data: 模块数据
         """
-        # 检查是否已存在同名模块
-        module_name = module_data.get("name")
-        existing_index = None
-        
-        for i, module in enumerate(self.modules):
-            if module.get("name") == module_name:
-                existing_index = i
-                break
-        
-        if existing_index is not None:
-            # 更新现有模块
-            self.modules[existing_index] = module_data
-        else:
-            # 添加新模块
-            self.modules.append(module_data)
+        self.modules.upsert(module_data)
+    
+    def get_module(self, module_name: str) -> Optional[Dict]:
+        """按名称获取模块"""
+        return self.modules.get(module_name)
+    
+    def get_modules_by_layer(self, layer: str) -> List[Dict]:
+        """获取指定层级的模块（保持插入顺序）"""
+        return self.modules.find_by("layer", layer)
+    
+    def get_modules_by_pattern(self, pattern: str) -> List[Dict]:
+        """获取指定架构模式的模块（保持插入顺序）"""
+        return self.modules.find_by("pattern", pattern)
+    
+    def get_modules_by_domain(self, domain: str) -> List[Dict]:
+        """获取指定领域的模块（保持插入顺序）"""
+        return self.modules.find_by("domain", domain)
     
     def add_requirement(self, req_data: Dict) -> None:
         """添加或更新需求
@@ -280,27 +430,23 @@ class ArchitectureManager:
         Args:
             req_data: 需求数据
         """
-        # 检查是否已存在同ID需求
         req_id = req_data.get("id")
         if not req_id:
             req_id = f"req_{len(self.requirements) + 1}"
             req_data["id"] = req_id
         
-        existing_index = None
-        for i, req in enumerate(self.requirements):
-            if req.get("id") == req_id:
-                existing_index = i
-                break
-        
-        if existing_index is not None:
-            # 更新现有需求
-            self.requirements[existing_index] = req_data
-        else:
-            # 添加新需求
-            self.requirements.append(req_data)
+        self.requirements.upsert(req_data)
+    
+    def get_requirement(self, req_id: str) -> Optional[Dict]:
+        """按ID获取需求"""
+        return self.requirements.get(req_id)
 
     async def process_new_module(self, module_spec: Dict, requirements: List[str]) -> Dict:
-        """处理新模块"""
+        """处理新模块（与其他模块写入串行执行）"""
+        async with self._write_lock:
+            return await self._process_new_module(module_spec, requirements)
+
+    async def _process_new_module(self, module_spec: Dict, requirements: List[str]) -> Dict:
         module_name = module_spec.get('name', 'unknown')
         call_id = str(uuid.uuid4())[:8]  # 生成唯一调用ID用于跟踪
         print(f"🔄 [LOOP-TRACE] {call_id} - ENTER process_new_module: '{module_name}'")
@@ -329,39 +475,16 @@ class ArchitectureManager:
         print(f"🔄 [LOOP-TRACE] {call_id} - 添加模块到模块列表")
         self.add_module(module_spec)
 
-        # 3.2 自动生成 full_summary.json
-        module_name = module_spec.get("name")
-        if module_name:
-            print(f"🔄 [LOOP-TRACE] {call_id} - 为模块 '{module_name}' 创建目录和摘要文件")
-            try:
-                module_dir = Path("data/output/modules") / str(module_name)
-                module_dir.mkdir(parents=True, exist_ok=True)
-                
-                summary_path = module_dir / "full_summary.json"
-                with open(summary_path, "w", encoding="utf-8") as f:
-                    json.dump(module_spec, f, ensure_ascii=False, indent=2)
-                print(f"🔄 [LOOP-TRACE] {call_id} - 成功创建摘要文件: {summary_path}")
-                
-                safe_module_name = ''.join(c for c in module_name if c.isalnum() or c in ['-', '_', ' '])
-                if safe_module_name and safe_module_name != module_name:
-                    safe_module_dir = Path("data/output/modules") / safe_module_name
-                    safe_module_dir.mkdir(parents=True, exist_ok=True)
-                    safe_summary_path = safe_module_dir / "full_summary.json"
-                    with open(safe_summary_path, "w", encoding="utf-8") as f:
-                        module_data_with_safe_name = dict(module_spec)
-                        module_data_with_safe_name["safe_module_name"] = safe_module_name
-                        json.dump(module_data_with_safe_name, f, ensure_ascii=False, indent=2)
-                    print(f"🔄 [LOOP-TRACE] {call_id} - 同时创建了安全名称摘要文件: {safe_summary_path}")
-            except Exception as e:
-                print(f"❌ [LOOP-TRACE] {call_id} - 创建摘要文件失败: {str(e)}")
-                import traceback
-                print(traceback.format_exc())
-        else:
-            print(f"⚠️ [LOOP-TRACE] {call_id} - 模块缺少名称，无法创建目录")
+        # 3.2 写入模块存储（同时导出 full_summary.json）
+        self._write_module_summary(module_spec, call_id)
         
-        # 4. 保存更新后的架构信息
+        # 4. 追加变更到架构状态日志（后台写盘）
         print(f"🔄 [LOOP-TRACE] {call_id} - 开始保存架构状态")
-        await self._save_architecture_state()
+        await self._save_architecture_state({
+            "op": "add_module",
+            "module": module_spec,
+            "requirements": list(requirements)
+        })
         print(f"🔄 [LOOP-TRACE] {call_id} - 架构状态保存完成")
         
         print(f"🔄 [LOOP-TRACE] {call_id} - EXIT process_new_module: '{module_name}'")
@@ -370,35 +493,168 @@ class ArchitectureManager:
             "module": module_spec
         }
 
-    async def _save_architecture_state(self):
-        """保存当前架构状态"""
-        state = {
-            "timestamp": datetime.now().isoformat(),
-            "requirement_module_index": {
-                k: list(v) for k, v in self.index.requirement_module_index.items()
-            },
-            "responsibility_index": {
+    def _write_module_summary(self, module_spec: Dict, call_id: str):
+        """把模块摘要写入模块存储（并导出兼容的 full_summary.json）"""
+        self._write_module_summaries([module_spec], call_id)
+
+    def _write_module_summaries(self, module_specs: List[Dict], call_id: str):
+        """在一个事务中写入多个模块摘要"""
+        named = [spec for spec in module_specs if spec.get("name")]
+        if len(named) < len(module_specs):
+            print(f"⚠️ [LOOP-TRACE] {call_id} - {len(module_specs) - len(named)} 个模块缺少名称，无法写入摘要")
+        if not named:
+            return
+        try:
+            get_module_store().upsert_many(named)
+            print(f"🔄 [LOOP-TRACE] {call_id} - 已写入 {len(named)} 个模块摘要")
+        except Exception as e:
+            print(f"❌ [LOOP-TRACE] {call_id} - 写入模块摘要失败: {str(e)}")
+            print(traceback.format_exc())
+
+    async def process_new_modules(self, batch: List[Tuple[Dict, List[str]]]) -> List[Dict]:
+        """批量处理新模块
+
+        按顺序逐个验证，批内先通过的模块会参与后续模块的职责重叠与循环依赖检查，
+        因此每个模块的结果与逐个调用 process_new_module 相同。摘要在线程池中
+        以一个事务写入，架构状态日志只追加一条记录。整批与其他模块写入串行执行。
+
+        Args:
+            batch: (模块规范, 需求列表) 的列表
+
+        Returns:
+            与 batch 顺序一致的处理结果列表
+        """
+        async with self._write_lock:
+            return await self._process_new_modules(batch)
+
+    async def _process_new_modules(self, batch: List[Tuple[Dict, List[str]]]) -> List[Dict]:
+        call_id = str(uuid.uuid4())[:8]
+        print(f"🔄 [LOOP-TRACE] {call_id} - ENTER process_new_modules: {len(batch)} 个模块")
+        
+        results = []
+        accepted = []
+        for module_spec, requirements in batch:
+            try:
+                validation_result = await self.validator.validate_new_module(module_spec, requirements)
+            except Exception as e:
+                print(f"❌ [LOOP-TRACE] {call_id} - 验证模块 '{module_spec.get('name', 'unknown')}' 时出错: {str(e)}")
+                results.append({"status": "error", "message": str(e)})
+                continue
+            
+            if any(validation_result.values()):
+                results.append({"status": "validation_failed", "issues": validation_result})
+                continue
+            
+            self.index.add_module(module_spec, requirements)
+            self.add_module(module_spec)
+            accepted.append((module_spec, requirements))
+            results.append({"status": "success", "module": module_spec})
+        
+        if accepted:
+            await asyncio.to_thread(
+                self._write_module_summaries, [module_spec for module_spec, _ in accepted], call_id
+            )
+            await self._save_architecture_state({
+                "op": "add_modules",
+                "modules": [
+                    {"module": module_spec, "requirements": list(requirements)}
+                    for module_spec, requirements in accepted
+                ]
+            })
+        
+        print(f"🔄 [LOOP-TRACE] {call_id} - EXIT process_new_modules: 成功 {len(accepted)}，失败 {len(batch) - len(accepted)}")
+        return results
+
+    def _get_journal(self) -> StateJournal:
+        if self._journal is None or self._journal.snapshot_path.parent != self.output_path:
+            self._journal = StateJournal(
+                # 不与 ArchitectureGenerator 导出的 architecture_state.json 同名
+                self.output_path / "architecture_snapshot",
+                self.output_path / "architecture_journal.jsonl"
+            )
+        return self._journal
+
+    async def _save_architecture_state(self, mutation: Dict = None) -> Optional[Dict]:
+        """保存架构状态
+
+        传入 mutation 时只把这次变更追加到日志，由后台线程写盘，累计一定数量后再压缩为完整快照；
+        不传 mutation 时立即写出完整快照并等待写盘完成。
+
+        Returns:
+            本次构建的快照；只追加日志时为 None
+        """
+        journal = self._get_journal()
+        if mutation is not None:
+            journal.append(mutation)
+            if journal.should_compact():
+                journal.write_snapshot(self._build_architecture_state())
+            return None
+
+        state = self._build_architecture_state()
+        journal.write_snapshot(state)
+        await asyncio.to_thread(journal.flush)
+        return state
+
+    async def flush_architecture_state(self) -> Dict:
+        """压缩日志为完整快照（关闭前调用），返回写出的快照"""
+        return await self._save_architecture_state()
+
+    def _build_architecture_state(self) -> Dict:
+        """构建完整快照（含关键字映射和模块列表，用于恢复）"""
+        return build_architecture_state(self.index, self.modules)
+
+    def export_architecture_state_json(self, path: Path = None) -> Path:
+        """按需导出带缩进的 JSON 快照，便于人工查看；默认写到 architecture_snapshot_export.json"""
+        state = self._build_architecture_state()
+        state["journal_seq"] = self._get_journal().seq
+        return export_state_json(state, path or self.output_path / "architecture_snapshot_export.json")
+
+    def load_architecture_state(self) -> bool:
+        """启动时恢复架构状态：读取快照后重放日志
+
+        Returns:
+            是否恢复到了任何状态
+        """
+        snapshot, records = self._get_journal().load()
+
+        if snapshot:
+            self.index.requirement_module_index = {
+                k: set(v) for k, v in snapshot.get("requirement_module_index", {}).items()
+            }
+            self.index.responsibility_index = {
                 k: {
-                    "modules": list(v["modules"]),
-                    "objects": list(v["objects"]),
-                    "patterns": list(v["patterns"])
-                } for k, v in self.index.responsibility_index.items()
-            },
-            "dependency_graph": {
+                    "modules": set(v.get("modules", [])),
+                    "objects": set(v.get("objects", [])),
+                    "patterns": set(v.get("patterns", []))
+                } for k, v in snapshot.get("responsibility_index", {}).items()
+            }
+            self.index.dependency_graph = {
                 k: {
-                    "depends_on": list(v["depends_on"]),
-                    "depended_by": list(v["depended_by"]),
-                    "pattern": v["pattern"],
-                    "layer": v["layer"]
-                } for k, v in self.index.dependency_graph.items()
-            },
-            "layer_index": {
-                layer: {
-                    name: module for name, module in modules.items()
-                } for layer, modules in self.index.layer_index.items()
+                    "depends_on": set(v.get("depends_on", [])),
+                    "depended_by": set(v.get("depended_by", [])),
+                    "pattern": v.get("pattern", ""),
+                    "layer": v.get("layer", "")
+                } for k, v in snapshot.get("dependency_graph", {}).items()
             }
-        }
-        
-        state_file = self.output_path / "architecture_state.json"
-        with open(state_file, 'w', encoding='utf-8') as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)                
\ No newline at end of file
+            self.index.keyword_mapping = {
+                k: set(v) for k, v in snapshot.get("keyword_mapping", {}).items()
+            }
+            for layer, modules in snapshot.get("layer_index", {}).items():
+                self.index.layer_index[layer] = dict(modules)
+            self.modules = list(snapshot.get("modules", []))
+
+        for record in records:
+            if record.get("op") == "add_module":
+                entries = [record]
+            elif record.get("op") == "add_modules":
+                entries = record.get("modules", [])
+            else:
+                continue
+            for entry in entries:
+                self.index.add_module(entry["module"], entry.get("requirements", []))
+                self.add_module(entry["module"])
+
+        if snapshot or records:
+            print(f"📂 已恢复架构状态: {len(self.index.dependency_graph)} 个模块（快照 + {len(records)} 条日志）")
+        return bool(snapshot or records)
+                
\ No newline at end of file
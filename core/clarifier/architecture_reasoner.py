@@ -2,12 +2,37 @@ from typing import Dict, List, Set, Tuple, Optional
 from pathlib import Path
 import json
 import asyncio
-import re
 import uuid
 import traceback
-from datetime import datetime
 from .architecture_manager import ArchitectureManager
+from .architecture_analyzer import ALL_CHECKS, ArchitectureAnalyzer
+from .cycle_analysis import analyze_dependency_cycles
+from .keyword_index import tokenize
+from .module_checks import ArchitectureIssue, ModuleIssueChecker
+from .module_pipeline import ModulePipeline
+from .correction_scheduler import DEFAULT_CORRECTION_BUDGET, CorrectionScheduler
+from .reasoning_dag import ReasoningDAG
+from .state_snapshot import build_architecture_state, core_sections
 from llm.llm_executor import run_prompt
+from core.llm.prompt_packing import PromptPacker
+
+# 按关键字查找相关组件时最多返回的模块数
+RELATED_KEYWORD_TOP_K = 10
+
+# 职责相似度阈值：共同词数 / 较短职责的词数超过该值视为高度相似
+RESPONSIBILITY_SIMILARITY_THRESHOLD = 0.7
+
+# 深度推理中同时执行的推理步骤（LLM 调用）数上限
+REASONING_CONCURRENCY = 8
+
+# 每个层级同时生成模块规范的 LLM 调用数上限
+MODULE_CONCURRENCY = 4
+
+# 一次 LLM 调用最多生成的模块规范数（共享的层级信息每组只发送一次），1 表示逐个生成
+MODULE_PACK_SIZE = 6
+
+# 架构模式文档的组成部分
+PATTERN_DOC_SECTIONS = ("overview", "layers", "interfaces", "dependencies")
 
 class ArchitectureReasoner:
     def __init__(self, architecture_manager=None, llm_chat=None, logger=None, output_path=None):
@@ -16,6 +41,16 @@ class ArchitectureReasoner:
         self.output_path.mkdir(parents=True, exist_ok=True)
         self.llm_chat = llm_chat
         self.logger = logger
+        self.responsibility_similarity_threshold = RESPONSIBILITY_SIMILARITY_THRESHOLD
+        self.reasoning_concurrency = REASONING_CONCURRENCY
+        self.module_concurrency = MODULE_CONCURRENCY
+        self.module_pack_size = MODULE_PACK_SIZE
+        self._module_pipelines = set()
+        self.correction_budget = dict(DEFAULT_CORRECTION_BUDGET)
+        self.correction_scheduler = CorrectionScheduler(**self.correction_budget)
+        self._module_checker = None
+        # 最近一次全量检查的结构化结果 {检查名: [ArchitectureIssue]}
+        self.last_architecture_issues = {}
 
     async def _get_llm_response(self, prompt: str) -> Dict:
         """获取LLM响应
@@ -58,7 +93,6 @@ class ArchitectureReasoner:
         # 1. 提取模块和依赖
         modules = []
         requirements = {}
-        dependencies = {}  # 存储模块间的依赖关系
         
         # 遍历各模式和层级提取模块信息
         for pattern in architecture_understanding["architecture_design"]["patterns"]:
@@ -87,21 +121,12 @@ class ArchitectureReasoner:
                     module_reqs = component.get("requirements", [])
                     requirements[component["name"]] = module_reqs
                     
-                    dependencies[component["name"]] = component.get("dependencies", [])
-                    
                     modules.append(module_spec)
         
-        # 2. 将模块添加到架构索引
+        # 2. 将模块添加到架构索引（depended_by 反向边由依赖图自动维护）
         for module in modules:
             self.arch_manager.index.add_module(module, requirements.get(module["name"], []))
             
-        for module_name, deps in dependencies.items():
-            for dep in deps:
-                if dep in self.arch_manager.index.dependency_graph:
-                    if "depended_by" not in self.arch_manager.index.dependency_graph[dep]:
-                        self.arch_manager.index.dependency_graph[dep]["depended_by"] = set()
-                    self.arch_manager.index.dependency_graph[dep]["depended_by"].add(module_name)
-            
         # 3. 添加架构模式（如果需要扩展现有模式）
         for pattern in architecture_understanding["architecture_design"]["patterns"]:
             if pattern["name"] not in self.arch_manager.index.architecture_patterns:
@@ -138,73 +163,69 @@ class ArchitectureReasoner:
         if get_llm_response:
             self._get_llm_response = get_llm_response
         
+        # 每次推理使用独立的修正预算
+        self.correction_scheduler = CorrectionScheduler(**self.correction_budget)
+        
         # 1. 将架构理解数据导入到架构索引
         await self.populate_architecture_index(architecture_understanding)
         
-        # 2. 处理每个识别出的架构模式
-        for pattern in architecture_understanding["architecture_design"]["patterns"]:
-            if self.logger:
-                self.logger.log(f"\n📐 处理架构模式: {pattern['name']}", role="system")
-            
-            # 为每个模式生成详细文档
-            pattern_docs = await self._generate_pattern_docs(pattern)
-            
-            # 基于生成的文档进行推理
-            await self._reason_by_pattern(pattern, pattern_docs)
+        # 2. 处理每个识别出的架构模式：所有模式的文档并发生成，文档就绪后即开始该模式的推理
+        await self._build_reasoning_dag(architecture_understanding["architecture_design"]["patterns"]).run(
+            self.reasoning_concurrency
+        )
         
         # 3. 执行整体架构验证
         await self._validate_overall_architecture()
         
-        # 4. 保存最终的架构状态
-        await self._save_final_architecture()
-        
-        return {
-            "timestamp": datetime.now().isoformat(),
-            "requirement_module_index": {
-                k: list(v) for k, v in self.arch_manager.index.requirement_module_index.items()
-            },
-            "responsibility_index": {
-                k: {
-                    "modules": list(v["modules"]),
-                    "objects": list(v["objects"]),
-                    "patterns": list(v["patterns"])
-                } for k, v in self.arch_manager.index.responsibility_index.items()
-            },
-            "dependency_graph": {
-                k: {
-                    "depends_on": list(v["depends_on"]),
-                    "depended_by": list(v["depended_by"]),
-                    "pattern": v["pattern"],
-                    "layer": v["layer"]
-                } for k, v in self.arch_manager.index.dependency_graph.items()
-            },
-            "layer_index": {
-                layer: {
-                    name: module for name, module in modules.items()
-                } for layer, modules in self.arch_manager.index.layer_index.items()
-            }
-        }
+        print(f"🔄 [CORRECTION] 修正统计: {self.correction_scheduler.summary()}")
+        
+        # 4. 保存最终的架构状态，推理结果复用同一份快照
+        state = await self._save_final_architecture()
+        return core_sections(state)
 
-    async def _generate_pattern_docs(self, pattern: Dict) -> Dict:
-        """为特定架构模式生成详细文档"""
+    def _build_reasoning_dag(self, patterns: List[Dict]) -> ReasoningDAG:
+        """构建深度推理的步骤依赖图
+        
+        每个模式的概述、层级设计、接口定义、依赖关系四份文档互不依赖，所有模式的文档并发生成；
+        模式推理依赖该模式的四份文档。推理会向共享的架构索引写入模块，因此各模式的推理按顺序
+        衔接，但与后续模式的文档生成重叠执行。
+        """
+        dag = ReasoningDAG()
+        previous_reasoning = None
+        for idx, pattern in enumerate(patterns):
+            doc_steps = self._add_pattern_doc_steps(dag, pattern, prefix=f"{idx}:{pattern['name']}")
+            
+            async def reason(*results, pattern=pattern):
+                if self.logger:
+                    self.logger.log(f"\n📐 处理架构模式: {pattern['name']}", role="system")
+                pattern_docs = dict(zip(PATTERN_DOC_SECTIONS, results))
+                await self._reason_by_pattern(pattern, pattern_docs)
+            
+            deps = doc_steps + ([previous_reasoning] if previous_reasoning else [])
+            previous_reasoning = dag.add(f"{idx}:{pattern['name']}.reason", reason, deps)
+        return dag
+
+    def _add_pattern_doc_steps(self, dag: ReasoningDAG, pattern: Dict, prefix: str) -> List[str]:
+        """将模式的四份文档作为互不依赖的步骤加入依赖图，返回按 PATTERN_DOC_SECTIONS 排列的步骤名"""
+        generators = {
+            "overview": self._generate_pattern_overview,
+            "layers": self._generate_layers_design,
+            "interfaces": self._generate_interface_definitions,
+            "dependencies": self._generate_dependency_specs
+        }
         if self.logger:
             self.logger.log(f"\n📝 生成 {pattern['name']} 模式的详细文档...", role="system")
-        
-        docs = {}
-        
-        # 1. 模式概述
-        docs["overview"] = await self._generate_pattern_overview(pattern)
-        
-        # 2. 层级设计
-        docs["layers"] = await self._generate_layers_design(pattern)
-        
-        # 3. 接口定义
-        docs["interfaces"] = await self._generate_interface_definitions(pattern)
-        
-        # 4. 依赖关系
-        docs["dependencies"] = await self._generate_dependency_specs(pattern)
-        
-        return docs
+        return [
+            dag.add(f"{prefix}.{section}", lambda generate=generators[section]: generate(pattern))
+            for section in PATTERN_DOC_SECTIONS
+        ]
+
+    async def _generate_pattern_docs(self, pattern: Dict) -> Dict:
+        """为特定架构模式生成详细文档（概述、层级设计、接口定义、依赖关系并发生成）"""
+        dag = ReasoningDAG()
+        steps = self._add_pattern_doc_steps(dag, pattern, prefix=pattern['name'])
+        results = await dag.run(self.reasoning_concurrency)
+        return {section: results[step] for section, step in zip(PATTERN_DOC_SECTIONS, steps)}
 
     async def _generate_pattern_overview(self, pattern: Dict) -> Dict:
         """生成架构模式概述"""
@@ -284,7 +305,54 @@ class ArchitectureReasoner:
 
     async def _generate_module_spec(self, module: Dict, layer_info: Dict) -> Dict:
         """生成模块规范"""
-        # 自动补全分层配件
+        self._complete_module_features(module)
+        prompt = f"""
+        为 {module['name']} 模块生成详细规范。
+
+        模块信息：
+        {json.dumps(module, ensure_ascii=False, indent=2)}
+
+        层级信息：
+        {json.dumps(layer_info, ensure_ascii=False, indent=2)}
+
+        请提供：
+        1. 模块名称
+        2. 详细职责描述
+        3. 与其他层的依赖关系
+        4. 对外暴露的接口
+        5. 与具体需求的映射关系
+        6. 文件路径设计
+
+        返回JSON格式。
+        """
+        return await self._get_llm_response(prompt)
+
+    def _module_specs_prompt(self, modules: Dict[str, Dict], layer_info: Dict) -> str:
+        """一次生成多个模块规范的提示词，层级信息只出现一次"""
+        for module in modules.values():
+            self._complete_module_features(module)
+        return f"""
+        为以下 {len(modules)} 个模块分别生成详细规范（键为模块名）。
+
+        模块信息：
+        {json.dumps(modules, ensure_ascii=False, indent=2)}
+
+        层级信息：
+        {json.dumps(layer_info, ensure_ascii=False, indent=2)}
+
+        对每个模块请提供：
+        1. 模块名称
+        2. 详细职责描述
+        3. 与其他层的依赖关系
+        4. 对外暴露的接口
+        5. 与具体需求的映射关系
+        6. 文件路径设计
+
+        返回JSON格式，键为模块名（与上面完全一致），值为该模块的规范。
+        """
+
+    def _complete_module_features(self, module: Dict):
+        """按模式和层级自动补全模块的分层配件（features 字段）"""
         pattern = module.get("pattern", "").lower()
         layer = module.get("layer", "").lower()
         # 定义常见配件模板
@@ -309,27 +377,6 @@ class ArchitectureReasoner:
             features = set(module.get("features", []))
             features.update(complements)
             module["features"] = list(features)
-        # 继续 LLM 生成
-        prompt = f"""
-        为 {module['name']} 模块生成详细规范。
-
-        模块信息：
-        {json.dumps(module, ensure_ascii=False, indent=2)}
-
-        层级信息：
-        {json.dumps(layer_info, ensure_ascii=False, indent=2)}
-
-        请提供：
-        1. 模块名称
-        2. 详细职责描述
-        3. 与其他层的依赖关系
-        4. 对外暴露的接口
-        5. 与具体需求的映射关系
-        6. 文件路径设计
-
-        返回JSON格式。
-        """
-        return await self._get_llm_response(prompt)
 
     async def _reason_by_pattern(self, pattern: Dict, pattern_docs: Dict):
         """基于生成的文档进行架构推理"""
@@ -397,34 +444,28 @@ class ArchitectureReasoner:
                             "relationship": "depended_by"
                         })
         
-        # 3. 按关键字查找
-        for keyword in self._extract_pattern_keywords(pattern):
-            if keyword in self.arch_manager.index.keyword_mapping:
-                for module in self.arch_manager.index.keyword_mapping[keyword]:
-                    module_info = self.arch_manager.index.dependency_graph.get(module, {})
-                    if module_info.get("pattern") != pattern_name:
-                        related["by_keyword"].append({
-                            "module": module,
-                            "pattern": module_info.get("pattern", ""),
-                            "layer": module_info.get("layer", ""),
-                            "keyword": keyword
-                        })
+        # 3. 按关键字查找（TF-IDF 排序，只取最相关的前几个模块）
+        graph = self.arch_manager.index.dependency_graph
+        matches = self.arch_manager.index.find_related_modules(
+            " ".join(self._extract_pattern_keywords(pattern)),
+            top_k=RELATED_KEYWORD_TOP_K,
+            predicate=lambda module: graph.get(module, {}).get("pattern") != pattern_name
+        )
+        for module, score, keywords in matches:
+            module_info = graph.get(module, {})
+            related["by_keyword"].append({
+                "module": module,
+                "pattern": module_info.get("pattern", ""),
+                "layer": module_info.get("layer", ""),
+                "keyword": keywords[0],
+                "score": round(score, 3)
+            })
         
         return related
 
     def _extract_pattern_keywords(self, pattern: Dict) -> Set[str]:
-        """从模式描述中提取关键字"""
-        keywords = set()
-        
-        # 从描述中提取
-        if "description" in pattern:
-            keywords.update(set(pattern["description"].lower().split()))
-            
-        # 从名称中提取
-        if "name" in pattern:
-            keywords.update(set(pattern["name"].lower().split()))
-            
-        return keywords
+        """从模式名称和描述中提取关键字"""
+        return set(tokenize(f"{pattern.get('name', '')} {pattern.get('description', '')}"))
 
     async def _validate_layer_design(self, layer_name: str, layer_info: Dict, related_components: Dict) -> Dict:
         """验证层级设计的合理性"""
@@ -563,53 +604,148 @@ class ArchitectureReasoner:
         return len(dependencies) > 0
 
     async def _process_layer_modules(self, layer_name: str, layer_info: Dict):
-        """处理层级中的模块，使用并行处理提高效率"""
+        """处理层级中的模块
+        
+        模块规范并发生成（最多 module_concurrency 个 LLM 调用），生成结果经队列交给唯一的写者，
+        按组件顺序成批写入架构管理器；可通过 cancel_module 取消单个模块。
+        """
         call_id = str(uuid.uuid4())[:8]  # 生成唯一调用ID用于跟踪
         print(f"🔄 [LOOP-TRACE] {call_id} - ENTER _process_layer_modules: layer='{layer_name}'")
         
         components = layer_info.get("components", [])
         print(f"🔄 [LOOP-TRACE] {call_id} - 发现 {len(components)} 个组件需要处理")
         
-        async def process_single_module(module, module_idx):
-            module_call_id = str(uuid.uuid4())[:8]  # 每个模块处理有自己的调用ID
-            module_name = module.get("name", f"未命名模块_{module_idx}")
-            print(f"🔄 [LOOP-TRACE] {call_id}.{module_call_id} - 开始处理模块 {module_idx+1}/{len(components)}: '{module_name}'")
-            
+        # 多个模块打包进一次请求，层级信息每组只发送一次；缺失的模块拆组重试，最终逐个生成
+        names = [module.get("name", "") for module in components]
+        packer = None
+        if self.module_pack_size > 1 and len(components) > 1 and all(names) and len(set(names)) == len(names):
+            packer = PromptPacker(
+                dict(zip(names, components)),
+                lambda modules: self._module_specs_prompt(modules, layer_info),
+                self._get_llm_response,
+                single=lambda name, module: self._generate_module_spec(module, layer_info),
+                max_group_size=self.module_pack_size,
+                max_concurrency=self.module_concurrency
+            )
+            print(f"🔄 [LOOP-TRACE] {call_id} - {len(components)} 个模块规范打包为 {len(packer.groups)} 次请求")
+            packer.start()
+        
+        async def generate_spec(module):
+            module_name = module.get("name", "")
+            print(f"🔄 [LOOP-TRACE] {call_id} - 开始生成模块规范: '{module_name}'")
             try:
-                # 1. 生成模块规范
-                print(f"🔄 [LOOP-TRACE] {call_id}.{module_call_id} - 开始生成模块规范")
-                module_spec = await self._generate_module_spec(module, layer_info)
-                print(f"🔄 [LOOP-TRACE] {call_id}.{module_call_id} - 模块规范生成完成")
-                
-                # 2. 添加到架构管理器
-                print(f"🔄 [LOOP-TRACE] {call_id}.{module_call_id} - 开始调用 process_new_module")
-                result = await self.arch_manager.process_new_module(
-                    module_spec,
-                    module_spec.get("requirements", [])
-                )
-                print(f"🔄 [LOOP-TRACE] {call_id}.{module_call_id} - process_new_module 调用完成: {result.get('status', '未知')}")
-                
-                if result["status"] == "validation_failed":
-                    print(f"🔄 [LOOP-TRACE] {call_id}.{module_call_id} - 模块验证失败，处理验证问题")
-                    await self._handle_validation_issues(result["issues"], module_spec)
-                    print(f"🔄 [LOOP-TRACE] {call_id}.{module_call_id} - 验证问题处理完成")
-                
-                print(f"🔄 [LOOP-TRACE] {call_id}.{module_call_id} - 模块 '{module_name}' 处理完成")
-                return result
+                if packer is not None:
+                    return await packer.get(module_name)
+                return await self._generate_module_spec(module, layer_info)
             except Exception as e:
-                print(f"❌ [LOOP-TRACE] {call_id}.{module_call_id} - 处理模块 '{module_name}' 时出错: {str(e)}")
+                print(f"❌ [LOOP-TRACE] {call_id} - 生成模块 '{module_name}' 规范时出错: {str(e)}")
                 traceback.print_exc()
-                return {"status": "error", "message": str(e)}
+                raise
+        
+        failed = []  # (模块规范, 验证结果)
         
-        print(f"🔄 [LOOP-TRACE] {call_id} - 开始并行处理 {len(components)} 个模块")
-        import asyncio
-        tasks = [process_single_module(module, idx) for idx, module in enumerate(components)]
-        results = await asyncio.gather(*tasks)
-        print(f"🔄 [LOOP-TRACE] {call_id} - 并行处理完成，成功: {sum(1 for r in results if r.get('status') == 'success')}，失败: {sum(1 for r in results if r.get('status') != 'success')}")
+        async def apply_specs(specs):
+            try:
+                applied = await self.arch_manager.process_new_modules([
+                    (spec, spec.get("requirements", [])) for spec in specs
+                ])
+            except Exception as e:
+                print(f"❌ [LOOP-TRACE] {call_id} - 批量处理模块时出错: {str(e)}")
+                traceback.print_exc()
+                raise
+            failed.extend((spec, result) for spec, result in zip(specs, applied) if result["status"] == "validation_failed")
+            return applied
+        
+        # 1. 生成模块规范并由单一写者批量添加到架构管理器（批内循环依赖一并检查）
+        print(f"🔄 [LOOP-TRACE] {call_id} - 开始生成 {len(components)} 个模块规范（并发上限 {self.module_concurrency}）")
+        pipeline = ModulePipeline(
+            generate_spec, apply_specs, self.module_concurrency,
+            key=lambda module: module.get("name", "")
+        )
+        self._module_pipelines.add(pipeline)
+        try:
+            results = await pipeline.run(components)
+        finally:
+            self._module_pipelines.discard(pipeline)
+            if packer is not None:
+                packer.cancel()
+        
+        # 2. 验证失败的模块交给修正调度器（同层级的模块合并修正）
+        if failed:
+            print(f"🔄 [LOOP-TRACE] {call_id} - {len(failed)} 个模块验证失败，处理验证问题")
+            for spec, result in failed:
+                self.correction_scheduler.submit(
+                    "module", spec.get("name", ""), result["issues"], payload=spec, group=f"module:{layer_name}"
+                )
+            await self._run_corrections()
+        
+        print(f"🔄 [LOOP-TRACE] {call_id} - 处理完成，成功: {sum(1 for r in results if r.get('status') == 'success')}，失败: {sum(1 for r in results if r.get('status') != 'success')}")
         
         print(f"🔄 [LOOP-TRACE] {call_id} - EXIT _process_layer_modules: layer='{layer_name}'")
         return results
 
+    def cancel_module(self, module_name: str) -> bool:
+        """取消正在处理的模块（尚未生成或尚未写入的不再处理），返回是否找到该模块"""
+        found = False
+        for pipeline in list(self._module_pipelines):
+            found = pipeline.cancel(module_name) or found
+        return found
+
+    async def _run_corrections(self):
+        """按优先级执行已提交的修正，受修正预算约束"""
+        return await self.correction_scheduler.drain(self._apply_correction_batch)
+
+    async def _apply_correction_batch(self, kind: str, entries: List[Dict]):
+        """执行一次修正调用，entries 为同组的若干问题"""
+        try:
+            if kind == "module":
+                if len(entries) == 1:
+                    return [await self._handle_validation_issues(entries[0]["issues"], entries[0]["payload"])]
+                return await self._handle_validation_issues_batch(entries)
+            if kind == "layer":
+                return await self._correct_layer(entries[0]["target"], entries[0]["issues"])
+            if kind == "consistency":
+                return await self._attempt_consistency_correction(entries[0]["issues"])
+            if kind == "cycle":
+                return await self._attempt_cycle_correction(entries[0]["issues"])
+        except Exception as e:
+            print(f"❌ [CORRECTION] 修正 {kind} {[entry['target'] for entry in entries]} 时出错: {str(e)}")
+            traceback.print_exc()
+        return None
+
+    async def _handle_validation_issues_batch(self, entries: List[Dict]) -> List[bool]:
+        """用一次 LLM 调用修正同一层级的多个模块，修正结果批量写入架构管理器"""
+        corrections = await self._attempt_module_corrections(entries)
+        corrected = [corrections.get(entry["target"]) for entry in entries]
+        valid = [module for module in corrected if isinstance(module, dict) and module]
+        if not valid:
+            return [False] * len(entries)
+        results = iter(await self.arch_manager.process_new_modules([
+            (module, module.get("requirements", [])) for module in valid
+        ]))
+        return [
+            next(results)["status"] == "success" if isinstance(module, dict) and module else False
+            for module in corrected
+        ]
+
+    async def _attempt_module_corrections(self, entries: List[Dict]) -> Dict[str, Dict]:
+        """一次修正多个模块，返回 {模块名: 修正后的模块定义}"""
+        modules = {
+            entry["target"]: {"issues": entry["issues"], "module": entry["payload"]}
+            for entry in entries
+        }
+        prompt = f"""
+        以下模块存在问题（键为模块名）：
+        
+        {json.dumps(modules, ensure_ascii=False, indent=2)}
+        
+        请为每个模块提供修正后的模块定义，以解决对应的问题。
+        返回JSON格式，键为模块名，值为修正后的模块定义。
+        """
+        
+        response = await self._get_llm_response(prompt)
+        return response if isinstance(response, dict) else {}
+
     async def _handle_validation_issues(self, issues: Dict, module: Dict):
         """处理验证问题"""
         # 尝试自动修正
@@ -647,7 +783,15 @@ class ArchitectureReasoner:
             if self.logger:
                 self.logger.log(f"• {issue}", role="error")
         
-        # 尝试自动修正
+        # 尝试自动修正（受修正预算约束，相同的问题只修正一次）
+        if not self.correction_scheduler.submit("layer", layer_name, issues, group=f"layer:{layer_name}"):
+            if self.logger:
+                self.logger.log("\n⏭️ 该层级问题已尝试修正或超出修正预算，跳过", role="system")
+            return
+        await self._run_corrections()
+
+    async def _correct_layer(self, layer_name: str, issues: List[str]):
+        """修正层级设计，并用修正后的设计重新处理层级中的模块"""
         corrected_layer_info = await self._attempt_layer_correction(layer_name, issues)
         if corrected_layer_info:
             if self.logger:
@@ -697,7 +841,8 @@ class ArchitectureReasoner:
             
             # 尝试自动修正
             print(f"🔄 [LOOP-TRACE] {call_id} - 开始尝试修正架构一致性问题")
-            await self._attempt_consistency_correction(consistency_issues)
+            self.correction_scheduler.submit("consistency", "architecture", consistency_issues)
+            await self._run_corrections()
             print(f"🔄 [LOOP-TRACE] {call_id} - 一致性问题修正尝试完成")
         else:
             print(f"🔄 [LOOP-TRACE] {call_id} - 未发现架构一致性问题")
@@ -719,7 +864,8 @@ class ArchitectureReasoner:
             
             # 尝试自动修正
             print(f"🔄 [LOOP-TRACE] {call_id} - 开始尝试修正循环依赖")
-            await self._attempt_cycle_correction(cycles)
+            self.correction_scheduler.submit("cycle", "architecture", cycles)
+            await self._run_corrections()
             print(f"🔄 [LOOP-TRACE] {call_id} - 循环依赖修正尝试完成")
         else:
             print(f"🔄 [LOOP-TRACE] {call_id} - 未检测到循环依赖")
@@ -729,107 +875,26 @@ class ArchitectureReasoner:
         print(f"🔄 [LOOP-TRACE] {call_id} - EXIT _validate_overall_architecture")
 
     def _check_overall_consistency(self) -> List[str]:
-        """检查整体架构一致性"""
-        issues = []
-        
-        # 1. 检查层级职责是否明确分离
-        layer_responsibilities = {}
-        for pattern, info in self.arch_manager.index.architecture_patterns.items():
-            for layer in info["layers"]:
-                layer_key = f"{pattern}.{layer}"
-                layer_responsibilities[layer_key] = set()
-                
-                for module_name, module in self.arch_manager.index.layer_index.get(layer_key, {}).items():
-                    for resp in module.get("responsibilities", []):
-                        layer_responsibilities[layer_key].add(resp)
-        
-        # 检查不同层级间的职责重叠
-        for layer1, resps1 in layer_responsibilities.items():
-            for layer2, resps2 in layer_responsibilities.items():
-                if layer1 != layer2:
-                    overlap = resps1.intersection(resps2)
-                    if overlap:
-                        issues.append(f"层级 {layer1} 和 {layer2} 存在职责重叠: {', '.join(overlap)}")
-        
-        # 2. 检查是否存在未实现的声明依赖
-        for module, info in self.arch_manager.index.dependency_graph.items():
-            for dep in info["depends_on"]:
-                if dep not in self.arch_manager.index.dependency_graph:
-                    issues.append(f"模块 {module} 依赖的模块 {dep} 不存在")
-        
-        return issues
+        """检查整体架构一致性：层级间职责重叠、声明了但不存在的依赖"""
+        return self._check_issues("consistency_issues")
+
+    def analyze_circular_dependencies(self, max_cycles_per_component: int = 0) -> List[Dict]:
+        """找出所有含环的强连通分量（迭代 Tarjan，O(V+E)）
+
+        Args:
+            max_cycles_per_component: 每个分量最多枚举的基本环数（Johnson 算法），0 表示只给出最短环
+
+        Returns:
+            [{"modules": [...], "shortest_cycle": [...], "cycles": [[...], ...], "truncated": bool}]
+        """
+        return analyze_dependency_cycles(self.arch_manager.index.dependency_graph, max_cycles_per_component)
 
-    def _check_global_circular_dependencies(self) -> List[str]:
-        """检查全局循环依赖"""
+    def _check_global_circular_dependencies(self, max_cycles_per_component: int = 0) -> List[str]:
+        """检查全局循环依赖，每个含环的强连通分量给出一个最短环（或枚举的基本环）"""
         call_id = str(uuid.uuid4())[:8]  # 生成唯一调用ID用于跟踪
         print(f"🔄 [LOOP-TRACE] {call_id} - ENTER _check_global_circular_dependencies")
         
-        cycles = []
-        all_modules = list(self.arch_manager.index.dependency_graph.keys())
-        print(f"🔄 [LOOP-TRACE] {call_id} - 检查 {len(all_modules)} 个模块的循环依赖")
-        
-        # 构建依赖图
-        dependency_map = {}
-        for module, info in self.arch_manager.index.dependency_graph.items():
-            deps = list(info.get("depends_on", []))
-            dependency_map[module] = deps
-            if deps:
-                print(f"🔄 [LOOP-TRACE] {call_id} - 模块 '{module}' 依赖于 {len(deps)} 个其他模块")
-        
-        visited = {}  # 0: 未访问，1: 正在访问，2: 已访问
-        path = []
-        max_recursion_depth = 100  # 防止无限递归
-        
-        def dfs(current: str, depth: int = 0) -> bool:
-            dfs_id = str(uuid.uuid4())[:6]  # 每个DFS调用有自己的ID
-            print(f"🔄 [LOOP-TRACE] {call_id}.{dfs_id} - DFS(depth={depth}): 检查模块 '{current}'")
-            
-            if depth > max_recursion_depth:
-                print(f"⚠️ [LOOP-TRACE] {call_id}.{dfs_id} - 达到最大递归深度 ({max_recursion_depth})，中断递归")
-                return False
-            
-            if current in visited and visited[current] == 1:
-                cycle_start = path.index(current)
-                cycle = path[cycle_start:] + [current]
-                cycle_str = " -> ".join(cycle)
-                print(f"⚠️ [LOOP-TRACE] {call_id}.{dfs_id} - 检测到循环! {cycle_str}")
-                cycles.append(cycle_str)
-                return True
-            
-            if current in visited and visited[current] == 2:
-                print(f"🔄 [LOOP-TRACE] {call_id}.{dfs_id} - 模块 '{current}' 已访问过，跳过")
-                return False
-                
-            visited[current] = 1
-            path.append(current)
-            print(f"🔄 [LOOP-TRACE] {call_id}.{dfs_id} - 当前路径: {' -> '.join(path)}")
-            
-            has_cycle = False
-            deps = dependency_map.get(current, [])
-            print(f"🔄 [LOOP-TRACE] {call_id}.{dfs_id} - 模块 '{current}' 有 {len(deps)} 个依赖需要检查")
-            
-            for i, dep in enumerate(deps):
-                print(f"🔄 [LOOP-TRACE] {call_id}.{dfs_id} - 检查依赖 {i+1}/{len(deps)}: '{dep}'")
-                if dep in dependency_map:
-                    print(f"🔄 [LOOP-TRACE] {call_id}.{dfs_id} - 递归检查依赖 '{dep}' (depth={depth+1})")
-                    if dfs(dep, depth + 1):
-                        print(f"🔄 [LOOP-TRACE] {call_id}.{dfs_id} - 依赖 '{dep}' 导致循环")
-                        has_cycle = True
-                else:
-                    print(f"🔄 [LOOP-TRACE] {call_id}.{dfs_id} - 依赖 '{dep}' 不在依赖图中")
-            
-            path.pop()
-            visited[current] = 2
-            print(f"🔄 [LOOP-TRACE] {call_id}.{dfs_id} - 完成模块 '{current}' 的检查，循环状态: {has_cycle}")
-            return has_cycle
-        
-        for i, module in enumerate(all_modules):
-            print(f"🔄 [LOOP-TRACE] {call_id} - 开始检查模块 {i+1}/{len(all_modules)}: '{module}'")
-            if module not in visited:
-                visited[module] = 0
-                print(f"🔄 [LOOP-TRACE] {call_id} - 开始DFS遍历模块 '{module}'")
-                dfs(module)
-                print(f"🔄 [LOOP-TRACE] {call_id} - 完成DFS遍历模块 '{module}'")
+        cycles = self._check_issues("circular_dependencies", max_cycles_per_component=max_cycles_per_component)
         
         print(f"🔄 [LOOP-TRACE] {call_id} - EXIT _check_global_circular_dependencies: 发现 {len(cycles)} 个循环")
         return cycles
@@ -1035,98 +1100,47 @@ class ArchitectureReasoner:
         print(f"🔄 [LOOP-TRACE] {call_id} - EXIT _apply_correction: 结果={result}")
         return result
 
-    async def _save_final_architecture(self):
-        """保存最终的架构状态"""
-        output_dir = Path("data/output/architecture")
-        output_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 保存架构状态
-        state_file = output_dir / "architecture_state.json"
-        
-        state = {
-            "timestamp": datetime.now().isoformat(),
-            "requirement_module_index": {
-                k: list(v) for k, v in self.arch_manager.index.requirement_module_index.items()
-            },
-            "responsibility_index": {
-                k: {
-                    "modules": list(v["modules"]),
-                    "objects": list(v["objects"]),
-                    "patterns": list(v["patterns"])
-                } for k, v in self.arch_manager.index.responsibility_index.items()
-            },
-            "dependency_graph": {
-                k: {
-                    "depends_on": list(v["depends_on"]),
-                    "depended_by": list(v["depended_by"]),
-                    "pattern": v["pattern"],
-                    "layer": v["layer"]
-                } for k, v in self.arch_manager.index.dependency_graph.items()
-            },
-            "layer_index": {
-                layer: {
-                    name: module for name, module in modules.items()
-                } for layer, modules in self.arch_manager.index.layer_index.items()
-            }
-        }
-        
-        with open(state_file, 'w', encoding='utf-8') as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
+    async def _save_final_architecture(self) -> Dict:
+        """保存最终的架构状态，并以同一份快照生成架构文档
+
+        Returns:
+            写出的架构状态快照
+        """
+        state = await self.arch_manager.flush_architecture_state()
         
         if self.logger:
             self.logger.log(f"\n✅ 架构推理完成！", role="system")
-            self.logger.log(f"架构状态已保存到：{state_file}", role="system")
+            self.logger.log(f"架构状态已保存到：{self.arch_manager.output_path}", role="system")
         
         # 生成架构文档
-        await self._generate_architecture_docs()
+        await self._generate_architecture_docs(state)
+        return state
         
-    async def _generate_architecture_docs(self):
-        """生成架构文档"""
+    async def _generate_architecture_docs(self, state: Dict = None):
+        """生成架构文档
+
+        Args:
+            state: 已构建的架构状态快照；未提供时从当前索引构建
+        """
         if self.logger:
             self.logger.log("\n📝 生成架构文档...", role="system")
         
-        arch_state = {
-            "timestamp": datetime.now().isoformat(),
-            "requirement_module_index": {
-                k: list(v) for k, v in self.arch_manager.index.requirement_module_index.items()
-            },
-            "responsibility_index": {
-                k: {
-                    "modules": list(v["modules"]),
-                    "objects": list(v["objects"]),
-                    "patterns": list(v["patterns"])
-                } for k, v in self.arch_manager.index.responsibility_index.items()
-            },
-            "dependency_graph": {
-                k: {
-                    "depends_on": list(v["depends_on"]),
-                    "depended_by": list(v["depended_by"]),
-                    "pattern": v["pattern"],
-                    "layer": v["layer"]
-                } for k, v in self.arch_manager.index.dependency_graph.items()
-            },
-            "layer_index": {
-                layer: {
-                    name: module for name, module in modules.items()
-                } for layer, modules in self.arch_manager.index.layer_index.items()
-            }
-        }
-        
-        # 2. 生成架构概览文档
-        overview_doc = await self._generate_overview_doc(arch_state)
-        (self.output_path / "01_architecture_overview.md").write_text(overview_doc)
-        
-        # 3. 生成详细设计文档
-        detailed_doc = await self._generate_detailed_design_doc(arch_state)
-        (self.output_path / "02_detailed_design.md").write_text(detailed_doc)
-        
-        # 4. 生成接口文档
-        interface_doc = await self._generate_interface_doc(arch_state)
-        (self.output_path / "03_interfaces.md").write_text(interface_doc)
-        
-        # 5. 生成部署文档
-        deployment_doc = await self._generate_deployment_doc(arch_state)
-        (self.output_path / "04_deployment.md").write_text(deployment_doc)
+        if state is None:
+            state = build_architecture_state(self.arch_manager.index, include_keywords=False)
+        arch_state = core_sections(state)
+        
+        # 2. 并发生成概览、详细设计、接口、部署文档，各自写入对应文件
+        dag = ReasoningDAG()
+        for filename, generate in [
+            ("01_architecture_overview.md", self._generate_overview_doc),
+            ("02_detailed_design.md", self._generate_detailed_design_doc),
+            ("03_interfaces.md", self._generate_interface_doc),
+            ("04_deployment.md", self._generate_deployment_doc)
+        ]:
+            async def write_doc(filename=filename, generate=generate):
+                (self.output_path / filename).write_text(await generate(arch_state))
+            dag.add(filename, write_doc)
+        await dag.run(self.reasoning_concurrency)
         
         if self.logger:
             self.logger.log("✅ 架构文档生成完成", role="system")
@@ -1254,92 +1268,7 @@ class ArchitectureReasoner:
         Returns:
             命名不一致性问题列表
         """
-        issues = []
-        
-        all_modules = list(self.arch_manager.index.dependency_graph.keys())
-        if not all_modules:
-            return issues
-            
-        camel_case_pattern = re.compile(r'^[a-z][a-zA-Z0-9]*$')  # 驼峰命名法
-        pascal_case_pattern = re.compile(r'^[A-Z][a-zA-Z0-9]*$')  # 帕斯卡命名法
-        snake_case_pattern = re.compile(r'^[a-z][a-z0-9_]*$')     # 下划线命名法
-        
-        naming_styles = {
-            "camel_case": 0,
-            "pascal_case": 0,
-            "snake_case": 0,
-            "other": 0
-        }
-        
-        for module in all_modules:
-            module_name = module.split('.')[-1]  # 获取最后一部分作为模块名
-            
-            if camel_case_pattern.match(module_name):
-                naming_styles["camel_case"] += 1
-            elif pascal_case_pattern.match(module_name):
-                naming_styles["pascal_case"] += 1
-            elif snake_case_pattern.match(module_name):
-                naming_styles["snake_case"] += 1
-            else:
-                naming_styles["other"] += 1
-        
-        dominant_style = max(naming_styles, key=naming_styles.get)
-        if dominant_style == "other" or naming_styles[dominant_style] < len(all_modules) * 0.7:
-            issues.append("模块命名风格不一致，建议统一使用同一种命名风格")
-        
-        if dominant_style != "other":
-            for module in all_modules:
-                module_name = module.split('.')[-1]
-                
-                if dominant_style == "camel_case" and not camel_case_pattern.match(module_name):
-                    issues.append(f"模块 '{module}' 不符合驼峰命名法")
-                elif dominant_style == "pascal_case" and not pascal_case_pattern.match(module_name):
-                    issues.append(f"模块 '{module}' 不符合帕斯卡命名法")
-                elif dominant_style == "snake_case" and not snake_case_pattern.match(module_name):
-                    issues.append(f"模块 '{module}' 不符合下划线命名法")
-        
-        layer_prefixes = {}
-        for module, info in self.arch_manager.index.dependency_graph.items():
-            layer = info.get("layer", "")
-            if not layer:
-                continue
-                
-            module_name = module.split('.')[-1]
-            prefix = module_name[:3] if len(module_name) > 3 else module_name
-            
-            if layer not in layer_prefixes:
-                layer_prefixes[layer] = {}
-                
-            if prefix not in layer_prefixes[layer]:
-                layer_prefixes[layer][prefix] = 0
-                
-            layer_prefixes[layer][prefix] += 1
-        
-        for layer, prefixes in layer_prefixes.items():
-            if len(prefixes) > 3:  # 如果一个层级有超过3种不同的前缀
-                most_common_prefix = max(prefixes, key=prefixes.get)
-                if prefixes[most_common_prefix] < sum(prefixes.values()) * 0.5:
-                    issues.append(f"层级 '{layer}' 的模块命名前缀不一致")
-        
-        for module, info in self.arch_manager.index.dependency_graph.items():
-            module_name = module.split('.')[-1].lower()
-            responsibilities = [r.lower() for r in info.get("responsibilities", [])]
-            
-            if responsibilities:
-                matched = False
-                for resp in responsibilities:
-                    keywords = [word for word in re.findall(r'\b\w+\b', resp) if len(word) > 3]
-                    for keyword in keywords:
-                        if keyword.lower() in module_name:
-                            matched = True
-                            break
-                    if matched:
-                        break
-                        
-                if not matched:
-                    issues.append(f"模块 '{module}' 的命名可能不能充分反映其职责")
-        
-        return issues
+        return self._check_issues("naming_inconsistencies")
         
     def _check_layer_violations(self) -> List[str]:
         """检查层级违规
@@ -1355,71 +1284,12 @@ class ArchitectureReasoner:
         call_id = str(uuid.uuid4())[:8]  # 生成唯一调用ID用于跟踪
         print(f"🔄 [LOOP-TRACE] {call_id} - ENTER _check_layer_violations")
         
-        issues = []
-        
-        patterns = self.arch_manager.index.architecture_patterns
-        pattern_count = len(patterns)
-        print(f"🔄 [LOOP-TRACE] {call_id} - 检查 {pattern_count} 个架构模式的层级违规")
-        
-        pattern_idx = 0
-        for pattern_name, pattern_info in patterns.items():
-            pattern_idx += 1
-            layer_dependencies = pattern_info.get("dependencies", {})
-            print(f"🔄 [LOOP-TRACE] {call_id} - 检查模式 {pattern_idx}/{pattern_count}: '{pattern_name}'，有 {len(layer_dependencies)} 个层级依赖规则")
-            
-            pattern_modules = [m for m, info in self.arch_manager.index.dependency_graph.items() 
-                              if info.get("pattern") == pattern_name]
-            print(f"🔄 [LOOP-TRACE] {call_id} - 模式 '{pattern_name}' 有 {len(pattern_modules)} 个模块")
-            
-            module_idx = 0
-            for module, info in self.arch_manager.index.dependency_graph.items():
-                if info.get("pattern") != pattern_name:
-                    continue
-                
-                module_idx += 1
-                print(f"🔄 [LOOP-TRACE] {call_id} - 检查模块 {module_idx}/{len(pattern_modules)}: '{module}'")
-                
-                module_layer = info.get("layer")
-                if not module_layer:
-                    print(f"🔄 [LOOP-TRACE] {call_id} - 模块 '{module}' 没有指定层级，跳过")
-                    continue
-                
-                allowed_dependencies = layer_dependencies.get(module_layer, [])
-                print(f"🔄 [LOOP-TRACE] {call_id} - 模块 '{module}' 在层级 '{module_layer}'，允许依赖的层级: {allowed_dependencies}")
-                
-                deps = info.get("depends_on", [])
-                print(f"🔄 [LOOP-TRACE] {call_id} - 模块 '{module}' 有 {len(deps)} 个依赖需要检查")
-                
-                dep_idx = 0
-                for dep in deps:
-                    dep_idx += 1
-                    print(f"🔄 [LOOP-TRACE] {call_id} - 检查依赖 {dep_idx}/{len(deps)}: '{dep}'")
-                    
-                    if dep not in self.arch_manager.index.dependency_graph:
-                        print(f"🔄 [LOOP-TRACE] {call_id} - 依赖 '{dep}' 不在依赖图中，跳过")
-                        continue  # 跳过不存在的依赖
-                    
-                    dep_info = self.arch_manager.index.dependency_graph[dep]
-                    dep_pattern = dep_info.get("pattern")
-                    dep_layer = dep_info.get("layer")
-                    
-                    print(f"🔄 [LOOP-TRACE] {call_id} - 依赖 '{dep}' 属于模式 '{dep_pattern}'，层级 '{dep_layer}'")
-                    
-                    if dep_pattern != pattern_name:
-                        issue = f"模块 '{module}' 依赖了不同架构模式的模块 '{dep}'"
-                        print(f"⚠️ [LOOP-TRACE] {call_id} - 发现层级违规: {issue}")
-                        issues.append(issue)
-                        continue
-                    
-                    if dep_layer not in allowed_dependencies and dep_layer != module_layer:
-                        issue = f"模块 '{module}' ({module_layer}) 依赖了不允许的层级 '{dep_layer}' 中的模块 '{dep}'"
-                        print(f"⚠️ [LOOP-TRACE] {call_id} - 发现层级违规: {issue}")
-                        issues.append(issue)
+        issues = self._check_issues("layer_violations")
         
         print(f"🔄 [LOOP-TRACE] {call_id} - EXIT _check_layer_violations: 发现 {len(issues)} 个层级违规")
         return issues
         
-    def _check_responsibility_overlaps(self) -> List[str]:
+    def _check_responsibility_overlaps(self, threshold: float = None) -> List[str]:
         """检查职责重叠
         
         检查不同模块之间是否存在职责重叠，包括：
@@ -1427,77 +1297,16 @@ class ArchitectureReasoner:
         2. 高度相似的职责
         3. 职责范围重叠
         
+        Args:
+            threshold: 相似度阈值（共同词数 / 较短职责词数），默认使用 responsibility_similarity_threshold
+            
         Returns:
             职责重叠问题列表
         """
         call_id = str(uuid.uuid4())[:8]  # 生成唯一调用ID用于跟踪
         print(f"🔄 [LOOP-TRACE] {call_id} - ENTER _check_responsibility_overlaps")
         
-        issues = []
-        
-        print(f"🔄 [LOOP-TRACE] {call_id} - 开始构建职责映射")
-        responsibility_map = {}
-        module_count = len(self.arch_manager.index.dependency_graph)
-        print(f"🔄 [LOOP-TRACE] {call_id} - 分析 {module_count} 个模块的职责")
-        
-        module_idx = 0
-        for module, info in self.arch_manager.index.dependency_graph.items():
-            module_idx += 1
-            responsibilities = info.get("responsibilities", [])
-            print(f"🔄 [LOOP-TRACE] {call_id} - 处理模块 {module_idx}/{module_count}: '{module}'，有 {len(responsibilities)} 个职责")
-            
-            for resp in responsibilities:
-                resp_lower = resp.lower()
-                if resp_lower not in responsibility_map:
-                    responsibility_map[resp_lower] = []
-                responsibility_map[resp_lower].append(module)
-        
-        print(f"🔄 [LOOP-TRACE] {call_id} - 检查完全相同的职责")
-        resp_count = len(responsibility_map)
-        print(f"🔄 [LOOP-TRACE] {call_id} - 共有 {resp_count} 个不同的职责需要检查")
-        
-        resp_idx = 0
-        for resp, modules in responsibility_map.items():
-            resp_idx += 1
-            print(f"🔄 [LOOP-TRACE] {call_id} - 检查职责 {resp_idx}/{resp_count}: '{resp}'，被 {len(modules)} 个模块引用")
-            
-            if len(modules) > 1:
-                issue = f"职责 '{resp}' 在多个模块中重复: {', '.join(modules)}"
-                print(f"⚠️ [LOOP-TRACE] {call_id} - 发现职责重叠: {issue}")
-                issues.append(issue)
-        
-        print(f"🔄 [LOOP-TRACE] {call_id} - 检查高度相似的职责")
-        all_responsibilities = list(responsibility_map.keys())
-        total_comparisons = len(all_responsibilities) * (len(all_responsibilities) - 1) // 2
-        print(f"🔄 [LOOP-TRACE] {call_id} - 需要进行 {total_comparisons} 次职责相似度比较")
-        
-        comparison_idx = 0
-        for i in range(len(all_responsibilities)):
-            for j in range(i+1, len(all_responsibilities)):
-                comparison_idx += 1
-                if comparison_idx % 100 == 0:  # 每100次比较输出一次日志，避免日志过多
-                    print(f"🔄 [LOOP-TRACE] {call_id} - 正在进行第 {comparison_idx}/{total_comparisons} 次职责相似度比较")
-                
-                resp1 = all_responsibilities[i]
-                resp2 = all_responsibilities[j]
-                
-                words1 = set(resp1.split())
-                words2 = set(resp2.split())
-                
-                if not words1 or not words2:
-                    continue
-                
-                common_words = words1.intersection(words2)
-                similarity = len(common_words) / min(len(words1), len(words2))
-                
-                if similarity > 0.7:  # 如果相似度超过70%
-                    modules1 = responsibility_map[resp1]
-                    modules2 = responsibility_map[resp2]
-                    
-                    if set(modules1) != set(modules2):
-                        issue = f"职责 '{resp1}' 和 '{resp2}' 高度相似，但分别属于不同模块: {', '.join(set(modules1))} 和 {', '.join(set(modules2))}"
-                        print(f"⚠️ [LOOP-TRACE] {call_id} - 发现职责相似: {issue}")
-                        issues.append(issue)
+        issues = self._check_issues("responsibility_overlaps", threshold=threshold)
         
         print(f"🔄 [LOOP-TRACE] {call_id} - EXIT _check_responsibility_overlaps: 发现 {len(issues)} 个职责重叠问题")
         return issues
@@ -1512,60 +1321,70 @@ class ArchitectureReasoner:
         4. 职责重叠检查
         5. 整体一致性检查
         
+        所有检查共用一次依赖图遍历（见 analyze_architecture）。
+        
         Returns:
             包含各类问题的字典
         """
-        issues = {
-            "circular_dependencies": [],
-            "naming_inconsistencies": [],
-            "layer_violations": [],
-            "responsibility_overlaps": [],
-            "consistency_issues": []
-        }
-        
-        issues["circular_dependencies"] = self._check_global_circular_dependencies()
-        issues["naming_inconsistencies"] = self._check_naming_inconsistencies()
-        issues["layer_violations"] = self._check_layer_violations()
-        issues["responsibility_overlaps"] = self._check_responsibility_overlaps()
-        issues["consistency_issues"] = self._check_overall_consistency()
+        results = self.analyze_architecture()
+        self.last_architecture_issues = results
+        return {check: [str(issue) for issue in issues] for check, issues in results.items()}
+
+    def analyze_architecture(self, checks=ALL_CHECKS, threshold: float = None,
+                             max_cycles_per_component: int = 0) -> Dict[str, List[ArchitectureIssue]]:
+        """一次遍历依赖图完成指定的架构检查
         
-        return issues
+        Args:
+            checks: 要执行的检查，默认全部（circular_dependencies、naming_inconsistencies、
+                layer_violations、responsibility_overlaps、consistency_issues）
+            threshold: 职责相似度阈值，默认使用 responsibility_similarity_threshold
+            max_cycles_per_component: 每个含环分量最多枚举的基本环数，0 表示只给出最短环
+            
+        Returns:
+            {检查名: [ArchitectureIssue, ...]}
+        """
+        if threshold is None:
+            threshold = self.responsibility_similarity_threshold
+        analyzer = ArchitectureAnalyzer(self.arch_manager.index, threshold, max_cycles_per_component)
+        return analyzer.analyze(checks)
+
+    def _check_issues(self, check: str, **kwargs) -> List[str]:
+        """执行单项检查，返回问题描述列表"""
+        return [str(issue) for issue in self.analyze_architecture((check,), **kwargs)[check]]
         
-    async def check_module_issues(self, module_name: str) -> Dict[str, List[str]]:
+    async def check_module_issues(self, module_name: str) -> Dict[str, List[ArchitectureIssue]]:
         """检查单个模块的架构问题
         
-        对新添加的模块执行架构检查，包括：
-        1. 循环依赖检查
+        对新添加的模块执行增量架构检查，只访问模块的邻接边和它参与的职责倒排表，包括：
+        1. 经过该模块的循环依赖
         2. 命名不一致性检查
-        3. 层级违规检查
+        3. 层级违规检查（该模块的依赖及依赖它的模块）
         4. 职责重叠检查
+        5. 依赖了不存在的模块
         
         Args:
             module_name: 要检查的模块名称
             
         Returns:
-            包含各类问题的字典
+            包含各类问题的字典，问题为 ArchitectureIssue（`module_name in issue` 按模块名精确匹配）
         """
-        issues = {
-            "circular_dependencies": [],
-            "naming_inconsistencies": [],
-            "layer_violations": [],
-            "responsibility_overlaps": []
-        }
-        
         if module_name not in self.arch_manager.index.dependency_graph:
-            return issues
-        
-        all_cycles = self._check_global_circular_dependencies()
-        issues["circular_dependencies"] = [cycle for cycle in all_cycles if module_name in cycle]
-        
-        all_naming_issues = self._check_naming_inconsistencies()
-        issues["naming_inconsistencies"] = [issue for issue in all_naming_issues if module_name in issue]
-        
-        all_layer_issues = self._check_layer_violations()
-        issues["layer_violations"] = [issue for issue in all_layer_issues if module_name in issue]
-        
-        all_resp_issues = self._check_responsibility_overlaps()
-        issues["responsibility_overlaps"] = [issue for issue in all_resp_issues if module_name in issue]
+            return {
+                "circular_dependencies": [],
+                "naming_inconsistencies": [],
+                "layer_violations": [],
+                "responsibility_overlaps": [],
+                "consistency_issues": []
+            }
         
-        return issues                           
\ No newline at end of file
+        return self._get_module_checker().check(module_name)
+
+    def _get_module_checker(self) -> ModuleIssueChecker:
+        """单模块检查器；依赖图变化由检查器自行增量同步"""
+        index = self.arch_manager.index
+        checker = self._module_checker
+        if checker is None or checker.index is not index:
+            checker = ModuleIssueChecker(index)
+            self._module_checker = checker
+        checker.similarity_threshold = self.responsibility_similarity_threshold
+        return checker
@@ -0,0 +1,241 @@
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Set
+
+from .document_analysis import content_hash
+
+MANIFEST_VERSION = 1
+
+# 受影响模块超过全部模块的这个比例时，直接重新做全量架构检查
+INCREMENTAL_REVALIDATION_RATIO = 0.5
+
+# 结果不能按模块拆分合并的检查（环的枚举、重复职责的分组、主流命名风格、层级前缀、缺失依赖），
+# 增量检查时每次全量重算；这些检查在 ArchitectureAnalyzer 中都是近线性的
+GLOBAL_ISSUE_CHECKS = ("circular_dependencies", "naming_inconsistencies", "responsibility_overlaps",
+                       "consistency_issues")
+
+# 默认按一、二级标题切分章节；更深的标题留在所属章节内
+SECTION_HEADING_LEVEL = 2
+
+
+def _heading_pattern(max_level: int):
+    return re.compile(r'^(#{1,%d})\s+(.+?)\s*#*\s*$' % max_level, re.MULTILINE)
+
+
+def split_sections(doc_name: str, content: str, max_level: int = SECTION_HEADING_LEVEL) -> List[Dict]:
+    """将 Markdown 文档按一级到 max_level 级标题切分为章节
+
+    只有标题没有正文的章节并入下一个章节（例如文档标题紧跟二级标题），
+    章节 ID 为 "文档名#一级标题/二级标题"，同名章节追加序号。
+
+    Returns:
+        [{"id", "title", "content", "hash"}]，按文档顺序
+    """
+    heading = _heading_pattern(max_level)
+    matches = list(heading.finditer(content))
+    raw = []
+    if not matches or matches[0].start() > 0:
+        raw.append(("", content[:matches[0].start()] if matches else content))
+    parents: List[str] = []
+    for idx, match in enumerate(matches):
+        end = matches[idx + 1].start() if idx + 1 < len(matches) else len(content)
+        level, title = len(match.group(1)), match.group(2).strip()
+        parents = parents[:level - 1] + [""] * (level - 1 - len(parents)) + [title]
+        path = "/".join(part for part in parents if part)
+        raw.append((path, content[match.start():end]))
+
+    sections = []
+    pending = ""
+    seen: Dict[str, int] = {}
+    for path, text in raw:
+        body = heading.sub("", text).strip()
+        if not body:
+            pending += text
+            continue
+        text = pending + text
+        pending = ""
+        count = seen.get(path, 0) + 1
+        seen[path] = count
+        section_id = f"{doc_name}#{path}" + (f"~{count}" if count > 1 else "")
+        sections.append({"id": section_id, "title": path, "content": text, "hash": content_hash(text)})
+    if pending.strip() and sections:
+        sections[-1]["content"] += pending
+        sections[-1]["hash"] = content_hash(sections[-1]["content"])
+    elif pending.strip():
+        sections.append({"id": f"{doc_name}#", "title": "", "content": pending, "hash": content_hash(pending)})
+    return sections
+
+
+class ClarificationManifest:
+    """输入文档的内容哈希清单与来源映射
+
+    记录每个文档、每个章节的内容哈希，以及章节 → 需求 → 模块的来源关系。
+    重新澄清时与当前输入比较，得到变化的章节和受影响的模块。
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.documents: Dict[str, Dict] = {}
+        self.sections: Dict[str, Dict] = {}
+        self.exists = False
+
+    @classmethod
+    def load(cls, path: Path) -> "ClarificationManifest":
+        manifest = cls(path)
+        try:
+            data = json.loads(manifest.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return manifest
+        if data.get("version") != MANIFEST_VERSION:
+            return manifest
+        manifest.documents = data.get("documents", {})
+        manifest.sections = data.get("sections", {})
+        manifest.exists = True
+        return manifest
+
+    def save(self):
+        data = {
+            "version": MANIFEST_VERSION,
+            "documents": self.documents,
+            "sections": self.sections,
+            "requirements": self.requirement_modules(),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    # ---- 比较 ----
+
+    def diff(self, sections_by_doc: Dict[str, List[Dict]]) -> Dict[str, List[str]]:
+        """与当前输入比较，返回 {"changed": [...], "removed": [...], "unchanged": [...]}（章节 ID）"""
+        current = {section["id"]: section["hash"] for sections in sections_by_doc.values() for section in sections}
+        changed = [sid for sid, digest in current.items() if self.sections.get(sid, {}).get("hash") != digest]
+        removed = [sid for sid in self.sections if sid not in current]
+        unchanged = [sid for sid in current if sid not in changed]
+        return {"changed": changed, "removed": removed, "unchanged": unchanged}
+
+    def modules_for(self, section_ids: Iterable[str]) -> Set[str]:
+        """这些章节（按清单记录）产生的模块"""
+        modules = set()
+        for sid in section_ids:
+            modules.update(self.sections.get(sid, {}).get("modules", []))
+        return modules
+
+    def requirement_modules(self) -> Dict[str, List[str]]:
+        """需求 → 模块"""
+        mapping: Dict[str, List[str]] = {}
+        for info in self.sections.values():
+            for requirement, modules in info.get("requirement_modules", {}).items():
+                targets = mapping.setdefault(requirement, [])
+                targets.extend(module for module in modules if module not in targets)
+        return mapping
+
+    # ---- 记录 ----
+
+    def record(self, sections_by_doc: Dict[str, List[Dict]], modules: List[Dict], incomplete: Iterable[str] = ()):
+        """用本次的章节与（带 source_sections 的）模块重建清单
+
+        incomplete 中的章节（分析失败）不记录哈希，下次运行时仍视为变化的章节；
+        这些章节沿用上次记录的模块和需求，重新分析成功后再更新。
+        """
+        incomplete = set(incomplete)
+        previous = self.sections
+        self.documents = {
+            doc: {
+                "hash": content_hash("".join(section["content"] for section in sections)),
+                "sections": [section["id"] for section in sections],
+            }
+            for doc, sections in sections_by_doc.items()
+        }
+        self.sections = {
+            section["id"]: {"document": doc, "hash": None if section["id"] in incomplete else section["hash"],
+                            "requirements": [], "modules": [],
+                            "requirement_modules": {}}
+            for doc, sections in sections_by_doc.items()
+            for section in sections
+        }
+        for sid in incomplete:
+            if sid in self.sections and sid in previous:
+                for field in ("requirements", "modules", "requirement_modules"):
+                    self.sections[sid][field] = previous[sid].get(field, self.sections[sid][field])
+        for module in modules:
+            name = module.get("module_name") or module.get("name")
+            if not name:
+                continue
+            for sid in module.get("source_sections", []):
+                info = self.sections.get(sid)
+                if info is None:
+                    continue
+                if name not in info["modules"]:
+                    info["modules"].append(name)
+                for requirement in module.get("requirements", []):
+                    requirement = str(requirement)
+                    if requirement not in info["requirements"]:
+                        info["requirements"].append(requirement)
+                    targets = info["requirement_modules"].setdefault(requirement, [])
+                    if name not in targets:
+                        targets.append(name)
+        self.exists = True
+
+
+def dependency_neighbourhood(graph, modules: Iterable[str]) -> Set[str]:
+    """模块及其直接依赖、直接被依赖的模块（只包含依赖图中存在的模块）"""
+    neighbourhood = set()
+    for name in modules:
+        if name not in graph:
+            continue
+        neighbourhood.add(name)
+        info = graph[name]
+        neighbourhood.update(dep for dep in info.get("depends_on", ()) if dep in graph)
+        neighbourhood.update(dep for dep in info.get("depended_by", ()) if dep in graph)
+    return neighbourhood
+
+
+def issue_scope(previous: Dict[str, List[Dict]], scope: Set[str], existing: Set[str]) -> Set[str]:
+    """扩大重新检查的范围：上次报告中与 scope 内模块同属一个问题的其他模块也要重新检查
+
+    例如三个模块共用的重复职责，其中一个模块去掉该职责后，另外两个模块之间的问题仍然存在。
+    """
+    expanded = set(scope)
+    for issues in previous.values():
+        for issue in issues:
+            modules = issue.get("modules", [])
+            if any(module in scope for module in modules):
+                expanded.update(module for module in modules if module in existing)
+    return expanded
+
+
+def merge_issue_reports(previous: Dict[str, List[Dict]], fresh: Dict[str, List], scope: Set[str],
+                        existing: Set[str], recomputed: Iterable[str] = ()) -> Dict[str, List[Dict]]:
+    """增量更新结构化的架构问题报告
+
+    上次报告中涉及 scope 内模块或已不存在模块的问题被丢弃，换成对 scope 重新检查得到的问题；
+    recomputed 中的检查在 fresh 里是全量重算的结果，直接替换上次的报告；
+    其余问题原样保留。
+
+    Args:
+        previous: 上次的报告 {检查名: [ArchitectureIssue.to_dict(), ...]}
+        fresh: 对 scope 内模块重新检查的结果 {检查名: [ArchitectureIssue 或其 to_dict(), ...]}
+        scope: 重新检查的模块
+        existing: 当前依赖图中的全部模块
+        recomputed: fresh 中全量重算的检查名
+    """
+    recomputed = set(recomputed)
+    merged: Dict[str, List[Dict]] = {}
+    for check, issues in previous.items():
+        if check in recomputed:
+            continue
+        merged[check] = [
+            issue for issue in issues
+            if not any(module in scope or module not in existing for module in issue.get("modules", []))
+        ]
+    for check, issues in fresh.items():
+        target = merged.setdefault(check, [])
+        for issue in issues:
+            issue = issue if isinstance(issue, dict) else issue.to_dict()
+            if issue not in target:
+                target.append(issue)
+    return merged
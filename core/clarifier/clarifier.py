@@ -6,12 +6,21 @@ from typing import Dict, List, Optional, Set, Any
 # from clarifier.index_generator import generate_summary_index
 # from dependency_manager import DependencyManager
 from .architecture_manager import ArchitectureManager
+from memory.module_store import get_module_store
 import asyncio
 import json
 import os
 import glob
 
 from .requirement_analyzer import RequirementAnalyzer
+from .document_analysis import (
+    DOCUMENT_ANALYSIS_CONCURRENCY, DocumentAnalysisCache, map_documents, merge_analyses, merge_module_lists,
+    read_text_files
+)
+from .clarification_manifest import (
+    GLOBAL_ISSUE_CHECKS, INCREMENTAL_REVALIDATION_RATIO, ClarificationManifest, dependency_neighbourhood,
+    issue_scope, merge_issue_reports, split_sections
+)
 from .architecture_generator import ArchitectureGenerator
 from core.llm.llm_executor import run_prompt
 from common.logger import Logger  # 假设logger已移至common
@@ -36,6 +45,8 @@ class Clarifier:
         self.requirement_analyzer = RequirementAnalyzer(logger=self.logger)
         self.architecture_generator = ArchitectureGenerator(logger=self.logger)
         self.waiting_for_user = None
+        self.document_concurrency = DOCUMENT_ANALYSIS_CONCURRENCY
+        self.document_cache = DocumentAnalysisCache(self.output_dir / "cache" / "documents")
         
         # 暂时移除对旧模块的依赖
         # self.architecture_manager = None  # 将在初始化完成后设置
@@ -91,13 +102,8 @@ class Clarifier:
         # 分析所有文档内容
         self.logger.log(f"✓ 找到 {len(all_documents)} 个文档。正在分析...", role="system")
         
-        # 将所有文档内容合并
-        all_content = ""
-        for doc_name, content in all_documents.items():
-            all_content += f"\n\n# {doc_name}\n{content}"
-        
-        # 分析需求
-        requirement_analysis = await self.requirement_analyzer.analyze_requirements(all_content, self.run_llm)
+        # 逐文档并发分析需求（内容未变的文档复用缓存），再合并
+        requirement_analysis = await self._analyze_documents_requirements(all_documents)
         
         # 生成需求摘要文档
         await self.requirement_analyzer.generate_requirement_summary(requirement_analysis, self.run_llm)
@@ -348,6 +354,18 @@ class Clarifier:
         
         return {"reasoning_result": result}
     
+    async def _analyze_documents_requirements(self, documents: Dict[str, str]) -> Dict[str, Any]:
+        """逐文档并发分析需求，并合并为一份需求分析"""
+        async def analyze(doc_name: str, content: str):
+            return await self.requirement_analyzer.analyze_requirements(f"# {doc_name}\n{content}", self.run_llm)
+        
+        analyses = await map_documents(
+            documents, analyze, self.document_cache, "requirements",
+            max_concurrency=self.document_concurrency,
+            cacheable=lambda result: isinstance(result, dict) and "error" not in result
+        )
+        return merge_analyses(analyses)
+    
     async def _read_all_markdown_files(self, input_path: str = None) -> Dict[str, str]:
         """读取输入文件夹中的所有Markdown文件
         
@@ -361,18 +379,17 @@ class Clarifier:
         
         input_dir = Path(input_path) if input_path else self.input_dir
         
-        # 获取所有Markdown文件
-        md_files = list(input_dir.glob('**/*.md'))
+        # 并发读取所有Markdown文件
+        md_files = sorted(input_dir.glob('**/*.md'))
         
-        for file_path in md_files:
-            try:
-                content = file_path.read_text(encoding='utf-8')
-                # 使用相对路径作为文档名
-                relative_path = file_path.relative_to(input_dir)
-                documents[str(relative_path)] = content
-                self.logger.log(f"- 已读取文档：{relative_path}", role="system")
-            except Exception as e:
-                self.logger.log(f"⚠️ 读取文件 {file_path} 时出错：{e}", role="system")
+        for file_path, content in await read_text_files(md_files):
+            if isinstance(content, Exception):
+                self.logger.log(f"⚠️ 读取文件 {file_path} 时出错：{content}", role="system")
+                continue
+            # 使用相对路径作为文档名
+            relative_path = file_path.relative_to(input_dir)
+            documents[str(relative_path)] = content
+            self.logger.log(f"- 已读取文档：{relative_path}", role="system")
         
         return documents
     
@@ -429,7 +446,6 @@ class Clarifier:
             output_path: 输出目录
         """
         from pathlib import Path
-        import json
         
         self.logger.log("\n🔄 开始集成legacy模块...", role="system")
         
@@ -440,29 +456,22 @@ class Clarifier:
         output_modules_path = Path(output_path) / "modules"
         output_modules_path.mkdir(parents=True, exist_ok=True)
         
+        batch = []
+        module_store = get_module_store(output_modules_path)
+        for module_data in module_store.all():
+            module_name = module_data.get('module_name', 'unknown')
+            self.logger.log(f"🔍 集成模块: {module_name}", role="system")
+            batch.append((module_data, module_data.get("requirements", [])))
+        for module_name, error in module_store.load_errors.items():
+            self.logger.log(f"⚠️ 处理模块 {module_name} 时出错: {error}", role="system")
+        
         modules_count = 0
-        for module_dir in output_modules_path.iterdir():
-            if not module_dir.is_dir():
-                continue
-                
-            summary_path = module_dir / "full_summary.json"
-            if not summary_path.exists():
-                continue
-                
+        if batch:
             try:
-                with open(summary_path, "r", encoding="utf-8") as f:
-                    module_data = json.load(f)
-                    
-                module_name = module_data.get('module_name', 'unknown')
-                self.logger.log(f"🔍 集成模块: {module_name}", role="system")
-                
-                await self.architecture_manager.process_new_module(
-                    module_data, 
-                    module_data.get("requirements", [])
-                )
-                modules_count += 1
+                results = await self.architecture_manager.process_new_modules(batch)
+                modules_count = sum(1 for result in results if result.get("status") != "error")
             except Exception as e:
-                self.logger.log(f"⚠️ 处理模块 {module_dir.name} 时出错: {str(e)}", role="system")
+                self.logger.log(f"⚠️ 批量处理模块时出错: {str(e)}", role="system")
         
         self.logger.log(f"✅ 集成legacy模块完成，共处理 {modules_count} 个模块", role="system")
         
@@ -513,12 +522,18 @@ class Clarifier:
             
         self.logger.log(f"✅ 已加载 {len(documents)} 个文档", role="system")
         
-        # 将所有文档内容合并
-        all_content = ""
-        for doc_name, content in documents.items():
-            all_content += f"\n\n# {doc_name}\n{content}"
+        output_dir = Path(output_path)
+        manifest = ClarificationManifest.load(output_dir / "clarification_manifest.json")
+        sections_by_doc = {name: split_sections(name, content) for name, content in documents.items()}
+        section_diff = manifest.diff(sections_by_doc)
+        if manifest.exists:
+            self.logger.log(
+                f"📑 章节变化: {len(section_diff['changed'])} 个新增/修改，{len(section_diff['removed'])} 个删除，"
+                f"{len(section_diff['unchanged'])} 个未变",
+                role="system"
+            )
         
-        self.logger.log("🧠 正在分析文档，提取细粒度模块...", role="system")
+        self.logger.log("🧠 正在逐章节分析，提取细粒度模块...", role="system")
         
         architecture_layers = [
             "表现层 (Presentation)",
@@ -527,12 +542,37 @@ class Clarifier:
             "基础设施层 (Infrastructure)"
         ]
         
+        section_contents = {}
+        documents_of = {}
+        for doc_name, sections in sections_by_doc.items():
+            for section in sections:
+                section_contents[section["id"]] = section["content"]
+                documents_of[section["id"]] = doc_name
+        
+        async def analyze(section_id: str, content: str):
+            # 分析失败返回 None（不缓存、不记录章节哈希）；没有模块的章节返回空列表
+            try:
+                return await self.requirement_analyzer.analyze_granular_modules(
+                    f"# {documents_of[section_id]}\n{content}",
+                    self.run_llm,
+                    architecture_layers,
+                    save=False,
+                    raise_on_error=True
+                )
+            except Exception as e:
+                self.logger.log(f"⚠️ 章节 {section_id} 分析失败: {str(e)}", role="system")
+                return None
+        
         try:
-            modules = await self.requirement_analyzer.analyze_granular_modules(
-                all_content, 
-                self.run_llm,
-                architecture_layers
+            # 逐章节并发提取（内容未变的章节复用缓存），合并同名模块并记录来源章节后统一保存
+            module_lists = await map_documents(
+                section_contents, analyze, DocumentAnalysisCache(output_dir / "cache" / "documents"),
+                "granular_modules", params=json.dumps(architecture_layers, ensure_ascii=False),
+                max_concurrency=self.document_concurrency
             )
+            modules = merge_module_lists(module_lists, documents_of)
+            if modules:
+                self.requirement_analyzer._save_granular_modules(modules)
             
             if not modules:
                 self.logger.log("❌ 未能从文档中提取模块", role="system")
@@ -543,28 +583,51 @@ class Clarifier:
             self.logger.log(f"❌ 提取模块时出错: {str(e)}", role="system")
             return {"modules_count": 0, "issues_count": 0}
         
-        output_dir = Path(output_path)
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        modules_count = 0
+        # 受影响的模块：本次由变化章节产生的模块，以及上次由变化/删除章节产生的模块
+        changed_sections = set(section_diff["changed"])
+        affected_modules = manifest.modules_for(section_diff["changed"] + section_diff["removed"])
+        for module in modules:
+            if changed_sections.intersection(module.get("source_sections", [])):
+                affected_modules.add(module.get("module_name"))
+        
+        # 上次由变化/删除章节产生、本次不再产生的模块从模块存储中删除；分析失败的章节的模块保留
+        failed_sections = [sid for sid, result in module_lists.items() if result is None]
+        produced = {module.get("module_name") for module in modules}
+        disappeared = affected_modules - produced - manifest.modules_for(failed_sections)
+        if disappeared:
+            try:
+                module_store = get_module_store()
+                for name in sorted(disappeared):
+                    if module_store.delete(name):
+                        self.logger.log(f"🗑️ 已删除不再产生的模块: {name}", role="system")
+            except Exception as e:
+                self.logger.log(f"⚠️ 删除不再产生的模块失败: {str(e)}", role="system")
+        
+        batch = []
         for module in modules:
             module_name = module.get("module_name")
             if not module_name:
                 continue
                 
+            module_copy = module.copy()
+            if "module_name" in module_copy and "name" not in module_copy:
+                module_copy["name"] = module_copy["module_name"]
+            batch.append((module_copy, module_copy.get("requirements", [])))
+        
+        modules_count = 0
+        if batch:
             try:
-                module_copy = module.copy()
-                if "module_name" in module_copy and "name" not in module_copy:
-                    module_copy["name"] = module_copy["module_name"]
-                
-                await self.architecture_manager.process_new_module(
-                    module_copy, 
-                    module_copy.get("requirements", [])
-                )
-                modules_count += 1
-                self.logger.log(f"✅ 处理模块: {module_name}", role="system")
+                results = await self.architecture_manager.process_new_modules(batch)
+                for (module_copy, _), result in zip(batch, results):
+                    if result.get("status") == "error":
+                        self.logger.log(f"❌ 处理模块 {module_copy['name']} 时出错: {result.get('message', '')}", role="system")
+                    else:
+                        modules_count += 1
+                        self.logger.log(f"✅ 处理模块: {module_copy['name']}", role="system")
             except Exception as e:
-                self.logger.log(f"❌ 处理模块 {module_name} 时出错: {str(e)}", role="system")
+                self.logger.log(f"❌ 批量处理模块时出错: {str(e)}", role="system")
         
         self.logger.log(f"✅ 共处理了 {modules_count} 个模块", role="system")
         
@@ -588,7 +651,7 @@ class Clarifier:
             from .architecture_reasoner import ArchitectureReasoner
             
             reasoner = ArchitectureReasoner(architecture_manager=self.architecture_manager, logger=self.logger)
-            issues = await reasoner.check_all_issues()
+            issues = await self._check_granular_issues(reasoner, manifest, affected_modules, output_dir / "issues")
             
             issues_count = sum(len(issue_list) for issue_list in issues.values())
             
@@ -610,6 +673,12 @@ class Clarifier:
             self.logger.log(f"❌ 检查架构问题失败: {str(e)}", role="system")
             issues_count = 0
         
+        try:
+            manifest.record(sections_by_doc, modules, incomplete=failed_sections)
+            manifest.save()
+        except Exception as e:
+            self.logger.log(f"⚠️ 保存澄清清单失败: {str(e)}", role="system")
+        
         self.logger.log("\n🎉 细粒度模块生成完成！", role="system")
         self.logger.log(f"- 共生成 {modules_count} 个模块", role="system")
         self.logger.log(f"- 检测到 {issues_count if 'issues_count' in locals() else 0} 个架构问题", role="system")
@@ -617,9 +686,57 @@ class Clarifier:
         
         return {
             "modules_count": modules_count,
-            "issues_count": issues_count if 'issues_count' in locals() else 0
+            "issues_count": issues_count if 'issues_count' in locals() else 0,
+            "changed_sections": len(section_diff["changed"]) + len(section_diff["removed"]),
+            "affected_modules": sorted(name for name in affected_modules if name)
         }
     
+    async def _check_granular_issues(self, reasoner, manifest: ClarificationManifest, affected_modules: Set[str],
+                                     issues_dir: Path) -> Dict[str, List[str]]:
+        """检查架构问题；重新澄清时只重新检查受影响模块的依赖邻域
+        
+        结构化的问题报告保存在 architecture_issues_detail.json 中。首次运行、上次报告缺失
+        或受影响模块过多时执行全量检查；否则丢弃上次报告中涉及邻域模块的问题，
+        对邻域内每个模块做单模块检查后合并。结果不能按模块拆分的检查（GLOBAL_ISSUE_CHECKS，
+        如循环依赖、职责重叠）每次都全量重算。
+        
+        Returns:
+            {检查名: [问题描述, ...]}
+        """
+        detail_path = issues_dir / "architecture_issues_detail.json"
+        graph = self.architecture_manager.index.dependency_graph
+        previous = None
+        if manifest.exists:
+            try:
+                previous = json.loads(detail_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                previous = None
+        
+        existing = set(graph)
+        scope = dependency_neighbourhood(graph, affected_modules)
+        if previous is None or len(scope) > len(existing) * INCREMENTAL_REVALIDATION_RATIO:
+            issues = await reasoner.check_all_issues()
+            detail = {check: [issue.to_dict() for issue in items]
+                      for check, items in reasoner.last_architecture_issues.items()}
+        else:
+            scope = issue_scope(previous, scope, existing)
+            self.logger.log(f"🔍 增量检查 {len(scope)} 个受影响模块及其依赖邻域", role="system")
+            fresh: Dict[str, List] = dict(reasoner.analyze_architecture(GLOBAL_ISSUE_CHECKS))
+            for name in sorted(scope):
+                for check, items in (await reasoner.check_module_issues(name)).items():
+                    if check not in GLOBAL_ISSUE_CHECKS:
+                        fresh.setdefault(check, []).extend(items)
+            detail = merge_issue_reports(previous, fresh, scope, existing, recomputed=GLOBAL_ISSUE_CHECKS)
+            issues = {check: [issue["message"] for issue in items] for check, items in detail.items()}
+        
+        issues_dir.mkdir(parents=True, exist_ok=True)
+        if detail:
+            with open(detail_path, "w", encoding="utf-8") as f:
+                json.dump(detail, f, ensure_ascii=False, indent=2, default=str)
+        elif detail_path.exists():
+            detail_path.unlink()
+        return issues
+    
     def continue_from_user(self):
         if self.waiting_for_user:
             self.waiting_for_user.set()
@@ -0,0 +1,337 @@
+from array import array
+from collections.abc import Mapping, MutableMapping, MutableSet
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import sys
+
+CORE_KEYS = ("depends_on", "depended_by", "pattern", "layer")
+
+
+class ModuleInterner:
+    """模块名 <-> 整数ID 的双向映射，名称只保存一份"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def intern(self, name: str) -> int:
+        node = self.ids.get(name)
+        if node is None:
+            name = sys.intern(name) if type(name) is str else name
+            node = len(self.names)
+            self.ids[name] = node
+            self.names.append(name)
+        return node
+
+    def lookup(self, name: str) -> Optional[int]:
+        return self.ids.get(name)
+
+    def __len__(self):
+        return len(self.names)
+
+
+class EdgeSetView(MutableSet):
+    """某个节点的出边（depends_on）或入边（depended_by）的集合视图，修改会同步到反向边"""
+
+    __slots__ = ("_graph", "_node", "_reverse")
+
+    def __init__(self, graph: "CompactDependencyGraph", node: int, reverse: bool):
+        self._graph = graph
+        self._node = node
+        self._reverse = reverse
+
+    def _ids(self) -> array:
+        return self._graph._in[self._node] if self._reverse else self._graph._out[self._node]
+
+    def __contains__(self, name) -> bool:
+        other = self._graph.interner.lookup(name)
+        return other is not None and other in self._ids()
+
+    def __iter__(self):
+        names = self._graph.interner.names
+        return iter([names[i] for i in self._ids()])
+
+    def __len__(self) -> int:
+        return len(self._ids())
+
+    def add(self, name: str):
+        other = self._graph._ensure_node(name)
+        if self._reverse:
+            self._graph._add_edge(other, self._node)
+        else:
+            self._graph._add_edge(self._node, other)
+
+    def discard(self, name: str):
+        other = self._graph.interner.lookup(name)
+        if other is None:
+            return
+        if self._reverse:
+            self._graph._remove_edge(other, self._node)
+        else:
+            self._graph._remove_edge(self._node, other)
+
+    def __repr__(self):
+        return repr(set(self))
+
+
+class NodeView(MutableMapping):
+    """单个模块的字典视图：depends_on / depended_by / pattern / layer 及其他附加字段"""
+
+    __slots__ = ("_graph", "_node")
+
+    def __init__(self, graph: "CompactDependencyGraph", node: int):
+        self._graph = graph
+        self._node = node
+
+    def __getitem__(self, key):
+        if key == "depends_on":
+            return EdgeSetView(self._graph, self._node, reverse=False)
+        if key == "depended_by":
+            return EdgeSetView(self._graph, self._node, reverse=True)
+        if key == "pattern":
+            return self._graph._pattern[self._node]
+        if key == "layer":
+            return self._graph._layer[self._node]
+        extra = self._graph._extra[self._node]
+        if extra is None or key not in extra:
+            raise KeyError(key)
+        return extra[key]
+
+    def __setitem__(self, key, value):
+        if key == "depends_on":
+            self._graph._set_edges(self._node, value, reverse=False)
+        elif key == "depended_by":
+            self._graph._set_edges(self._node, value, reverse=True)
+        elif key == "pattern":
+            self._graph._pattern[self._node] = value
+            self._graph._touch(self._node)
+        elif key == "layer":
+            self._graph._layer[self._node] = value
+            self._graph._touch(self._node)
+        else:
+            if self._graph._extra[self._node] is None:
+                self._graph._extra[self._node] = {}
+            self._graph._extra[self._node][key] = value
+            self._graph._touch(self._node)
+
+    def __delitem__(self, key):
+        extra = self._graph._extra[self._node]
+        if key in CORE_KEYS or extra is None or key not in extra:
+            raise KeyError(key)
+        del extra[key]
+        self._graph._touch(self._node)
+
+    def __iter__(self):
+        yield from CORE_KEYS
+        yield from self._graph._extra[self._node] or ()
+
+    def __len__(self):
+        return len(CORE_KEYS) + len(self._graph._extra[self._node] or ())
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class CompactDependencyGraph(MutableMapping):
+    """以整数ID存储的依赖图，对外保持 dict-of-dicts 的接口
+
+    - 模块名经 ModuleInterner 映射为整数ID
+    - 每个节点的出边/入边是紧凑的 int 数组，反向边随正向边自动维护
+    - to_csr() 导出 CSR 数组（numpy），供环检测、层级和影响分析做批量遍历
+
+    只被依赖、尚未注册的模块也会分配ID，但不出现在映射的键中。
+    为某个模块整体赋值时替换它的 depends_on；depended_by 中的模块只会被追加为入边，
+    已有入边由依赖方的 depends_on 决定，不会被清除。
+    changed_since() 返回某个时间戳之后被修改过的模块（就地修改附加字段的值不计入），供增量检查使用。
+    """
+
+    def __init__(self, data: Optional[Mapping] = None):
+        self.interner = ModuleInterner()
+        self._out: List[array] = []
+        self._in: List[array] = []
+        self._pattern: List[str] = []
+        self._layer: List[str] = []
+        self._extra: List[Optional[Dict]] = []
+        self._present: Dict[int, None] = {}  # 已注册模块，保持插入顺序
+        self._version = 0
+        self._stamp = 0
+        self._touched: Dict[int, int] = {}  # 节点 -> 最近一次修改的时间戳，按修改先后排列
+        self._csr_cache: Dict[bool, Tuple[int, object, object]] = {}
+        if data:
+            self.update(data)
+
+    # ---- 内部：节点与边 ----
+
+    def _ensure_node(self, name: str) -> int:
+        node = self.interner.intern(name)
+        if node == len(self._out):
+            self._out.append(array("i"))
+            self._in.append(array("i"))
+            self._pattern.append("")
+            self._layer.append("")
+            self._extra.append(None)
+        return node
+
+    def _touch(self, node: int):
+        self._stamp += 1
+        self._touched.pop(node, None)
+        self._touched[node] = self._stamp
+
+    def _add_edge(self, source: int, target: int):
+        if target in self._out[source]:
+            return
+        self._out[source].append(target)
+        self._in[target].append(source)
+        self._version += 1
+        self._touch(source)
+        self._touch(target)
+
+    def _remove_edge(self, source: int, target: int):
+        if target not in self._out[source]:
+            return
+        self._out[source].remove(target)
+        self._in[target].remove(source)
+        self._version += 1
+        self._touch(source)
+        self._touch(target)
+
+    def _set_edges(self, node: int, names: Iterable[str], reverse: bool):
+        wanted = [self._ensure_node(name) for name in names]
+        current = self._in[node] if reverse else self._out[node]
+        wanted_set = set(wanted)
+        for other in [i for i in current if i not in wanted_set]:
+            if reverse:
+                self._remove_edge(other, node)
+            else:
+                self._remove_edge(node, other)
+        for other in wanted:
+            if reverse:
+                self._add_edge(other, node)
+            else:
+                self._add_edge(node, other)
+
+    # ---- dict 接口 ----
+
+    def __getitem__(self, name: str) -> NodeView:
+        node = self.interner.lookup(name)
+        if node is None or node not in self._present:
+            raise KeyError(name)
+        return NodeView(self, node)
+
+    def __setitem__(self, name: str, value: Mapping):
+        node = self._ensure_node(name)
+        self._present[node] = None
+        self._set_edges(node, value.get("depends_on", ()), reverse=False)
+        for source in value.get("depended_by", ()):
+            self._add_edge(self._ensure_node(source), node)
+        self._pattern[node] = value.get("pattern", "")
+        self._layer[node] = value.get("layer", "")
+        extra = {k: v for k, v in value.items() if k not in CORE_KEYS}
+        self._extra[node] = extra or None
+        self._touch(node)
+
+    def __delitem__(self, name: str):
+        node = self.interner.lookup(name)
+        if node is None or node not in self._present:
+            raise KeyError(name)
+        del self._present[node]
+        self._set_edges(node, (), reverse=False)
+        self._pattern[node] = ""
+        self._layer[node] = ""
+        self._extra[node] = None
+        self._touch(node)
+
+    def __contains__(self, name) -> bool:
+        node = self.interner.lookup(name)
+        return node is not None and node in self._present
+
+    def __iter__(self):
+        names = self.interner.names
+        return iter([names[node] for node in self._present])
+
+    def __len__(self) -> int:
+        return len(self._present)
+
+    def __repr__(self):
+        return repr({name: dict(view) for name, view in self.items()})
+
+    def to_dict(self) -> Dict[str, Dict]:
+        """导出为普通的 dict-of-dicts（集合为 set）"""
+        return {
+            name: {
+                "depends_on": set(view["depends_on"]),
+                "depended_by": set(view["depended_by"]),
+                **{k: view[k] for k in view if k not in ("depends_on", "depended_by")}
+            } for name, view in self.items()
+        }
+
+    copy = to_dict
+
+    # ---- 批量分析 ----
+
+    def changed_since(self, stamp: int) -> Tuple[List[str], int]:
+        """返回时间戳 stamp 之后被修改过的模块名（含已删除的）和当前时间戳，开销与修改数量相关"""
+        names = self.interner.names
+        changed = []
+        for node in reversed(self._touched):
+            if self._touched[node] <= stamp:
+                break
+            changed.append(names[node])
+        return changed, self._stamp
+
+    def node_id(self, name: str) -> Optional[int]:
+        return self.interner.lookup(name)
+
+    def to_csr(self, reverse: bool = False):
+        """返回 (indptr, indices) 两个 numpy int32 数组，覆盖所有已分配ID的节点；结果按版本缓存"""
+        cached = self._csr_cache.get(reverse)
+        if cached and cached[0] == self._version and len(cached[1]) == len(self._out) + 1:
+            return cached[1], cached[2]
+
+        import numpy as np
+        rows = self._in if reverse else self._out
+        lengths = np.fromiter((len(row) for row in rows), dtype=np.int32, count=len(rows))
+        indptr = np.zeros(len(rows) + 1, dtype=np.int32)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.empty(int(indptr[-1]), dtype=np.int32)
+        for node, row in enumerate(rows):
+            if row:
+                indices[indptr[node]:indptr[node + 1]] = np.frombuffer(row, dtype=np.int32)
+        self._csr_cache[reverse] = (self._version, indptr, indices)
+        return indptr, indices
+
+    def reachable(self, names: Iterable[str], reverse: bool = False) -> Set[str]:
+        """从 names 出发沿依赖（reverse=True 时沿被依赖）方向可达的模块，不含起点本身
+
+        按层批量展开 CSR，避免逐个节点的 Python 遍历。
+        """
+        import numpy as np
+        starts = [node for node in (self.interner.lookup(n) for n in names) if node is not None]
+        if not starts:
+            return set()
+        indptr, indices = self.to_csr(reverse)
+        visited = np.zeros(len(indptr) - 1, dtype=bool)
+        frontier = np.array(sorted(set(starts)), dtype=np.int32)
+        visited[frontier] = True
+        reached = []
+        while frontier.size:
+            begins, ends = indptr[frontier], indptr[frontier + 1]
+            counts = ends - begins
+            total = int(counts.sum())
+            if total == 0:
+                break
+            offsets = np.repeat(begins - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+            neighbours = indices[np.arange(total, dtype=np.int64) + offsets]
+            neighbours = np.unique(neighbours[~visited[neighbours]])
+            visited[neighbours] = True
+            reached.append(neighbours)
+            frontier = neighbours
+        start_set = set(starts)
+        result = set()
+        names_list = self.interner.names
+        for chunk in reached:
+            result.update(names_list[i] for i in chunk.tolist() if i not in start_set)
+        return result
+
+    def impacted_by(self, name: str) -> Set[str]:
+        """修改 name 后会受影响的模块（直接或间接依赖它的模块）"""
+        return self.reachable([name], reverse=True)
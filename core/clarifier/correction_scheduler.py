@@ -0,0 +1,200 @@
+import heapq
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# 修正类型的默认优先级（数值越小越先处理）
+CORRECTION_PRIORITIES = {
+    "cycle": 0,
+    "consistency": 1,
+    "layer": 2,
+    "module": 3,
+}
+
+# 默认预算
+DEFAULT_CORRECTION_BUDGET = {
+    "max_calls": 50,               # 全部修正最多的 LLM 调用次数
+    "max_calls_per_target": 2,     # 每个模块/层级最多的修正调用次数
+    "max_seconds": 900.0,          # 从第一次提交起全部修正的时间预算（秒）
+    "max_seconds_per_target": 180.0,  # 每个模块/层级累计的修正时间（秒）
+    "batch_size": 5,               # 同组问题合并到一个修正提示词的最大数量
+}
+
+
+def issue_signature(kind: str, target: str, issues: Any) -> str:
+    """问题集合的签名，用于去重"""
+    return json.dumps([kind, target, issues], ensure_ascii=False, sort_keys=True, default=str)
+
+
+class CorrectionScheduler:
+    """自我修正的调度器
+
+    - 问题按优先级入队（循环依赖 > 一致性 > 层级 > 模块），相同的问题集合只处理一次
+    - 同一目标尚未处理的问题合并为一条；同组（如同一层级的模块）问题批量交给一次修正调用
+    - 全局与每个目标的 LLM 调用次数、时间都有预算，超出预算的问题被跳过并记录
+    """
+
+    def __init__(self, max_calls: int = 50, max_calls_per_target: int = 2, max_seconds: float = 900.0,
+                 max_seconds_per_target: float = 180.0, batch_size: int = 5,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_calls = max_calls
+        self.max_calls_per_target = max_calls_per_target
+        self.max_seconds = max_seconds
+        self.max_seconds_per_target = max_seconds_per_target
+        self.batch_size = max(1, batch_size)
+        self.clock = clock
+        self.calls = 0
+        self.started_at: Optional[float] = None
+        self.target_calls: Dict[str, int] = {}
+        self.target_seconds: Dict[str, float] = {}
+        self.skipped: List[Dict] = []
+        self._seen = set()
+        self._queue: List[Tuple[int, int, Dict]] = []
+        self._queued: Dict[Tuple[str, str], Dict] = {}
+        self._seq = 0
+
+    # ---- 入队 ----
+
+    def submit(self, kind: str, target: str, issues: Any, payload: Any = None,
+               group: Optional[str] = None, priority: Optional[int] = None) -> bool:
+        """提交待修正的问题，返回是否入队（重复或超出预算时返回 False）"""
+        signature = issue_signature(kind, target, issues)
+        if signature in self._seen:
+            print(f"🔄 [CORRECTION] 跳过重复的修正请求: {kind} '{target}'")
+            return False
+        self._seen.add(signature)
+        if self.started_at is None:
+            self.started_at = self.clock()
+
+        reason = self._budget_exceeded(target)
+        if reason:
+            self._skip(kind, target, issues, reason)
+            return False
+
+        queued = self._queued.get((kind, target))
+        if queued is not None:
+            queued["issues"] = _merge_issues(queued["issues"], issues)
+            if payload is not None:
+                queued["payload"] = payload
+            return True
+
+        entry = {
+            "kind": kind,
+            "target": target,
+            "issues": issues,
+            "payload": payload,
+            "group": group or kind,
+            "priority": CORRECTION_PRIORITIES.get(kind, len(CORRECTION_PRIORITIES)) if priority is None else priority,
+        }
+        self._queued[(kind, target)] = entry
+        heapq.heappush(self._queue, (entry["priority"], self._seq, entry))
+        self._seq += 1
+        return True
+
+    def __len__(self):
+        return len(self._queue)
+
+    # ---- 执行 ----
+
+    async def drain(self, handler: Callable[[str, List[Dict]], Awaitable[Any]]) -> List[Tuple[List[Dict], Any]]:
+        """按优先级处理队列中的问题
+
+        Args:
+            handler: async handler(kind, entries)，一次修正调用处理同组的若干问题
+
+        Returns:
+            [(entries, handler 返回值), ...]
+        """
+        results = []
+        while self._queue:
+            batch = self._next_batch()
+            if not batch:
+                continue
+            start = self.clock()
+            self.calls += 1
+            for entry in batch:
+                self.target_calls[entry["target"]] = self.target_calls.get(entry["target"], 0) + 1
+            try:
+                result = await handler(batch[0]["kind"], batch)
+            finally:
+                elapsed = self.clock() - start
+                for entry in batch:
+                    self.target_seconds[entry["target"]] = self.target_seconds.get(entry["target"], 0.0) + elapsed
+            results.append((batch, result))
+        return results
+
+    def _next_batch(self) -> List[Dict]:
+        _, _, head = heapq.heappop(self._queue)
+        del self._queued[(head["kind"], head["target"])]
+        reason = self._budget_exceeded(head["target"])
+        if reason:
+            self._skip(head["kind"], head["target"], head["issues"], reason)
+            if reason == "global":
+                self._skip_all("global")
+            return []
+
+        batch = [head]
+        if self.batch_size > 1:
+            related = sorted(
+                (item for item in self._queue if item[2]["group"] == head["group"] and item[2]["kind"] == head["kind"]),
+                key=lambda item: item[:2]
+            )
+            for item in related:
+                if len(batch) >= self.batch_size:
+                    break
+                entry = item[2]
+                if self._budget_exceeded(entry["target"]):
+                    continue
+                batch.append(entry)
+            if len(batch) > 1:
+                taken = {id(entry) for entry in batch}
+                self._queue = [item for item in self._queue if id(item[2]) not in taken]
+                heapq.heapify(self._queue)
+                for entry in batch[1:]:
+                    del self._queued[(entry["kind"], entry["target"])]
+        return batch
+
+    # ---- 预算 ----
+
+    def _budget_exceeded(self, target: str) -> Optional[str]:
+        """返回超出的预算（"global" / "target"），未超出时返回 None"""
+        if self.calls >= self.max_calls:
+            return "global"
+        if self.started_at is not None and self.clock() - self.started_at >= self.max_seconds:
+            return "global"
+        if self.target_calls.get(target, 0) >= self.max_calls_per_target:
+            return "target"
+        if self.target_seconds.get(target, 0.0) >= self.max_seconds_per_target:
+            return "target"
+        return None
+
+    def _skip(self, kind: str, target: str, issues: Any, reason: str):
+        print(f"⚠️ [CORRECTION] 超出{'全局' if reason == 'global' else '目标'}修正预算，跳过: {kind} '{target}'")
+        self.skipped.append({"kind": kind, "target": target, "issues": issues, "reason": reason})
+
+    def _skip_all(self, reason: str):
+        for _, _, entry in self._queue:
+            self._skip(entry["kind"], entry["target"], entry["issues"], reason)
+        self._queue.clear()
+        self._queued.clear()
+
+    def summary(self) -> Dict:
+        """修正统计"""
+        return {
+            "calls": self.calls,
+            "elapsed": 0.0 if self.started_at is None else self.clock() - self.started_at,
+            "target_calls": dict(self.target_calls),
+            "skipped": len(self.skipped),
+        }
+
+
+def _merge_issues(existing: Any, new: Any) -> Any:
+    """合并同一目标的问题：列表去重拼接，字典按键合并列表"""
+    if isinstance(existing, dict) and isinstance(new, dict):
+        merged = dict(existing)
+        for key, value in new.items():
+            merged[key] = _merge_issues(merged[key], value) if key in merged else value
+        return merged
+    if isinstance(existing, list) and isinstance(new, list):
+        return existing + [item for item in new if item not in existing]
+    return new
@@ -0,0 +1,215 @@
+from collections import deque
+from typing import Dict, Iterable, List, Mapping, Optional, Set
+
+# 强连通分量不超过该规模时精确求最短环（对每个节点做一次 BFS），否则只求经过代表节点的最短环
+EXACT_SHORTEST_CYCLE_LIMIT = 200
+
+
+def strongly_connected_components(succ: List[List[int]]) -> List[List[int]]:
+    """迭代版 Tarjan 算法，O(V+E)，不受递归深度限制
+
+    Args:
+        succ: 邻接表，succ[v] 为 v 的后继节点编号
+
+    Returns:
+        强连通分量列表（逆拓扑序：被依赖的分量在前）
+    """
+    n = len(succ)
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    stack: List[int] = []
+    components: List[List[int]] = []
+    counter = 0
+
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, 0)]
+        while work:
+            v, i = work[-1]
+            edges = succ[v]
+            if i < len(edges):
+                work[-1] = (v, i + 1)
+                w = edges[i]
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, 0))
+                elif on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if low[v] < low[parent]:
+                    low[parent] = low[v]
+            if low[v] == index[v]:
+                component = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    component.append(w)
+                    if w == v:
+                        break
+                components.append(component)
+    return components
+
+
+def _is_cyclic(succ: List[List[int]], component: List[int]) -> bool:
+    return len(component) > 1 or component[0] in succ[component[0]]
+
+
+def shortest_cycle(succ: List[List[int]], component: Iterable[int],
+                   exact_limit: int = EXACT_SHORTEST_CYCLE_LIMIT) -> Optional[List[int]]:
+    """求强连通分量内的最短环，返回 [v0, v1, ..., v0]
+
+    环一定位于某个强连通分量内部，因此 BFS 只在分量内进行；分量较大时只从编号最小的节点出发。
+    """
+    members = set(component)
+    if not members:
+        return None
+    starts = sorted(members) if len(members) <= exact_limit else [min(members)]
+
+    best = None
+    for start in starts:
+        parent = {start: None}
+        queue = deque([start])
+        found = None
+        while queue and found is None:
+            v = queue.popleft()
+            for w in succ[v]:
+                if w == start:
+                    found = v
+                    break
+                if w in members and w not in parent:
+                    parent[w] = v
+                    queue.append(w)
+        if found is None:
+            continue
+        path = []
+        node = found
+        while node is not None:
+            path.append(node)
+            node = parent[node]
+        cycle = path[::-1] + [start]
+        if best is None or len(cycle) < len(best):
+            best = cycle
+            if len(best) == 2:
+                break
+    return best
+
+
+def elementary_cycles(succ: List[List[int]], component: Iterable[int], limit: int) -> List[List[int]]:
+    """Johnson 算法枚举分量内的基本环，最多返回 limit 个，每个环为 [v0, ..., v0]"""
+    cycles: List[List[int]] = []
+    members = set(component)
+    pending = [sorted(members)]
+
+    while pending and len(cycles) < limit:
+        scc = pending.pop()
+        nodes = set(scc)
+        start = scc[0]
+        graph = {v: [w for w in succ[v] if w in nodes] for v in scc}
+
+        path = [start]
+        blocked = {start}
+        blocked_by: Dict[int, Set[int]] = {}
+        closed = [False]
+        stack = [iter(graph[start])]
+        while stack:
+            for w in stack[-1]:
+                if w == start:
+                    cycles.append(path + [start])
+                    closed[-1] = True
+                    if len(cycles) >= limit:
+                        return cycles
+                elif w not in blocked:
+                    path.append(w)
+                    closed.append(False)
+                    stack.append(iter(graph[w]))
+                    blocked.add(w)
+                    break
+            else:
+                stack.pop()
+                v = path.pop()
+                if closed.pop():
+                    if closed:
+                        closed[-1] = True
+                    to_unblock = [v]
+                    while to_unblock:
+                        u = to_unblock.pop()
+                        if u in blocked:
+                            blocked.discard(u)
+                            to_unblock.extend(blocked_by.pop(u, ()))
+                else:
+                    for w in graph[v]:
+                        blocked_by.setdefault(w, set()).add(v)
+
+        # 去掉起点后在剩余子图中继续查找
+        rest = [v for v in scc if v != start]
+        local = {v: i for i, v in enumerate(rest)}
+        sub_succ = [[local[w] for w in graph[v] if w in local] for v in rest]
+        for sub in strongly_connected_components(sub_succ):
+            if _is_cyclic(sub_succ, sub):
+                pending.append(sorted(rest[i] for i in sub))
+    return cycles
+
+
+def analyze_dependency_cycles(dependency_graph: Mapping[str, Mapping], max_cycles_per_component: int = 0,
+                              exact_limit: int = EXACT_SHORTEST_CYCLE_LIMIT) -> List[Dict]:
+    """找出依赖图中所有含环的强连通分量，按分量内最早加入图的模块排序
+
+    Args:
+        dependency_graph: 模块名 -> {"depends_on": ...}；不在图中的依赖被忽略
+        max_cycles_per_component: 每个分量最多枚举的基本环数，0 表示只给出最短环
+        exact_limit: 精确求最短环的分量规模上限
+
+    Returns:
+        [{"modules": [...], "shortest_cycle": [...], "cycles": [[...], ...], "truncated": bool}]
+    """
+    names = list(dependency_graph)
+    ids = {name: i for i, name in enumerate(names)}
+    succ = [
+        [ids[dep] for dep in info.get("depends_on", ()) if dep in ids]
+        for info in dependency_graph.values()
+    ]
+    return analyze_cycles(names, succ, max_cycles_per_component, exact_limit)
+
+
+def analyze_cycles(names: List[str], succ: List[List[int]], max_cycles_per_component: int = 0,
+                   exact_limit: int = EXACT_SHORTEST_CYCLE_LIMIT) -> List[Dict]:
+    """在已编号的邻接表上分析含环分量，参数与返回值同 analyze_dependency_cycles"""
+    cyclic = sorted(
+        (sorted(component) for component in strongly_connected_components(succ) if _is_cyclic(succ, component)),
+        key=lambda component: component[0]
+    )
+    results = []
+    for component in cyclic:
+        cycles = []
+        if max_cycles_per_component > 0:
+            # 多枚举一个环用于判断是否截断
+            cycles = elementary_cycles(succ, component, max_cycles_per_component + 1)
+        results.append({
+            "modules": [names[i] for i in component],
+            "shortest_cycle": [names[i] for i in shortest_cycle(succ, component, exact_limit)],
+            "cycles": [[names[i] for i in cycle] for cycle in cycles[:max_cycles_per_component]],
+            "truncated": len(cycles) > max_cycles_per_component
+        })
+    return results
+
+
+def format_cycles(components: List[Dict]) -> List[str]:
+    """将分析结果格式化为 "A -> B -> A"；枚举了基本环时逐个列出，否则只列最短环"""
+    return [
+        " -> ".join(cycle)
+        for component in components
+        for cycle in (component["cycles"] or [component["shortest_cycle"]])
+    ]
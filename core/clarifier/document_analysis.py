@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+# 同时进行的文档分析（LLM 调用）数上限
+DOCUMENT_ANALYSIS_CONCURRENCY = 4
+
+# 分析提示词或结果结构变化时递增，使旧缓存失效
+ANALYSIS_CACHE_VERSION = 1
+
+# 列表中字典元素的标识字段（按顺序取第一个存在的）
+_ITEM_KEY_FIELDS = ("module_name", "name", "id", "title")
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class DocumentAnalysisCache:
+    """按文档内容哈希缓存单个文档的分析结果
+
+    键由分析类型、分析参数和文档内容共同决定，文档内容不变时直接复用结果。
+    cache_dir 为 None 时只缓存在内存中。
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._memory: Dict[str, Any] = {}
+
+    @staticmethod
+    def key(kind: str, content: str, params: str = "") -> str:
+        return content_hash(f"{ANALYSIS_CACHE_VERSION}\0{kind}\0{params}\0{content}")
+
+    def get(self, key: str) -> Optional[Any]:
+        if key in self._memory:
+            return self._memory[key]
+        if self.cache_dir is None:
+            return None
+        path = self.cache_dir / f"{key}.json"
+        try:
+            value = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        self._memory[key] = value
+        return value
+
+    def put(self, key: str, value: Any):
+        self._memory[key] = value
+        if self.cache_dir is None:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self.cache_dir / f"{key}.json"
+            tmp_path = path.with_suffix(".json.tmp")
+            tmp_path.write_text(json.dumps(value, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️ 写入文档分析缓存失败: {e}")
+
+
+async def read_text_files(paths: Iterable[Path]) -> List[Tuple[Path, Any]]:
+    """并发读取文本文件，返回 [(路径, 内容或异常)]，顺序与输入一致"""
+    paths = list(paths)
+
+    async def read(path: Path):
+        try:
+            return await asyncio.to_thread(path.read_text, encoding="utf-8")
+        except Exception as e:
+            return e
+
+    contents = await asyncio.gather(*(read(path) for path in paths))
+    return list(zip(paths, contents))
+
+
+async def map_documents(documents: Dict[str, str], analyze: Callable[[str, str], Awaitable[Any]],
+                        cache: DocumentAnalysisCache, kind: str, params: str = "",
+                        max_concurrency: int = DOCUMENT_ANALYSIS_CONCURRENCY,
+                        cacheable: Callable[[Any], bool] = None) -> Dict[str, Any]:
+    """逐个文档并发分析（map 阶段）
+
+    Args:
+        documents: {文档名: 内容}
+        analyze: async analyze(文档名, 内容)，返回单个文档的分析结果
+        cache: 文档分析缓存，内容未变的文档不再调用 analyze
+        kind: 分析类型，作为缓存键的一部分
+        params: 影响分析结果的其他参数，作为缓存键的一部分
+        max_concurrency: 同时分析的文档数上限
+        cacheable: 判断结果是否可以缓存（如出错的结果不缓存），默认全部缓存
+
+    Returns:
+        {文档名: 分析结果}，顺序与 documents 一致
+    """
+    limit = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(name: str, content: str):
+        key = cache.key(kind, content, params)
+        cached = cache.get(key)
+        if cached is not None:
+            print(f"♻️ 复用文档分析缓存: {name}")
+            return cached
+        async with limit:
+            result = await analyze(name, content)
+        if result is not None and (cacheable is None or cacheable(result)):
+            cache.put(key, result)
+        return result
+
+    names = list(documents)
+    results = await asyncio.gather(*(run(name, documents[name]) for name in names))
+    return dict(zip(names, results))
+
+
+# ---- reduce 阶段：结构化合并 ----
+
+def _item_key(item: Any) -> Optional[str]:
+    if isinstance(item, dict):
+        for field in _ITEM_KEY_FIELDS:
+            value = item.get(field)
+            if isinstance(value, str) and value.strip():
+                return f"{field}:{value.strip().lower()}"
+        return None
+    if isinstance(item, str):
+        return f"str:{item.strip().lower()}"
+    return None
+
+
+def merge_lists(existing: List, new: List) -> List:
+    """合并两个列表：同名（模块名/名称/ID/标题）的字典递归合并，字符串忽略大小写去重"""
+    merged = list(existing)
+    positions = {}
+    for idx, item in enumerate(merged):
+        key = _item_key(item)
+        if key is not None:
+            positions.setdefault(key, idx)
+    for item in new:
+        key = _item_key(item)
+        if key is None:
+            if item not in merged:
+                merged.append(item)
+        elif key in positions:
+            merged[positions[key]] = merge_values(merged[positions[key]], item)
+        else:
+            positions[key] = len(merged)
+            merged.append(item)
+    return merged
+
+
+def merge_values(existing: Any, new: Any) -> Any:
+    """合并两个分析结果：字典按键递归合并，列表按标识去重合并，标量保留先出现的非空值"""
+    if isinstance(existing, dict) and isinstance(new, dict):
+        merged = dict(existing)
+        for key, value in new.items():
+            merged[key] = merge_values(merged[key], value) if key in merged else value
+        return merged
+    if isinstance(existing, list) and isinstance(new, list):
+        return merge_lists(existing, new)
+    if existing is None or existing == "" or existing == [] or existing == {}:
+        return new
+    return existing
+
+
+def merge_analyses(analyses: Dict[str, Any]) -> Dict:
+    """合并各文档的分析结果（字典）；出错的结果只在全部出错时返回"""
+    valid = [result for result in analyses.values() if isinstance(result, dict) and "error" not in result]
+    if not valid:
+        errors = [result for result in analyses.values() if isinstance(result, dict)]
+        return errors[0] if errors else {}
+    merged: Dict = {}
+    for result in valid:
+        merged = merge_values(merged, result)
+    return merged
+
+
+def merge_module_lists(module_lists: Dict[str, List[Dict]], documents_of: Dict[str, str] = None) -> List[Dict]:
+    """合并各文档提取的模块：同名模块的职责、依赖、需求等字段取并集，并记录来源文档
+
+    Args:
+        module_lists: {文档名: 模块列表}；给出 documents_of 时键为章节 ID
+        documents_of: {章节 ID: 文档名}，给出时同时记录来源章节（source_sections）
+    """
+    merged: List[Dict] = []
+    for source, modules in module_lists.items():
+        if documents_of is None:
+            provenance = {"source_documents": [source]}
+        else:
+            provenance = {"source_documents": [documents_of[source]], "source_sections": [source]}
+        tagged = []
+        for module in modules or []:
+            if isinstance(module, dict):
+                tagged.append({**module, **provenance})
+        merged = merge_lists(merged, tagged)
+    return merged
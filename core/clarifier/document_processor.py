@@ -3,16 +3,27 @@ from typing import Dict, List, Optional
 import asyncio
 import json
 from llm.llm_executor import run_prompt
+from .document_analysis import (
+    DOCUMENT_ANALYSIS_CONCURRENCY, DocumentAnalysisCache, map_documents, merge_analyses, read_text_files
+)
 
 class DocumentProcessor:
     """负责读取和分析文档"""
     
-    def __init__(self, input_path: Path = None, logger=None):
-        """初始化文档处理器"""
+    def __init__(self, input_path: Path = None, logger=None, cache_dir: Path = None):
+        """初始化文档处理器
+        
+        Args:
+            input_path: 输入文档目录
+            logger: 日志记录器
+            cache_dir: 逐文档分析结果的缓存目录，默认为输入目录同级的 output/cache/documents
+        """
         self.input_path = input_path or Path("data/input")
         if not self.input_path.exists():
             self.input_path.mkdir(parents=True, exist_ok=True)
         self.logger = logger
+        self.max_concurrency = DOCUMENT_ANALYSIS_CONCURRENCY
+        self.cache = DocumentAnalysisCache(cache_dir or self.input_path.parent / "output" / "cache" / "documents")
     
     async def read_all_markdown_files(self) -> Dict[str, str]:
         """读取input目录下的所有markdown文件"""
@@ -26,36 +37,44 @@ class DocumentProcessor:
             self.input_path.mkdir(parents=True)
             return documents
             
-        for file_path in self.input_path.glob("*.md"):
-            try:
-                content = file_path.read_text(encoding='utf-8')
-                documents[file_path.name] = content
-                if self.logger:
-                    self.logger.log(f"✓ 已读取: {file_path.name}", role="system")
-                else:
-                    print(f"✓ 已读取: {file_path.name}")
-            except Exception as e:
+        for file_path, content in await read_text_files(sorted(self.input_path.glob("*.md"))):
+            if isinstance(content, Exception):
                 if self.logger:
-                    self.logger.log(f"⚠️ 读取文件 {file_path.name} 时出错: {str(e)}", role="error")
+                    self.logger.log(f"⚠️ 读取文件 {file_path.name} 时出错: {str(content)}", role="error")
                 else:
-                    print(f"⚠️ 读取文件 {file_path.name} 时出错: {str(e)}")
+                    print(f"⚠️ 读取文件 {file_path.name} 时出错: {str(content)}")
+                continue
+            documents[file_path.name] = content
+            if self.logger:
+                self.logger.log(f"✓ 已读取: {file_path.name}", role="system")
+            else:
+                print(f"✓ 已读取: {file_path.name}")
                 
         return documents
     
     async def analyze_all_documents(self, documents: Dict[str, str], llm_call) -> Dict:
-        """分析所有文档并理解架构"""
+        """分析所有文档并理解架构
+        
+        每个文档单独分析（并发，内容未变的文档复用缓存），再按模式、层级、组件等名称合并。
+        """
         print("\n🔍 正在分析所有文档...")
         
-        # 将所有文档内容组合成一个上下文
-        combined_content = "\n\n=== 文档分隔符 ===\n\n".join(
-            f"文件：{filename}\n\n{content}" 
-            for filename, content in documents.items()
-        )
+        async def analyze(filename: str, content: str):
+            return await llm_call(self._architecture_analysis_prompt(f"文件：{filename}\n\n{content}"))
         
-        prompt = f"""
-        请分析以下所有文档，理解系统的整体架构设计：
+        analyses = await map_documents(
+            documents, analyze, self.cache, "architecture_analysis",
+            max_concurrency=self.max_concurrency,
+            cacheable=lambda result: isinstance(result, dict) and "error" not in result
+        )
+        return merge_analyses(analyses)
+    
+    def _architecture_analysis_prompt(self, document_content: str) -> str:
+        """单个文档的架构分析提示词"""
+        return f"""
+        请分析以下文档，理解系统的整体架构设计：
 
-        {combined_content}
+        {document_content}
 
         请提供完整的架构分析，包括：
 
@@ -125,8 +144,6 @@ class DocumentProcessor:
             }}
         }}
         """
-        
-        return await llm_call(prompt)
     
     async def extract_architecture_info(self, architecture_doc: str, llm_call) -> Dict:
         """从技术架构文档中提取架构信息"""
@@ -1,13 +1,23 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Optional
 from pathlib import Path
-import json
-import os
+from memory.module_store import get_module_store, module_name_of
+from common.job_journal import atomic_write_json
+from .module_index import ModuleIndex, INDEX_DIMENSIONS, CROSS_CUTTING_CONCERNS
 
 class MultiDimensionalIndexGenerator:
+    """模块多维度索引的生成与导出
+
+    索引由 ModuleIndex 增量维护并持久化在 indices/module_index.json（快照 + 变更日志）：
+    重新生成时只更新内容变化的模块，只重写发生变化的维度的索引文件。
+    """
+
     def __init__(self, modules_dir: Path, output_dir: Path):
         self.modules_dir = modules_dir
         self.output_dir = output_dir
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.indices_dir = self.output_dir / "indices"
+        self.index = ModuleIndex(self.indices_dir / "module_index.json")
+        self._synced_modules = None
         
         self.dimensions = {
             "layer_index": {},       # 层级索引
@@ -18,28 +28,15 @@ class MultiDimensionalIndexGenerator:
         }
         
     def load_modules(self) -> List[Dict]:
-        """加载所有模块的full_summary.json"""
-        modules = []
-        
-        for module_dir in self.modules_dir.iterdir():
-            if not module_dir.is_dir():
-                continue
-                
-            summary_path = module_dir / "full_summary.json"
-            if not summary_path.exists():
-                continue
-                
-            try:
-                with open(summary_path, "r", encoding="utf-8") as f:
-                    module_data = json.load(f)
-                    modules.append(module_data)
-            except Exception as e:
-                print(f"❌ 读取模块 {module_dir.name} 时出错: {str(e)}")
-                
-        return modules
+        """从模块存储加载所有模块摘要（同步 modules 目录中变化的 full_summary.json）"""
+        try:
+            return get_module_store(self.modules_dir).all()
+        except Exception as e:
+            print(f"❌ 读取模块存储时出错: {str(e)}")
+            return []
         
     def generate_indices(self) -> Dict:
-        """生成多维度索引"""
+        """增量更新多维度索引，只重写发生变化的索引文件"""
         modules = self.load_modules()
         print(f"📊 为 {len(modules)} 个模块生成多维度索引...")
         
@@ -53,100 +50,85 @@ class MultiDimensionalIndexGenerator:
         
         self._generate_cross_cutting_index(modules)
         
-        self._save_indices()
+        changed = [INDEX_DIMENSIONS[dimension] for dimension in INDEX_DIMENSIONS
+                   if dimension in self.index.changed_dimensions
+                   or not (self.indices_dir / f"{INDEX_DIMENSIONS[dimension]}.json").exists()]
+        self._save_indices(changed)
+        self.index.changed_dimensions = set()
+        self.index.save()
         
         return self.dimensions
+
+    def query(self, **filters) -> List[str]:
+        """按维度组合查询模块名，例如 query(layer="services", requirement="REQ-001")"""
+        return self.index.query(**filters)
         
-    def _generate_layer_index(self, modules: List[Dict]) -> None:
-        """生成层级索引"""
+    def _sync(self, modules: List[Dict]) -> None:
+        """把模块列表增量同步到索引；同一个列表只同步一次"""
+        if modules is self._synced_modules:
+            return
+        keyed = {}
         for module in modules:
-            layer = module.get("layer", "Unknown")
-            if "." in layer:
-                parts = layer.split(".")
-                current = self.dimensions["layer_index"]
-                
-                for i, part in enumerate(parts):
-                    if part not in current:
-                        current[part] = {} if i < len(parts) - 1 else []
-                    
-                    if i == len(parts) - 1:
-                        current[part].append(module.get("module_name"))
-                    else:
-                        current = current[part]
+            name = module_name_of(module)
+            if name:
+                keyed[name] = module
+        counts = self.index.sync(keyed)
+        if any(counts.values()):
+            print(f"🔄 索引更新: 新增 {counts['added']}，更新 {counts['updated']}，移除 {counts['removed']} 个模块")
+        self._synced_modules = modules
+        
+    def _generate_layer_index(self, modules: List[Dict]) -> None:
+        """生成层级索引（"a.b" 形式的层级导出为嵌套结构）"""
+        self._sync(modules)
+        layer_index = {}
+        for layer, names in self.index.export("layer").items():
+            if "." not in layer:
+                layer_index.setdefault(layer, []).extend(names)
+                continue
+            parts = layer.split(".")
+            current = layer_index
+            for part in parts[:-1]:
+                current = current.setdefault(part, {})
+                if not isinstance(current, dict):
+                    # 上级层级本身也有模块时无法嵌套，保留完整的层级名
+                    layer_index.setdefault(layer, []).extend(names)
+                    break
             else:
-                if layer not in self.dimensions["layer_index"]:
-                    self.dimensions["layer_index"][layer] = []
-                self.dimensions["layer_index"][layer].append(module.get("module_name"))
+                current.setdefault(parts[-1], []).extend(names)
+        self.dimensions["layer_index"] = layer_index
       
     def _generate_domain_index(self, modules: List[Dict]) -> None:
         """生成领域索引"""
-        for module in modules:
-            domain = module.get("domain", "Unknown")
-            if domain not in self.dimensions["domain_index"]:
-                self.dimensions["domain_index"][domain] = []
-            self.dimensions["domain_index"][domain].append(module.get("module_name"))
+        self._sync(modules)
+        self.dimensions["domain_index"] = self.index.export("domain")
             
     def _generate_responsibility_index(self, modules: List[Dict]) -> None:
         """生成职责索引"""
-        for module in modules:
-            for resp in module.get("responsibilities", []):
-                if resp not in self.dimensions["responsibility_index"]:
-                    self.dimensions["responsibility_index"][resp] = []
-                self.dimensions["responsibility_index"][resp].append(module.get("module_name"))
+        self._sync(modules)
+        self.dimensions["responsibility_index"] = self.index.export("responsibility")
                 
     def _generate_requirement_module_index(self, modules: List[Dict]) -> None:
         """生成需求-模块索引"""
-        for module in modules:
-            for req in module.get("requirements", []):
-                if req not in self.dimensions["requirement_module_index"]:
-                    self.dimensions["requirement_module_index"][req] = []
-                self.dimensions["requirement_module_index"][req].append(module.get("module_name"))
+        self._sync(modules)
+        self.dimensions["requirement_module_index"] = self.index.export("requirement")
                 
     def _generate_cross_cutting_index(self, modules: List[Dict]) -> None:
-        """生成横切关注点索引"""
-        cross_cutting_concerns = [
-            "Internationalization",
-            "Authentication",
-            "Logging",
-            "Caching",
-            "ErrorHandling",
-            "Security",
-            "Responsive"
-        ]
-        
-        for concern in cross_cutting_concerns:
-            self.dimensions["cross_cutting_index"][concern] = []
-            
-        for module in modules:
-            for resp in module.get("responsibilities", []):
-                for concern in cross_cutting_concerns:
-                    if concern.lower() in resp.lower():
-                        self.dimensions["cross_cutting_index"][concern].append(module.get("module_name"))
-                        break
+        """生成横切关注点索引（预置的关注点即使没有模块也会列出）"""
+        self._sync(modules)
+        cross_cutting_index = {concern: [] for concern in CROSS_CUTTING_CONCERNS}
+        cross_cutting_index.update(self.index.export("cross_cutting"))
+        self.dimensions["cross_cutting_index"] = cross_cutting_index
                         
-            for dep in module.get("dependencies", []):
-                for concern in cross_cutting_concerns:
-                    if concern.lower() in dep.lower():
-                        if module.get("module_name") not in self.dimensions["cross_cutting_index"][concern]:
-                            self.dimensions["cross_cutting_index"][concern].append(module.get("module_name"))
-                        break
-                        
-    def _save_indices(self) -> None:
-        """保存所有索引"""
-        indices_dir = self.output_dir / "indices"
-        indices_dir.mkdir(parents=True, exist_ok=True)
+    def _save_indices(self, names: Optional[Iterable[str]] = None) -> None:
+        """保存索引文件（默认全部维度）
+
+        不再写出 all_indices.json：它与各维度文件内容重复，需要全部索引时读取各维度文件即可。
+        """
+        self.indices_dir.mkdir(parents=True, exist_ok=True)
         
-        for name, data in self.dimensions.items():
+        for name in (self.dimensions if names is None else names):
             try:
-                with open(indices_dir / f"{name}.json", "w", encoding="utf-8") as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-                print(f"✅ 已保存 {name} 到 {indices_dir / f'{name}.json'}")
+                atomic_write_json(self.indices_dir / f"{name}.json", self.dimensions[name])
+                print(f"✅ 已保存 {name} 到 {self.indices_dir / f'{name}.json'}")
             except Exception as e:
                 print(f"❌ 保存 {name} 时出错: {str(e)}")
-                
-        try:
-            with open(indices_dir / "all_indices.json", "w", encoding="utf-8") as f:
-                json.dump(self.dimensions, f, ensure_ascii=False, indent=2)
-            print(f"✅ 已保存合并索引到 {indices_dir / 'all_indices.json'}")
-        except Exception as e:
-            print(f"❌ 保存合并索引时出错: {str(e)}")
@@ -0,0 +1,151 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# 英文停用词（含需求/架构文档中几乎每个模块都会出现的泛词）
+ENGLISH_STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "if", "then", "else", "of", "to", "in", "on", "at",
+    "by", "for", "with", "from", "as", "into", "onto", "about", "over", "under", "via", "per",
+    "is", "are", "was", "were", "be", "been", "being", "am", "do", "does", "did", "done",
+    "has", "have", "had", "can", "could", "should", "would", "will", "shall", "may", "might", "must",
+    "it", "its", "this", "that", "these", "those", "there", "here", "which", "who", "whom", "what",
+    "when", "where", "why", "how", "all", "any", "each", "every", "some", "such", "no", "not",
+    "only", "own", "same", "so", "than", "too", "very", "also", "just", "more", "most", "other",
+    "we", "you", "they", "he", "she", "our", "your", "their", "them", "us", "i", "me", "my",
+    "etc", "eg", "ie", "use", "used", "using", "based", "module", "modules", "component", "components",
+}
+
+# 中文停用词；分词时在这些词处切开。单字只收不常出现在复合词中的虚词（“用”“中”“由”等会拆开用户、中间件、路由）
+CHINESE_STOPWORDS = {
+    "的", "了", "和", "与", "及", "或", "是", "把", "被", "从", "等", "也", "都", "就", "而", "之",
+    "其", "这", "那", "各", "每", "些", "给", "让", "且",
+    "一个", "一种", "这个", "那个", "一些", "所有", "以及", "或者", "并且", "如果", "因为", "所以",
+    "但是", "通过", "进行", "用于", "使用", "可以", "需要", "能够", "其他", "其中", "对于", "关于",
+    "为了", "以便", "由于", "相关", "支持", "提供", "实现", "包括", "包含", "模块", "组件", "功能",
+}
+
+_MAX_STOPWORD_LEN = max(len(w) for w in CHINESE_STOPWORDS)
+_TOKEN_PATTERN = re.compile(r"[㐀-䶿一-鿿豈-﫿]+|[A-Za-z][A-Za-z0-9_]*|[0-9]+")
+_CAMEL_PATTERN = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+[0-9]*|[A-Z]+[0-9]*|[0-9]+")
+
+
+def _segment_cjk(run: str) -> List[str]:
+    """在停用词处切分汉字串，片段长于两个字时输出二元组（无词典的常用中文检索切分方式）"""
+    segments, current, i = [], [], 0
+    while i < len(run):
+        for size in range(min(_MAX_STOPWORD_LEN, len(run) - i), 0, -1):
+            if run[i:i + size] in CHINESE_STOPWORDS:
+                segments.append("".join(current))
+                current = []
+                i += size
+                break
+        else:
+            current.append(run[i])
+            i += 1
+    segments.append("".join(current))
+
+    tokens = []
+    for segment in segments:
+        if len(segment) == 2:
+            tokens.append(segment)
+        elif len(segment) > 2:
+            tokens.extend(segment[k:k + 2] for k in range(len(segment) - 1))
+    return tokens
+
+
+def tokenize(text: str) -> List[str]:
+    """将中英文混合文本切分为关键字（保留重复，便于统计词频）
+
+    英文按驼峰/下划线拆词并转小写，汉字按停用词切分后取二元组，
+    丢弃停用词、纯数字和单字符。
+    """
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text or ""):
+        piece = match.group()
+        if piece[0] >= "㐀":
+            tokens.extend(_segment_cjk(piece))
+            continue
+        if piece.isdigit():
+            continue
+        for part in piece.split("_"):
+            for word in _CAMEL_PATTERN.findall(part):
+                word = word.lower()
+                if len(word) > 1 and not word.isdigit() and word not in ENGLISH_STOPWORDS:
+                    tokens.append(word)
+    return tokens
+
+
+class KeywordIndex:
+    """关键字倒排索引，按 TF-IDF 返回最相关的前 k 个模块
+
+    mapping 为 关键字 -> 模块集合（即 ArchitectureIndex.keyword_mapping），
+    doc_terms 记录每个模块的词频，重复添加同一模块时会先移除旧关键字。
+    查询只访问查询词的倒排表，开销与命中的倒排表长度相关，而不是模块总数。
+    """
+
+    def __init__(self):
+        self.mapping: Dict[str, Set[str]] = {}
+        self.doc_terms: Dict[str, Dict[str, int]] = {}
+
+    def add(self, module_name: str, text: str) -> Set[str]:
+        """索引模块的文本，返回其关键字"""
+        self.remove(module_name)
+        counts = Counter(tokenize(text))
+        self.doc_terms[module_name] = dict(counts)
+        for term in counts:
+            self.mapping.setdefault(term, set()).add(module_name)
+        return set(counts)
+
+    def remove(self, module_name: str):
+        for term in self.doc_terms.pop(module_name, {}):
+            modules = self.mapping.get(term)
+            if modules is not None:
+                modules.discard(module_name)
+                if not modules:
+                    del self.mapping[term]
+
+    def load_mapping(self, mapping: Dict[str, Iterable[str]]):
+        """从 关键字 -> 模块 的映射恢复索引（快照中不含词频，按 1 计）"""
+        self.mapping = {}
+        self.doc_terms = {}
+        for term, modules in mapping.items():
+            for module_name in modules:
+                self.mapping.setdefault(term, set()).add(module_name)
+                self.doc_terms.setdefault(module_name, {})[term] = 1
+
+    def idf(self, term: str) -> float:
+        df = len(self.mapping.get(term, ()))
+        return math.log((1 + len(self.doc_terms)) / (1 + df)) + 1
+
+    def query(self, text: str, top_k: int = 10,
+              predicate: Optional[Callable[[str], bool]] = None) -> List[Tuple[str, float, List[str]]]:
+        """返回与 text 最相关的模块 [(模块名, 得分, 命中关键字按权重降序)]
+
+        得分为 Σ 查询词频 × idf² × 文档词频 / √文档关键字数；predicate 用于在取前 k 个之前过滤模块。
+        """
+        query_terms = Counter(tokenize(text))
+        scores: Dict[str, float] = {}
+        matched: Dict[str, List[Tuple[float, str]]] = {}
+        for term, qtf in query_terms.items():
+            modules = self.mapping.get(term)
+            if not modules:
+                continue
+            weight = qtf * self.idf(term) ** 2
+            for module_name in modules:
+                if predicate is not None and not predicate(module_name):
+                    continue
+                tf = self.doc_terms.get(module_name, {}).get(term, 1)
+                scores[module_name] = scores.get(module_name, 0.0) + weight * tf
+                matched.setdefault(module_name, []).append((weight, term))
+
+        top = heapq.nsmallest(
+            top_k,
+            ((score / math.sqrt(len(self.doc_terms.get(name, ())) or 1), name) for name, score in scores.items()),
+            key=lambda item: (-item[0], item[1])
+        )
+        return [
+            (name, score, [term for _, term in sorted(matched[name], key=lambda m: (-m[0], m[1]))])
+            for score, name in top
+        ]
@@ -0,0 +1,304 @@
+import re
+from collections import Counter, deque
+from typing import Dict, List, Optional, Set
+
+from .similarity import overlap_similarity
+
+CAMEL_CASE_PATTERN = re.compile(r'^[a-z][a-zA-Z0-9]*$')   # 驼峰命名法
+PASCAL_CASE_PATTERN = re.compile(r'^[A-Z][a-zA-Z0-9]*$')  # 帕斯卡命名法
+SNAKE_CASE_PATTERN = re.compile(r'^[a-z][a-z0-9_]*$')     # 下划线命名法
+_WORD_PATTERN = re.compile(r'\b\w+\b')
+
+NAMING_STYLE_LABELS = {
+    "camel_case": "驼峰命名法",
+    "pascal_case": "帕斯卡命名法",
+    "snake_case": "下划线命名法",
+}
+
+
+def naming_style(module: str) -> str:
+    """模块名（取最后一段）的命名风格"""
+    module_name = module.split('.')[-1]
+    if CAMEL_CASE_PATTERN.match(module_name):
+        return "camel_case"
+    if PASCAL_CASE_PATTERN.match(module_name):
+        return "pascal_case"
+    if SNAKE_CASE_PATTERN.match(module_name):
+        return "snake_case"
+    return "other"
+
+
+class ArchitectureIssue:
+    """结构化的架构问题
+
+    kind 为问题类型，modules 为涉及的模块，message 为与全局检查一致的描述。
+    `name in issue` 按模块名精确判断模块是否涉及该问题（而不是子串匹配）。
+    """
+
+    __slots__ = ("kind", "modules", "message", "details")
+
+    def __init__(self, kind: str, modules: List[str], message: str, details: Optional[Dict] = None):
+        self.kind = kind
+        self.modules = list(modules)
+        self.message = message
+        self.details = details or {}
+
+    def __contains__(self, module_name) -> bool:
+        return module_name in self.modules
+
+    def __eq__(self, other):
+        return isinstance(other, ArchitectureIssue) and self.to_dict() == other.to_dict()
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return f"ArchitectureIssue({self.kind!r}, {self.modules!r}, {self.message!r})"
+
+    def to_dict(self) -> Dict:
+        return {"kind": self.kind, "modules": self.modules, "message": self.message, "details": self.details}
+
+
+class ModuleIssueChecker:
+    """单个模块的增量架构检查
+
+    只访问模块的邻接边和它参与的职责倒排表。命名风格统计和职责倒排表随依赖图的
+    修改增量更新（CompactDependencyGraph.changed_since），每次检查的开销与模块的度数
+    和相关倒排表长度相关，而不是整张图。
+    """
+
+    def __init__(self, index, similarity_threshold: float = 0.7):
+        self.index = index
+        self.similarity_threshold = similarity_threshold
+        self._graph = None
+        self._stamp = 0
+        self._styles: Dict[str, str] = {}
+        self._style_counts: Counter = Counter()
+        self._responsibilities: Dict[str, List[str]] = {}  # 模块 -> 职责（小写）
+        self._resp_modules: Dict[str, List[str]] = {}      # 职责 -> 模块
+        self._resp_words: Dict[str, Set[str]] = {}         # 职责 -> 词
+        self._word_postings: Dict[str, Set[str]] = {}      # 词 -> 职责
+
+    # ---- 增量维护 ----
+
+    def sync(self):
+        """将统计与倒排表同步到依赖图的当前状态"""
+        graph = self.index.dependency_graph
+        if graph is not self._graph or not hasattr(graph, "changed_since"):
+            self._reset(graph)
+            for name in list(graph):
+                self._update_module(name)
+            self._stamp = getattr(graph, "_stamp", 0)
+            return
+        changed, self._stamp = graph.changed_since(self._stamp)
+        for name in changed:
+            self._update_module(name)
+
+    def _reset(self, graph):
+        self._graph = graph
+        self._styles.clear()
+        self._style_counts.clear()
+        self._responsibilities.clear()
+        self._resp_modules.clear()
+        self._resp_words.clear()
+        self._word_postings.clear()
+
+    def _update_module(self, name: str):
+        self._remove_module(name)
+        graph = self.index.dependency_graph
+        if name not in graph:
+            return
+        style = naming_style(name)
+        self._styles[name] = style
+        self._style_counts[style] += 1
+
+        responsibilities = [resp.lower() for resp in graph[name].get("responsibilities", [])]
+        self._responsibilities[name] = responsibilities
+        for resp in responsibilities:
+            modules = self._resp_modules.setdefault(resp, [])
+            modules.append(name)
+            if len(modules) == 1:
+                words = set(resp.split())
+                self._resp_words[resp] = words
+                for word in words:
+                    self._word_postings.setdefault(word, set()).add(resp)
+
+    def _remove_module(self, name: str):
+        style = self._styles.pop(name, None)
+        if style is not None:
+            self._style_counts[style] -= 1
+        for resp in self._responsibilities.pop(name, ()):
+            modules = self._resp_modules.get(resp)
+            if modules is None:
+                continue
+            if name in modules:
+                modules.remove(name)
+            if modules:
+                continue
+            del self._resp_modules[resp]
+            for word in self._resp_words.pop(resp, ()):
+                postings = self._word_postings.get(word)
+                if postings is not None:
+                    postings.discard(resp)
+                    if not postings:
+                        del self._word_postings[word]
+
+    # ---- 检查 ----
+
+    def check(self, name: str) -> Dict[str, List[ArchitectureIssue]]:
+        """检查单个模块，返回各类结构化问题"""
+        self.sync()
+        return {
+            "circular_dependencies": self.circular_dependencies(name),
+            "naming_inconsistencies": self.naming_inconsistencies(name),
+            "layer_violations": self.layer_violations(name),
+            "responsibility_overlaps": self.responsibility_overlaps(name),
+            "consistency_issues": self.missing_dependencies(name)
+        }
+
+    def missing_dependencies(self, name: str) -> List[ArchitectureIssue]:
+        """该模块依赖了依赖图中不存在的模块"""
+        graph = self.index.dependency_graph
+        if name not in graph:
+            return []
+        return [
+            ArchitectureIssue("missing_dependency", [name], f"模块 {name} 依赖的模块 {dep} 不存在", {"dependency": dep})
+            for dep in graph[name].get("depends_on", ()) if dep not in graph
+        ]
+
+    def circular_dependencies(self, name: str) -> List[ArchitectureIssue]:
+        """经过该模块的最短环
+
+        在线拓扑序中没有成环的边时依赖图无环，直接返回；否则从模块出发做 BFS 找回到自身的最短路径。
+        """
+        graph = self.index.dependency_graph
+        if name not in graph:
+            return []
+        get_order = getattr(self.index, "get_dependency_order", None)
+        if callable(get_order) and not get_order().cyclic_edges:
+            return []
+
+        parent = {name: None}
+        queue = deque([name])
+        while queue:
+            current = queue.popleft()
+            for dep in graph[current].get("depends_on", ()):
+                if dep == name:
+                    path = []
+                    node = current
+                    while node is not None:
+                        path.append(node)
+                        node = parent[node]
+                    cycle = path[::-1] + [name]
+                    return [ArchitectureIssue(
+                        "circular_dependency", cycle[:-1], " -> ".join(cycle), {"cycle": cycle}
+                    )]
+                if dep not in parent and dep in graph:
+                    parent[dep] = current
+                    queue.append(dep)
+        return []
+
+    def naming_inconsistencies(self, name: str) -> List[ArchitectureIssue]:
+        """命名风格与主流风格不一致、命名未反映职责"""
+        issues = []
+        total = len(self._styles)
+        if total:
+            dominant_style = max(("camel_case", "pascal_case", "snake_case", "other"), key=self._style_counts.__getitem__)
+            if dominant_style != "other" and self._styles.get(name) != dominant_style:
+                issues.append(ArchitectureIssue(
+                    "naming_style", [name], f"模块 '{name}' 不符合{NAMING_STYLE_LABELS[dominant_style]}",
+                    {"style": self._styles.get(name), "dominant_style": dominant_style}
+                ))
+
+        responsibilities = self._responsibilities.get(name, [])
+        if responsibilities:
+            module_name = name.split('.')[-1].lower()
+            matched = any(
+                word.lower() in module_name
+                for resp in responsibilities
+                for word in _WORD_PATTERN.findall(resp) if len(word) > 3
+            )
+            if not matched:
+                issues.append(ArchitectureIssue(
+                    "naming_responsibility", [name], f"模块 '{name}' 的命名可能不能充分反映其职责"
+                ))
+        return issues
+
+    def layer_violations(self, name: str) -> List[ArchitectureIssue]:
+        """该模块的依赖及依赖它的模块是否违反层级规则"""
+        graph = self.index.dependency_graph
+        if name not in graph:
+            return []
+        info = graph[name]
+        issues = []
+        for dep in info.get("depends_on", ()):
+            issue = self._edge_violation(name, info, dep)
+            if issue:
+                issues.append(issue)
+        for dependant in info.get("depended_by", ()):
+            if dependant in graph and dependant != name:
+                issue = self._edge_violation(dependant, graph[dependant], name)
+                if issue:
+                    issues.append(issue)
+        return issues
+
+    def _edge_violation(self, module: str, info, dep: str) -> Optional[ArchitectureIssue]:
+        graph = self.index.dependency_graph
+        pattern_name = info.get("pattern")
+        pattern_info = self.index.architecture_patterns.get(pattern_name)
+        module_layer = info.get("layer")
+        if pattern_info is None or not module_layer or dep not in graph:
+            return None
+
+        dep_info = graph[dep]
+        dep_pattern = dep_info.get("pattern")
+        dep_layer = dep_info.get("layer")
+        if dep_pattern != pattern_name:
+            return ArchitectureIssue(
+                "cross_pattern_dependency", [module, dep], f"模块 '{module}' 依赖了不同架构模式的模块 '{dep}'",
+                {"pattern": pattern_name, "dependency_pattern": dep_pattern}
+            )
+        allowed_dependencies = pattern_info.get("dependencies", {}).get(module_layer, [])
+        if dep_layer not in allowed_dependencies and dep_layer != module_layer:
+            return ArchitectureIssue(
+                "layer_dependency", [module, dep],
+                f"模块 '{module}' ({module_layer}) 依赖了不允许的层级 '{dep_layer}' 中的模块 '{dep}'",
+                {"layer": module_layer, "dependency_layer": dep_layer}
+            )
+        return None
+
+    def responsibility_overlaps(self, name: str) -> List[ArchitectureIssue]:
+        """该模块的职责与其他模块重复或高度相似（只查询它参与的倒排表）"""
+        issues = []
+        responsibilities = self._responsibilities.get(name, [])
+        for resp in dict.fromkeys(responsibilities):
+            modules = self._resp_modules[resp]
+            if len(modules) > 1:
+                issues.append(ArchitectureIssue(
+                    "duplicate_responsibility", list(dict.fromkeys(modules)),
+                    f"职责 '{resp}' 在多个模块中重复: {', '.join(modules)}", {"responsibility": resp}
+                ))
+
+        seen = set()
+        for resp in dict.fromkeys(responsibilities):
+            words = self._resp_words[resp]
+            candidates = set()
+            for word in words:
+                candidates.update(self._word_postings.get(word, ()))
+            for other in sorted(candidates):
+                pair = tuple(sorted((resp, other)))
+                if other == resp or pair in seen:
+                    continue
+                seen.add(pair)
+                if overlap_similarity(words, self._resp_words[other]) <= self.similarity_threshold:
+                    continue
+                modules1, modules2 = set(self._resp_modules[resp]), set(self._resp_modules[other])
+                if modules1 == modules2:
+                    continue
+                issues.append(ArchitectureIssue(
+                    "similar_responsibility", sorted(modules1 | modules2),
+                    f"职责 '{resp}' 和 '{other}' 高度相似，但分别属于不同模块: "
+                    f"{', '.join(sorted(modules1))} 和 {', '.join(sorted(modules2))}",
+                    {"responsibilities": [resp, other]}
+                ))
+        return issues
@@ -0,0 +1,411 @@
+import hashlib
+import heapq
+import json
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+from common.job_journal import atomic_write_json, read_jsonl_log
+
+INDEX_VERSION = 1
+
+# 索引维度 -> 导出的索引名（与原 indices/*.json 文件名一致）
+INDEX_DIMENSIONS = {
+    "layer": "layer_index",
+    "domain": "domain_index",
+    "responsibility": "responsibility_index",
+    "requirement": "requirement_module_index",
+    "cross_cutting": "cross_cutting_index",
+}
+
+# 在职责和依赖中按名称识别的横切关注点
+CROSS_CUTTING_CONCERNS = (
+    "Internationalization",
+    "Authentication",
+    "Logging",
+    "Caching",
+    "ErrorHandling",
+    "Security",
+    "Responsive",
+)
+
+# 变更日志超过这个条数时合并进快照
+INDEX_COMPACT_THRESHOLD = 500
+
+# 位图超过这个位数时用 numpy 批量解码置位位置
+DENSE_BITMAP_BITS = 4096
+
+# 取值少的维度用位图（按位与、计数都很快）；职责、需求这类几乎每个模块取值都不同的维度
+# 用槽位集合，内存与模块数成正比，而不是 取值数 × 槽位数
+DENSE_DIMENSIONS = ("layer", "domain", "cross_cutting")
+
+
+def _values(value: Any) -> List[str]:
+    """字段既可能是字符串，也可能是列表或带 id/name 的字典列表"""
+    if not value:
+        return []
+    if isinstance(value, (str, dict)):
+        value = [value]
+    items = []
+    for item in value:
+        if isinstance(item, dict):
+            item = item.get("id") or item.get("name")
+        if item:
+            items.append(str(item))
+    return list(dict.fromkeys(items))
+
+
+def module_facets(module: Dict, default: str = "Unknown",
+                  concerns: Iterable[str] = CROSS_CUTTING_CONCERNS) -> Dict[str, List[str]]:
+    """模块在各索引维度上的取值
+
+    layer/domain 缺失时取 default；横切关注点来自模块声明的 cross_cutting_concerns，
+    以及职责和依赖中出现的关注点名称（每条职责或依赖只取第一个匹配的关注点）。
+    """
+    responsibilities = _values(module.get("responsibilities"))
+    cross_cutting = _values(module.get("cross_cutting_concerns"))
+    for text in responsibilities + _values(module.get("dependencies")):
+        lowered = text.lower()
+        for concern in concerns:
+            if concern.lower() in lowered:
+                if concern not in cross_cutting:
+                    cross_cutting.append(concern)
+                break
+    return {
+        "layer": [str(module.get("layer") or default)],
+        "domain": _values(module.get("domain")) or [default],
+        "responsibility": responsibilities,
+        "requirement": _values(module.get("requirements")),
+        "cross_cutting": cross_cutting,
+    }
+
+
+def _set_bit(bitmap: bytearray, slot: int):
+    byte = slot >> 3
+    if byte >= len(bitmap):
+        bitmap.extend(bytes(byte + 1 - len(bitmap)))
+    bitmap[byte] |= 1 << (slot & 7)
+
+
+def _clear_bit(bitmap: bytearray, slot: int):
+    byte = slot >> 3
+    if byte < len(bitmap):
+        bitmap[byte] &= ~(1 << (slot & 7)) & 0xFF
+
+
+def _to_int(bitmap: bytearray) -> int:
+    return int.from_bytes(bitmap, "little")
+
+
+def _bits(bitmap: int) -> List[int]:
+    """按从低到高的顺序返回位图中置位的位置"""
+    if bitmap.bit_length() <= DENSE_BITMAP_BITS:
+        positions = []
+        while bitmap:
+            low = bitmap & -bitmap
+            positions.append(low.bit_length() - 1)
+            bitmap ^= low
+        return positions
+    import numpy as np
+    data = np.frombuffer(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(data, bitorder="little")).tolist()
+
+
+class ModuleIndex:
+    """可增量维护、可组合查询的模块多维度索引
+
+    每个模块占用一个槽位（删除后槽位复用）。DENSE_DIMENSIONS 中的维度每个取值对应一个
+    bytearray 位图（置位、清位都是 O(1)，查询时再转换为整数做按位运算），
+    其余维度每个取值对应一个槽位集合。
+    - upsert/remove 只修改该模块涉及的位图和集合，内容未变化的模块直接跳过
+    - query(layer=..., domain=...) 对各维度的匹配求交集（同一维度给出多个取值时求并集）；
+      条件中有集合维度时先求集合的交集，再用模块的维度取值过滤，不对大位图逐位操作
+    - facets(维度, **条件) 返回该维度每个取值在条件下的模块数，供界面做分面筛选
+
+    给出 path 时持久化为 快照 + 变更日志：save() 只把上次保存后的变更追加到日志，
+    日志超过 compact_threshold 条时才重写快照。
+    """
+
+    def __init__(self, path: Optional[Path] = None, default: str = "Unknown",
+                 concerns: Iterable[str] = CROSS_CUTTING_CONCERNS,
+                 compact_threshold: int = INDEX_COMPACT_THRESHOLD):
+        self.path = Path(path) if path else None
+        self.log_path = self.path.with_suffix(".log.jsonl") if self.path else None
+        self.default = default
+        self.concerns = tuple(concerns)
+        self.compact_threshold = compact_threshold
+        self.clear()
+        if self.path is not None:
+            self.load()
+
+    def clear(self):
+        self.slots: List[Optional[str]] = []
+        self._slot_of: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._facets: Dict[str, Dict[str, List[str]]] = {}
+        self._digests: Dict[str, str] = {}
+        # 维度 -> 取值 -> 位图（DENSE_DIMENSIONS）或槽位集合
+        self._postings: Dict[str, Dict[str, Union[bytearray, Set[int]]]] = {
+            dimension: {} for dimension in INDEX_DIMENSIONS
+        }
+        self._all = bytearray()
+        self._pending: List[Dict] = []
+        self._log_size = 0
+        self.changed_dimensions: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._slot_of
+
+    def keys(self) -> List[str]:
+        return [self.slots[slot] for slot in _bits(_to_int(self._all))]
+
+    # ---- 增量维护 ----
+
+    @staticmethod
+    def _digest(facets: Dict[str, List[str]]) -> str:
+        data = json.dumps(facets, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+    def upsert(self, key: str, module: Dict) -> bool:
+        """新增或更新模块，返回索引是否发生变化"""
+        return self._set(key, module_facets(module, self.default, self.concerns))
+
+    def remove(self, key: str) -> bool:
+        slot = self._slot_of.pop(key, None)
+        if slot is None:
+            return False
+        for dimension, values in self._facets.pop(key).items():
+            self._discard(dimension, values, slot)
+        del self._digests[key]
+        _clear_bit(self._all, slot)
+        self.slots[slot] = None
+        heapq.heappush(self._free, slot)
+        self._pending.append({"op": "remove", "key": key})
+        return True
+
+    def sync(self, modules: Dict[str, Dict]) -> Dict[str, int]:
+        """使索引与 {键: 模块} 一致：新增、更新变化的模块，移除不存在的模块"""
+        counts = {"added": 0, "updated": 0, "removed": 0}
+        for key in [key for key in self._slot_of if key not in modules]:
+            self.remove(key)
+            counts["removed"] += 1
+        for key, module in modules.items():
+            existed = key in self._slot_of
+            if self.upsert(key, module):
+                counts["updated" if existed else "added"] += 1
+        return counts
+
+    def _set(self, key: str, facets: Dict[str, List[str]], digest: Optional[str] = None,
+             record: bool = True) -> bool:
+        digest = digest or self._digest(facets)
+        if self._digests.get(key) == digest:
+            return False
+        slot = self._slot_of.get(key)
+        if slot is None:
+            slot = heapq.heappop(self._free) if self._free else len(self.slots)
+            if slot == len(self.slots):
+                self.slots.append(key)
+            else:
+                self.slots[slot] = key
+            self._slot_of[key] = slot
+            _set_bit(self._all, slot)
+            old = {}
+        else:
+            old = self._facets[key]
+        for dimension in INDEX_DIMENSIONS:
+            before, after = old.get(dimension, []), facets.get(dimension, [])
+            if before != after:
+                if before:
+                    self._discard(dimension, [value for value in before if value not in after], slot)
+                self._add(dimension, after, slot)
+                self.changed_dimensions.add(dimension)
+        self._facets[key] = facets
+        self._digests[key] = digest
+        if record:
+            self._pending.append({"op": "upsert", "key": key, "facets": facets, "digest": digest})
+        return True
+
+    def _add(self, dimension: str, values: Iterable[str], slot: int):
+        postings = self._postings[dimension]
+        if dimension in DENSE_DIMENSIONS:
+            for value in values:
+                bitmap = postings.get(value)
+                if bitmap is None:
+                    bitmap = postings[value] = bytearray()
+                _set_bit(bitmap, slot)
+        else:
+            for value in values:
+                postings.setdefault(value, set()).add(slot)
+
+    def _discard(self, dimension: str, values: Iterable[str], slot: int):
+        postings = self._postings[dimension]
+        dense = dimension in DENSE_DIMENSIONS
+        for value in values:
+            posting = postings.get(value)
+            if posting is None:
+                continue
+            if dense:
+                _clear_bit(posting, slot)
+                empty = posting.count(0) == len(posting)
+            else:
+                posting.discard(slot)
+                empty = not posting
+            if empty:
+                del postings[value]
+        self.changed_dimensions.add(dimension)
+
+    # ---- 查询 ----
+
+    def _match(self, **filters) -> Union[int, Set[int]]:
+        """满足条件的槽位：条件只涉及位图维度时返回位图，否则返回槽位集合"""
+        dense, sparse = [], []
+        for dimension, wanted in filters.items():
+            if dimension not in INDEX_DIMENSIONS:
+                raise ValueError(f"未知的索引维度: {dimension}")
+            if wanted is None:
+                continue
+            wanted = [wanted] if isinstance(wanted, str) else list(wanted)
+            (dense if dimension in DENSE_DIMENSIONS else sparse).append((dimension, wanted))
+
+        if not sparse:
+            bitmap = _to_int(self._all)
+            for dimension, wanted in dense:
+                postings = self._postings[dimension]
+                union = 0
+                for value in wanted:
+                    if value in postings:
+                        union |= _to_int(postings[value])
+                bitmap &= union
+                if not bitmap:
+                    break
+            return bitmap
+
+        slots = None
+        for dimension, wanted in sparse:
+            postings = self._postings[dimension]
+            union = set().union(*(postings.get(value, ()) for value in wanted))
+            slots = union if slots is None else slots & union
+            if not slots:
+                return set()
+        # 候选通常很少，直接比对模块的维度取值
+        for dimension, wanted in dense:
+            wanted = set(wanted)
+            slots = {slot for slot in slots if not wanted.isdisjoint(self._facets[self.slots[slot]][dimension])}
+        return slots
+
+    @staticmethod
+    def _slots(match: Union[int, bytearray, Set[int]]) -> List[int]:
+        if isinstance(match, bytearray):
+            match = _to_int(match)
+        return _bits(match) if isinstance(match, int) else sorted(match)
+
+    def query(self, **filters) -> List[str]:
+        """按维度条件组合查询，返回模块键（按槽位顺序）
+
+        例如 query(layer="services", domain=["user", "auth"], cross_cutting="Logging")
+        """
+        return [self.slots[slot] for slot in self._slots(self._match(**filters))]
+
+    def count(self, **filters) -> int:
+        match = self._match(**filters)
+        return match.bit_count() if isinstance(match, int) else len(match)
+
+    def facets(self, dimension: str, **filters) -> Dict[str, int]:
+        """维度每个取值在条件下的模块数（不含为 0 的取值）"""
+        if dimension not in INDEX_DIMENSIONS:
+            raise ValueError(f"未知的索引维度: {dimension}")
+        match = self._match(**filters)
+        postings = self._postings[dimension]
+        if isinstance(match, int) and dimension in DENSE_DIMENSIONS:
+            counts = {}
+            for value, bitmap in postings.items():
+                count = (_to_int(bitmap) & match).bit_count()
+                if count:
+                    counts[value] = count
+            return counts
+        if not filters or match == _to_int(self._all):
+            return {value: len(slots) for value, slots in postings.items()}
+        # 按候选模块的维度取值计数，开销与候选数成正比
+        counts = Counter()
+        for slot in self._slots(match):
+            counts.update(self._facets[self.slots[slot]][dimension])
+        return dict(counts)
+
+    def values(self, dimension: str) -> List[str]:
+        return list(self._postings[dimension])
+
+    def facets_of(self, key: str) -> Optional[Dict[str, List[str]]]:
+        return self._facets.get(key)
+
+    def export(self, dimension: str) -> Dict[str, List[str]]:
+        """导出为 {取值: [模块键, ...]}，与原多维度索引文件的格式一致"""
+        return {value: [self.slots[slot] for slot in self._slots(posting)]
+                for value, posting in self._postings[dimension].items()}
+
+    # ---- 持久化 ----
+
+    def load(self):
+        self.clear()
+        try:
+            snapshot = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            snapshot = {}
+        if snapshot.get("version") == INDEX_VERSION:
+            # 快照按槽位保存，恢复后槽位与保存时一致，日志重放得到相同的位图
+            for slot, key in enumerate(snapshot.get("slots", [])):
+                if key is None:
+                    self.slots.append(None)
+                    heapq.heappush(self._free, slot)
+                    continue
+                self.slots.append(key)
+                entry = snapshot["modules"][key]
+                self._slot_of[key] = slot
+                _set_bit(self._all, slot)
+                self._set_loaded(key, entry["facets"], entry["digest"], slot)
+        for record in read_jsonl_log(self.log_path):
+            self._log_size += 1
+            if record.get("op") == "remove":
+                self.remove(record["key"])
+            else:
+                self._set(record["key"], record["facets"], record["digest"], record=False)
+        self._pending = []
+        self.changed_dimensions = set()
+
+    def _set_loaded(self, key: str, facets: Dict[str, List[str]], digest: str, slot: int):
+        for dimension, values in facets.items():
+            self._add(dimension, values, slot)
+        self._facets[key] = facets
+        self._digests[key] = digest
+
+    def save(self):
+        """把上次保存后的变更追加到日志；日志过长时重写快照并清空日志"""
+        if self.path is None:
+            return
+        if self._log_size + len(self._pending) > self.compact_threshold or not self.path.exists():
+            self.compact()
+            return
+        if not self._pending:
+            return
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in self._pending))
+            f.flush()
+            os.fsync(f.fileno())
+        self._log_size += len(self._pending)
+        self._pending = []
+
+    def compact(self):
+        """原子地重写快照，然后清空变更日志"""
+        atomic_write_json(self.path, {
+            "version": INDEX_VERSION,
+            "slots": self.slots,
+            "modules": {key: {"facets": self._facets[key], "digest": self._digests[key]} for key in self._slot_of},
+        }, indent=None)
+        if self.log_path.exists():
+            self.log_path.unlink()
+        self._log_size = 0
+        self._pending = []
@@ -0,0 +1,112 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+_CANCELLED = object()
+
+
+class ModulePipeline:
+    """模块处理流水线：受限并发的规范生成 → 队列 → 单写者应用
+
+    - 生成阶段：最多 max_concurrency 个 generate(item) 同时执行（LLM 调用）
+    - 应用阶段：唯一的写者从队列取出已生成的规范，按输入顺序成批调用 apply(specs)，
+      因此索引的写入顺序与逐个处理相同，且不会并发写入
+    - cancel(key) 取消单个模块：生成中的任务被取消，尚未开始或尚未应用的模块直接跳过
+
+    结果与输入顺序一致：apply 的返回值，或 {"status": "error"/"cancelled", ...}。
+    """
+
+    def __init__(self, generate: Callable[[Any], Awaitable[Dict]],
+                 apply: Callable[[List[Dict]], Awaitable[List[Dict]]],
+                 max_concurrency: int = 4, key: Optional[Callable[[Any], str]] = None):
+        self.generate = generate
+        self.apply = apply
+        self.max_concurrency = max(1, max_concurrency)
+        self.key = key or (lambda item: item.get("name"))
+        self._cancelled: Set[str] = set()
+        self._keys: Set[str] = set()
+        self._running: Dict[str, Set[asyncio.Future]] = {}
+
+    def cancel(self, key: str) -> bool:
+        """取消模块，返回该模块是否属于本流水线"""
+        self._cancelled.add(key)
+        for task in self._running.get(key, ()):
+            task.cancel()
+        return key in self._keys
+
+    async def run(self, items: List[Any]) -> List[Dict]:
+        total = len(items)
+        self._keys.update(self.key(item) for item in items)
+        results: List[Optional[Dict]] = [None] * total
+        pending: asyncio.Queue = asyncio.Queue()
+        ready: asyncio.Queue = asyncio.Queue()
+        for idx, item in enumerate(items):
+            pending.put_nowait((idx, item))
+
+        async def generator():
+            while True:
+                try:
+                    idx, item = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                key = self.key(item)
+                if key in self._cancelled:
+                    await ready.put((idx, key, _CANCELLED))
+                    continue
+                task = asyncio.ensure_future(self.generate(item))
+                self._running.setdefault(key, set()).add(task)
+                try:
+                    spec = await task
+                except asyncio.CancelledError:
+                    if not task.cancelled() or key not in self._cancelled:
+                        raise
+                    spec = _CANCELLED
+                except Exception as e:
+                    spec = e
+                finally:
+                    self._running[key].discard(task)
+                await ready.put((idx, key, spec))
+
+        async def writer():
+            buffered = {}
+            next_idx = 0
+            while next_idx < total:
+                idx, key, spec = await ready.get()
+                buffered[idx] = (key, spec)
+                while not ready.empty():
+                    idx, key, spec = ready.get_nowait()
+                    buffered[idx] = (key, spec)
+                batch = []
+                while next_idx in buffered:
+                    batch.append((next_idx, *buffered.pop(next_idx)))
+                    next_idx += 1
+                if batch:
+                    await self._apply_batch(batch, results)
+
+        workers = [asyncio.ensure_future(generator()) for _ in range(min(self.max_concurrency, total))]
+        write_task = asyncio.ensure_future(writer())
+        try:
+            await asyncio.gather(write_task, *workers)
+        except BaseException:
+            for task in [write_task, *workers]:
+                task.cancel()
+            await asyncio.gather(write_task, *workers, return_exceptions=True)
+            raise
+        return results
+
+    async def _apply_batch(self, batch, results: List[Optional[Dict]]):
+        specs = []
+        for idx, key, spec in batch:
+            if spec is _CANCELLED or key in self._cancelled:
+                results[idx] = {"status": "cancelled", "module": key}
+            elif isinstance(spec, Exception):
+                results[idx] = {"status": "error", "message": str(spec)}
+            else:
+                specs.append((idx, spec))
+        if not specs:
+            return
+        try:
+            applied = await self.apply([spec for _, spec in specs])
+        except Exception as e:
+            applied = [{"status": "error", "message": str(e)}] * len(specs)
+        for (idx, _), result in zip(specs, applied):
+            results[idx] = result
@@ -0,0 +1,55 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+
+class ReasoningDAG:
+    """推理步骤的依赖图，按依赖关系并发执行
+
+    每个步骤是一个异步函数，参数为其依赖步骤的结果（按 deps 顺序）。步骤只能依赖已添加的步骤，
+    因此图天然无环。没有依赖关系的步骤并发执行，同时运行的步骤数受 max_concurrency 限制，
+    总耗时约等于关键路径上各步骤耗时之和。
+    """
+
+    def __init__(self):
+        self._steps: Dict[str, Tuple[Callable[..., Awaitable[Any]], Tuple[str, ...]]] = {}
+
+    def add(self, name: str, func: Callable[..., Awaitable[Any]], deps: Iterable[str] = ()) -> str:
+        """添加步骤，返回步骤名，便于作为后续步骤的依赖"""
+        if name in self._steps:
+            raise ValueError(f"步骤 '{name}' 已存在")
+        deps = tuple(deps)
+        for dep in deps:
+            if dep not in self._steps:
+                raise ValueError(f"步骤 '{name}' 依赖的步骤 '{dep}' 不存在")
+        self._steps[name] = (func, deps)
+        return name
+
+    def __len__(self):
+        return len(self._steps)
+
+    async def run(self, max_concurrency: Optional[int] = None) -> Dict[str, Any]:
+        """执行所有步骤，返回 {步骤名: 结果}
+
+        任一步骤出错时取消其余步骤并抛出该异常。
+        """
+        limit = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        tasks: Dict[str, asyncio.Future] = {}
+
+        async def run_step(func, deps):
+            args = [await tasks[dep] for dep in deps]
+            if limit is None:
+                return await func(*args)
+            async with limit:
+                return await func(*args)
+
+        for name, (func, deps) in self._steps.items():
+            tasks[name] = asyncio.ensure_future(run_step(func, deps))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return {name: task.result() for name, task in tasks.items()}
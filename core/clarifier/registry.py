@@ -0,0 +1,96 @@
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+
+class KeyedRegistry(list):
+    """按键索引的有序注册表
+
+    仍然是一个 list（保持插入顺序，可直接序列化、下标访问和遍历），
+    额外维护 键 -> 位置 的字典，使 upsert/get 为 O(1)，并可按指定字段
+    （如 layer、pattern、domain）建立二级索引。
+
+    通过普通 list 方法修改内容时索引会失效，下次查询时重建；
+    修改已有条目的键或索引字段时请使用 upsert。
+    """
+
+    def __init__(self, items: Iterable[Dict] = (), key: str = "name", indexed_fields: Iterable[str] = ()):
+        super().__init__(items)
+        self.key = key
+        self.indexed_fields = tuple(indexed_fields)
+        self._positions: Optional[Dict[Any, int]] = None
+        self._field_index: Dict[str, Dict[Any, Set[int]]] = {}
+
+    def _ensure_index(self):
+        if self._positions is not None:
+            return
+        self._positions = {}
+        self._field_index = {field: {} for field in self.indexed_fields}
+        for position, item in enumerate(self):
+            # 与线性查找一致：重复键以第一次出现的位置为准
+            self._positions.setdefault(item.get(self.key), position)
+            self._index_fields(item, position)
+
+    def _index_fields(self, item: Dict, position: int):
+        for field in self.indexed_fields:
+            self._field_index[field].setdefault(item.get(field), set()).add(position)
+
+    def _unindex_fields(self, item: Dict, position: int):
+        for field in self.indexed_fields:
+            positions = self._field_index[field].get(item.get(field))
+            if positions is not None:
+                positions.discard(position)
+                if not positions:
+                    del self._field_index[field][item.get(field)]
+
+    def upsert(self, item: Dict) -> bool:
+        """按键插入或替换条目，返回是否为新条目"""
+        self._ensure_index()
+        key = item.get(self.key)
+        position = self._positions.get(key)
+        if position is not None:
+            self._unindex_fields(self[position], position)
+            list.__setitem__(self, position, item)
+            self._index_fields(item, position)
+            return False
+
+        position = len(self)
+        list.append(self, item)
+        self._positions[key] = position
+        self._index_fields(item, position)
+        return True
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        self._ensure_index()
+        position = self._positions.get(key)
+        return self[position] if position is not None else default
+
+    def has(self, key: Any) -> bool:
+        self._ensure_index()
+        return key in self._positions
+
+    def find_by(self, field: str, value: Any) -> List[Dict]:
+        """按二级索引字段查询，结果保持插入顺序"""
+        if field not in self.indexed_fields:
+            return [item for item in self if item.get(field) == value]
+        self._ensure_index()
+        return [self[position] for position in sorted(self._field_index[field].get(value, ()))]
+
+    def all_keys(self) -> List[Any]:
+        self._ensure_index()
+        return list(self._positions)
+
+
+def _invalidating(name: str):
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        self._positions = None
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+for _name in ("__setitem__", "__delitem__", "__iadd__", "__imul__", "append", "extend",
+              "insert", "pop", "remove", "clear", "sort", "reverse"):
+    setattr(KeyedRegistry, _name, _invalidating(_name))
@@ -535,13 +535,16 @@ class RequirementAnalyzer:
                 if new_name != module_name:
                     print(f"✓ 修复模块名称: {module_name} -> {new_name}")
     
-    async def analyze_granular_modules(self, content: str, llm_call: Callable, architecture_layers: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    async def analyze_granular_modules(self, content: str, llm_call: Callable, architecture_layers: Optional[List[str]] = None,
+                                       save: bool = True, raise_on_error: bool = False) -> List[Dict[str, Any]]:
         """分析文档内容，提取细粒度模块
         
         Args:
             content: 需求文档或架构文档内容
             llm_call: 调用LLM的函数
             architecture_layers: 可选的架构层级列表，用于指导模块提取
+            save: 是否保存提取的模块（逐文档分析时由调用方合并后统一保存）
+            raise_on_error: 分析失败时抛出异常而不是返回空列表，便于调用方区分失败与没有模块
             
         Returns:
             细粒度模块列表，每个模块包含详细信息
@@ -663,6 +666,8 @@ class RequirementAnalyzer:
                                 self.logger.log(f"尝试解析的内容: {result[:200]}...", role="debug")
                             else:
                                 print("⚠️ LLM返回的结果不是有效的JSON格式")
+                            if raise_on_error:
+                                raise ValueError("LLM返回的结果不是有效的JSON格式")
                             # 创建一个基本的结构
                             result = []
                 else:
@@ -674,6 +679,8 @@ class RequirementAnalyzer:
                             self.logger.log(f"尝试解析的内容: {result[:200]}...", role="debug")
                         else:
                             print("⚠️ LLM返回的结果不是有效的JSON格式")
+                        if raise_on_error:
+                            raise ValueError("LLM返回的结果不是有效的JSON格式")
                         # 创建一个基本的结构
                         result = []
             
@@ -682,6 +689,8 @@ class RequirementAnalyzer:
                     self.logger.log("⚠️ LLM返回的结果不是有效的模块列表", role="error")
                 else:
                     print("⚠️ LLM返回的结果不是有效的模块列表")
+                if raise_on_error:
+                    raise ValueError("LLM返回的结果不是有效的模块列表")
                 result = []
             
             for module in result:
@@ -692,7 +701,8 @@ class RequirementAnalyzer:
             else:
                 print(f"✓ 已提取 {len(result)} 个细粒度模块")
             
-            self._save_granular_modules(result)
+            if save:
+                self._save_granular_modules(result)
             
             return result
             
@@ -701,6 +711,8 @@ class RequirementAnalyzer:
                 self.logger.log(f"❌ 提取细粒度模块时出错: {str(e)}", role="error")
             else:
                 print(f"❌ 提取细粒度模块时出错: {str(e)}")
+            if raise_on_error:
+                raise
             return []
     
     def _save_granular_modules(self, modules: List[Dict[str, Any]]) -> None:
@@ -0,0 +1,54 @@
+from typing import Dict, List
+
+from .clarification_manifest import split_sections
+from .keyword_index import KeywordIndex
+
+# 检索时切分章节的最深标题级别
+RETRIEVAL_HEADING_LEVEL = 3
+
+# 每个提示词附带的文档内容上限（字符）
+SECTION_CONTEXT_CHARS = 4000
+
+
+class SectionRetriever:
+    """按关键字相关度为提示词挑选文档章节
+
+    文档按一到三级标题切分，章节标题与正文一起建立关键字倒排索引（标题权重加倍）。
+    retrieve 返回与查询最相关、且总长度不超过上限的章节，按文档原顺序拼接；
+    没有任何章节命中时退回到文档开头的若干章节。
+    """
+
+    def __init__(self, content: str, doc_name: str = "document", max_level: int = RETRIEVAL_HEADING_LEVEL):
+        self.sections: List[Dict] = split_sections(doc_name, content, max_level=max_level)
+        self._order = {section["id"]: idx for idx, section in enumerate(self.sections)}
+        self._by_id = {section["id"]: section for section in self.sections}
+        self.index = KeywordIndex()
+        for section in self.sections:
+            title = section["title"].replace("/", " ")
+            self.index.add(section["id"], f"{title}\n{title}\n{section['content']}")
+
+    def select(self, query: str, max_chars: int = SECTION_CONTEXT_CHARS) -> List[Dict]:
+        """返回选中的章节（文档顺序）"""
+        ranked = [name for name, _, _ in self.index.query(query, top_k=len(self.sections))]
+        if not ranked:
+            ranked = [section["id"] for section in self.sections]
+
+        chosen, used = [], 0
+        for section_id in ranked:
+            section = self._by_id[section_id]
+            size = len(section["content"])
+            if used + size > max_chars:
+                if chosen:
+                    continue
+                # 最相关的章节本身超出上限时截断，保证至少有一段上下文
+                section = {**section, "content": section["content"][:max_chars]}
+                size = max_chars
+            chosen.append(section)
+            used += size
+            if used >= max_chars:
+                break
+        return sorted(chosen, key=lambda section: self._order[section["id"]])
+
+    def retrieve(self, query: str, max_chars: int = SECTION_CONTEXT_CHARS) -> str:
+        """返回与查询相关的文档内容"""
+        return "\n".join(section["content"].strip() for section in self.select(query, max_chars))
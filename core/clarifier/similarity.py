@@ -0,0 +1,49 @@
+import math
+from collections import Counter
+from typing import Dict, List, Sequence, Set, Tuple
+
+
+def overlap_similarity(words1: Set[str], words2: Set[str]) -> float:
+    """重叠系数 |A∩B| / min(|A|, |B|)，任一方为空时为 0"""
+    if not words1 or not words2:
+        return 0.0
+    return len(words1 & words2) / min(len(words1), len(words2))
+
+
+def similar_pairs(word_sets: Sequence[Set[str]], threshold: float) -> List[Tuple[int, int]]:
+    """找出重叠系数大于 threshold（取值 [0, 1)）的所有下标对 (i, j)，i < j，按 (i, j) 排序
+
+    结果与两两比较完全一致，但只对候选对打分：词按全局出现次数升序排列，
+    较小的集合 A 与任何集合 B 的重叠数要超过 threshold·|A|，B 必须包含 A 的前
+    |A| - ⌊threshold·|A|⌋ + 1 个（最罕见的）词之一（前缀过滤），因此只需用这些词查倒排表。
+    """
+    frequency = Counter(word for words in word_sets for word in words)
+    postings: Dict[str, List[int]] = {}
+    ordered: List[List[str]] = []
+    for i, words in enumerate(word_sets):
+        ordered.append(sorted(words, key=lambda w: (frequency[w], w)))
+        for word in words:
+            postings.setdefault(word, []).append(i)
+
+    pairs = set()
+    for i, words in enumerate(ordered):
+        size = len(words)
+        if not size:
+            continue
+        # 需要的最少重叠数（取保守值，精确判断在打分时进行）
+        required = max(1, math.floor(threshold * size))
+        prefix_len = size - required + 1
+        if prefix_len <= 0:
+            continue
+        candidates = set()
+        for word in words[:prefix_len]:
+            candidates.update(postings[word])
+        candidates.discard(i)
+        for j in candidates:
+            # 前缀过滤只对较小的一方成立，较大的一方由对方负责查找
+            other_size = len(word_sets[j])
+            if other_size < size or (other_size == size and j < i):
+                continue
+            if overlap_similarity(word_sets[i], word_sets[j]) > threshold:
+                pairs.add((min(i, j), max(i, j)))
+    return sorted(pairs)
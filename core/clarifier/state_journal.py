@@ -0,0 +1,123 @@
+import atexit
+import json
+import queue
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.clarifier.state_snapshot import encode_snapshot, read_state, write_encoded
+
+
+class StateJournal:
+    """架构状态的追加式日志，写盘由后台线程完成
+
+    每次变更只追加一行 JSON 到日志文件；完整快照定期（或关闭时）压缩写出，
+    快照写成功后清空日志。恢复时读取快照，再重放序号大于快照的日志记录。
+    记录和快照在调用线程中序列化后才入队，之后调用方修改模块字典不会影响已提交的内容。
+    snapshot_path 不含扩展名，快照格式见 state_snapshot.write_state。
+    """
+
+    def __init__(self, snapshot_path: Path, journal_path: Path, compact_every: int = 500, compress: bool = True):
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = Path(journal_path)
+        self.compact_every = compact_every
+        self.compress = compress
+        self.seq = 0
+        self.pending_records = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_writer(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="architecture-state-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def append(self, record: Dict) -> int:
+        """追加一条变更记录，返回其序号（写盘在后台进行）"""
+        line = json.dumps({"seq": self.seq + 1, **record}, ensure_ascii=False)
+        self.seq += 1
+        self.pending_records += 1
+        self._ensure_writer()
+        self._queue.put(("append", line))
+        return self.seq
+
+    def should_compact(self) -> bool:
+        return self.pending_records >= self.compact_every
+
+    def write_snapshot(self, state: Dict):
+        """提交完整快照；快照包含至当前序号为止的全部变更"""
+        state["journal_seq"] = self.seq
+        encoded = encode_snapshot(state, self.compress)
+        self.pending_records = 0
+        self._ensure_writer()
+        self._queue.put(("snapshot", encoded))
+
+    def flush(self):
+        """阻塞直到所有已提交的写入完成"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def load(self) -> Tuple[Optional[Dict], List[Dict]]:
+        """读取快照和快照之后的日志记录，并将序号续接到已有记录之后"""
+        snapshot = read_state(self.snapshot_path)
+        base_seq = (snapshot or {}).get("journal_seq", 0)
+
+        records = []
+        if self.journal_path.exists():
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 进程中断时最后一行可能不完整
+                        print("⚠️ 跳过不完整的架构日志记录")
+                        continue
+                    if record.get("seq", 0) > base_seq:
+                        records.append(record)
+
+        self.seq = max([base_seq] + [r["seq"] for r in records])
+        self.pending_records = len(records)
+        return snapshot, records
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                print(f"❌ 写入架构状态失败: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: List[Tuple[str, Any]]):
+        """连续的追加记录合并为一次写入，快照按提交顺序写出"""
+        lines = []
+        for kind, payload in batch:
+            if kind == "append":
+                lines.append(payload)
+                continue
+            self._append_lines(lines)
+            lines = []
+            self._write_snapshot_file(payload)
+        self._append_lines(lines)
+
+    def _append_lines(self, lines: List[str]):
+        if not lines:
+            return
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def _write_snapshot_file(self, encoded: Tuple[bytes, str]):
+        write_encoded(*encoded, self.snapshot_path)
+        # 快照已包含此前所有记录，清空日志
+        open(self.journal_path, "w", encoding="utf-8").close()
@@ -0,0 +1,184 @@
+import json
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 快照中供推理结果和架构文档使用的部分（不含关键字映射、模块列表等恢复用数据）
+CORE_SECTIONS = ("timestamp", "requirement_module_index", "responsibility_index", "dependency_graph", "layer_index")
+
+# 快照格式版本；write_state 写入 snapshot_version 字段，读取时缺少该字段或 journal_seq 的文件不视为快照
+SNAPSHOT_VERSION = 1
+
+
+def _load_msgpack():
+    try:
+        import msgpack
+        return msgpack
+    except ImportError:
+        return None
+
+
+def _load_zstd():
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+def build_architecture_state(index, modules: Optional[Iterable[Dict]] = None, include_keywords: bool = True) -> Dict:
+    """从 ArchitectureIndex 构建架构状态快照，集合统一排序以保证输出稳定
+
+    状态文件、架构文档输入和推理结果都使用这一份快照，每次变更只需构建一次。
+    """
+    state = {
+        "timestamp": datetime.now().isoformat(),
+        "requirement_module_index": {
+            k: sorted(v) for k, v in index.requirement_module_index.items()
+        },
+        "responsibility_index": {
+            k: {
+                "modules": sorted(v["modules"]),
+                "objects": sorted(v["objects"]),
+                "patterns": sorted(v["patterns"])
+            } for k, v in index.responsibility_index.items()
+        },
+        "dependency_graph": {
+            k: {
+                "depends_on": sorted(v["depends_on"]),
+                "depended_by": sorted(v["depended_by"]),
+                "pattern": v["pattern"],
+                "layer": v["layer"]
+            } for k, v in index.dependency_graph.items()
+        },
+        "layer_index": {
+            layer: dict(modules_in_layer) for layer, modules_in_layer in index.layer_index.items()
+        }
+    }
+    if include_keywords:
+        state["keyword_mapping"] = {k: sorted(v) for k, v in index.keyword_mapping.items()}
+    if modules is not None:
+        state["modules"] = list(modules)
+    return state
+
+
+def core_sections(state: Dict) -> Dict:
+    """取快照的核心部分（浅拷贝，不复制各索引的内容）"""
+    return {key: state[key] for key in CORE_SECTIONS if key in state}
+
+
+def _candidates(base_path: Path) -> List[Tuple[Path, str]]:
+    base_path = Path(base_path)
+    return [
+        (base_path.with_name(base_path.name + ".msgpack.zst"), "msgpack.zst"),
+        (base_path.with_name(base_path.name + ".msgpack"), "msgpack"),
+        (base_path.with_name(base_path.name + ".json"), "json"),
+    ]
+
+
+def encode_state(state: Dict, compress: bool = True) -> Tuple[bytes, str]:
+    """将快照编码为 (数据, 格式)
+
+    安装了 msgpack 时使用 msgpack（再装有 zstandard 且 compress 为真时压缩），
+    否则退回紧凑 JSON（无缩进）。
+    """
+    msgpack = _load_msgpack()
+    if msgpack is None:
+        data = json.dumps(state, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return data, "json"
+
+    data = msgpack.packb(state, use_bin_type=True)
+    zstd = _load_zstd() if compress else None
+    if zstd is None:
+        return data, "msgpack"
+    return zstd.ZstdCompressor(level=3).compress(data), "msgpack.zst"
+
+
+def decode_state(data: bytes, fmt: str) -> Dict:
+    if fmt == "json":
+        return json.loads(data.decode("utf-8"))
+    if fmt == "msgpack.zst":
+        zstd = _load_zstd()
+        if zstd is None:
+            raise ImportError("读取 .msgpack.zst 快照需要安装 zstandard")
+        data = zstd.ZstdDecompressor().decompress(data)
+    msgpack = _load_msgpack()
+    if msgpack is None:
+        raise ImportError("读取 .msgpack 快照需要安装 msgpack")
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+def _atomic_write(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def encode_snapshot(state: Dict, compress: bool = True) -> Tuple[bytes, str]:
+    """编码为带快照版本的 (数据, 格式)，可先在调用线程编码，再交给写盘线程"""
+    return encode_state({**state, "snapshot_version": SNAPSHOT_VERSION}, compress)
+
+
+def write_encoded(data: bytes, fmt: str, base_path: Path) -> Path:
+    """原子地写出已编码的快照，返回写出的文件路径"""
+    path = next(p for p, candidate_fmt in _candidates(base_path) if candidate_fmt == fmt)
+    _atomic_write(path, data)
+    return path
+
+
+def write_state(state: Dict, base_path: Path, compress: bool = True) -> Path:
+    """原子地写出快照，base_path 不含扩展名，实际文件扩展名取决于编码格式
+
+    Returns:
+        写出的文件路径
+    """
+    data, fmt = encode_snapshot(state, compress)
+    return write_encoded(data, fmt, base_path)
+
+
+def is_snapshot(state) -> bool:
+    """是否为 write_state 写出的快照（版本匹配且带日志序号）"""
+    return (isinstance(state, dict) and state.get("snapshot_version") == SNAPSHOT_VERSION
+            and isinstance(state.get("journal_seq"), int))
+
+
+def read_state(base_path: Path) -> Optional[Dict]:
+    """读取 base_path 对应的最新快照（按修改时间），无法解码或不是快照的文件会被跳过
+
+    Returns:
+        快照内容；不存在可用快照时返回 None
+    """
+    existing = []
+    for path, fmt in _candidates(base_path):
+        try:
+            existing.append((path.stat().st_mtime_ns, path, fmt))
+        except FileNotFoundError:
+            continue
+
+    for _, path, fmt in sorted(existing, key=lambda item: item[0], reverse=True):
+        try:
+            state = decode_state(path.read_bytes(), fmt)
+        except Exception as e:
+            print(f"⚠️ 无法读取架构状态快照 {path.name}: {e}")
+            continue
+        if is_snapshot(state):
+            return state
+        print(f"⚠️ 跳过不是架构状态快照的文件 {path.name}")
+    return None
+
+
+def export_state_json(state: Dict, path: Path) -> Path:
+    """按需导出便于阅读的 JSON（带缩进），导出文件不带快照版本，不会被当作快照读取"""
+    path = Path(path)
+    state = {key: value for key, value in state.items() if key != "snapshot_version"}
+    _atomic_write(path, json.dumps(state, ensure_ascii=False, indent=2).encode("utf-8"))
+    return path
@@ -9,6 +9,7 @@ import re
 from dependency_manager import DependencyManager, initialize_dependency_graph
 from rollback_manager import RollbackManager, initialize_rollback_manager
 from prompt_templates import get_fixer_prompt
+from memory.module_store import get_module_store, module_name_of
 
 BASE_PATH = Path("data/output/modules")
 INDEX_PATH = Path("data/output/summary_index.json")
@@ -27,8 +28,8 @@ def get_fixer_prompt(module_name, issues, original_summary, related_modules=None
     return get_template_prompt(module_name, issues, original_summary, related_modules)
 
 def load_summary(module_name):
-    summary_path = BASE_PATH / module_name / "full_summary.json"
-    if not summary_path.exists():
+    summary = get_module_store(BASE_PATH).get(module_name)
+    if summary is None:
         return {
             "module_name": module_name,
             "responsibilities": [],
@@ -38,13 +39,12 @@ def load_summary(module_name):
             "depends_on": [],
             "target_path": ""
         }
-    return json.loads(summary_path.read_text())
+    return summary
 
 def save_summary(module_name, summary):
-    mod_dir = BASE_PATH / module_name
-    mod_dir.mkdir(parents=True, exist_ok=True)
-    path = mod_dir / "full_summary.json"
-    path.write_text(json.dumps(summary, indent=2))
+    if module_name_of(summary) != module_name:
+        summary = {**summary, "module_name": module_name}
+    get_module_store(BASE_PATH).upsert(summary)
 
 def update_index(summary_index, summary):
     summary_index[summary["module_name"]] = {
@@ -469,12 +469,7 @@ async def fix_modules():
     issue_map = get_issues_per_module(VALIDATOR_JSON_PATH)
     
     # 加载所有模块的摘要
-    all_modules = []
-    for path in BASE_PATH.glob("*/full_summary.json"):
-        try:
-            all_modules.append(json.loads(path.read_text()))
-        except:
-            print(f"⚠️ Failed to parse {path}")
+    all_modules = get_module_store(BASE_PATH).all()
     
     # 从summary_index加载索引
     summary_index = json.loads(INDEX_PATH.read_text()) if INDEX_PATH.exists() else {}
@@ -1,10 +1,3 @@
-from autogen_agentchat.agents import AssistantAgent
-from autogen_ext.models.openai import OpenAIChatCompletionClient
-from llm.llm_executor import run_prompt
-import tiktoken
-
-tokenizer = tiktoken.encoding_for_model("gpt-4o")
-
 async def chat(
     user_message: str = None,
     system_message: str = None,
@@ -27,6 +20,10 @@ async def chat(
     Returns:
         模型的回复
     """
+    # autogen 依赖较重，延迟到首次调用时导入
+    from autogen_agentchat.agents import AssistantAgent
+    from autogen_ext.models.openai import OpenAIChatCompletionClient
+
     model_client = OpenAIChatCompletionClient(model=model)
     agent = AssistantAgent("CodeWriter", model_client=model_client)
 
@@ -0,0 +1,186 @@
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# 每组任务（不含共享上下文）的 token 预算：任务描述 + 预计输出
+PACK_TOKEN_BUDGET = 3000
+
+# 每组最多的任务数
+PACK_MAX_GROUP_SIZE = 8
+
+# 每个任务预计的输出 token 数
+PACK_OUTPUT_TOKENS = 350
+
+# 同时进行的打包请求数上限
+PACK_CONCURRENCY = 4
+
+_tokenizer = None
+
+
+def estimate_tokens(text: str) -> int:
+    """估算 token 数；tiktoken 不可用时按每 4 个字符约 1 个 token 计算"""
+    global _tokenizer
+    if _tokenizer is None:
+        try:
+            import tiktoken
+            _tokenizer = tiktoken.encoding_for_model("gpt-4o")
+        except Exception as e:
+            print(f"⚠️ 无法初始化tiktoken，使用近似计算: {str(e)}")
+            _tokenizer = False
+    if _tokenizer:
+        return len(_tokenizer.encode(text))
+    return len(text) // 4
+
+
+def _task_text(task: Any) -> str:
+    return task if isinstance(task, str) else json.dumps(task, ensure_ascii=False, default=str)
+
+
+def pack_groups(tasks: Dict[str, Any], token_budget: int = PACK_TOKEN_BUDGET,
+                max_group_size: int = PACK_MAX_GROUP_SIZE, output_tokens: int = PACK_OUTPUT_TOKENS,
+                partition: Optional[Callable[[str], Any]] = None) -> List[List[str]]:
+    """按顺序把任务装入若干组，每组的任务 token 与预计输出 token 之和不超过预算
+
+    给出 partition 时，partition(任务键) 不同的任务不会进入同一组（例如共享上下文不同的任务）。
+    """
+    groups: List[List[str]] = []
+    current: List[str] = []
+    used = 0
+    current_part = None
+    for key, task in tasks.items():
+        cost = estimate_tokens(_task_text(task)) + output_tokens
+        part = partition(key) if partition is not None else None
+        if current and (used + cost > token_budget or len(current) >= max_group_size or part != current_part):
+            groups.append(current)
+            current, used = [], 0
+        current_part = part
+        current.append(key)
+        used += cost
+    if current:
+        groups.append(current)
+    return groups
+
+
+def match_keyed_response(response: Any, keys: List[str]) -> Dict[str, Any]:
+    """从以任务键为键的 JSON 响应中取出各任务的结果；键先精确匹配，再忽略大小写和首尾空白匹配"""
+    if not isinstance(response, dict):
+        return {}
+    normalized = {str(key).strip().lower(): value for key, value in response.items()}
+    found = {}
+    for key in keys:
+        if key in response:
+            found[key] = response[key]
+        elif key.strip().lower() in normalized:
+            found[key] = normalized[key.strip().lower()]
+    return found
+
+
+def _default_accept(value: Any) -> bool:
+    return isinstance(value, dict) and bool(value) and "error" not in value
+
+
+class PromptPacker:
+    """把若干个共享同一段上下文的小任务打包进一次 LLM 请求
+
+    - 任务按 token 预算分组；build_prompt(组内任务) 生成一次请求的提示词，
+      共享上下文每组只出现一次，要求模型返回以任务键为键的 JSON
+    - 响应中缺少的键（或无法解析的响应）拆成更小的组重试，单个任务仍失败时
+      调用 single(键, 任务) 按原来的逐任务提示词处理
+    - get(键) 等待该任务所在的组完成；start() 预先按并发上限启动全部组
+
+    Args:
+        tasks: {任务键: 任务描述}，任务描述会计入分组预算
+        build_prompt: build_prompt({任务键: 任务描述}) -> 提示词
+        call: async call(提示词) -> 响应（期望为以任务键为键的字典）
+        single: async single(任务键, 任务描述) -> 结果，逐任务的后备方案
+        accept: 判断单个任务的结果是否有效，默认要求为非空且不含 error 的字典
+        partition: 共享上下文不同的任务不打包到同一组
+    """
+
+    def __init__(self, tasks: Dict[str, Any], build_prompt: Callable[[Dict[str, Any]], str],
+                 call: Callable[[str], Awaitable[Any]],
+                 single: Optional[Callable[[str, Any], Awaitable[Any]]] = None,
+                 token_budget: int = PACK_TOKEN_BUDGET, max_group_size: int = PACK_MAX_GROUP_SIZE,
+                 output_tokens: int = PACK_OUTPUT_TOKENS, max_concurrency: int = PACK_CONCURRENCY,
+                 accept: Callable[[Any], bool] = _default_accept,
+                 partition: Optional[Callable[[str], Any]] = None):
+        self.tasks = dict(tasks)
+        self.build_prompt = build_prompt
+        self.call = call
+        self.single = single
+        self.accept = accept
+        self.groups = pack_groups(self.tasks, token_budget, max(1, max_group_size), output_tokens, partition)
+        self._group_of = {key: idx for idx, group in enumerate(self.groups) for key in group}
+        self._limit = asyncio.Semaphore(max(1, max_concurrency))
+        self._futures: Dict[int, asyncio.Future] = {}
+        self.calls = 0
+        self.single_calls = 0
+
+    def start(self):
+        """启动全部组（受并发上限约束）"""
+        for idx in range(len(self.groups)):
+            self._group_future(idx)
+
+    def cancel(self):
+        """取消尚未完成的组"""
+        for future in self._futures.values():
+            if not future.done():
+                future.cancel()
+
+    async def get(self, key: str) -> Any:
+        """返回单个任务的结果；任务失败时抛出异常"""
+        results = await asyncio.shield(self._group_future(self._group_of[key]))
+        value = results[key]
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    async def run(self) -> Dict[str, Any]:
+        """执行全部任务，返回 {任务键: 结果或异常}，顺序与 tasks 一致"""
+        self.start()
+        merged = {}
+        for results in await asyncio.gather(*self._futures.values()):
+            merged.update(results)
+        return {key: merged[key] for key in self.tasks}
+
+    def _group_future(self, idx: int) -> asyncio.Future:
+        if idx not in self._futures:
+            self._futures[idx] = asyncio.ensure_future(self._solve(self.groups[idx]))
+        return self._futures[idx]
+
+    async def _solve(self, keys: List[str]) -> Dict[str, Any]:
+        prompt = self.build_prompt({key: self.tasks[key] for key in keys})
+        async with self._limit:
+            self.calls += 1
+            try:
+                response = await self.call(prompt)
+            except Exception as e:
+                print(f"⚠️ [PACK] {len(keys)} 个任务的打包请求失败: {str(e)}")
+                response = None
+
+        found = match_keyed_response(response, keys)
+        results = {key: value for key, value in found.items() if self.accept(value)}
+        missing = [key for key in keys if key not in results]
+        if not missing:
+            return results
+
+        print(f"⚠️ [PACK] 响应缺少 {len(missing)}/{len(keys)} 个任务的结果，拆分重试")
+        if len(missing) > 1:
+            half = len(missing) // 2
+            for part in await asyncio.gather(self._solve(missing[:half]), self._solve(missing[half:])):
+                results.update(part)
+        elif self.single is not None:
+            results[missing[0]] = await self._run_single(missing[0])
+        elif len(keys) > 1:
+            results.update(await self._solve(missing))
+        else:
+            results[missing[0]] = ValueError(f"未能获取任务 '{missing[0]}' 的结果")
+        return results
+
+    async def _run_single(self, key: str) -> Any:
+        async with self._limit:
+            self.single_calls += 1
+            try:
+                return await self.single(key, self.tasks[key])
+            except Exception as e:
+                return e
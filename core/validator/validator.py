@@ -5,6 +5,7 @@ from core.llm.llm_executor import run_prompt, split_text_by_tokens
 from core.llm.chat_openai import chat
 import tiktoken
 from dependency_manager import DependencyManager
+from memory.module_store import get_module_store
 import re
 import time
 from prompt_templates import get_validator_prompt as get_template_prompt
@@ -309,18 +310,12 @@ async def run_validator(modules_to_check=None):
     requirement_docs = [f.read_text() for f in input_path.glob("*.md")]
     requirement_text = "\n\n".join(requirement_docs)
 
-    # 加载模块摘要
-    summaries = []
-    for path in module_path.glob("*/full_summary.json"):
-        try:
-            # 如果指定了要检查的模块，只加载这些模块
-            if modules_to_check:
-                module_name = path.parent.name
-                if module_name not in modules_to_check:
-                    continue
-            summaries.append(json.loads(path.read_text()))
-        except Exception as e:
-            print(f"⚠️ 无法解析 {path}: {e}")
+    # 从模块存储加载模块摘要（结构验证阶段复用同一份结果）
+    module_store = get_module_store(module_path)
+    if modules_to_check:
+        summaries = module_store.find(names=modules_to_check)
+    else:
+        summaries = module_store.all()
 
     # 加载和更新索引
     summary_index = {}
@@ -473,18 +468,11 @@ async def run_validator(modules_to_check=None):
 
     # 结构验证
     local_structure_issues = {}
-    for path in module_path.glob("*/full_summary.json"):
-        try:
-            # 如果指定了要检查的模块，只检查这些模块
-            module_name = path.parent.name
-            if modules_to_check and module_name not in modules_to_check:
-                continue
-                
-            data = json.loads(path.read_text())
-            check_module_structure(data, summary_index, local_structure_issues)
-        except Exception as e:
-            module_name = path.parent.name
-            local_structure_issues[module_name] = [f"failed to parse: {e}"]
+    for data in summaries:
+        check_module_structure(data, summary_index, local_structure_issues)
+    for module_name, error in module_store.load_errors.items():
+        if not modules_to_check or module_name in modules_to_check:
+            local_structure_issues[module_name] = [f"failed to parse: {error}"]
 
     # 如果保留之前的结构问题
     if modules_to_check and output_json_path.exists():
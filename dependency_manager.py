@@ -1,8 +1,12 @@
 import json
 from pathlib import Path
 import re
-import networkx as nx
-import matplotlib.pyplot as plt
+from memory.module_store import get_module_store
+
+# networkx / matplotlib 导入开销较大，仅在真正用到图算法或可视化时才加载
+def _nx():
+    import networkx
+    return networkx
 
 class DependencyManager:
     """管理模块依赖关系的类，提供实时更新和循环检测功能"""
@@ -23,7 +27,7 @@ class DependencyManager:
     
     def _ensure_nx_graph(self):
         """确保NetworkX图已创建并与当前依赖图同步"""
-        self.digraph = nx.DiGraph()
+        self.digraph = _nx().DiGraph()
         
         # 添加节点
         for module in self.graph:
@@ -136,6 +140,7 @@ class DependencyManager:
     
     def check_circular_dependencies(self, start_module=None):
         """检查是否存在循环依赖，如果指定了起始模块，则只检查与该模块相关的循环"""
+        nx = _nx()
         try:
             if start_module:
                 # 只检查与指定模块相关的循环
@@ -159,6 +164,7 @@ class DependencyManager:
     
     def get_topological_order(self):
         """获取模块的拓扑排序（如果没有循环依赖）"""
+        nx = _nx()
         try:
             return list(nx.topological_sort(self.digraph))
         except nx.NetworkXUnfeasible:
@@ -167,6 +173,8 @@ class DependencyManager:
     
     def visualize(self, output_path="data/output/dependency_graph.png"):
         """将依赖图可视化并保存为图片"""
+        import matplotlib.pyplot as plt
+        nx = _nx()
         plt.figure(figsize=(12, 10))
         pos = nx.spring_layout(self.digraph)
         nx.draw(
@@ -187,22 +195,18 @@ class DependencyManager:
             print(f"模块目录不存在: {modules_dir}")
             return
             
-        # 第一遍: 收集所有模块
-        for module_dir in modules_dir.glob("*"):
-            if module_dir.is_dir():
-                summary_file = module_dir / "full_summary.json"
-                if summary_file.exists():
-                    try:
-                        data = json.loads(summary_file.read_text())
-                        module_name = data.get("module_name")
-                        if module_name:
-                            self.graph[module_name] = {
-                                "depends_on": data.get("depends_on", []),
-                                "depended_by": [],
-                                "target_path": data.get("target_path", "")
-                            }
-                    except Exception as e:
-                        print(f"处理模块 {module_dir.name} 时出错: {e}")
+        # 第一遍: 从模块存储收集所有模块
+        module_store = get_module_store(modules_dir)
+        for data in module_store.all():
+            module_name = data.get("module_name")
+            if module_name:
+                self.graph[module_name] = {
+                    "depends_on": data.get("depends_on", []),
+                    "depended_by": [],
+                    "target_path": data.get("target_path", "")
+                }
+        for module_dir_name, error in module_store.load_errors.items():
+            print(f"处理模块 {module_dir_name} 时出错: {error}")
         
         # 第二遍: 填充 depended_by 字段
         for name, data in self.graph.items():
@@ -6,7 +6,13 @@ from typing import Set
 from llm.llm_executor import run_prompt
 from llm.chat_openai import chat
 import tiktoken
-from prompt_templates import get_missing_module_summary_prompt
+from prompt_templates import get_missing_module_summary_prompt, get_missing_modules_summary_prompt, infer_module_layer
+from core.llm.prompt_packing import PromptPacker
+from common.job_journal import JobJournal, atomic_write_json, inputs_hash
+
+# 补全缺失模块的作业日志：重启时跳过已补全的模块，失败的模块有限次重试
+JOURNAL_PATH = Path("data/output/jobs/fix_missing_modules.jsonl")
+JOB_STAGE = "missing_module"
 
 def parse_missing_modules_from_json_report(report_data: dict) -> Set[str]:
     """从JSON格式的验证报告中提取需要修复的模块列表"""
@@ -110,12 +116,35 @@ def parse_json(text: str):
 
 async def fix_missing_modules(modules_to_fix: Set[str], output_dir: Path):
     tokenizer = tiktoken.encoding_for_model("gpt-4o")
+    journal = JobJournal(JOURNAL_PATH)
+    inputs = {name: inputs_hash(name, infer_module_layer(name), str(output_dir)) for name in modules_to_fix}
 
-    for i, name in enumerate(sorted(modules_to_fix)):
-        print(f"🧠 Generating summary for: {name}")
-        prompt = f"Missing module: **{name}**"
+    names = []
+    for name in sorted(modules_to_fix):
+        saved = journal.result(name, JOB_STAGE, inputs[name])
+        if saved and (output_dir / saved).exists():
+            print(f"♻️ Already fixed: {name} → {saved}")
+        elif journal.is_exhausted(name, JOB_STAGE, inputs[name]):
+            print(f"⏭️ Skipping {name}: retry limit reached")
+        else:
+            names.append(name)
+    if not names:
+        journal.close()
+        return
 
-        result = await run_prompt(
+    async def generate_packed(prompt):
+        # 架构约定每组只发送一次，返回以模块名为键的 JSON
+        return await run_prompt(
+            chat=chat,
+            user_message=prompt,
+            model="gpt-4o",
+            tokenizer=tokenizer,
+            parse_response=parse_json,
+        )
+
+    async def generate_single(name, layer_info):
+        prompt = f"Missing module: **{name}**"
+        return await run_prompt(
             chat=chat,
             user_message=prompt,
             model="gpt-4o",
@@ -125,18 +154,32 @@ async def fix_missing_modules(modules_to_fix: Set[str], output_dir: Path):
             get_system_prompt=get_summary_prompt,
         )
 
+    packer = PromptPacker(
+        {name: infer_module_layer(name) for name in names},
+        lambda modules: get_missing_modules_summary_prompt(list(modules)),
+        generate_packed,
+        single=generate_single,
+    )
+    print(f"🧠 Generating summaries for {len(names)} modules in {len(packer.groups)} requests")
+    results = await packer.run()
+
+    for name in names:
+        result = results[name]
         try:
+            if isinstance(result, Exception):
+                raise result
             parsed = result
+            parsed.setdefault("module_name", name)
             resolved_path = parsed.get("target_path", "backend/services")
-            save_path = output_dir / resolved_path / parsed["module_name"].lower()
-            save_path.mkdir(parents=True, exist_ok=True)
-
-            with open(save_path / "full_summary.json", "w") as f:
-                json.dump(parsed, f, indent=2)
+            save_path = Path(resolved_path) / parsed["module_name"].lower() / "full_summary.json"
+            atomic_write_json(output_dir / save_path, parsed, indent=2)
+            journal.complete(name, JOB_STAGE, inputs[name], str(save_path))
 
             print(f"✅ Fixed: {parsed['module_name']} → {resolved_path}/")
         except Exception as e:
+            journal.fail(name, JOB_STAGE, inputs[name], e)
             print(f"❌ Failed to write summary for {name}: {e}")
+    journal.close()
 
 def fix_all():
     # 优先使用JSON格式的报告
@@ -6,7 +6,10 @@ This script creates more detailed modules reflecting the layered architecture:
 
 The script performs the following steps:
 1. Extract functional and non-functional modules from technical documentation
-2. Generate layer-specific modules for each domain
+   (existing modules are kept; a job journal lets an interrupted run resume
+   without regenerating completed modules)
+2. Generate layer-specific modules for each domain (concurrently, each prompt carrying
+   only the document sections relevant to its layer/component/domain)
 3. Create multi-dimensional indices for quick requirement-based lookup
 4. Perform global validation checks (conflicts, circular dependencies, functional overlaps)
 5. Prepare data for WebUI display
@@ -16,8 +19,185 @@ import json
 import os
 from pathlib import Path
 from core.clarifier.clarifier import Clarifier
+from core.clarifier.module_pipeline import ModulePipeline
+from core.clarifier.section_retrieval import SECTION_CONTEXT_CHARS, SectionRetriever
+from core.llm.prompt_packing import PromptPacker
+from common.job_journal import JobJournal, atomic_write_json, inputs_hash
 from core.llm.chat_openai import chat as openai_chat
 
+# 同时进行的模块生成（LLM 调用）数上限
+GENERATION_CONCURRENCY = 8
+
+# 同一领域的模块打包生成时，每次请求最多包含的模块数（领域相关章节每组只发送一次）
+GENERATION_PACK_SIZE = 6
+
+LAYER_GUIDANCE = {
+    "Presentation": "关注用户界面、交互体验和展示逻辑。依赖于Business层的服务，但不应直接访问Data层。",
+    "Business": "实现业务逻辑和规则，协调数据流。可以依赖Data层和Infrastructure层。",
+    "Data": "负责数据访问、持久化和数据转换。通常依赖Infrastructure层的服务。",
+    "Infrastructure": "提供技术基础设施和跨领域关注点。通常不依赖其他层。"
+}
+
+COMPONENT_GUIDANCE = {
+    "UI Components": "可重用的UI元素，如按钮、表单、卡片等。",
+    "Pages": "完整的页面组件，整合多个UI组件和视图。",
+    "Views": "特定功能区域的视图组件，可能包含多个UI组件。",
+    "Layout Components": "页面布局组件，如导航栏、侧边栏、页脚等。",
+    "Services": "实现业务逻辑的服务类，处理复杂业务规则。",
+    "Controllers": "处理请求和响应，协调服务和数据访问。",
+    "Validators": "验证输入数据的有效性和合法性。",
+    "Middleware": "请求处理管道中的中间件组件。",
+    "Models": "数据模型类，表示业务实体。",
+    "Repositories": "数据访问抽象，提供CRUD操作。",
+    "Data Access Objects": "直接与数据源交互的对象。",
+    "Data Transfer Objects": "在不同层之间传输数据的对象。",
+    "API Clients": "与外部API交互的客户端。",
+    "Storage Services": "提供存储服务的组件。",
+    "Authentication Services": "处理认证和授权的服务。",
+    "Logging Services": "提供日志记录功能的服务。"
+}
+
+# 作业日志：重启时跳过已生成的模块
+JOURNAL_PATH = Path("data/output/jobs/generate_layered_modules.jsonl")
+JOB_STAGE = "layered_module"
+
+REQUIRED_FIELDS = ["module_name", "responsibilities", "layer", "domain", "dependencies", "requirements", "target_path"]
+
+
+def build_module_prompt(layer, component, domain, context):
+    return f"""
+                基于以下技术架构文档中的相关章节，为{layer}层的{component}组件在{domain}领域生成一个详细的模块。
+                
+                技术文档（相关章节）:
+                {context}
+                
+                层级指导: {LAYER_GUIDANCE.get(layer, "")}
+                组件指导: {COMPONENT_GUIDANCE.get(component, "")}
+                
+                请专注于创建一个准确反映文档中描述的分层架构的模块。
+                对于这个特定组合({layer}/{component}/{domain})，请识别:
+                1. 该模块应具有的具体职责
+                2. 该模块对其他模块的依赖关系
+                3. 该模块将满足的需求
+                4. 该模块的适当目标路径
+                
+                返回一个具有以下结构的JSON对象:
+                {{
+                    "module_name": "{component} - {domain}",
+                    "responsibilities": ["具体职责1", "具体职责2", ...],
+                    "layer": "{layer}",
+                    "domain": "{domain}",
+                    "dependencies": ["依赖1", "依赖2", ...],
+                    "requirements": ["需求1", "需求2", ...],
+                    "target_path": "目标路径"
+                }}
+                
+                请在分析中具体且详细。如果这个特定组合在架构中没有意义，请返回一个responsibilities、dependencies和requirements为空数组的JSON。
+                
+                注意：
+                1. 确保职责与该层级和组件类型相符
+                2. 依赖关系应遵循分层架构原则（例如，Presentation层不应直接依赖Data层）
+                3. 需求应该是该模块将满足的具体功能或非功能需求
+                4. 目标路径应反映模块在项目结构中的位置
+                """
+
+
+def build_modules_prompt(domain, modules, context):
+    """同一领域多个模块的提示词，modules 为 {模块名: {"layer", "component", ...}}"""
+    module_list = json.dumps({
+        name: {
+            "layer": info["layer"],
+            "component": info["component"],
+            "layer_guidance": LAYER_GUIDANCE.get(info["layer"], ""),
+            "component_guidance": COMPONENT_GUIDANCE.get(info["component"], "")
+        }
+        for name, info in modules.items()
+    }, ensure_ascii=False, indent=2)
+    return f"""
+                基于以下技术架构文档中的相关章节，为{domain}领域的以下 {len(modules)} 个模块分别生成详细的模块定义。
+                
+                技术文档（相关章节）:
+                {context}
+                
+                需要生成的模块（键为模块名，值为层级、组件类型及其指导）:
+                {module_list}
+                
+                请专注于创建准确反映文档中描述的分层架构的模块。
+                对于每个模块，请识别:
+                1. 该模块应具有的具体职责
+                2. 该模块对其他模块的依赖关系
+                3. 该模块将满足的需求
+                4. 该模块的适当目标路径
+                
+                返回一个JSON对象，键为上面的模块名（保持完全一致），值具有以下结构:
+                {{
+                    "module_name": "模块名",
+                    "responsibilities": ["具体职责1", "具体职责2", ...],
+                    "layer": "层级",
+                    "domain": "{domain}",
+                    "dependencies": ["依赖1", "依赖2", ...],
+                    "requirements": ["需求1", "需求2", ...],
+                    "target_path": "目标路径"
+                }}
+                
+                请在分析中具体且详细。如果某个组合在架构中没有意义，该模块的responsibilities、dependencies和requirements返回空数组。
+                
+                注意：
+                1. 确保职责与该层级和组件类型相符
+                2. 依赖关系应遵循分层架构原则（例如，Presentation层不应直接依赖Data层）
+                3. 需求应该是该模块将满足的具体功能或非功能需求
+                4. 目标路径应反映模块在项目结构中的位置
+                """
+
+
+def parse_module_result(result):
+    """将 LLM 响应解析为字典；无法解析时抛出 ValueError"""
+    if isinstance(result, str):
+        if "```json" in result:
+            json_start = result.find("```json") + 7
+            json_end = result.rfind("```")
+            if json_end <= json_start:
+                raise ValueError("响应中的 JSON 代码块不完整")
+            try:
+                result = json.loads(result[json_start:json_end].strip())
+            except json.JSONDecodeError as je:
+                raise ValueError(f"解析提取的JSON失败: {je}")
+        else:
+            try:
+                result = json.loads(result)
+            except json.JSONDecodeError:
+                raise ValueError("将响应解析为JSON失败")
+    return result
+
+
+def save_module(spec, output_dir):
+    """写入单个模块的 full_summary.json（由流水线的唯一写者调用）"""
+    result, component, domain = spec["result"], spec["component"], spec["domain"]
+    if not isinstance(result, dict) or "module_name" not in result:
+        return {"status": "failed", "message": str(result)}
+    
+    if not result.get("responsibilities"):
+        print(f"⚠️ 跳过 {result['module_name']} - 未识别到职责")
+        return {"status": "skipped", "module": result["module_name"]}
+    
+    missing_fields = [field for field in REQUIRED_FIELDS if field not in result or result[field] is None]
+    if missing_fields:
+        print(f"⚠️ 模块 {result.get('module_name', 'unknown')} 缺少必要字段: {', '.join(missing_fields)}")
+        for field in missing_fields:
+            if field in ["responsibilities", "dependencies", "requirements"]:
+                result[field] = []
+            elif field == "target_path":
+                result[field] = f"src/{domain.lower()}/{component.lower().replace(' ', '_')}"
+            else:
+                result[field] = "unknown"
+    
+    module_name = result["module_name"]
+    atomic_write_json(output_dir / module_name / "full_summary.json", result)
+    
+    print(f"✅ 生成模块: {module_name}")
+    return {"status": "success", "module": module_name}
+
+
 async def generate_layered_modules():
     clarifier = Clarifier(llm_chat=openai_chat)
     
@@ -78,150 +258,143 @@ async def generate_layered_modules():
     output_dir = Path("data/output/modules")
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    for item in output_dir.iterdir():
-        if item.is_dir():
-            for file in item.iterdir():
-                file.unlink()
-            item.rmdir()
-    
     print("🔄 生成分层模块中...")
     print(f"📊 总计需要生成: {len(layers) * sum(len(components) for components in layers.values()) * len(domains)} 个模块")
     print(f"📋 层级: {list(layers.keys())}")
     print(f"📋 功能域: {functional_domains}")
     print(f"📋 非功能域: {non_functional_domains}")
     
-    total_modules = len(layers) * sum(len(components) for components in layers.values()) * len(domains)
-    generated_modules = 0
-    skipped_modules = 0
-    failed_modules = 0
-    
-    for layer, components in layers.items():
-        print(f"\n🔄 生成 {layer} 层的模块...")
-        for component in components:
-            for domain in domains:
-                generated_modules += 1
-                print(f"🔄 [{generated_modules}/{total_modules}] 生成 {layer}/{component}/{domain} 模块...")
-                
-                layer_specific_guidance = {
-                    "Presentation": "关注用户界面、交互体验和展示逻辑。依赖于Business层的服务，但不应直接访问Data层。",
-                    "Business": "实现业务逻辑和规则，协调数据流。可以依赖Data层和Infrastructure层。",
-                    "Data": "负责数据访问、持久化和数据转换。通常依赖Infrastructure层的服务。",
-                    "Infrastructure": "提供技术基础设施和跨领域关注点。通常不依赖其他层。"
-                }
-                
-                component_specific_guidance = {
-                    "UI Components": "可重用的UI元素，如按钮、表单、卡片等。",
-                    "Pages": "完整的页面组件，整合多个UI组件和视图。",
-                    "Views": "特定功能区域的视图组件，可能包含多个UI组件。",
-                    "Layout Components": "页面布局组件，如导航栏、侧边栏、页脚等。",
-                    "Services": "实现业务逻辑的服务类，处理复杂业务规则。",
-                    "Controllers": "处理请求和响应，协调服务和数据访问。",
-                    "Validators": "验证输入数据的有效性和合法性。",
-                    "Middleware": "请求处理管道中的中间件组件。",
-                    "Models": "数据模型类，表示业务实体。",
-                    "Repositories": "数据访问抽象，提供CRUD操作。",
-                    "Data Access Objects": "直接与数据源交互的对象。",
-                    "Data Transfer Objects": "在不同层之间传输数据的对象。",
-                    "API Clients": "与外部API交互的客户端。",
-                    "Storage Services": "提供存储服务的组件。",
-                    "Authentication Services": "处理认证和授权的服务。",
-                    "Logging Services": "提供日志记录功能的服务。"
-                }
-                
-                prompt = f"""
-                基于以下技术架构文档，为{layer}层的{component}组件在{domain}领域生成一个详细的模块。
-                
-                技术文档:
-                {content[:15000]}
-                
-                层级指导: {layer_specific_guidance.get(layer, "")}
-                组件指导: {component_specific_guidance.get(component, "")}
-                
-                请专注于创建一个准确反映文档中描述的分层架构的模块。
-                对于这个特定组合({layer}/{component}/{domain})，请识别:
-                1. 该模块应具有的具体职责
-                2. 该模块对其他模块的依赖关系
-                3. 该模块将满足的需求
-                4. 该模块的适当目标路径
-                
-                返回一个具有以下结构的JSON对象:
-                {{
-                    "module_name": "{component} - {domain}",
-                    "responsibilities": ["具体职责1", "具体职责2", ...],
-                    "layer": "{layer}",
-                    "domain": "{domain}",
-                    "dependencies": ["依赖1", "依赖2", ...],
-                    "requirements": ["需求1", "需求2", ...],
-                    "target_path": "目标路径"
-                }}
-                
-                请在分析中具体且详细。如果这个特定组合在架构中没有意义，请返回一个responsibilities、dependencies和requirements为空数组的JSON。
-                
-                注意：
-                1. 确保职责与该层级和组件类型相符
-                2. 依赖关系应遵循分层架构原则（例如，Presentation层不应直接依赖Data层）
-                3. 需求应该是该模块将满足的具体功能或非功能需求
-                4. 目标路径应反映模块在项目结构中的位置
-                """
-                
-                try:
-                    result = await clarifier.run_llm(prompt=prompt, return_json=True)
-                    
-                    if isinstance(result, str):
-                        if "```json" in result:
-                            json_start = result.find("```json") + 7
-                            json_end = result.rfind("```")
-                            if json_end > json_start:
-                                json_str = result[json_start:json_end].strip()
-                                try:
-                                    result = json.loads(json_str)
-                                    print(f"✅ 成功从Markdown中提取JSON")
-                                except json.JSONDecodeError as je:
-                                    print(f"❌ 解析提取的JSON失败: {je}")
-                                    failed_modules += 1
-                                    continue
-                        else:
-                            try:
-                                result = json.loads(result)
-                                print(f"✅ 成功将字符串解析为JSON")
-                            except json.JSONDecodeError:
-                                print(f"❌ 将响应解析为JSON失败")
-                                failed_modules += 1
-                                continue
-                    
-                    if isinstance(result, dict) and "module_name" in result:
-                        if not result.get("responsibilities") or len(result.get("responsibilities", [])) == 0:
-                            print(f"⚠️ 跳过 {result['module_name']} - 未识别到职责")
-                            skipped_modules += 1
-                            continue
-                        
-                        required_fields = ["module_name", "responsibilities", "layer", "domain", "dependencies", "requirements", "target_path"]
-                        missing_fields = [field for field in required_fields if field not in result or result[field] is None]
-                        
-                        if missing_fields:
-                            print(f"⚠️ 模块 {result.get('module_name', 'unknown')} 缺少必要字段: {', '.join(missing_fields)}")
-                            for field in missing_fields:
-                                if field in ["responsibilities", "dependencies", "requirements"]:
-                                    result[field] = []
-                                elif field == "target_path":
-                                    result[field] = f"src/{domain.lower()}/{component.lower().replace(' ', '_')}"
-                                else:
-                                    result[field] = "unknown"
-                        
-                        module_name = result["module_name"]
-                        module_dir = output_dir / module_name
-                        module_dir.mkdir(parents=True, exist_ok=True)
-                        
-                        with open(module_dir / "full_summary.json", "w", encoding="utf-8") as f:
-                            json.dump(result, f, ensure_ascii=False, indent=2)
-                        
-                        print(f"✅ 生成模块: {module_name}")
-                    else:
-                        print(f"❌ 为 {layer}/{component}/{domain} 生成模块失败: {result}")
-                        failed_modules += 1
-                except Exception as e:
-                    print(f"❌ 为 {layer}/{component}/{domain} 生成模块时出错: {str(e)}")
-                    failed_modules += 1
+    jobs = [
+        {"layer": layer, "component": component, "domain": domain}
+        for layer, components in layers.items()
+        for component in components
+        for domain in domains
+    ]
+    total_modules = len(jobs)
+    
+    def job_key(job):
+        return f"{job['component']} - {job['domain']}"
+    
+    # 已生成的模块不再重复生成（文档内容或组合变化后重新生成），失败次数达到上限的不再自动重试
+    journal = JobJournal(JOURNAL_PATH)
+    document_hash = inputs_hash(content)
+    job_inputs = {job_key(job): inputs_hash(document_hash, job) for job in jobs}
+    resumed = {}
+    exhausted = []
+    pending_jobs = []
+    for job in jobs:
+        key = job_key(job)
+        previous = journal.result(key, JOB_STAGE, job_inputs[key])
+        if previous is not None and (previous.get("status") == "skipped"
+                                     or (output_dir / previous.get("module", "") / "full_summary.json").exists()):
+            resumed[key] = previous
+        elif journal.is_exhausted(key, JOB_STAGE, job_inputs[key]):
+            exhausted.append(job)
+        else:
+            pending_jobs.append(job)
+    if resumed or exhausted:
+        print(f"♻️ 从作业日志恢复: {len(resumed)} 个模块已完成，{len(exhausted)} 个模块已达重试上限，"
+              f"{len(pending_jobs)} 个模块待生成")
+    
+    retriever = SectionRetriever(content, input_path.name)
+    context_chars = []
+    started = 0
+    
+    def retrieve_context(domain, components):
+        # 只附带与领域和组件相关的章节，而不是固定的文档前 15000 个字符
+        context = retriever.retrieve(
+            " ".join([domain, domain] + [f"{component} {COMPONENT_GUIDANCE.get(component, '')}" for component in components]),
+            SECTION_CONTEXT_CHARS
+        )
+        context_chars.append(len(context))
+        return context
+    
+    def build_packed_prompt(modules):
+        domain = next(iter(modules.values()))["domain"]
+        context = retrieve_context(domain, sorted({info["component"] for info in modules.values()}))
+        return build_modules_prompt(domain, modules, context)
+    
+    async def call_packed(prompt):
+        return parse_module_result(await clarifier.run_llm(prompt=prompt, return_json=True))
+    
+    async def generate_single(key, job):
+        layer, component, domain = job["layer"], job["component"], job["domain"]
+        context = retrieve_context(domain, [component])
+        prompt = build_module_prompt(layer, component, domain, context)
+        return parse_module_result(await clarifier.run_llm(prompt=prompt, return_json=True))
+    
+    # 同一领域的模块共享检索到的章节，按领域打包生成；缺失的模块拆组重试，最终逐个生成
+    domain_order = {domain: idx for idx, domain in enumerate(domains)}
+    packer = PromptPacker(
+        {job_key(job): job for job in sorted(pending_jobs, key=lambda job: domain_order[job["domain"]])},
+        build_packed_prompt, call_packed,
+        single=generate_single,
+        max_group_size=GENERATION_PACK_SIZE,
+        max_concurrency=GENERATION_CONCURRENCY,
+        accept=lambda value: isinstance(value, dict) and "error" not in value,
+        partition=lambda key: key.rsplit(" - ", 1)[-1]
+    )
+    print(f"📦 {len(pending_jobs)} 个模块打包为 {len(packer.groups)} 次请求")
+    packer.start()
+    
+    async def generate(job):
+        nonlocal started
+        started += 1
+        layer, component, domain = job["layer"], job["component"], job["domain"]
+        print(f"🔄 [{started}/{len(pending_jobs)}] 生成 {layer}/{component}/{domain} 模块...")
+        result = await packer.get(job_key(job))
+        if isinstance(result, dict):
+            result.setdefault("module_name", job_key(job))
+        return {**job, "result": result}
+    
+    recorded = set()
+    
+    async def apply(specs):
+        # 输出写成功后才记录完成，进程中断时未记录的模块重启后重新生成；
+        # 逐个模块捕获写入错误，已写入并记录完成的模块不会因同批其他模块失败而被标记为失败
+        results = []
+        for spec in specs:
+            key = job_key(spec)
+            try:
+                result = save_module(spec, output_dir)
+            except Exception as e:
+                result = {"status": "failed", "message": str(e)}
+            if result["status"] in ("success", "skipped"):
+                journal.complete(key, JOB_STAGE, job_inputs[key], result)
+            else:
+                journal.fail(key, JOB_STAGE, job_inputs[key], result.get("message", ""))
+            recorded.add(key)
+            results.append(result)
+        return results
+    
+    pipeline = ModulePipeline(
+        generate, apply, max_concurrency=GENERATION_CONCURRENCY,
+        key=lambda job: f"{job['layer']}/{job['component']}/{job['domain']}"
+    )
+    results = []
+    try:
+        results = await pipeline.run(pending_jobs)
+    finally:
+        packer.cancel()
+        # 生成阶段出错的模块没有经过 apply，在关闭日志前补记失败
+        for job, result in zip(pending_jobs, results):
+            key = job_key(job)
+            if result.get("status") == "error" and key not in recorded:
+                journal.fail(key, JOB_STAGE, job_inputs[key], result.get("message", ""))
+        journal.close()
+    
+    results_by_key = dict(resumed)
+    results_by_key.update((job_key(job), result) for job, result in zip(pending_jobs, results))
+    skipped_modules = sum(1 for result in results_by_key.values() if result.get("status") == "skipped")
+    failed_modules = len(exhausted)
+    for job, result in zip(pending_jobs, results):
+        if result.get("status") in ("failed", "error", "cancelled"):
+            failed_modules += 1
+            print(f"❌ 为 {job['layer']}/{job['component']}/{job['domain']} 生成模块失败: {result.get('message', '')}")
+    generated_names = sorted({result["module"] for result in results_by_key.values() if result.get("status") == "success"})
+    if context_chars:
+        print(f"📉 每个提示词平均附带 {sum(context_chars) // len(context_chars)} 个字符的文档内容（原为 15000）")
+    print(f"📦 LLM 请求: 打包 {packer.calls} 次，逐个生成 {packer.single_calls} 次（原为 {total_modules} 次）")
     
     print("🔄 集成生成的模块...")
     integration_result = await clarifier.integrate_legacy_modules()
@@ -267,10 +440,9 @@ async def generate_layered_modules():
         "domain_index": {}
     }
     
-    for module_dir in output_dir.iterdir():
-        if not module_dir.is_dir():
-            continue
-            
+    # 只汇总本次组合矩阵生成的模块（输出目录中可能还有其他工具生成的模块）
+    for module_name in generated_names:
+        module_dir = output_dir / module_name
         summary_path = module_dir / "full_summary.json"
         if not summary_path.exists():
             continue
@@ -309,8 +481,7 @@ async def generate_layered_modules():
             if module_id not in summary_index["requirement_module_index"][req_id]["modules"]:
                 summary_index["requirement_module_index"][req_id]["modules"].append(module_id)
     
-    with open("data/output/summary_index.json", "w", encoding="utf-8") as f:
-        json.dump(summary_index, f, ensure_ascii=False, indent=2)
+    atomic_write_json(Path("data/output/summary_index.json"), summary_index)
     
     print(f"✅ 生成摘要索引，包含 {len(summary_index['modules'])} 个模块")
     
@@ -347,8 +518,7 @@ async def generate_layered_modules():
         }
         webui_data["requirement_module_index"][req_id] = req_data["modules"]
     
-    with open("data/output/loaded_modules.json", "w", encoding="utf-8") as f:
-        json.dump(webui_data, f, ensure_ascii=False, indent=2)
+    atomic_write_json(Path("data/output/loaded_modules.json"), webui_data)
     
     print("✅ WebUI数据准备完成")
     
@@ -9,10 +9,14 @@ from pathlib import Path
 from llm.prompt_cleaner import clean_code_output
 from llm.chat_autogen import chat
 from memory.structured_context import get_structured_context
+from common.job_journal import JobJournal, atomic_write_text, inputs_hash
 from prompt_templates import get_generator_prompt
 
 input_dir = Path("data/output/modules")
 output_dir = Path("data/generated_code")
+# 代码生成的作业日志：重启时跳过已生成的模块，失败的模块有限次重试
+journal_path = Path("data/output/jobs/generate_all_modules.jsonl")
+JOB_STAGE = "generate_code"
 output_dir.mkdir(parents=True, exist_ok=True)
 
 # Load summary index
@@ -34,9 +38,7 @@ async def generate_module(module_name: str, prompt: str, resolved_path: Path):
     else:
         cleaned_text = clean_code_output(result_text.messages[-1].content)
 
-    resolved_path.mkdir(parents=True, exist_ok=True)
-    with open(resolved_path / f"{module_name.lower()}.ts", "w") as f:
-        f.write(cleaned_text)
+    atomic_write_text(resolved_path / f"{module_name.lower()}.ts", cleaned_text)
 
     print(f"✅ Module generated: {module_name}")
 
@@ -56,8 +58,14 @@ def construct_prompt(module_summary):
 async def generate_all_modules():
     """
     Generates code for all modules defined in the input directory
+
+    Progress is recorded in a job journal: modules already generated from the same
+    prompt are skipped on restart, and a failing module is retried a limited number
+    of times without stopping the rest of the batch.
     """
-    modules = [p for p in input_dir.iterdir() if p.is_dir()]
+    modules = sorted(p for p in input_dir.iterdir() if p.is_dir())
+    journal = JobJournal(journal_path)
+    counts = {"skipped": 0, "done": 0, "failed": 0, "exhausted": 0}
     for module_path in modules:
         module_name = module_path.name
         summary_path = module_path / "full_summary.json"
@@ -75,10 +83,26 @@ async def generate_all_modules():
         # Resolve the output path
         target_path = Path(summary.get("target_path", ""))
         resolved_path = output_dir / target_path
-        
-        await generate_module(module_name, prompt, resolved_path)
-        
-    print(f"🎉 All modules generated successfully!")
+        output_file = resolved_path / f"{module_name.lower()}.ts"
+        inputs = inputs_hash(prompt, str(output_file))
+
+        if not output_file.exists():
+            # 日志记录已完成但输出文件已被删除时重新生成
+            journal.invalidate(module_name, JOB_STAGE, inputs)
+
+        outcome = await journal.run(module_name, JOB_STAGE, inputs,
+                                    lambda: generate_module(module_name, prompt, resolved_path))
+        counts[outcome["status"]] += 1
+        if outcome["status"] == "exhausted":
+            print(f"⏭️ Skipping {module_name}: retry limit reached ({outcome.get('error')})")
+
+    journal.close()
+    failed = counts["failed"] + counts["exhausted"]
+    print(f"📊 Generated {counts['done']}, resumed {counts['skipped']}, failed {failed}")
+    if failed:
+        print(f"⚠️ {failed} modules failed; modules at the retry limit are retried once their summary changes")
+    else:
+        print(f"🎉 All modules generated successfully!")
 
 if __name__ == "__main__":
     asyncio.run(generate_all_modules())
@@ -6,6 +6,7 @@ import json
 import os
 from pathlib import Path
 import requests
+from memory.module_store import get_module_store
 
 async def load_modules():
     print("🔄 Loading modules from data/output/modules...")
@@ -22,19 +23,9 @@ async def load_modules():
     }
     
     module_count = 0
-    for module_dir in modules_dir.iterdir():
-        if not module_dir.is_dir():
-            continue
-            
-        summary_path = module_dir / "full_summary.json"
-        if not summary_path.exists():
-            print(f"⚠️ No full_summary.json found in {module_dir}")
-            continue
-            
+    module_store = get_module_store(modules_dir)
+    for module_data in module_store.all():
         try:
-            with open(summary_path, "r", encoding="utf-8") as f:
-                module_data = json.load(f)
-                
             module_name = module_data.get("module_name", "unknown")
             module_id = module_name.replace(" ", "_").lower()
             
@@ -62,7 +53,9 @@ async def load_modules():
             module_count += 1
             print(f"✅ Loaded module: {module_name}")
         except Exception as e:
-            print(f"❌ Error loading module {module_dir.name}: {str(e)}")
+            print(f"❌ Error loading module {module_data.get('module_name')}: {str(e)}")
+    for module_dir_name, error in module_store.load_errors.items():
+        print(f"❌ Error loading module {module_dir_name}: {error}")
     
     print(f"✅ Loaded {module_count} modules")
     
@@ -1,6 +1,7 @@
 # memory/embedding_client.py
 
-from typing import List, Protocol
+import asyncio
+from typing import Dict, List, Protocol
 from pathlib import Path
 
 class EmbeddingClient(Protocol):
@@ -12,6 +13,14 @@ class EmbeddingClient(Protocol):
         """Query top-K relevant chunks based on input text."""
         ...
 
+    async def query_async(self, query_text: str, top_k: int = 3) -> List[str]:
+        """Non-blocking variant of query for code running on the event loop."""
+        ...
+
+    async def query_many(self, query_texts: List[str], top_k: int = 3) -> Dict[str, List[str]]:
+        """Query several texts at once, returning top-K chunks per text."""
+        ...
+
     def build(self, doc_paths: List[Path]):
         """Build the index from a list of markdown documents."""
         ...
@@ -19,10 +28,10 @@ class EmbeddingClient(Protocol):
 
 # Default: Local JSON Vector Client
 from memory.embedding_db import (
-    load_chunks, load_embeddings, cosine_similarity,
-    embed_chunks, prepare_db_from_docs, save_vector_db
+    load_chunks, load_embeddings,
+    embed_chunks, embed_queries, get_sync_client, top_k_chunks,
+    prepare_db_from_docs, save_vector_db
 )
-from openai import OpenAI
 import json
 import numpy as np
 
@@ -36,14 +45,33 @@ class LocalEmbeddingClient:
         self.chunks = load_chunks()
         self.embeddings = load_embeddings()
 
+    async def load_async(self):
+        """在线程池中读取向量库，避免阻塞事件循环"""
+        self.chunks, self.embeddings = await asyncio.gather(
+            asyncio.to_thread(load_chunks),
+            asyncio.to_thread(load_embeddings)
+        )
+
     def query(self, query_text: str, top_k: int = 3) -> List[str]:
-        sync_client = OpenAI()
-        response = sync_client.embeddings.create(model=self.model, input=[query_text])
+        """同步查询，会阻塞调用线程；在事件循环中请使用 query_async"""
+        response = get_sync_client().embeddings.create(model=self.model, input=[query_text])
         query_vec = response.data[0].embedding
-        
-        scores = [cosine_similarity(query_vec, v) for v in self.embeddings]
-        top_indices = sorted(range(len(scores)), key=lambda i: -scores[i])[:top_k]
-        return [self.chunks[i] for i in top_indices]
+        return top_k_chunks(query_vec, self.chunks, self.embeddings, top_k)
+
+    async def query_async(self, query_text: str, top_k: int = 3) -> List[str]:
+        results = await self.query_many([query_text], top_k)
+        return results.get(query_text, [])
+
+    async def query_many(self, query_texts: List[str], top_k: int = 3) -> Dict[str, List[str]]:
+        """批量查询：所有查询文本合并为一次 embeddings 请求"""
+        if not self.chunks:
+            return {q: [] for q in query_texts}
+        unique_texts = list(dict.fromkeys(query_texts))
+        query_vecs = await embed_queries(unique_texts, model=self.model)
+        return {
+            q: top_k_chunks(vec, self.chunks, self.embeddings, top_k)
+            for q, vec in zip(unique_texts, query_vecs)
+        }
 
     async def build(self, doc_paths: List[Path]):
         chunks = prepare_db_from_docs([str(p) for p in doc_paths])
@@ -2,23 +2,58 @@
 
 import os
 import json
+import asyncio
 from pathlib import Path
-from typing import List
+from typing import Dict, List
 import numpy as np
-import tiktoken
-from openai import AsyncOpenAI
 
 # Global config
 DB_PATH = Path("data/vector/architecture_embeddings.json")
 CHUNK_PATH = Path("data/vector/chunks.json")
 MODEL = "text-embedding-3-small"
-ENCODING = tiktoken.encoding_for_model(MODEL)
 
-client = AsyncOpenAI()
+# tokenizer 与客户端均在首次使用时创建，避免 import 时加载 BPE 词表和初始化 HTTP 客户端
+_encoding = None
+client = None
+_sync_client = None
+
+def get_encoding():
+    global _encoding
+    if _encoding is None:
+        import tiktoken
+        _encoding = tiktoken.encoding_for_model(MODEL)
+    return _encoding
+
+def get_client():
+    """Shared async client, created on first use."""
+    global client
+    if client is None:
+        from openai import AsyncOpenAI
+        client = AsyncOpenAI()
+    return client
+
+def get_sync_client():
+    """Shared sync client for callers that cannot await (CLI scripts)."""
+    global _sync_client
+    if _sync_client is None:
+        from openai import OpenAI
+        _sync_client = OpenAI()
+    return _sync_client
 
 def cosine_similarity(a, b):
     return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
 
+def top_k_chunks(query_vec, chunks: List[str], embeddings, top_k: int = 3) -> List[str]:
+    """Rank all chunks against one query vector in a single matrix product."""
+    if not chunks or len(embeddings) == 0:
+        return []
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    query = np.asarray(query_vec, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    scores = matrix @ query / np.where(norms == 0, 1.0, norms)
+    top_indices = np.argsort(-scores, kind="stable")[:top_k]
+    return [chunks[i] for i in top_indices]
+
 def load_embeddings():
     if not DB_PATH.exists():
         return []
@@ -36,15 +71,16 @@ def save_vector_db(chunks: List[str], embeddings: List[List[float]]):
     DB_PATH.write_text(json.dumps(embeddings, indent=2))
 
 async def embed_chunks(text_chunks: List[str]) -> List[List[float]]:
-    response = await client.embeddings.create(
+    response = await get_client().embeddings.create(
         model=MODEL,
         input=text_chunks
     )
     return [d.embedding for d in response.data]
 
 def truncate(text: str, max_tokens=200) -> str:
-    tokens = ENCODING.encode(text)
-    return ENCODING.decode(tokens[:max_tokens])
+    encoding = get_encoding()
+    tokens = encoding.encode(text)
+    return encoding.decode(tokens[:max_tokens])
 
 def prepare_db_from_docs(docs: List[str]):
     from llm.token_splitter import split_text_by_tokens
@@ -52,7 +88,7 @@ def prepare_db_from_docs(docs: List[str]):
     for doc in docs:
         with open(doc, "r") as f:
             text = f.read()
-            chunks = split_text_by_tokens(text, ENCODING, 200)
+            chunks = split_text_by_tokens(text, get_encoding(), 200)
             print(f"📄 {doc} split into {len(chunks)} chunks.")
             all_chunks.extend(chunks)
     print(f"🧩 Total {len(all_chunks)} chunks prepared from markdown files.")
@@ -63,19 +99,43 @@ async def build_embedding_db(doc_paths: List[Path]):
     embeddings = await embed_chunks(chunks)
     save_vector_db(chunks, embeddings)
 
+async def embed_queries(queries: List[str], model: str = MODEL) -> List[List[float]]:
+    """Embed several query strings with one request on the shared async client."""
+    if not queries:
+        return []
+    response = await get_client().embeddings.create(model=model, input=list(queries))
+    return [d.embedding for d in response.data]
+
 def query_relevant_excerpts(module_name: str, top_k=3) -> List[str]:
+    """同步版本，仅供无法 await 的脚本使用；异步代码请使用 query_relevant_excerpts_async"""
     if not DB_PATH.exists() or not CHUNK_PATH.exists():
         return []
 
     all_chunks = load_chunks()
     all_embeddings = load_embeddings()
 
-    from openai import OpenAI
-    sync_client = OpenAI()
-    response = sync_client.embeddings.create(model=MODEL, input=[module_name])
+    response = get_sync_client().embeddings.create(model=MODEL, input=[module_name])
     query_vec = response.data[0].embedding
 
-    scores = [cosine_similarity(query_vec, vec) for vec in all_embeddings]
-    top_indices = sorted(range(len(scores)), key=lambda i: -scores[i])[:top_k]
+    return top_k_chunks(query_vec, all_chunks, all_embeddings, top_k)
+
+async def query_relevant_excerpts_async(module_name: str, top_k=3) -> List[str]:
+    results = await query_many_relevant_excerpts([module_name], top_k)
+    return results.get(module_name, [])
+
+async def query_many_relevant_excerpts(queries: List[str], top_k=3) -> Dict[str, List[str]]:
+    """批量检索：一次 embeddings 请求，向量库文件在线程池中读取，不阻塞事件循环"""
+    if not queries or not DB_PATH.exists() or not CHUNK_PATH.exists():
+        return {q: [] for q in queries}
+
+    all_chunks, all_embeddings = await asyncio.gather(
+        asyncio.to_thread(load_chunks),
+        asyncio.to_thread(load_embeddings)
+    )
+    unique_queries = list(dict.fromkeys(queries))
+    query_vecs = await embed_queries(unique_queries)
 
-    return [all_chunks[i] for i in top_indices]
\ No newline at end of file
+    return {
+        q: top_k_chunks(vec, all_chunks, all_embeddings, top_k)
+        for q, vec in zip(unique_queries, query_vecs)
+    }
\ No newline at end of file
@@ -1,50 +1,32 @@
 # memory/function_signatures.py
 
-import re
 import json
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
+from memory.symbol_index import get_symbol_index, parse_typescript_symbols
 
-GENERATED_CODE_DIR = Path("data/generated_code")
 SUMMARY_INDEX_PATH = Path("data/output/summary_index.json")
 
-TS_FUNC_PATTERN = re.compile(r"(?:export\s+)?function\s+(\w+)\s*\(")
-CLASS_METHOD_PATTERN = re.compile(r"(\w+)\s*\((.*?)\)\s*{")
-
 
 def extract_functions_from_file(file_path: Path) -> List[str]:
-    content = file_path.read_text(errors="ignore")
-    lines = []
-
-    # Extract top-level functions
-    for match in TS_FUNC_PATTERN.finditer(content):
-        fn = match.group(1)
-        lines.append(fn + "(...)")
-
-    # Extract class methods
-    class_body = re.findall(r"class\s+\w+\s*{(.*?)}", content, re.DOTALL)
-    for body in class_body:
-        for match in CLASS_METHOD_PATTERN.finditer(body):
-            fn = match.group(1)
-            if fn not in ["constructor"]:
-                lines.append(fn + "(...)")
-
-    return list(set(lines))
+    symbols = parse_typescript_symbols(file_path.read_text(errors="ignore"))
+    lines = [f["name"] + "(...)" for f in symbols["functions"]]
+    for cls in symbols["classes"]:
+        lines.extend(m["name"] + "(...)" for m in cls["methods"])
+    return list(dict.fromkeys(lines))
 
 
-def get_function_signatures(module_name: str) -> List[str]:
-    if not SUMMARY_INDEX_PATH.exists():
-        return []
-
-    summary_index = json.loads(SUMMARY_INDEX_PATH.read_text())
-    target_info = summary_index.get(module_name)
-    if not target_info:
-        return []
+def get_function_signatures(module_name: str, summary_index: Optional[Dict] = None) -> List[str]:
+    """从持久化符号索引中读取模块签名，文件未变化时不会重新解析
 
-    target_path = target_info.get("target_path", "unsure")
-    module_path = GENERATED_CODE_DIR / target_path / f"{module_name.lower()}.ts"
+    summary_index 可由调用方预先加载并在多个模块间共享
+    """
+    if summary_index is None:
+        if not SUMMARY_INDEX_PATH.exists():
+            return []
+        summary_index = json.loads(SUMMARY_INDEX_PATH.read_text())
 
-    if not module_path.exists():
+    if module_name not in summary_index:
         return []
 
-    return extract_functions_from_file(module_path)
+    return get_symbol_index().get_module_signatures(module_name, summary_index)
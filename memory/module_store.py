@@ -0,0 +1,343 @@
+# memory/module_store.py
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MODULES_DIR = Path("data/output/modules")
+SUMMARY_FILE = "full_summary.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS modules (
+    name TEXT PRIMARY KEY,
+    layer TEXT NOT NULL DEFAULT '',
+    target_path TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_modules_layer ON modules(layer);
+CREATE INDEX IF NOT EXISTS idx_modules_target_path ON modules(target_path);
+
+CREATE TABLE IF NOT EXISTS module_domains (
+    module TEXT NOT NULL REFERENCES modules(name) ON DELETE CASCADE,
+    domain TEXT NOT NULL,
+    PRIMARY KEY (module, domain)
+);
+CREATE INDEX IF NOT EXISTS idx_module_domains_domain ON module_domains(domain);
+
+CREATE TABLE IF NOT EXISTS module_requirements (
+    module TEXT NOT NULL REFERENCES modules(name) ON DELETE CASCADE,
+    requirement TEXT NOT NULL,
+    PRIMARY KEY (module, requirement)
+);
+CREATE INDEX IF NOT EXISTS idx_module_requirements_requirement ON module_requirements(requirement);
+
+CREATE TABLE IF NOT EXISTS legacy_files (
+    path TEXT PRIMARY KEY,
+    module TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_legacy_files_module ON legacy_files(module);
+"""
+
+
+def module_name_of(summary: Dict, fallback: str = "") -> str:
+    return summary.get("module_name") or summary.get("name") or fallback
+
+
+def safe_module_name(module_name: str) -> str:
+    return ''.join(c for c in module_name if c.isalnum() or c in ['-', '_', ' '])
+
+
+def _as_list(value) -> List[str]:
+    """domain/requirements 既可能是字符串，也可能是列表或带 id/name 的字典列表"""
+    if not value:
+        return []
+    if isinstance(value, (str, dict)):
+        value = [value]
+    items = []
+    for item in value:
+        if isinstance(item, dict):
+            item = item.get("id") or item.get("name")
+        if item:
+            items.append(str(item))
+    return list(dict.fromkeys(items))
+
+
+class ModuleStore:
+    """模块摘要的 SQLite（WAL）存储
+
+    name、layer、target_path 为索引列，domain 与 requirements 存入关联表，完整摘要以 JSON 存于 data 列。
+    批量写入在一个事务中完成。为兼容仍按目录读取的脚本，写入后会导出
+    <modules_dir>/<name>/full_summary.json（名称含特殊字符时另导出安全名称副本）；
+    其他进程直接改写的摘要文件按 (mtime, size) 检测，refresh() 时只重新解析变化的文件。
+    """
+
+    def __init__(self, modules_dir: Path = MODULES_DIR, db_path: Optional[Path] = None, export_legacy: bool = True):
+        self.modules_dir = Path(modules_dir).absolute()
+        self.db_path = Path(db_path) if db_path else self.modules_dir.parent / f"{self.modules_dir.name}.sqlite"
+        self.export_legacy = export_legacy
+        self.load_errors: Dict[str, str] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is not None and not self.db_path.exists():
+            # 数据库文件被外部删除（例如清空输出目录）时重新创建
+            self._conn.close()
+            self._conn = None
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ---- 写入 ----
+
+    def _write_rows(self, conn: sqlite3.Connection, summary: Dict, name: str):
+        conn.execute(
+            "INSERT INTO modules (name, layer, target_path, data, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET layer=excluded.layer, target_path=excluded.target_path, "
+            "data=excluded.data, updated_at=excluded.updated_at",
+            (name, str(summary.get("layer") or ""), str(summary.get("target_path") or ""),
+             json.dumps(summary, ensure_ascii=False), time.time())
+        )
+        conn.execute("DELETE FROM module_domains WHERE module = ?", (name,))
+        conn.executemany("INSERT INTO module_domains (module, domain) VALUES (?, ?)",
+                         [(name, domain) for domain in _as_list(summary.get("domain"))])
+        conn.execute("DELETE FROM module_requirements WHERE module = ?", (name,))
+        conn.executemany("INSERT INTO module_requirements (module, requirement) VALUES (?, ?)",
+                         [(name, req) for req in _as_list(summary.get("requirements"))])
+
+    def upsert(self, summary: Dict) -> str:
+        return self.upsert_many([summary])[0]
+
+    def upsert_many(self, summaries: Iterable[Dict]) -> List[str]:
+        """在一个事务中写入多个模块摘要，返回模块名列表"""
+        summaries = list(summaries)
+        names = [module_name_of(summary) for summary in summaries]
+        if not all(names):
+            raise ValueError("模块摘要缺少 module_name/name 字段")
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                for summary, name in zip(summaries, names):
+                    self._write_rows(conn, summary, name)
+            if self.export_legacy:
+                self._export(list(zip(names, summaries)))
+        return names
+
+    def delete(self, module_name: str) -> bool:
+        """删除模块及其导出的摘要文件"""
+        with self._lock:
+            conn = self._connect()
+            paths = [row[0] for row in conn.execute("SELECT path FROM legacy_files WHERE module = ?", (module_name,))]
+            with conn:
+                deleted = conn.execute("DELETE FROM modules WHERE name = ?", (module_name,)).rowcount
+                conn.execute("DELETE FROM legacy_files WHERE module = ?", (module_name,))
+        for path in paths:
+            try:
+                (self.modules_dir / path).unlink()
+            except FileNotFoundError:
+                pass
+        return bool(deleted)
+
+    # ---- 兼容文件 ----
+
+    def export_legacy_files(self, names: Optional[Iterable[str]] = None) -> int:
+        """把存储中的模块导出为 <name>/full_summary.json，返回导出的模块数"""
+        wanted = set(names) if names is not None else None
+        with self._lock:
+            rows = [
+                (name, json.loads(data))
+                for name, data in self._connect().execute("SELECT name, data FROM modules ORDER BY rowid")
+                if wanted is None or name in wanted
+            ]
+            self._export(rows)
+        return len(rows)
+
+    def _export(self, rows: List[Tuple[str, Dict]]):
+        records = []
+        for name, summary in rows:
+            targets = [(name, summary)]
+            safe_name = safe_module_name(name)
+            if safe_name and safe_name != name:
+                targets.append((safe_name, {**summary, "safe_module_name": safe_name}))
+            for dir_name, data in targets:
+                path = self.modules_dir / dir_name / SUMMARY_FILE
+                path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp, path)
+                stat = path.stat()
+                records.append((f"{dir_name}/{SUMMARY_FILE}", name, stat.st_mtime_ns, stat.st_size))
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO legacy_files (path, module, mtime_ns, size) VALUES (?, ?, ?, ?)", records
+            )
+
+    def _read_legacy(self, rel_path: str) -> Optional[Dict]:
+        path = self.modules_dir / rel_path
+        try:
+            summary = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError, UnicodeDecodeError) as e:
+            self.load_errors[rel_path.split("/", 1)[0]] = str(e)
+            print(f"⚠️ 无法解析 {path}: {e}")
+            return None
+        if not isinstance(summary, dict):
+            self.load_errors[rel_path.split("/", 1)[0]] = "摘要不是 JSON 对象"
+            return None
+        self.load_errors.pop(rel_path.split("/", 1)[0], None)
+        return summary
+
+    def _sync(self, conn: sqlite3.Connection, current: Dict[str, Tuple[int, int]],
+              known: Dict[str, Tuple[str, int, int]]) -> int:
+        """按 current（路径 -> (mtime, size)）同步 known 中的记录，返回重新导入的文件数"""
+        changed = [path for path, stat in current.items() if known.get(path, (None,))[1:] != stat]
+        removed = [path for path in known if path not in current]
+        imported = []
+        for path in changed:
+            summary = self._read_legacy(path)
+            if summary is not None:
+                imported.append((path, summary, module_name_of(summary, path.split("/", 1)[0])))
+        if not imported and not removed:
+            return 0
+
+        with conn:
+            orphaned = set()
+            for path, summary, name in imported:
+                self._write_rows(conn, summary, name)
+                conn.execute("INSERT OR REPLACE INTO legacy_files (path, module, mtime_ns, size) VALUES (?, ?, ?, ?)",
+                             (path, name, *current[path]))
+                if path in known and known[path][0] != name:
+                    orphaned.add(known[path][0])
+            for path in removed:
+                conn.execute("DELETE FROM legacy_files WHERE path = ?", (path,))
+                orphaned.add(known[path][0])
+            # 模块的最后一个摘要文件被删除（或改名）时，同时从存储中移除
+            for module in orphaned:
+                remaining = conn.execute("SELECT 1 FROM legacy_files WHERE module = ? LIMIT 1", (module,)).fetchone()
+                if remaining is None:
+                    conn.execute("DELETE FROM modules WHERE name = ?", (module,))
+        return len(imported)
+
+    def refresh(self) -> int:
+        """导入 modules 目录中新增或被外部修改的摘要文件，移除已删除文件对应的模块
+
+        只对每个文件做一次 stat，未变化的文件不会被重新解析。返回重新导入的文件数。
+        """
+        current = {}
+        if self.modules_dir.exists():
+            with os.scandir(self.modules_dir) as entries:
+                for entry in entries:
+                    if not entry.is_dir():
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(entry.path, SUMMARY_FILE))
+                    except FileNotFoundError:
+                        continue
+                    current[f"{entry.name}/{SUMMARY_FILE}"] = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            conn = self._connect()
+            known = {path: (module, mtime, size)
+                     for path, module, mtime, size in conn.execute("SELECT path, module, mtime_ns, size FROM legacy_files")}
+            self.load_errors = {k: v for k, v in self.load_errors.items() if f"{k}/{SUMMARY_FILE}" in current}
+            count = self._sync(conn, current, known)
+        return count
+
+    def _refresh_module(self, module_name: str):
+        """只检查单个模块目录的摘要文件"""
+        rel_path = f"{module_name}/{SUMMARY_FILE}"
+        try:
+            stat = os.stat(self.modules_dir / rel_path)
+            current = {rel_path: (stat.st_mtime_ns, stat.st_size)}
+        except (FileNotFoundError, NotADirectoryError):
+            current = {}
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT module, mtime_ns, size FROM legacy_files WHERE path = ?", (rel_path,)).fetchone()
+            self._sync(conn, current, {rel_path: tuple(row)} if row else {})
+
+    # ---- 查询 ----
+
+    def get(self, module_name: str, refresh: bool = True) -> Optional[Dict]:
+        if refresh:
+            self._refresh_module(module_name)
+        with self._lock:
+            row = self._connect().execute("SELECT data FROM modules WHERE name = ?", (module_name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def all(self, refresh: bool = True) -> List[Dict]:
+        """返回全部模块摘要（按首次写入顺序）"""
+        return self.find(refresh=refresh)
+
+    def names(self, refresh: bool = True) -> List[str]:
+        if refresh:
+            self.refresh()
+        with self._lock:
+            return [row[0] for row in self._connect().execute("SELECT name FROM modules ORDER BY rowid")]
+
+    def find(self, layer: Optional[str] = None, domain: Optional[str] = None, target_path: Optional[str] = None,
+             requirement: Optional[str] = None, names: Optional[Iterable[str]] = None,
+             refresh: bool = True) -> List[Dict]:
+        """按索引列组合查询模块摘要"""
+        if refresh:
+            self.refresh()
+        sql, params = ["SELECT m.data FROM modules m"], []
+        where = []
+        if domain is not None:
+            sql.append("JOIN module_domains d ON d.module = m.name")
+            where.append("d.domain = ?")
+            params.append(domain)
+        if requirement is not None:
+            sql.append("JOIN module_requirements r ON r.module = m.name")
+            where.append("r.requirement = ?")
+            params.append(requirement)
+        if layer is not None:
+            where.append("m.layer = ?")
+            params.append(layer)
+        if target_path is not None:
+            where.append("m.target_path = ?")
+            params.append(target_path)
+        if names is not None:
+            names = list(names)
+            where.append(f"m.name IN ({','.join('?' * len(names))})")
+            params.extend(names)
+        if where:
+            sql.append("WHERE " + " AND ".join(where))
+        sql.append("ORDER BY m.rowid")
+        with self._lock:
+            rows = self._connect().execute(" ".join(sql), params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+
+_stores: Dict[Path, ModuleStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_module_store(modules_dir: Path = MODULES_DIR) -> ModuleStore:
+    """按模块目录（绝对路径）共享 ModuleStore 实例"""
+    key = Path(modules_dir).absolute()
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = ModuleStore(key)
+        return store
@@ -1,20 +1,23 @@
 # memory/structured_context.py
 
 import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import AsyncIterator, Dict, Iterable, List, Tuple
 from memory.function_signatures import get_function_signatures
 from memory.embedding_client import LocalEmbeddingClient
+from memory.module_store import get_module_store
 
 MODULE_SUMMARY_PATH = Path("data/output/modules")
 SUMMARY_INDEX_PATH = Path("data/output/summary_index.json")
 
 
 def load_summary(module_name: str) -> Dict:
-    summary_file = MODULE_SUMMARY_PATH / module_name / "full_summary.json"
-    if not summary_file.exists():
+    summary = get_module_store(MODULE_SUMMARY_PATH).get(module_name)
+    if summary is None:
         raise FileNotFoundError(f"Summary not found for module: {module_name}")
-    return json.loads(summary_file.read_text())
+    return summary
 
 
 def load_summary_index() -> Dict:
@@ -34,16 +37,97 @@ def get_structured_context(module_name: str) -> str:
     summary = load_summary(module_name)
     summary_index = load_summary_index()
 
-    responsibilities = "\n".join(f"- {r}" for r in summary.get("responsibilities", []))
-    key_apis = "\n".join(f"- {a}" for a in summary.get("key_apis", []))
-    deps = build_dependency_context(summary, summary_index)
-    
     memory = LocalEmbeddingClient()
     memory.load()
     excerpts = memory.query(module_name, top_k=3)
     
     functions = get_function_signatures(module_name)
 
+    return render_structured_context(module_name, summary, summary_index, functions, excerpts)
+
+
+async def get_structured_context_async(module_name: str) -> str:
+    """异步版本：文件读取放到线程池，检索使用共享的异步 embeddings 客户端"""
+    memory = LocalEmbeddingClient()
+    summary, summary_index, functions, _ = await asyncio.gather(
+        asyncio.to_thread(load_summary, module_name),
+        asyncio.to_thread(load_summary_index),
+        asyncio.to_thread(get_function_signatures, module_name),
+        memory.load_async()
+    )
+    excerpts = await memory.query_async(module_name, top_k=3)
+
+    return render_structured_context(module_name, summary, summary_index, functions, excerpts)
+
+
+async def iter_structured_contexts(
+    module_names: Iterable[str],
+    top_k: int = 3,
+    max_workers: int = 8,
+    query_batch_size: int = 32
+) -> AsyncIterator[Tuple[str, str]]:
+    """批量构建多个模块的上下文，每个模块完成后立即产出 (module_name, context)
+
+    summary_index 与向量库只加载一次并共享；检索按 query_batch_size 分批合并为
+    embeddings 请求；summary 与函数签名的文件读取在线程池中并发执行。
+    缺少 summary 的模块会被跳过并打印警告。
+    """
+    names = list(dict.fromkeys(module_names))
+    if not names:
+        return
+
+    loop = asyncio.get_running_loop()
+    memory = LocalEmbeddingClient()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        summary_index, _ = await asyncio.gather(
+            loop.run_in_executor(pool, load_summary_index),
+            loop.run_in_executor(pool, memory.load)
+        )
+
+        batch_tasks = [
+            asyncio.create_task(memory.query_many(names[i:i + query_batch_size], top_k))
+            for i in range(0, len(names), query_batch_size)
+        ]
+
+        async def build_one(index: int, module_name: str) -> Tuple[str, str]:
+            summary, functions = await asyncio.gather(
+                loop.run_in_executor(pool, load_summary, module_name),
+                loop.run_in_executor(pool, get_function_signatures, module_name, summary_index)
+            )
+            excerpts = (await batch_tasks[index // query_batch_size]).get(module_name, [])
+            return module_name, render_structured_context(
+                module_name, summary, summary_index, functions, excerpts
+            )
+
+        tasks = [asyncio.create_task(build_one(i, name)) for i, name in enumerate(names)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    yield await next_done
+                except FileNotFoundError as e:
+                    print(f"⚠️ {e}")
+        finally:
+            for task in tasks + batch_tasks:
+                task.cancel()
+
+
+async def build_structured_contexts(module_names: Iterable[str], **kwargs) -> Dict[str, str]:
+    """批量构建并收集所有上下文"""
+    return {name: context async for name, context in iter_structured_contexts(module_names, **kwargs)}
+
+
+def render_structured_context(
+    module_name: str,
+    summary: Dict,
+    summary_index: Dict,
+    functions: List[str],
+    excerpts: List[str]
+) -> str:
+    responsibilities = "\n".join(f"- {r}" for r in summary.get("responsibilities", []))
+    key_apis = "\n".join(f"- {a}" for a in summary.get("key_apis", []))
+    deps = build_dependency_context(summary, summary_index)
+
     context = f"""
 You are a senior full-stack developer. Please implement the module **{module_name}** in TypeScript using NestJS.
 """
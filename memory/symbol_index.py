@@ -0,0 +1,268 @@
+# memory/symbol_index.py
+
+import json
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+GENERATED_CODE_DIR = Path("data/generated_code")
+SYMBOL_INDEX_PATH = Path("data/output/symbol_index.json")
+INDEX_VERSION = 1
+
+FUNCTION_PATTERN = re.compile(r"\b(export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)\s*(<[^({]*>)?\s*\(")
+ARROW_PATTERN = re.compile(r"\b(export\s+)?(?:const|let)\s+([A-Za-z_$][\w$]*)\s*(?::[^=]+)?=\s*(?:async\s+)?\(")
+CLASS_PATTERN = re.compile(r"\b(export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+([A-Za-z_$][\w$]*)[^{]*\{")
+METHOD_PATTERN = re.compile(
+    r"(?:^|[;}\s])((?:(?:public|private|protected|static|async|readonly|abstract|override|get|set)\s+)*)"
+    r"\*?([A-Za-z_$][\w$]*)\s*(<[^({]*>)?\s*\("
+)
+NOT_METHODS = {"if", "for", "while", "switch", "catch", "return", "function", "constructor", "super", "new"}
+
+
+def _mask_comments_and_strings(source: str) -> str:
+    """用空格替换注释和字符串内容（保持长度与换行），便于按括号深度扫描"""
+    out = list(source)
+    i, n = 0, len(source)
+    while i < n:
+        ch = source[i]
+        if ch == "/" and i + 1 < n and source[i + 1] == "/":
+            end = source.find("\n", i)
+            end = n if end == -1 else end
+            for k in range(i, end):
+                out[k] = " "
+            i = end
+        elif ch == "/" and i + 1 < n and source[i + 1] == "*":
+            end = source.find("*/", i + 2)
+            end = n if end == -1 else end + 2
+            for k in range(i, end):
+                if out[k] != "\n":
+                    out[k] = " "
+            i = end
+        elif ch in "'\"`":
+            k = i + 1
+            while k < n and source[k] != ch:
+                k += 2 if source[k] == "\\" else 1
+            for j in range(i + 1, min(k, n)):
+                if out[j] != "\n":
+                    out[j] = " "
+            i = k + 1
+        else:
+            i += 1
+    return "".join(out)
+
+
+def _match_close(text: str, start: int, open_ch: str, close_ch: str) -> int:
+    """返回与 text[start] 处开括号匹配的闭括号位置，找不到时返回 len(text)"""
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] == open_ch:
+            depth += 1
+        elif text[i] == close_ch:
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(text)
+
+
+def _flatten(text: str, start: int, end: int) -> str:
+    """只保留 [start, end) 中深度为 0 的内容，嵌套的 {...} 内部替换为空格"""
+    out = []
+    depth = 0
+    for ch in text[start:end]:
+        if ch == "}":
+            depth -= 1
+        out.append(ch if depth <= 0 else (" " if ch != "\n" else ch))
+        if ch == "{":
+            depth += 1
+    return "".join(out)
+
+
+def _signature_after(source: str, masked: str, name: str, generics: Optional[str], paren: int) -> Optional[Dict]:
+    """从参数括号开始解析签名，返回 {"name", "params", "returns"}；不是函数定义时返回 None"""
+    close = _match_close(masked, paren, "(", ")")
+    if close >= len(masked):
+        return None
+    rest = masked[close + 1:]
+    body_at = re.match(r"\s*(?::\s*([^{;=]+?))?\s*(=>\s*)?\{", rest)
+    if not body_at:
+        return None
+    params = " ".join(source[paren + 1:close].split())
+    returns = " ".join(body_at.group(1).split()) if body_at.group(1) else ""
+    return {
+        "name": name,
+        "params": params,
+        "returns": returns,
+        "signature": f"{name}{generics or ''}({params})" + (f": {returns}" if returns else "")
+    }
+
+
+def parse_typescript_symbols(source: str) -> Dict:
+    """提取顶层函数、类及其方法（支持嵌套的方法体）"""
+    masked = _mask_comments_and_strings(source)
+    top_level = _flatten(masked, 0, len(masked))
+    symbols = {"functions": [], "classes": []}
+
+    functions = []
+    for pattern in (FUNCTION_PATTERN, ARROW_PATTERN):
+        for match in pattern.finditer(top_level):
+            paren = match.end() - 1
+            generics = match.group(3) if pattern is FUNCTION_PATTERN else None
+            sig = _signature_after(source, masked, match.group(2), generics, paren)
+            if sig:
+                sig["exported"] = bool(match.group(1))
+                functions.append((match.start(), sig))
+    symbols["functions"] = [sig for _, sig in sorted(functions, key=lambda item: item[0])]
+
+    for match in CLASS_PATTERN.finditer(top_level):
+        open_brace = match.end() - 1
+        close_brace = _match_close(masked, open_brace, "{", "}")
+        body = _flatten(masked, open_brace + 1, close_brace)
+        methods = []
+        for m in METHOD_PATTERN.finditer(body):
+            name = m.group(2)
+            if name in NOT_METHODS:
+                continue
+            paren = open_brace + 1 + m.end() - 1
+            sig = _signature_after(source, masked, name, m.group(3), paren)
+            if sig:
+                modifiers = m.group(1).split()
+                sig["static"] = "static" in modifiers
+                sig["private"] = "private" in modifiers or "protected" in modifiers
+                methods.append(sig)
+        symbols["classes"].append({
+            "name": match.group(2),
+            "exported": bool(match.group(1)),
+            "methods": methods
+        })
+
+    return symbols
+
+
+class SymbolIndex:
+    """generated_code 下 TypeScript 文件的持久化符号索引
+
+    以 (相对路径, mtime, size) 判断文件是否变化，只重新扫描变化的文件。
+    """
+
+    def __init__(self, root: Path = GENERATED_CODE_DIR, index_path: Path = SYMBOL_INDEX_PATH):
+        self.root = Path(root)
+        self.index_path = Path(index_path)
+        self.files: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        # 串行化写盘：取快照与写文件在同一把锁内，较早的快照不会覆盖较新的
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        if not self.index_path.exists():
+            return
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ 符号索引损坏，将重新构建: {e}")
+            return
+        if data.get("version") == INDEX_VERSION:
+            self.files = data.get("files", {})
+
+    def save(self):
+        """原子写入索引文件，仅在有变更时写盘（可在多个线程中调用）"""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                payload = json.dumps({"version": INDEX_VERSION, "files": self.files}, ensure_ascii=False)
+                self._dirty = False
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.index_path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp, self.index_path)
+
+    def _key(self, path: Path) -> str:
+        try:
+            return path.relative_to(self.root).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def refresh_file(self, path: Path) -> Optional[Dict]:
+        """确保单个文件的条目是最新的，返回其符号；文件不存在时移除条目"""
+        key = self._key(path)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            with self._lock:
+                if self.files.pop(key, None) is not None:
+                    self._dirty = True
+            return None
+
+        entry = self.files.get(key)
+        if entry and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return entry["symbols"]
+
+        symbols = parse_typescript_symbols(path.read_text(errors="ignore"))
+        with self._lock:
+            self.files[key] = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "symbols": symbols}
+            self._dirty = True
+        return symbols
+
+    def refresh(self) -> int:
+        """扫描整个目录，重新解析变化的文件并移除已删除的文件，返回重新解析的文件数"""
+        seen = set()
+        rescanned = 0
+        for path in sorted(self.root.rglob("*.ts")) if self.root.exists() else []:
+            key = self._key(path)
+            seen.add(key)
+            before = self.files.get(key)
+            self.refresh_file(path)
+            if self.files.get(key) is not before:
+                rescanned += 1
+        with self._lock:
+            for key in set(self.files) - seen:
+                del self.files[key]
+                self._dirty = True
+        self.save()
+        return rescanned
+
+    def module_path(self, module_name: str, summary_index: Optional[Dict] = None) -> Optional[Path]:
+        """按 summary_index 的 target_path 定位模块文件，找不到时按文件名匹配已索引文件"""
+        file_name = f"{module_name.lower()}.ts"
+        target_info = (summary_index or {}).get(module_name)
+        if target_info:
+            return self.root / target_info.get("target_path", "unsure") / file_name
+        for key in self.files:
+            if key.rsplit("/", 1)[-1] == file_name:
+                return self.root / key
+        return None
+
+    def get_module_symbols(self, module_name: str, summary_index: Optional[Dict] = None) -> Optional[Dict]:
+        path = self.module_path(module_name, summary_index)
+        if path is None:
+            return None
+        symbols = self.refresh_file(path)
+        self.save()
+        return symbols
+
+    def get_module_signatures(self, module_name: str, summary_index: Optional[Dict] = None) -> List[str]:
+        """返回模块中导出函数，以及导出类的非私有方法的签名列表"""
+        symbols = self.get_module_symbols(module_name, summary_index)
+        if not symbols:
+            return []
+        signatures = [f["signature"] for f in symbols["functions"] if f.get("exported")]
+        for cls in symbols["classes"]:
+            if cls.get("exported"):
+                signatures.extend(f"{cls['name']}.{m['signature']}" for m in cls["methods"] if not m.get("private"))
+        return signatures
+
+
+symbol_index: Optional[SymbolIndex] = None
+
+
+def get_symbol_index() -> SymbolIndex:
+    global symbol_index
+    if symbol_index is None:
+        symbol_index = SymbolIndex()
+    return symbol_index
@@ -9,5 +9,6 @@ from prompt_templates.architecture_conventions import (
     get_validator_prompt,
     get_fixer_prompt,
     get_generator_prompt,
-    get_missing_module_summary_prompt
+    get_missing_module_summary_prompt,
+    get_missing_modules_summary_prompt
 ) 
\ No newline at end of file
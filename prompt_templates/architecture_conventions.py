@@ -580,6 +580,51 @@ Use this format:
 Use placeholder values if necessary. Respond only with JSON. Do NOT add markdown or comments.
 """
 
+def get_missing_modules_summary_prompt(module_names):
+    """Returns one prompt for generating summaries of several missing modules.
+
+    The architecture conventions are included once; the response is a JSON object keyed by module name.
+    """
+    architecture_conventions = get_architecture_conventions()
+    
+    module_lines = []
+    for module_name in module_names:
+        layer_info = infer_module_layer(module_name)
+        line = (f"- **{module_name}**: {layer_info['layer']} layer, {layer_info['expected_api_format']} format APIs, "
+                f"target_path \"{layer_info['target_path']}\"")
+        if layer_info.get("typical_dependencies"):
+            line += f", typically depends on {', '.join(layer_info['typical_dependencies'])}"
+        if layer_info["layer"] == "testing":
+            line += f", {layer_info.get('test_type', 'unit')} test for {layer_info.get('tests_for', '')}"
+        module_lines.append(line)
+    modules_text = "\n".join(module_lines)
+    
+    return f"""You are a TypeScript/NestJS architect.
+
+{architecture_conventions}
+
+You will be given several module names that were found missing from a system architecture.
+Based on naming conventions, each module's layer, API format and target path are listed below:
+
+{modules_text}
+
+Please define a JSON summary for each missing module.
+Respond with one JSON object whose keys are exactly the module names above and whose values use this format:
+
+{{
+  "module_name": "<module name>",
+  "responsibilities": ["..."],
+  "key_apis": ["..."],
+  "data_inputs": [],
+  "data_outputs": [],
+  "depends_on": [],
+  "target_path": "<target path listed above>",
+  "layer_type": "<layer listed above>"
+}}
+
+Use placeholder values if necessary. Respond only with JSON. Do NOT add markdown or comments.
+"""
+
 def save_template_config():
     """Save template configuration to the config file"""
     config = {
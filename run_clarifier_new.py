@@ -46,6 +46,7 @@ async def main():
         from core.clarifier.architecture_manager import ArchitectureManager
         
         architecture_manager = ArchitectureManager()
+        architecture_manager.load_architecture_state()
         reasoner = ArchitectureReasoner(architecture_manager=architecture_manager)
         
         await clarifier.integrate_legacy_modules(output_path=args.output)
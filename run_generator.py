@@ -5,7 +5,7 @@ import json
 import asyncio
 from pathlib import Path
 from core.generator.autogen_module_generator import generate_module
-from memory.structured_context import get_structured_context
+from memory.structured_context import iter_structured_contexts
 
 def run_code_generation(only=None):
     input_dir = Path("data/output/modules")
@@ -16,7 +16,7 @@ def run_code_generation(only=None):
         print("❌ summary_index.json not found. Please run run_clarifier.py first.")
         return
 
-    tasks = []
+    jobs = []
 
     for mod_dir in sorted(input_dir.iterdir()):
         summary_path = mod_dir / "full_summary.json"
@@ -30,16 +30,25 @@ def run_code_generation(only=None):
         if only and module_name not in only:
             continue
 
-        prompt = get_structured_context(module_name)
         target_path = output_dir / module_data.get("target_path", "misc")
-        tasks.append(generate_module(module_name, prompt, target_path))
+        jobs.append((module_name, target_path))
 
-    if not tasks:
+    if not jobs:
         print("⚠️ No modules matched.")
         return
 
-    print(f"🚀 Generating {len(tasks)} module(s)...")
-    asyncio.run(asyncio.gather(*tasks))
+    async def generate_jobs():
+        # 上下文批量构建，每完成一个模块即开始生成
+        targets = dict(jobs)
+        generations = []
+        async for module_name, prompt in iter_structured_contexts(targets):
+            generations.append(asyncio.create_task(
+                generate_module(module_name, prompt, targets[module_name])
+            ))
+        await asyncio.gather(*generations)
+
+    print(f"🚀 Generating {len(jobs)} module(s)...")
+    asyncio.run(generate_jobs())
     print("✅ Code generation complete.")
 
 if __name__ == "__main__":
@@ -10,6 +10,9 @@ import uuid
 from fastapi import Depends
 from functools import lru_cache
 from core.clarifier.clarifier import Clarifier
+from core.clarifier.registry import KeyedRegistry
+from core.clarifier.module_index import ModuleIndex, INDEX_DIMENSIONS
+from memory.module_store import get_module_store, module_name_of
 
 class StateService:
     """
@@ -32,6 +35,8 @@ class StateService:
         self.uploaded_files: List[str] = []
         self.current_mode: Optional[str] = None
         self.input_dir = "data/input"
+        # 按模块ID增量维护的多维度索引（layer/domain/职责/需求/横切关注点）
+        self.module_index = ModuleIndex(default="unknown")
         
         self.load_modules_from_disk()
     
@@ -97,20 +102,39 @@ class StateService:
             self.global_state["requirements"] = {}
         self.global_state["requirements"][requirement_id] = requirement_data
     
+    def _module_registry(self) -> KeyedRegistry:
+        modules = self.global_state.get("modules", [])
+        if not isinstance(modules, KeyedRegistry):
+            # 整体替换为普通列表后，首次使用时重新建立按ID的索引（按维度的查询由 module_index 负责）
+            modules = KeyedRegistry(modules, key="id")
+            self.global_state["modules"] = modules
+        return modules
+    
     def add_module(self, module_id: str, module_data: Dict[str, Any]) -> None:
         """添加模块"""
-        if "modules" not in self.global_state:
-            self.global_state["modules"] = []
+        modules = self._module_registry()
         
         if "id" not in module_data:
             module_data["id"] = module_id
-            
-        for i, existing_module in enumerate(self.global_state["modules"]):
-            if existing_module.get("id") == module_id:
-                self.global_state["modules"][i] = module_data
-                return
-                
-        self.global_state["modules"].append(module_data)
+        
+        modules.upsert(module_data)
+        self.module_index.upsert(module_data["id"], module_data)
+    
+    def query_modules(self, facet_dimensions: Optional[List[str]] = None, **filters) -> Dict[str, Any]:
+        """按 layer/domain/responsibility/requirement/cross_cutting 组合查询模块
+        
+        同一维度给出多个取值时匹配任意一个，不同维度之间取交集。
+        facet_dimensions 中的维度会附带在当前条件下每个取值的模块数，供界面分面筛选。
+        """
+        filters = {dimension: value for dimension, value in filters.items() if value}
+        modules = self._module_registry()
+        module_ids = self.module_index.query(**filters)
+        return {
+            "total": len(module_ids),
+            "modules": [module for module in (modules.get(module_id) for module_id in module_ids) if module],
+            "facets": {dimension: self.module_index.facets(dimension, **filters)
+                       for dimension in (facet_dimensions or ())},
+        }
     
     def add_validation_issue(self, issue_type: str, issue_data: Dict[str, Any]) -> None:
         """添加验证问题"""
@@ -128,6 +152,7 @@ class StateService:
     
     def clear_global_state(self) -> None:
         """清空全局状态"""
+        self.module_index.clear()
         self.global_state = {
             "requirements": {},
             "modules": [],
@@ -149,42 +174,25 @@ class StateService:
             print(f"❌ 模块目录不存在: {modules_dir}")
             return
         
-        modules = []
-        print(f"🔍 从磁盘加载模块数据，目录: {modules_dir}")
-        
-        module_count = 0
-        error_count = 0
+        print(f"🔍 从模块存储加载模块数据，目录: {modules_dir}")
         
-        module_dirs = list(modules_dir.iterdir())
-        print(f"🔍 发现 {len(module_dirs)} 个模块目录")
+        module_store = get_module_store(modules_dir)
+        modules = []
+        for module_data in module_store.all():
+            module_data["name"] = module_name_of(module_data)
+            # 按模块名生成稳定的ID，重复加载时多维度索引只需更新变化的模块
+            module_data["id"] = str(uuid.uuid5(uuid.NAMESPACE_URL, module_data["name"]))
+            modules.append(module_data)
         
-        for module_dir in module_dirs:
-            if not module_dir.is_dir():
-                continue
-            
-            summary_file = module_dir / "full_summary.json"
-            if not summary_file.exists():
-                print(f"⚠️ 模块 {module_dir.name} 缺少full_summary.json文件")
-                error_count += 1
-                continue
-            
-            try:
-                with open(summary_file, "r", encoding="utf-8") as f:
-                    module_data = json.load(f)
-                
-                module_id = str(uuid.uuid4())
-                module_data["id"] = module_id
-                module_data["name"] = module_dir.name  # 确保模块名称与目录名一致
-                modules.append(module_data)
-                module_count += 1
-                print(f"✅ 成功加载模块: {module_dir.name}")
-            except Exception as e:
-                print(f"❌ 加载模块 {module_dir.name} 失败: {str(e)}")
-                error_count += 1
+        module_count = len(modules)
+        error_count = len(module_store.load_errors)
+        for module_name, error in module_store.load_errors.items():
+            print(f"❌ 加载模块 {module_name} 失败: {error}")
         
         print(f"✅ 总共加载了 {module_count} 个模块，{error_count} 个错误")
         
         self.global_state["modules"] = modules
+        self.module_index.sync({module_data["id"]: module_data for module_data in modules})
         print(f"🔄 全局状态现在包含 {len(self.global_state['modules'])} 个模块")
         
         if modules and len(modules) > 0:
@@ -221,21 +229,12 @@ class StateService:
             self.global_state["modules"] = modules_list
             print(f"✅ 更新了 {len(modules_list)} 个模块")
             
-            modules_dir = Path("data/output/modules")
-            modules_dir.mkdir(parents=True, exist_ok=True)
-            
-            for module_data in modules_list:
-                module_name = module_data.get("module_name", module_data.get("name", "unknown"))
-                module_dir = modules_dir / str(module_name)
-                module_dir.mkdir(parents=True, exist_ok=True)
-                
-                summary_path = module_dir / "full_summary.json"
-                try:
-                    with open(summary_path, "w", encoding="utf-8") as f:
-                        json.dump(module_data, f, ensure_ascii=False, indent=2)
-                    print(f"✅ 为模块 '{module_name}' 创建了摘要文件: {summary_path}")
-                except Exception as e:
-                    print(f"❌ 为模块 '{module_name}' 创建摘要文件失败: {e}")
+            named_modules = [module_data for module_data in modules_list if module_name_of(module_data)]
+            try:
+                get_module_store(Path("data/output/modules")).upsert_many(named_modules)
+                print(f"✅ 已写入 {len(named_modules)} 个模块摘要")
+            except Exception as e:
+                print(f"❌ 写入模块摘要失败: {e}")
         
         if "technology_stack" in data and isinstance(data["technology_stack"], dict):
             self.global_state["technology_stack"] = data["technology_stack"]
@@ -259,52 +258,15 @@ class StateService:
         
         if "modules" in data:
             modules_data = data["modules"]
-            
-            responsibility_index = {}
-            layer_index = {}
-            domain_index = {}
-            
             if isinstance(modules_data, dict):
-                for module_id, module_info in modules_data.items():
-                    for resp in module_info.get("responsibilities", []):
-                        if resp not in responsibility_index:
-                            responsibility_index[resp] = []
-                        responsibility_index[resp].append(module_id)
-                    
-                    layer = module_info.get("layer", "unknown")
-                    if layer not in layer_index:
-                        layer_index[layer] = []
-                    layer_index[layer].append(module_id)
-                    
-                    domain = module_info.get("domain", "unknown")
-                    if domain not in domain_index:
-                        domain_index[domain] = []
-                    domain_index[domain].append(module_id)
-            elif isinstance(modules_data, list):
-                for module_info in modules_data:
-                    module_id = module_info.get("id", "")
-                    if not module_id:
-                        continue
-                        
-                    for resp in module_info.get("responsibilities", []):
-                        if resp not in responsibility_index:
-                            responsibility_index[resp] = []
-                        responsibility_index[resp].append(module_id)
-                    
-                    layer = module_info.get("layer", "unknown")
-                    if layer not in layer_index:
-                        layer_index[layer] = []
-                    layer_index[layer].append(module_id)
-                    
-                    domain = module_info.get("domain", "unknown")
-                    if domain not in domain_index:
-                        domain_index[domain] = []
-                    domain_index[domain].append(module_id)
+                keyed_modules = modules_data
+            else:
+                keyed_modules = {module_info["id"]: module_info for module_info in modules_data if module_info.get("id")}
             
-            self.global_state["responsibility_index"] = responsibility_index
-            self.global_state["layer_index"] = layer_index
-            self.global_state["domain_index"] = domain_index
-            print(f"✅ 已更新多维度模块索引")
+            changes = self.module_index.sync(keyed_modules)
+            for dimension in ("responsibility", "layer", "domain"):
+                self.global_state[INDEX_DIMENSIONS[dimension]] = self.module_index.export(dimension)
+            print(f"✅ 已更新多维度模块索引（新增 {changes['added']}，更新 {changes['updated']}，移除 {changes['removed']}）")
         
         try:
             modules_data = data.get("modules", {})
@@ -388,6 +350,8 @@ class StateService:
                 modules_to_process = self.global_state["modules"][:max_modules_to_process]
                 print(f"🔍 [LOOP-TRACE] {call_id} - 将处理 {len(modules_to_process)}/{len(self.global_state['modules'])} 个模块")
                 
+                batch = []
+                batch_names = set()
                 for i, module in enumerate(modules_to_process):
                     module_id = module.get("id", "")
                     if not module_id:
@@ -406,19 +370,24 @@ class StateService:
                     print(f"🔍 [LOOP-TRACE] {call_id} - 模块名称: {module_name}, 关联需求: {len(requirements)}")
                     
                     if hasattr(arch_manager.index, 'dependency_graph'):
-                        already_exists = module_name in arch_manager.index.dependency_graph
+                        already_exists = module_name in arch_manager.index.dependency_graph or module_name in batch_names
                         print(f"🔍 [LOOP-TRACE] {call_id} - 模块 {module_name} 已存在于依赖图: {already_exists}")
                         
                         if not already_exists:
-                            try:
-                                if hasattr(arch_manager, 'process_new_module'):
-                                    print(f"🔍 [LOOP-TRACE] {call_id} - 开始处理新模块 {module_name}")
-                                    process_result = await arch_manager.process_new_module(module, requirements)
-                                    print(f"🔍 [LOOP-TRACE] {call_id} - 模块 {module_name} 处理结果: {process_result.get('status', '未知')}")
-                                    module_count += 1
-                            except Exception as e:
-                                print(f"❌ [LOOP-TRACE] {call_id} - 处理模块 {module_name} 时出错: {str(e)}")
-                                pass
+                            batch.append((module, requirements))
+                            batch_names.add(module_name)
+                
+                if batch and hasattr(arch_manager, 'process_new_modules'):
+                    try:
+                        print(f"🔍 [LOOP-TRACE] {call_id} - 开始批量处理 {len(batch)} 个新模块")
+                        process_results = await arch_manager.process_new_modules(batch)
+                        for (module, _), process_result in zip(batch, process_results):
+                            module_name = module.get("module_name", module.get("name", module.get("id", "")))
+                            print(f"🔍 [LOOP-TRACE] {call_id} - 模块 {module_name} 处理结果: {process_result.get('status', '未知')}")
+                            if process_result.get("status") != "error":
+                                module_count += 1
+                    except Exception as e:
+                        print(f"❌ [LOOP-TRACE] {call_id} - 批量处理模块时出错: {str(e)}")
                 
                 print(f"✅ [LOOP-TRACE] {call_id} - 架构验证完成: 处理了 {req_count} 个需求和 {module_count} 个模块")
                 
@@ -439,8 +408,14 @@ class StateService:
             
         print(f"🔍 [LOOP-TRACE] {call_id} - _validate_architecture_with_manager 执行完成")
 
-state_service = StateService()
+state_service: Optional[StateService] = None
 
 def get_state_service() -> StateService:
-    """获取状态服务实例，用于依赖注入"""
+    """获取状态服务实例，用于依赖注入
+
+    实例在首次请求时创建，import 本模块不再触发模块目录扫描
+    """
+    global state_service
+    if state_service is None:
+        state_service = StateService()
     return state_service
@@ -215,8 +215,8 @@ class TestClarifierIntegration(unittest.IsolatedAsyncioTestCase):
                         "requirements.md": "# 需求文档\n## 用户认证\n系统应支持用户认证\n## 数据管理\n系统应支持数据管理"
                     }
                     
-                    with patch('core.clarifier.architecture_manager.ArchitectureManager.process_new_module') as mock_process:
-                        mock_process.return_value = None
+                    with patch('core.clarifier.architecture_manager.ArchitectureManager.process_new_modules') as mock_process:
+                        mock_process.side_effect = lambda batch: [{"status": "success", "module": module} for module, _ in batch]
                         
                         with patch('core.clarifier.index_generator.MultiDimensionalIndexGenerator.generate_indices') as mock_generate:
                             mock_generate.return_value = {
@@ -240,7 +240,8 @@ class TestClarifierIntegration(unittest.IsolatedAsyncioTestCase):
                                 self.assertEqual(result["modules_count"], 2)
                                 self.assertEqual(result["issues_count"], 0)
                                 
-                                mock_analyze_granular.assert_called_once()
+                                # 逐章节分析：文档的两个二级章节各分析一次
+                                self.assertEqual(mock_analyze_granular.call_count, 2)
 
     async def test_clarifier_with_architecture_generator(self):
         """测试Clarifier与ArchitectureGenerator的集成"""
@@ -341,8 +342,8 @@ class TestClarifierIntegration(unittest.IsolatedAsyncioTestCase):
                     }
                 ]
                 
-                with patch('core.clarifier.architecture_manager.ArchitectureManager.process_new_module') as mock_process:
-                    mock_process.return_value = None
+                with patch('core.clarifier.architecture_manager.ArchitectureManager.process_new_modules') as mock_process:
+                    mock_process.side_effect = lambda batch: [{"status": "success", "module": module} for module, _ in batch]
                     
                     self.clarifier.index_generator = self.index_generator
                     
@@ -450,7 +451,7 @@ class TestClarifierIntegration(unittest.IsolatedAsyncioTestCase):
         self.clarifier.architecture_generator = mock_architecture_generator
         
         mock_architecture_manager = MagicMock()
-        mock_architecture_manager.process_new_module.return_value = None
+        mock_architecture_manager.process_new_modules = AsyncMock(return_value=[])
         
         self.clarifier.architecture_manager = mock_architecture_manager
         
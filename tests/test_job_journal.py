@@ -0,0 +1,136 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+
+from common.job_journal import JobJournal, atomic_write_json, inputs_hash
+
+
+class TestJobJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "jobs" / "batch.jsonl"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def reopen(self, journal, **kwargs):
+        journal.close()
+        return JobJournal(self.path, **kwargs)
+
+    def test_resume_skips_completed_units(self):
+        journal = JobJournal(self.path)
+        inputs = inputs_hash("prompt A")
+        journal.complete("UserService", "generate", inputs, {"file": "userservice.ts"})
+        journal.fail("OrderService", "generate", inputs_hash("prompt B"), "timeout")
+
+        journal = self.reopen(journal)
+        self.assertTrue(journal.is_done("UserService", "generate", inputs))
+        self.assertEqual({"file": "userservice.ts"}, journal.result("UserService", "generate", inputs))
+        self.assertTrue(journal.should_run("OrderService", "generate", inputs_hash("prompt B")))
+        # 阶段不同是不同的工作单元
+        self.assertTrue(journal.should_run("UserService", "summarize", inputs))
+        self.assertEqual({"done": 1, "failed": 1}, journal.summary("generate"))
+        journal.close()
+
+    def test_changed_inputs_rerun_and_reset_attempts(self):
+        journal = JobJournal(self.path, max_attempts=2)
+        old, new = inputs_hash("v1"), inputs_hash("v2")
+        journal.complete("UserService", "generate", old)
+        self.assertFalse(journal.is_done("UserService", "generate", new))
+
+        journal.fail("UserService", "generate", new, "boom")
+        journal.fail("UserService", "generate", new, "boom")
+        self.assertTrue(journal.is_exhausted("UserService", "generate", new))
+        self.assertFalse(journal.should_run("UserService", "generate", new))
+
+        journal = self.reopen(journal, max_attempts=2)
+        self.assertTrue(journal.is_exhausted("UserService", "generate", new))
+        self.assertTrue(journal.should_run("UserService", "generate", inputs_hash("v3")))
+        journal.close()
+
+    def test_torn_last_line_is_ignored(self):
+        journal = JobJournal(self.path)
+        journal.complete("UserService", "generate", "h1")
+        journal.close()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('{"unit": "OrderService", "stage": "gen')
+
+        journal = JobJournal(self.path)
+        self.assertTrue(journal.is_done("UserService", "generate", "h1"))
+        self.assertIsNone(journal.entry("OrderService", "generate", "h1"))
+        # 之后追加的记录不会接在残缺的行后面
+        journal.complete("OrderService", "generate", "h1")
+        journal = self.reopen(journal)
+        self.assertTrue(journal.is_done("OrderService", "generate", "h1"))
+        journal.close()
+
+    def test_invalidate_and_compact(self):
+        journal = JobJournal(self.path)
+        journal.fail("UserService", "generate", "h1", "boom")
+        journal.complete("UserService", "generate", "h1", "ok")
+        journal.invalidate("UserService", "generate", "h1")
+        self.assertTrue(journal.should_run("UserService", "generate", "h1"))
+        self.assertEqual(0, journal.entry("UserService", "generate", "h1")["attempts"])
+
+        journal.complete("OrderService", "generate", "h2", "ok")
+        journal.compact()
+        lines = self.path.read_text(encoding="utf-8").splitlines()
+        self.assertEqual(2, len(lines))
+        journal = JobJournal(self.path)
+        self.assertTrue(journal.should_run("UserService", "generate", "h1"))
+        self.assertTrue(journal.is_done("OrderService", "generate", "h2"))
+        journal.close()
+
+    def test_run_retries_until_limit(self):
+        journal = JobJournal(self.path, max_attempts=3)
+        calls = []
+
+        async def flaky():
+            calls.append(1)
+            if len(calls) < 2:
+                raise RuntimeError("temporary")
+            return "ok"
+
+        async def broken():
+            raise RuntimeError("permanent")
+
+        outcome = asyncio.run(journal.run("UserService", "generate", "h1", flaky))
+        self.assertEqual({"status": "done", "result": "ok"}, outcome)
+        self.assertEqual(2, len(calls))
+        outcome = asyncio.run(journal.run("UserService", "generate", "h1", flaky))
+        self.assertEqual("skipped", outcome["status"])
+        self.assertEqual(2, len(calls))
+
+        outcome = asyncio.run(journal.run("OrderService", "generate", "h1", broken))
+        self.assertEqual("failed", outcome["status"])
+        journal = self.reopen(journal, max_attempts=3)
+        outcome = asyncio.run(journal.run("OrderService", "generate", "h1", broken))
+        self.assertEqual({"status": "exhausted", "error": "permanent"}, outcome)
+        journal.close()
+
+    def test_atomic_write_json(self):
+        target = Path(self.tmp.name) / "out" / "full_summary.json"
+        atomic_write_json(target, {"module_name": "用户服务"})
+        atomic_write_json(target, {"module_name": "UserService"})
+        self.assertEqual({"module_name": "UserService"}, json.loads(target.read_text(encoding="utf-8")))
+        self.assertEqual(["full_summary.json"], [p.name for p in target.parent.iterdir()])
+
+    def test_atomic_write_syncs_file_before_replace(self):
+        target = Path(self.tmp.name) / "out" / "full_summary.json"
+        calls = []
+        real_fsync, real_replace = os.fsync, os.replace
+        with mock.patch("common.job_journal.os.fsync", side_effect=lambda fd: calls.append("fsync") or real_fsync(fd)), \
+                mock.patch("common.job_journal.os.replace",
+                           side_effect=lambda *a: calls.append("replace") or real_replace(*a)):
+            atomic_write_json(target, {"module_name": "UserService"})
+        self.assertEqual("fsync", calls[0])
+        self.assertLess(calls.index("fsync"), calls.index("replace"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from memory.module_store import ModuleStore
+
+
+def write_summary(modules_dir: Path, dir_name: str, summary: dict):
+    path = modules_dir / dir_name / "full_summary.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(summary, ensure_ascii=False))
+    return path
+
+
+class TestModuleStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.modules_dir = Path(self.tmp.name) / "modules"
+        self.store = ModuleStore(self.modules_dir)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_batch_upsert_and_indexed_queries(self):
+        self.store.upsert_many([
+            {"name": "UserService", "layer": "services", "domain": ["user", "auth"],
+             "target_path": "backend/services", "requirements": ["REQ-1", {"id": "REQ-2"}]},
+            {"module_name": "UserRepository", "layer": "repositories", "domain": "user",
+             "target_path": "backend/repositories", "requirements": ["REQ-1"]},
+        ])
+
+        self.assertEqual(["UserService", "UserRepository"], self.store.names())
+        self.assertEqual("services", self.store.get("UserService")["layer"])
+        self.assertEqual(["UserService"], [m["name"] for m in self.store.find(layer="services")])
+        self.assertEqual(2, len(self.store.find(domain="user")))
+        self.assertEqual(["UserService"], [m["name"] for m in self.store.find(requirement="REQ-2")])
+        self.assertEqual(["UserRepository"],
+                         [m["module_name"] for m in self.store.find(target_path="backend/repositories")])
+        self.assertEqual(["UserService"], [m["name"] for m in self.store.find(domain="auth", requirement="REQ-1")])
+
+        self.store.upsert({"name": "UserService", "layer": "controllers"})
+        self.assertEqual([], self.store.find(layer="services"))
+        self.assertEqual(["UserRepository"], [m["module_name"] for m in self.store.find(requirement="REQ-1")])
+
+    def test_exports_legacy_files(self):
+        self.store.upsert({"name": "Auth/Service", "layer": "services"})
+
+        exported = json.loads((self.modules_dir / "Auth/Service" / "full_summary.json").read_text())
+        safe_copy = json.loads((self.modules_dir / "AuthService" / "full_summary.json").read_text())
+        self.assertEqual("services", exported["layer"])
+        self.assertEqual("AuthService", safe_copy["safe_module_name"])
+
+        # 导出的文件已登记，刷新时不会被当作外部修改重新导入
+        self.assertEqual(0, self.store.refresh())
+        self.assertEqual(["Auth/Service"], self.store.names())
+
+    def test_refresh_imports_only_changed_files(self):
+        write_summary(self.modules_dir, "A", {"module_name": "A", "layer": "services"})
+        write_summary(self.modules_dir, "B", {"module_name": "B", "layer": "models"})
+        self.assertEqual(2, self.store.refresh())
+        self.assertEqual(0, self.store.refresh())
+
+        path = write_summary(self.modules_dir, "A", {"module_name": "A", "layer": "controllers"})
+        os.utime(path, ns=(1, 1))
+        self.assertEqual(1, self.store.refresh())
+        self.assertEqual("controllers", self.store.get("A", refresh=False)["layer"])
+
+        (self.modules_dir / "B" / "full_summary.json").unlink()
+        self.store.refresh()
+        self.assertEqual(["A"], self.store.names(refresh=False))
+
+    def test_get_checks_single_module_file(self):
+        write_summary(self.modules_dir, "A", {"module_name": "A"})
+        self.assertEqual({"module_name": "A"}, self.store.get("A"))
+        self.assertIsNone(self.store.get("Missing"))
+
+    def test_invalid_files_are_reported(self):
+        (self.modules_dir / "Broken").mkdir(parents=True)
+        (self.modules_dir / "Broken" / "full_summary.json").write_text("not json")
+        write_summary(self.modules_dir, "A", {"module_name": "A"})
+
+        self.assertEqual([{"module_name": "A"}], self.store.all())
+        self.assertIn("Broken", self.store.load_errors)
+
+    def test_state_survives_reopen(self):
+        self.store.upsert({"name": "A", "layer": "services"})
+        self.store.close()
+
+        reopened = ModuleStore(self.modules_dir)
+        try:
+            self.assertEqual(0, reopened.refresh())
+            self.assertEqual(["A"], [m["name"] for m in reopened.find(layer="services")])
+        finally:
+            reopened.close()
+
+    def test_delete_removes_exported_files(self):
+        self.store.upsert({"name": "A"})
+        self.assertTrue(self.store.delete("A"))
+        self.assertFalse((self.modules_dir / "A" / "full_summary.json").exists())
+        self.assertIsNone(self.store.get("A"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Startup-time budget for modules loaded by CLI tools and uvicorn workers.
+
+Each module is imported in a fresh interpreter with ``python -X importtime``;
+the cumulative import time must stay under its budget and importing must not
+pull in the heavy dependencies that are only needed on first use.
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 模块 -> 累计导入时间预算（毫秒）
+IMPORT_BUDGETS_MS = {
+    "memory.embedding_db": 500,
+    "dependency_manager": 150,
+    "core.generator.autogen_module_generator": 800,
+    "services.state_service": 1500,
+}
+
+# 这些依赖只应在首次使用时加载
+DEFERRED_MODULES = {"matplotlib", "networkx", "openai", "autogen_agentchat"}
+
+
+def measure_import(module_name):
+    """在独立解释器中导入模块，返回 (累计耗时ms, 已导入的顶层包集合, stdout)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    if result.returncode != 0:
+        raise AssertionError(f"import {module_name} failed:\n{result.stderr[-2000:]}")
+
+    cumulative_us = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [p.strip() for p in line[len("import time:"):].split("|")]
+        if len(parts) != 3 or not parts[1].isdigit():
+            continue
+        name = parts[2]
+        imported.add(name.split(".")[0])
+        if name == module_name:
+            cumulative_us = int(parts[1])
+
+    if cumulative_us is None:
+        raise AssertionError(f"no importtime entry for {module_name}")
+    return cumulative_us / 1000.0, imported, result.stdout
+
+
+class TestStartupTime(unittest.TestCase):
+
+    def test_import_time_budgets(self):
+        for module_name, budget_ms in IMPORT_BUDGETS_MS.items():
+            with self.subTest(module=module_name):
+                elapsed_ms, _, _ = measure_import(module_name)
+                self.assertLess(
+                    elapsed_ms, budget_ms,
+                    f"import {module_name} took {elapsed_ms:.0f}ms (budget {budget_ms}ms)"
+                )
+
+    def test_heavy_dependencies_are_deferred(self):
+        for module_name in IMPORT_BUDGETS_MS:
+            with self.subTest(module=module_name):
+                _, imported, _ = measure_import(module_name)
+                self.assertEqual(set(), imported & DEFERRED_MODULES)
+
+    def test_state_service_import_has_no_side_effects(self):
+        _, _, stdout = measure_import("services.state_service")
+        self.assertEqual("", stdout.strip())
+
+
+if __name__ == "__main__":
+    unittest.main()
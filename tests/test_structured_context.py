@@ -0,0 +1,97 @@
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import memory.symbol_index as symbol_index
+import memory.structured_context as structured_context
+
+
+class FakeEmbeddingClient:
+    instances = []
+
+    def __init__(self):
+        self.load_calls = 0
+        self.query_batches = []
+        FakeEmbeddingClient.instances.append(self)
+
+    def load(self):
+        self.load_calls += 1
+
+    async def query_many(self, query_texts, top_k=3):
+        self.query_batches.append(list(query_texts))
+        return {q: [f"excerpt for {q}"] for q in query_texts}
+
+
+class TestBulkStructuredContext(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        modules_dir = root / "modules"
+        summary_index = {}
+        for name in ["UserService", "AuthService", "OrderService"]:
+            (modules_dir / name).mkdir(parents=True)
+            (modules_dir / name / "full_summary.json").write_text(json.dumps({
+                "module_name": name,
+                "responsibilities": [f"{name} responsibility"],
+                "key_apis": [],
+                "depends_on": ["UserService"] if name != "UserService" else []
+            }))
+            summary_index[name] = {"target_path": "backend/services"}
+        index_path = root / "summary_index.json"
+        index_path.write_text(json.dumps(summary_index))
+
+        FakeEmbeddingClient.instances = []
+        self.patches = [
+            patch.object(structured_context, "MODULE_SUMMARY_PATH", modules_dir),
+            patch.object(structured_context, "SUMMARY_INDEX_PATH", index_path),
+            patch.object(symbol_index, "symbol_index",
+                         symbol_index.SymbolIndex(root / "generated", root / "symbol_index.json")),
+            patch.object(structured_context, "LocalEmbeddingClient", FakeEmbeddingClient),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp.cleanup()
+
+    def test_builds_all_contexts_with_shared_state(self):
+        names = ["UserService", "AuthService", "OrderService"]
+        contexts = asyncio.run(structured_context.build_structured_contexts(names, query_batch_size=2))
+
+        self.assertEqual(set(names), set(contexts))
+        self.assertIn("excerpt for AuthService", contexts["AuthService"])
+        self.assertIn("UserService located at `backend/services/userservice.ts`", contexts["OrderService"])
+
+        self.assertEqual(1, len(FakeEmbeddingClient.instances))
+        client = FakeEmbeddingClient.instances[0]
+        self.assertEqual(1, client.load_calls)
+        self.assertEqual([["UserService", "AuthService"], ["OrderService"]], client.query_batches)
+
+    def test_matches_single_module_rendering(self):
+        contexts = asyncio.run(structured_context.build_structured_contexts(["AuthService"]))
+        expected = structured_context.render_structured_context(
+            "AuthService",
+            structured_context.load_summary("AuthService"),
+            structured_context.load_summary_index(),
+            [],
+            ["excerpt for AuthService"]
+        )
+        self.assertEqual(expected, contexts["AuthService"])
+
+    def test_missing_summary_is_skipped(self):
+        async def collect():
+            return [name async for name, _ in structured_context.iter_structured_contexts(
+                ["UserService", "MissingService"]
+            )]
+
+        self.assertEqual(["UserService"], asyncio.run(collect()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import patch
+
+import memory.symbol_index as symbol_index
+from memory.symbol_index import SymbolIndex, parse_typescript_symbols
+
+AUTH_SERVICE_TS = """
+import { Injectable } from '@nestjs/common';
+
+// function commented(): void {}
+export function hashPassword(raw: string, rounds = 10): string {
+  return raw;
+}
+
+export const toToken = async (userId: string): Promise<string> => {
+  return `token-${userId}`;
+};
+
+@Injectable()
+export class AuthService {
+  constructor(private readonly users: UserService) {}
+
+  async login(dto: LoginDto): Promise<string> {
+    if (!dto.email) {
+      throw new Error('missing { brace');
+    }
+    for (const x of [1, 2]) {
+      console.log(x);
+    }
+    return toToken(dto.email);
+  }
+
+  private validate(user: User): boolean {
+    return !!user;
+  }
+
+  static create(): AuthService {
+    return new AuthService(null);
+  }
+}
+
+class Helper {
+  run() {}
+}
+"""
+
+
+class TestParseTypescriptSymbols(unittest.TestCase):
+
+    def test_functions_and_nested_class_bodies(self):
+        symbols = parse_typescript_symbols(AUTH_SERVICE_TS)
+
+        self.assertEqual(["hashPassword", "toToken"], [f["name"] for f in symbols["functions"]])
+        self.assertEqual("hashPassword(raw: string, rounds = 10): string", symbols["functions"][0]["signature"])
+        self.assertTrue(all(f["exported"] for f in symbols["functions"]))
+
+        classes = {c["name"]: c for c in symbols["classes"]}
+        self.assertEqual({"AuthService", "Helper"}, set(classes))
+        self.assertTrue(classes["AuthService"]["exported"])
+        self.assertFalse(classes["Helper"]["exported"])
+
+        methods = {m["name"]: m for m in classes["AuthService"]["methods"]}
+        # 方法体中含嵌套的 if/for 块，validate 与 create 仍需被识别
+        self.assertEqual({"login", "validate", "create"}, set(methods))
+        self.assertEqual("login(dto: LoginDto): Promise<string>", methods["login"]["signature"])
+        self.assertTrue(methods["validate"]["private"])
+        self.assertTrue(methods["create"]["static"])
+        self.assertEqual(["run"], [m["name"] for m in classes["Helper"]["methods"]])
+
+
+class TestSymbolIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / "generated_code"
+        self.index_path = Path(self.tmp.name) / "symbol_index.json"
+        (self.root / "backend/services").mkdir(parents=True)
+        self.auth_file = self.root / "backend/services/authservice.ts"
+        self.auth_file.write_text(AUTH_SERVICE_TS)
+        (self.root / "backend/services/userservice.ts").write_text("export function findUser(id: string) {}\n")
+        self.summary_index = {
+            "AuthService": {"target_path": "backend/services"},
+            "UserService": {"target_path": "backend/services"},
+        }
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_refresh_is_incremental_and_persistent(self):
+        index = SymbolIndex(self.root, self.index_path)
+        self.assertEqual(2, index.refresh())
+        self.assertTrue(self.index_path.exists())
+
+        reloaded = SymbolIndex(self.root, self.index_path)
+        with patch.object(symbol_index, "parse_typescript_symbols", wraps=parse_typescript_symbols) as parse:
+            self.assertEqual(0, reloaded.refresh())
+            parse.assert_not_called()
+
+            self.auth_file.write_text(AUTH_SERVICE_TS + "\nexport function extra() {}\n")
+            os.utime(self.auth_file, ns=(1, 1))
+            self.assertEqual(1, reloaded.refresh())
+            self.assertEqual(1, parse.call_count)
+
+    def test_deleted_files_are_removed(self):
+        index = SymbolIndex(self.root, self.index_path)
+        index.refresh()
+        self.auth_file.unlink()
+        index.refresh()
+        self.assertEqual(["backend/services/userservice.ts"], list(index.files))
+
+    def test_query_by_module_name(self):
+        index = SymbolIndex(self.root, self.index_path)
+        signatures = index.get_module_signatures("AuthService", self.summary_index)
+        self.assertIn("AuthService.login(dto: LoginDto): Promise<string>", signatures)
+        self.assertIn("hashPassword(raw: string, rounds = 10): string", signatures)
+        # 只返回导出的函数和导出类的非私有方法
+        self.assertFalse(any(s.startswith(("AuthService.validate", "Helper.")) for s in signatures))
+
+        # 没有 summary_index 时按文件名在已索引文件中查找
+        index.refresh()
+        self.assertEqual(["findUser(id: string)"], index.get_module_signatures("UserService"))
+        self.assertEqual([], index.get_module_signatures("MissingService", self.summary_index))
+
+
+    def test_concurrent_saves_keep_latest_state(self):
+        index = SymbolIndex(self.root, self.index_path)
+        for i in range(20):
+            (self.root / f"backend/services/service{i}.ts").write_text(f"export function run{i}() {{}}\n")
+        summary_index = {f"Service{i}": {"target_path": "backend/services"} for i in range(20)}
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda i: index.get_module_symbols(f"Service{i}", summary_index), range(20)))
+
+        reloaded = SymbolIndex(self.root, self.index_path)
+        self.assertEqual(set(index.files), set(reloaded.files))
+        self.assertEqual(20, len(reloaded.files))
+
+
+if __name__ == "__main__":
+    unittest.main()
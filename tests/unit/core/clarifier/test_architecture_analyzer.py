@@ -0,0 +1,97 @@
+import pytest
+from unittest.mock import patch
+
+from core.clarifier.architecture_analyzer import ALL_CHECKS, ArchitectureAnalyzer, compile_layer_rules
+from core.clarifier.architecture_manager import ArchitectureManager
+from core.clarifier.architecture_reasoner import ArchitectureReasoner
+
+
+@pytest.fixture
+def reasoner(tmp_path):
+    with patch('pathlib.Path.mkdir'):
+        manager = ArchitectureManager()
+    for name, pattern, layer, deps in [
+        ("UserRepository", "backend", "repositories", []),
+        ("UserService", "backend", "services", ["UserRepository"]),
+        ("UserController", "backend", "controllers", ["UserService"]),
+        ("OrderService", "backend", "services", ["UserController", "Ghost"]),
+        ("LoginPage", "frontend", "pages", ["UserService"]),
+    ]:
+        manager.index.add_module({"name": name, "pattern": pattern, "layer": layer, "dependencies": deps}, [])
+    return ArchitectureReasoner(architecture_manager=manager, output_path=tmp_path)
+
+
+class TestCompileLayerRules:
+    """compile_layer_rules 单元测试"""
+
+    def test_allow_matrix(self):
+        patterns = {"backend": {"dependencies": {"services": ["repositories"]}}}
+        keys = [("backend", "services"), ("backend", "repositories"), ("frontend", "pages"), ("backend", None)]
+        checked, allowed = compile_layer_rules(patterns, keys)
+        assert checked.tolist() == [True, True, False, False]
+        assert allowed[0].tolist() == [True, True, False, False]
+        assert allowed[1].tolist() == [False, True, False, False]
+        assert not allowed[2].any()
+
+
+class TestArchitectureAnalyzer:
+    """ArchitectureAnalyzer 单次遍历检查单元测试"""
+
+    def test_layer_violations(self, reasoner):
+        """测试层级违规与跨模式依赖的描述和顺序"""
+        violations = ArchitectureAnalyzer(reasoner.arch_manager.index).analyze(["layer_violations"])["layer_violations"]
+        # 按架构模式的定义顺序（frontend 在 backend 之前）
+        assert [str(issue) for issue in violations] == [
+            "模块 'LoginPage' 依赖了不同架构模式的模块 'UserService'",
+            "模块 'OrderService' (services) 依赖了不允许的层级 'controllers' 中的模块 'UserController'",
+        ]
+        assert [issue.kind for issue in violations] == ["cross_pattern_dependency", "layer_dependency"]
+        assert "UserController" in violations[1] and "UserService" not in violations[1]
+
+    def test_cycles_and_missing_dependencies(self, reasoner):
+        """测试循环依赖与不存在的依赖"""
+        reasoner.arch_manager.index.add_module({
+            "name": "UserRepository", "pattern": "backend", "layer": "repositories", "dependencies": ["UserController"]
+        }, [])
+        results = ArchitectureAnalyzer(reasoner.arch_manager.index).analyze()
+        assert list(results) == list(ALL_CHECKS)
+        assert [str(c) for c in results["circular_dependencies"]] == [
+            "UserRepository -> UserController -> UserService -> UserRepository"
+        ]
+        assert "模块 OrderService 依赖的模块 Ghost 不存在" in [str(i) for i in results["consistency_issues"]]
+
+    def test_naming(self, reasoner):
+        """测试命名风格与职责匹配"""
+        graph = reasoner.arch_manager.index.dependency_graph
+        reasoner.arch_manager.index.add_module({"name": "order_helper", "pattern": "backend", "layer": "services"}, [])
+        graph["UserService"]["responsibilities"] = ["process payments"]
+        issues = [str(i) for i in ArchitectureAnalyzer(reasoner.arch_manager.index).analyze(
+            ["naming_inconsistencies"])["naming_inconsistencies"]]
+        assert issues == [
+            "模块 'order_helper' 不符合帕斯卡命名法",
+            "模块 'UserService' 的命名可能不能充分反映其职责",
+        ]
+
+    def test_layer_responsibility_overlap(self, reasoner):
+        """测试层级间职责重叠（双向报告）"""
+        index = reasoner.arch_manager.index
+        index.layer_index.setdefault("backend.services", {})["UserService"] = {"responsibilities": ["audit"]}
+        index.layer_index.setdefault("backend.repositories", {})["UserRepository"] = {"responsibilities": ["audit"]}
+        issues = [str(i) for i in ArchitectureAnalyzer(index).analyze(["consistency_issues"])["consistency_issues"]]
+        assert "层级 backend.services 和 backend.repositories 存在职责重叠: audit" in issues
+        assert "层级 backend.repositories 和 backend.services 存在职责重叠: audit" in issues
+
+
+class TestReasonerIntegration:
+    """ArchitectureReasoner 通过分析器执行检查"""
+
+    @pytest.mark.asyncio
+    async def test_check_all_issues_single_pass(self, reasoner):
+        """测试 check_all_issues 只执行一次分析，且结果与单项检查一致"""
+        with patch.object(ArchitectureAnalyzer, 'analyze', autospec=True, side_effect=ArchitectureAnalyzer.analyze) as mock_analyze:
+            issues = await reasoner.check_all_issues()
+        assert mock_analyze.call_count == 1
+        assert all(isinstance(issue, str) for values in issues.values() for issue in values)
+        assert issues["layer_violations"] == reasoner._check_layer_violations()
+        assert issues["naming_inconsistencies"] == reasoner._check_naming_inconsistencies()
+        assert issues["consistency_issues"] == reasoner._check_overall_consistency()
@@ -7,7 +7,9 @@ from pathlib import Path
 from unittest.mock import patch, AsyncMock, MagicMock, mock_open
 from datetime import datetime
 
-from core.clarifier.architecture_manager import ArchitectureIndex, ArchitectureValidator, ArchitectureManager
+from core.clarifier.architecture_manager import ArchitectureIndex, ArchitectureValidator, ArchitectureManager, DependencyOrder
+from core.clarifier.compact_graph import CompactDependencyGraph
+from core.clarifier.state_snapshot import read_state
 
 class TestArchitectureIndex:
     """ArchitectureIndex 单元测试"""
@@ -18,7 +20,7 @@ class TestArchitectureIndex:
         
         assert isinstance(index.requirement_module_index, dict)
         assert isinstance(index.responsibility_index, dict)
-        assert isinstance(index.dependency_graph, dict)
+        assert isinstance(index.dependency_graph, CompactDependencyGraph)
         assert isinstance(index.keyword_mapping, dict)
         assert isinstance(index.layer_index, dict)
         
@@ -63,10 +65,11 @@ class TestArchitectureIndex:
         assert "frontend" == index.dependency_graph["TestModule"]["pattern"]
         assert "components" == index.dependency_graph["TestModule"]["layer"]
         
-        assert "这是一个测试模块" in index.keyword_mapping
-        assert "关键字1" in index.keyword_mapping
-        assert "关键字2" in index.keyword_mapping
-        assert "TestModule" in index.keyword_mapping["关键字1"]
+        assert "测试" in index.keyword_mapping
+        assert "关键" in index.keyword_mapping
+        assert "键字" in index.keyword_mapping
+        assert "这是一个测试模块" not in index.keyword_mapping
+        assert "TestModule" in index.keyword_mapping["关键"]
         
         assert "TestModule" in index.layer_index["frontend.components"]
     
@@ -77,10 +80,10 @@ class TestArchitectureIndex:
         text = "这是一个测试文本 包含关键字1 和 关键字2"
         keywords = index._extract_keywords(text)
         
-        assert "这是一个测试文本" in keywords
-        assert "包含关键字1" in keywords
-        assert "和" in keywords
-        assert "关键字2" in keywords
+        assert keywords == {"测试", "试文", "文本", "关键", "键字"}
+        assert "和" not in keywords
+        
+        assert index._extract_keywords("The UserService handles the JWT tokens") == {"user", "service", "handles", "jwt", "tokens"}
     
     def test_get_allowed_dependencies(self):
         """测试获取特定架构模式和层级允许的依赖"""
@@ -116,6 +119,140 @@ class TestArchitectureIndex:
         assert nonexistent_layer_path == ""
 
 
+class TestDependencyOrder:
+    """DependencyOrder 单元测试"""
+    
+    def assert_topological(self, order):
+        for source, targets in order.succ.items():
+            for target in targets:
+                assert order.ord[source] < order.ord[target]
+    
+    def test_add_edge_reorders_affected_region(self):
+        """测试逆序加边时重排拓扑序"""
+        order = DependencyOrder()
+        for name in ["A", "B", "C", "D"]:
+            order.set_dependencies(name, [])
+        
+        assert order.add_edge("D", "C") is None
+        assert order.add_edge("C", "B") is None
+        assert order.add_edge("B", "A") is None
+        self.assert_topological(order)
+        assert sorted(order.ord, key=order.ord.get) == ["D", "C", "B", "A"]
+    
+    def test_add_edge_returns_cycle_path(self):
+        """测试形成环的边返回环路径且不破坏拓扑序"""
+        order = DependencyOrder()
+        order.set_dependencies("A", ["B"])
+        order.set_dependencies("B", ["C"])
+        
+        assert order.find_cycle("C", "A") == ["C", "A", "B", "C"]
+        assert order.add_edge("C", "A") == ["C", "A", "B", "C"]
+        assert ("C", "A") in order.cyclic_edges
+        assert "A" not in order.succ["C"]
+        self.assert_topological(order)
+        
+        assert order.find_cycle("D", "A") is None
+        assert order.find_cycle("A", "A") == ["A", "A"]
+    
+    def test_set_dependencies_replaces_edges(self):
+        """测试替换依赖后旧边不再参与环检测"""
+        order = DependencyOrder()
+        order.set_dependencies("A", ["B"])
+        assert order.find_cycle("B", "A") == ["B", "A", "B"]
+        
+        order.set_dependencies("A", [])
+        assert order.find_cycle("B", "A") is None
+    
+    def test_index_rebuilds_order_when_graph_replaced(self):
+        """测试依赖图被整体替换时重新构建拓扑序"""
+        index = ArchitectureIndex()
+        index.add_module({"name": "A", "dependencies": []}, [])
+        
+        index.dependency_graph = {
+            "A": {"depends_on": {"B"}, "depended_by": set(), "pattern": "", "layer": ""},
+            "B": {"depends_on": set(), "depended_by": {"A"}, "pattern": "", "layer": ""}
+        }
+        
+        validator = ArchitectureValidator(index)
+        assert validator._check_circular_dependencies({"name": "B", "dependencies": ["A"]}) == ["B -> A -> B"]
+
+class TestCompactDependencyGraph:
+    """CompactDependencyGraph 单元测试"""
+
+    def test_reverse_edges_maintained(self):
+        """测试添加、替换依赖时自动维护 depended_by"""
+        graph = CompactDependencyGraph()
+        graph["A"] = {"depends_on": ["B", "C"], "pattern": "backend", "layer": "services"}
+        graph["B"] = {"depends_on": []}
+
+        assert set(graph["B"]["depended_by"]) == {"A"}
+
+        graph["A"]["depends_on"] = ["C"]
+        graph["C"] = {"depends_on": []}
+        assert set(graph["B"]["depended_by"]) == set()
+        assert set(graph["C"]["depended_by"]) == {"A"}
+
+        graph["B"]["depended_by"].add("C")
+        assert set(graph["C"]["depends_on"]) == {"B"}
+
+    def test_dict_facade(self):
+        """测试与 dict-of-dicts 相同的读取方式"""
+        graph = CompactDependencyGraph({
+            "A": {"depends_on": {"B"}, "depended_by": set(), "pattern": "frontend", "layer": "pages"},
+            "B": {"depends_on": set(), "depended_by": {"A"}, "pattern": "frontend", "layer": "components"}
+        })
+
+        assert list(graph) == ["A", "B"]
+        assert graph["A"]["layer"] == "pages"
+        assert graph.get("Missing", {}).get("layer", "") == ""
+        assert sorted(graph["B"]["depended_by"]) == ["A"]
+        assert graph.to_dict()["A"]["depends_on"] == {"B"}
+
+        del graph["A"]
+        assert "A" not in graph
+        assert len(graph["B"]["depended_by"]) == 0
+
+    def test_unregistered_dependency_not_in_graph(self):
+        """测试仅被依赖的模块不会出现在映射的键中"""
+        graph = CompactDependencyGraph()
+        graph["A"] = {"depends_on": ["Missing"]}
+
+        assert "Missing" not in graph
+        assert len(graph) == 1
+        assert list(graph["A"]["depends_on"]) == ["Missing"]
+
+        graph["Missing"] = {"depends_on": []}
+        assert set(graph["Missing"]["depended_by"]) == {"A"}
+
+    def test_reachable(self):
+        """测试基于 CSR 的可达性与影响分析"""
+        graph = CompactDependencyGraph()
+        graph["UI"] = {"depends_on": ["Service"]}
+        graph["Service"] = {"depends_on": ["Repo"]}
+        graph["Repo"] = {"depends_on": ["Model"]}
+        graph["Model"] = {"depends_on": []}
+        graph["Other"] = {"depends_on": ["Model"]}
+
+        assert graph.reachable(["UI"]) == {"Service", "Repo", "Model"}
+        assert graph.impacted_by("Repo") == {"Service", "UI"}
+        assert graph.impacted_by("Model") == {"Repo", "Service", "UI", "Other"}
+
+        graph["Other"]["depends_on"] = []
+        assert graph.impacted_by("Model") == {"Repo", "Service", "UI"}
+
+    def test_index_uses_compact_graph(self):
+        """测试 ArchitectureIndex 整体赋值普通字典时转换为紧凑存储"""
+        index = ArchitectureIndex()
+        index.add_module({"name": "B", "dependencies": []}, [])
+        index.add_module({"name": "A", "dependencies": ["B"]}, [])
+
+        assert isinstance(index.dependency_graph, CompactDependencyGraph)
+        assert set(index.dependency_graph["B"]["depended_by"]) == {"A"}
+
+        index.dependency_graph = {"C": {"depends_on": set(), "depended_by": set(), "pattern": "", "layer": ""}}
+        assert isinstance(index.dependency_graph, CompactDependencyGraph)
+        assert list(index.dependency_graph) == ["C"]
+
 class TestArchitectureValidator:
     """ArchitectureValidator 单元测试"""
     
@@ -276,13 +413,14 @@ class TestArchitectureValidator:
             "dependencies": ["ExistingModule2"]  # 形成循环: TestModule -> ExistingModule2 -> ExistingModule1 -> TestModule
         }
         
-        validator.index.dependency_graph["ExistingModule1"]["depends_on"].add("TestModule")
+        existing_module1 = setup_validator["existing_module1"]
+        validator.index.add_module({**existing_module1, "dependencies": ["TestModule"]}, ["需求1"])
         
         cycles = validator._check_circular_dependencies(module_with_cycle)
         
-        validator.index.dependency_graph["ExistingModule1"]["depends_on"].remove("TestModule")
+        validator.index.add_module(existing_module1, ["需求1"])
         
-        assert len(cycles) == 1
+        assert cycles == ["TestModule -> ExistingModule2 -> ExistingModule1 -> TestModule"]
         
         module_without_cycle = {
             "name": "TestModule",
@@ -404,6 +542,34 @@ class TestArchitectureManager:
         assert manager.modules[0]["responsibilities"] == ["职责1", "职责2"]
         assert manager.modules[0]["dependencies"] == ["ModuleA"]
     
+    def test_module_registry_indexes(self, setup_manager):
+        """测试模块注册表的按名称查找与层级/模式/领域二级索引"""
+        manager = setup_manager
+        
+        manager.add_module({"name": "UserService", "layer": "services", "pattern": "backend", "domain": "user"})
+        manager.add_module({"name": "UserPage", "layer": "pages", "pattern": "frontend", "domain": "user"})
+        manager.add_module({"name": "OrderService", "layer": "services", "pattern": "backend", "domain": "order"})
+        manager.add_module({"name": "UserPage", "layer": "components", "pattern": "frontend", "domain": "user"})
+        
+        assert [m["name"] for m in manager.modules] == ["UserService", "UserPage", "OrderService"]
+        assert manager.get_module("UserPage")["layer"] == "components"
+        assert [m["name"] for m in manager.get_modules_by_layer("services")] == ["UserService", "OrderService"]
+        assert manager.get_modules_by_layer("pages") == []
+        assert [m["name"] for m in manager.get_modules_by_pattern("frontend")] == ["UserPage"]
+        assert [m["name"] for m in manager.get_modules_by_domain("user")] == ["UserService", "UserPage"]
+        
+        # 整体替换或直接修改列表后索引仍然正确
+        manager.modules = [{"name": "A", "layer": "models"}]
+        manager.modules.append({"name": "B", "layer": "models"})
+        manager.add_module({"name": "A", "layer": "repositories"})
+        assert [m["name"] for m in manager.modules] == ["A", "B"]
+        assert [m["name"] for m in manager.get_modules_by_layer("models")] == ["B"]
+        
+        manager.requirements = [{"id": "REQ-001", "description": "旧需求"}]
+        manager.add_requirement({"id": "REQ-001", "description": "新需求"})
+        assert manager.get_requirement("REQ-001")["description"] == "新需求"
+        assert len(manager.requirements) == 1
+    
     def test_add_requirement_new(self, setup_manager):
         """测试添加新需求"""
         manager = setup_manager
@@ -555,9 +721,10 @@ class TestArchitectureManager:
             manager._save_architecture_state.assert_called_once()
     
     @pytest.mark.asyncio
-    async def test_save_architecture_state(self, setup_manager):
+    async def test_save_architecture_state(self, setup_manager, tmp_path):
         """测试保存架构状态"""
         manager = setup_manager
+        manager.output_path = tmp_path
         
         manager.index.requirement_module_index = {
             "需求1": {"模块1", "模块2"},
@@ -587,22 +754,124 @@ class TestArchitectureManager:
             }
         }
         
-        with patch('builtins.open', mock_open()) as mock_file, \
-             patch('json.dump') as mock_json_dump:
-            
-            await manager._save_architecture_state()
-            
-            mock_file.assert_called_once_with(
-                manager.output_path / "architecture_state.json",
-                'w',
-                encoding='utf-8'
-            )
-            
-            args, kwargs = mock_json_dump.call_args
-            state = args[0]
-            
-            assert "timestamp" in state
-            assert state["requirement_module_index"]["需求1"] == ["模块1", "模块2"]
-            assert state["responsibility_index"]["职责1"]["modules"] == ["模块1"]
-            assert state["dependency_graph"]["模块1"]["depends_on"] == ["模块2"]
-            assert state["layer_index"]["前端.组件"]["模块1"] == {"name": "模块1"}
+        await manager._save_architecture_state()
+        
+        state = read_state(manager.output_path / "architecture_snapshot")
+        assert "timestamp" in state
+        assert state["requirement_module_index"]["需求1"] == ["模块1", "模块2"]
+        assert state["responsibility_index"]["职责1"]["modules"] == ["模块1"]
+        assert state["dependency_graph"]["模块1"]["depends_on"] == ["模块2"]
+        assert state["layer_index"]["前端.组件"]["模块1"] == {"name": "模块1"}
+    
+    @pytest.mark.asyncio
+    async def test_process_new_module_appends_journal(self, setup_manager, tmp_path, monkeypatch):
+        """测试新模块只追加日志，重启后可通过快照 + 日志恢复"""
+        monkeypatch.chdir(tmp_path)
+        manager = setup_manager
+        manager.output_path = tmp_path
+        
+        modules = [
+            {"name": "UserRepository", "responsibilities": ["用户数据访问"], "dependencies": [],
+             "pattern": "backend", "layer": "repositories"},
+            {"name": "UserService", "responsibilities": ["用户管理"], "dependencies": ["UserRepository"],
+             "pattern": "backend", "layer": "services"}
+        ]
+        
+        await manager.process_new_module(modules[0], ["需求1"])
+        await manager._save_architecture_state()
+        
+        await manager.process_new_module(modules[1], ["需求2"])
+        manager._get_journal().flush()
+        
+        journal_lines = (tmp_path / "architecture_journal.jsonl").read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["module"]["name"] for line in journal_lines] == ["UserService"]
+        
+        with patch('pathlib.Path.mkdir'):
+            restored = ArchitectureManager()
+        restored.output_path = tmp_path
+        
+        assert restored.load_architecture_state() is True
+        assert [m["name"] for m in restored.modules] == ["UserRepository", "UserService"]
+        assert restored.index.dependency_graph["UserService"]["depends_on"] == {"UserRepository"}
+        assert restored.index.requirement_module_index["需求1"] == {"UserRepository"}
+        assert "backend.services" in restored.index.layer_index
+        assert "UserService" in restored.index.layer_index["backend.services"]
+    
+    @pytest.mark.asyncio
+    async def test_load_ignores_generator_state_file(self, setup_manager, tmp_path):
+        """测试 ArchitectureGenerator 写出的 architecture_state.json 不会被当作快照"""
+        manager = setup_manager
+        manager.output_path = tmp_path
+        manager.index.add_module({"name": "UserService", "dependencies": []}, ["需求1"])
+        manager.add_module({"name": "UserService"})
+        await manager._save_architecture_state()
+        
+        foreign = {"requirement_analysis": {}, "architecture_analysis": {}, "timestamp": "2026-01-01T00:00:00"}
+        (tmp_path / "architecture_state.json").write_text(json.dumps(foreign), encoding="utf-8")
+        
+        with patch('pathlib.Path.mkdir'):
+            restored = ArchitectureManager()
+        restored.output_path = tmp_path
+        
+        assert restored.load_architecture_state() is True
+        assert [m["name"] for m in restored.modules] == ["UserService"]
+        assert "UserService" in restored.index.dependency_graph
+    
+    @pytest.mark.asyncio
+    async def test_journal_compaction(self, setup_manager, tmp_path):
+        """测试日志累计到阈值后压缩为快照并清空日志"""
+        manager = setup_manager
+        manager.output_path = tmp_path
+        journal = manager._get_journal()
+        journal.compact_every = 3
+        
+        for i in range(3):
+            manager.index.add_module({"name": f"Module{i}", "dependencies": []}, [])
+            manager.add_module({"name": f"Module{i}"})
+            await manager._save_architecture_state({
+                "op": "add_module", "module": {"name": f"Module{i}"}, "requirements": []
+            })
+        journal.flush()
+        
+        state = read_state(tmp_path / "architecture_snapshot")
+        assert state["journal_seq"] == 3
+        assert len(state["modules"]) == 3
+        assert (tmp_path / "architecture_journal.jsonl").read_text(encoding="utf-8") == ""
+    
+    @pytest.mark.asyncio
+    async def test_process_new_modules_matches_sequential(self, tmp_path, monkeypatch):
+        """测试批量处理与逐个处理结果一致，并检测批内形成的循环依赖"""
+        monkeypatch.chdir(tmp_path)
+        
+        batch = [
+            ({"name": "A", "responsibilities": ["职责A"], "dependencies": ["B"]}, ["需求1"]),
+            ({"name": "B", "responsibilities": ["职责B"], "dependencies": ["C"]}, ["需求2"]),
+            ({"name": "C", "responsibilities": ["职责C"], "dependencies": ["A"]}, ["需求3"]),
+            ({"name": "D", "responsibilities": ["职责A"], "dependencies": []}, ["需求4"]),
+            ({"module_name": "NoName"}, [])
+        ]
+        
+        sequential = ArchitectureManager()
+        sequential.output_path = tmp_path / "sequential"
+        expected = []
+        for module_spec, requirements in batch:
+            try:
+                expected.append(await sequential.process_new_module(module_spec, requirements))
+            except KeyError as e:
+                expected.append({"status": "error", "message": str(e)})
+        
+        manager = ArchitectureManager()
+        manager.output_path = tmp_path / "batch"
+        with patch.object(manager, '_save_architecture_state') as mock_save:
+            results = await manager.process_new_modules(batch)
+        
+        assert results == expected
+        assert [r["status"] for r in results] == ["success", "success", "validation_failed", "validation_failed", "error"]
+        assert results[2]["issues"]["circular_dependencies"] == ["C -> A -> B -> C"]
+        assert [m["name"] for m in manager.modules] == ["A", "B"]
+        assert (tmp_path / "data/output/modules/B/full_summary.json").exists()
+        
+        mock_save.assert_called_once()
+        mutation = mock_save.call_args[0][0]
+        assert mutation["op"] == "add_modules"
+        assert [entry["module"]["name"] for entry in mutation["modules"]] == ["A", "B"]
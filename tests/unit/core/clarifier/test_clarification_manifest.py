@@ -0,0 +1,229 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from core.clarifier.clarification_manifest import (
+    ClarificationManifest, dependency_neighbourhood, issue_scope, merge_issue_reports, split_sections
+)
+from core.clarifier.clarifier import Clarifier
+from core.clarifier.architecture_manager import ArchitectureManager
+from core.clarifier.requirement_analyzer import RequirementAnalyzer
+from core.clarifier.architecture_reasoner import ArchitectureReasoner
+from memory.module_store import ModuleStore
+
+
+class TestSplitSections:
+    """split_sections 单元测试"""
+
+    def test_split_by_heading(self):
+        """测试按一、二级标题切分，只有标题的章节并入下一章节，三级标题留在章节内"""
+        content = "# 需求文档\n## 用户认证\n支持登录\n### 细节\n支持找回密码\n## 数据管理\n支持导出\n"
+        sections = split_sections("req.md", content)
+        assert [s["id"] for s in sections] == ["req.md#需求文档/用户认证", "req.md#需求文档/数据管理"]
+        assert sections[0]["content"].startswith("# 需求文档\n## 用户认证")
+        assert "### 细节" in sections[0]["content"]
+        assert "".join(s["content"] for s in sections) == content
+
+    def test_duplicate_titles_and_preamble(self):
+        sections = split_sections("a.md", "说明\n## 接口\nA\n## 接口\nB\n")
+        assert [s["id"] for s in sections] == ["a.md#", "a.md#接口", "a.md#接口~2"]
+        assert sections[1]["hash"] != sections[2]["hash"]
+
+
+class TestClarificationManifest:
+    """ClarificationManifest 单元测试"""
+
+    def test_diff_and_provenance(self, tmp_path):
+        """测试章节变化比较与 章节 → 需求 → 模块 的来源映射"""
+        path = tmp_path / "manifest.json"
+        sections = {"req.md": split_sections("req.md", "## 登录\n支持登录\n## 订单\n支持下单\n")}
+        manifest = ClarificationManifest.load(path)
+        assert not manifest.exists
+        manifest.record(sections, [
+            {"module_name": "AuthService", "requirements": ["REQ-001"], "source_sections": ["req.md#登录"]},
+            {"module_name": "OrderService", "requirements": ["REQ-002"], "source_sections": ["req.md#订单"]},
+        ])
+        manifest.save()
+
+        manifest = ClarificationManifest.load(path)
+        assert manifest.exists
+        assert manifest.requirement_modules() == {"REQ-001": ["AuthService"], "REQ-002": ["OrderService"]}
+
+        changed = {"req.md": split_sections("req.md", "## 登录\n支持登录和注册\n## 订单\n支持下单\n")}
+        diff = manifest.diff(changed)
+        assert diff == {"changed": ["req.md#登录"], "removed": [], "unchanged": ["req.md#订单"]}
+        assert manifest.modules_for(diff["changed"]) == {"AuthService"}
+
+        diff = manifest.diff({"req.md": split_sections("req.md", "## 订单\n支持下单\n")})
+        assert diff["removed"] == ["req.md#登录"]
+
+    def test_incomplete_sections_stay_changed(self, tmp_path):
+        sections = {"a.md": split_sections("a.md", "## A\n内容\n")}
+        manifest = ClarificationManifest(tmp_path / "manifest.json")
+        manifest.record(sections, [], incomplete=["a.md#A"])
+        assert manifest.diff(sections)["changed"] == ["a.md#A"]
+
+    def test_neighbourhood_and_issue_merge(self):
+        """测试依赖邻域，以及只替换邻域内模块的问题"""
+        graph = {
+            "A": {"depends_on": {"B"}, "depended_by": set()},
+            "B": {"depends_on": {"C"}, "depended_by": {"A"}},
+            "C": {"depends_on": set(), "depended_by": {"B"}},
+            "D": {"depends_on": set(), "depended_by": set()},
+        }
+        assert dependency_neighbourhood(graph, ["B", "Gone"]) == {"A", "B", "C"}
+
+        previous = {
+            "layer_violations": [
+                {"kind": "layer_violations", "modules": ["A", "B"], "message": "旧问题", "details": {}},
+                {"kind": "layer_violations", "modules": ["D"], "message": "D 的问题", "details": {}},
+                {"kind": "layer_violations", "modules": ["E"], "message": "已删除模块的问题", "details": {}},
+            ],
+            "consistency_issues": [{"kind": "consistency_issues", "modules": [], "message": "全局", "details": {}}],
+        }
+        fresh = {"layer_violations": [{"kind": "layer_violations", "modules": ["B", "C"], "message": "新问题",
+                                       "details": {}}]}
+        merged = merge_issue_reports(previous, fresh, {"A", "B", "C"}, set(graph))
+        assert [i["message"] for i in merged["layer_violations"]] == ["D 的问题", "新问题"]
+        assert merged["consistency_issues"] == previous["consistency_issues"]
+
+        # 全量重算的检查直接替换上次的报告
+        fresh["consistency_issues"] = []
+        merged = merge_issue_reports(previous, fresh, {"A", "B", "C"}, set(graph), recomputed=["consistency_issues"])
+        assert merged["consistency_issues"] == []
+
+        # 与邻域模块同属一个问题的模块也重新检查
+        assert issue_scope(previous, {"B"}, set(graph)) == {"A", "B"}
+
+
+class TestIncrementalClarification:
+    """Clarifier.generate_granular_modules 增量重新澄清"""
+
+    @pytest.mark.asyncio
+    async def test_incremental_issues_match_full_check(self, tmp_path):
+        """测试修改后增量检查得到的报告与全量 check_all_issues 一致"""
+        with patch('pathlib.Path.mkdir'):
+            manager = ArchitectureManager()
+        index = manager.index
+        for i in range(12):
+            index.add_module({"name": f"Module{i}", "pattern": "backend", "layer": "services",
+                              "dependencies": [f"Module{i + 1}"] if i % 3 == 0 else []}, [])
+        index.add_module({"name": "ReportService", "pattern": "backend", "layer": "services",
+                          "dependencies": ["AuditService"]}, [])
+        for name in ("Module1", "Module5", "Module8"):
+            index.dependency_graph[name]["responsibilities"] = ["manage orders"]
+        index.add_module({"name": "CycleA", "pattern": "backend", "layer": "services", "dependencies": ["CycleB"]}, [])
+        index.add_module({"name": "CycleB", "pattern": "backend", "layer": "services", "dependencies": ["CycleA"]}, [])
+
+        clarifier = Clarifier(data_dir=str(tmp_path))
+        clarifier.architecture_manager = manager
+        reasoner = ArchitectureReasoner(architecture_manager=manager, output_path=tmp_path)
+        manifest = ClarificationManifest(tmp_path / "manifest.json")
+        await clarifier._check_granular_issues(reasoner, manifest, set(), tmp_path / "issues")
+
+        # 一个模块不再承担重复职责，另一个模块加入已有的重复职责，新增模块加入已有的循环依赖，
+        # 新增的模块命名风格不同、依赖了不存在的模块，缺失的依赖被补上
+        index.dependency_graph["Module1"]["responsibilities"] = ["route requests"]
+        index.dependency_graph["Module2"]["responsibilities"] = ["manage orders"]
+        index.add_module({"name": "CycleC", "pattern": "backend", "layer": "services", "dependencies": ["CycleA"]}, [])
+        index.add_module({"name": "CycleB", "pattern": "backend", "layer": "services",
+                          "dependencies": ["CycleA", "CycleC"]}, [])
+        index.add_module({"name": "order_helper", "pattern": "backend", "layer": "services",
+                          "dependencies": ["MissingModule"]}, [])
+        index.add_module({"name": "AuditService", "pattern": "backend", "layer": "services", "dependencies": []}, [])
+        manifest.exists = True
+        with patch.object(reasoner, 'check_all_issues', wraps=reasoner.check_all_issues) as mock_full:
+            incremental = await clarifier._check_granular_issues(
+                reasoner, manifest, {"Module1", "Module2", "CycleB", "CycleC", "order_helper", "AuditService"},
+                tmp_path / "issues"
+            )
+        mock_full.assert_not_called()
+
+        full = await reasoner.check_all_issues()
+        normalize = lambda report: {check: sorted(items) for check, items in report.items() if items}
+        assert normalize(incremental) == normalize(full)
+        assert "模块 order_helper 依赖的模块 MissingModule 不存在" in incremental["consistency_issues"]
+        assert len(incremental["circular_dependencies"]) == 1
+        assert len(incremental["responsibility_overlaps"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_rerun_only_changed_sections(self, tmp_path):
+        """测试重新运行时只分析变化的章节，只重新检查受影响模块的依赖邻域"""
+        input_dir = tmp_path / "input"
+        output_dir = tmp_path / "output"
+        documents = {"req.md": "# 需求\n## 登录\n支持登录\n## 订单\n支持下单\n"}
+
+        async def analyze(content, llm_call, layers, save=True, **kwargs):
+            if "登录" in content:
+                return [{"module_name": "AuthService", "layer": "业务层", "requirements": ["REQ-001"],
+                         "dependencies": ["UserRepository"]},
+                        {"module_name": "UserRepository", "layer": "数据层", "requirements": ["REQ-001"]}]
+            return [{"module_name": "OrderService", "layer": "业务层", "requirements": ["REQ-002"]}]
+
+        clarifier = Clarifier(data_dir=str(tmp_path))
+        with patch.object(clarifier, '_read_all_markdown_files', new_callable=AsyncMock) as mock_read, \
+             patch.object(RequirementAnalyzer, 'analyze_granular_modules', side_effect=analyze) as mock_analyze, \
+             patch.object(RequirementAnalyzer, '_save_granular_modules'), \
+             patch('core.clarifier.index_generator.MultiDimensionalIndexGenerator.generate_indices'), \
+             patch.object(ArchitectureReasoner, 'check_module_issues', new_callable=AsyncMock) as mock_module_check:
+            mock_read.return_value = documents
+            mock_module_check.return_value = {}
+            first = await clarifier.generate_granular_modules(str(input_dir), str(output_dir))
+            assert mock_analyze.call_count == 2
+            assert first["affected_modules"] == ["AuthService", "OrderService", "UserRepository"]
+            assert (output_dir / "clarification_manifest.json").exists()
+            assert (output_dir / "issues" / "architecture_issues_detail.json").exists()
+            mock_module_check.assert_not_called()
+
+            # 只修改“订单”章节
+            mock_read.return_value = {"req.md": "# 需求\n## 登录\n支持登录\n## 订单\n支持下单和退款\n"}
+            with patch('pathlib.Path.mkdir'):
+                clarifier.architecture_manager = ArchitectureManager()
+            second = await clarifier.generate_granular_modules(str(input_dir), str(output_dir))
+            assert mock_analyze.call_count == 3
+            assert second["changed_sections"] == 1
+            assert second["affected_modules"] == ["OrderService"]
+            assert [call.args[0] for call in mock_module_check.call_args_list] == ["OrderService"]
+
+    @pytest.mark.asyncio
+    async def test_empty_sections_cached_and_disappeared_modules_deleted(self, tmp_path):
+        """测试没有模块的章节被缓存和记录，不再产生的模块从模块存储删除，分析失败章节的模块保留"""
+        input_dir = tmp_path / "input"
+        output_dir = tmp_path / "output"
+        store = ModuleStore(tmp_path / "modules")
+        failing = set()
+
+        async def analyze(content, llm_call, layers, save=True, raise_on_error=False):
+            for keyword in failing:
+                if keyword in content:
+                    raise ValueError("LLM返回的结果不是有效的模块列表")
+            if "登录" in content:
+                return [{"module_name": "AuthService", "layer": "业务层", "requirements": ["REQ-001"]}]
+            if "退款" in content:
+                return [{"module_name": "RefundService", "layer": "业务层", "requirements": ["REQ-002"]}]
+            if "订单" in content:
+                return [{"module_name": "OrderService", "layer": "业务层", "requirements": ["REQ-002"]}]
+            return []
+
+        clarifier = Clarifier(data_dir=str(tmp_path))
+        with patch.object(clarifier, '_read_all_markdown_files', new_callable=AsyncMock) as mock_read, \
+             patch.object(RequirementAnalyzer, 'analyze_granular_modules', side_effect=analyze) as mock_analyze, \
+             patch.object(RequirementAnalyzer, '_save_granular_modules'), \
+             patch('core.clarifier.index_generator.MultiDimensionalIndexGenerator.generate_indices'), \
+             patch('core.clarifier.clarifier.get_module_store', return_value=store), \
+             patch('core.clarifier.architecture_manager.get_module_store', return_value=store):
+            mock_read.return_value = {"req.md": "# 需求\n## 登录\n支持登录\n## 订单\n支持下单\n## 公告\n暂无\n"}
+            await clarifier.generate_granular_modules(str(input_dir), str(output_dir))
+            assert mock_analyze.call_count == 3
+            assert sorted(store.names()) == ["AuthService", "OrderService"]
+
+            # “订单”章节改为产生 RefundService，“登录”章节分析失败；没有模块的“公告”章节不重新分析
+            failing.add("登录")
+            mock_read.return_value = {"req.md": "# 需求\n## 登录\n支持登录和注销\n## 订单\n支持退款\n## 公告\n暂无\n"}
+            await clarifier.generate_granular_modules(str(input_dir), str(output_dir))
+            assert mock_analyze.call_count == 5
+            assert sorted(store.names()) == ["AuthService", "RefundService"]
+
+            manifest = ClarificationManifest.load(output_dir / "clarification_manifest.json")
+            assert manifest.sections["req.md#需求/公告"]["hash"] is not None
+            assert manifest.sections["req.md#需求/登录"]["hash"] is None
+            assert manifest.modules_for(["req.md#需求/登录"]) == {"AuthService"}
@@ -316,9 +316,8 @@ class TestClarifier(unittest.IsolatedAsyncioTestCase):
         with open(module_dir / "full_summary.json", "w", encoding="utf-8") as f:
             json.dump(module_data, f, ensure_ascii=False, indent=2)
         
-        with patch('core.clarifier.architecture_manager.ArchitectureManager.process_new_module') as mock_process:
-            mock_process.return_value = asyncio.Future()
-            mock_process.return_value.set_result(None)
+        with patch('core.clarifier.architecture_manager.ArchitectureManager.process_new_modules') as mock_process:
+            mock_process.side_effect = lambda batch: [{"status": "success", "module": module} for module, _ in batch]
             
             with patch('core.clarifier.architecture_reasoner.ArchitectureReasoner._check_global_circular_dependencies') as mock_check:
                 mock_check.return_value = []
@@ -372,9 +371,8 @@ class TestClarifier(unittest.IsolatedAsyncioTestCase):
                     }
                 ])
                 
-                with patch('core.clarifier.architecture_manager.ArchitectureManager.process_new_module') as mock_process:
-                    mock_process.return_value = asyncio.Future()
-                    mock_process.return_value.set_result(None)
+                with patch('core.clarifier.architecture_manager.ArchitectureManager.process_new_modules') as mock_process:
+                    mock_process.side_effect = lambda batch: [{"status": "success", "module": module} for module, _ in batch]
                     
                     with patch('core.clarifier.index_generator.MultiDimensionalIndexGenerator.generate_indices') as mock_generate:
                         mock_generate.return_value = {
@@ -398,7 +396,8 @@ class TestClarifier(unittest.IsolatedAsyncioTestCase):
                             
                             mock_analyze.assert_called_once()
                             
-                            self.assertEqual(mock_process.call_count, 3)
+                            mock_process.assert_called_once()
+                            self.assertEqual(len(mock_process.call_args[0][0]), 3)
                             
                             mock_generate.assert_called_once()
                             
@@ -311,8 +311,8 @@ class TestClarifier(unittest.IsolatedAsyncioTestCase):
         with open(module_dir / "full_summary.json", "w", encoding="utf-8") as f:
             json.dump(module_data, f, ensure_ascii=False, indent=2)
         
-        with patch('core.clarifier.architecture_manager.ArchitectureManager.process_new_module') as mock_process:
-            mock_process.return_value = None
+        with patch('core.clarifier.architecture_manager.ArchitectureManager.process_new_modules') as mock_process:
+            mock_process.side_effect = lambda batch: [{"status": "success", "module": module} for module, _ in batch]
             
             with patch('core.clarifier.architecture_reasoner.ArchitectureReasoner._check_global_circular_dependencies') as mock_check:
                 mock_check.return_value = []
@@ -364,8 +364,8 @@ class TestClarifier(unittest.IsolatedAsyncioTestCase):
                     }
                 ]
                 
-                with patch('core.clarifier.architecture_manager.ArchitectureManager.process_new_module') as mock_process:
-                    mock_process.return_value = None
+                with patch('core.clarifier.architecture_manager.ArchitectureManager.process_new_modules') as mock_process:
+                    mock_process.side_effect = lambda batch: [{"status": "success", "module": module} for module, _ in batch]
                     
                     with patch('core.clarifier.index_generator.MultiDimensionalIndexGenerator.generate_indices') as mock_generate:
                         mock_generate.return_value = {
@@ -386,9 +386,11 @@ class TestClarifier(unittest.IsolatedAsyncioTestCase):
                             
                             mock_read.assert_called_once_with(str(self.input_dir))
                             
-                            mock_analyze.assert_called_once()
+                            # 每个章节单独分析（两份文档各两个二级章节），提取的同名模块合并
+                            self.assertEqual(mock_analyze.call_count, 4)
                             
-                            self.assertEqual(mock_process.call_count, 3)
+                            mock_process.assert_called_once()
+                            self.assertEqual(len(mock_process.call_args[0][0]), 3)
                             
                             mock_generate.assert_called_once()
                             
@@ -0,0 +1,118 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from core.clarifier.correction_scheduler import CorrectionScheduler
+from core.clarifier.architecture_manager import ArchitectureManager
+from core.clarifier.architecture_reasoner import ArchitectureReasoner
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCorrectionScheduler:
+    """CorrectionScheduler 单元测试"""
+
+    @pytest.mark.asyncio
+    async def test_priority_and_batching(self):
+        """测试按优先级处理，同组问题合并为一次调用"""
+        scheduler = CorrectionScheduler(batch_size=2)
+        scheduler.submit("module", "A", {"naming": ["x"]}, group="services")
+        scheduler.submit("module", "B", {"naming": ["y"]}, group="services")
+        scheduler.submit("module", "C", {"naming": ["z"]}, group="services")
+        scheduler.submit("cycle", "architecture", ["A -> B -> A"])
+        calls = []
+
+        async def handler(kind, entries):
+            calls.append((kind, [entry["target"] for entry in entries]))
+
+        await scheduler.drain(handler)
+        assert calls == [("cycle", ["architecture"]), ("module", ["A", "B"]), ("module", ["C"])]
+        assert scheduler.calls == 3
+
+    @pytest.mark.asyncio
+    async def test_dedupe_and_merge(self):
+        """测试相同的问题集合只处理一次，同一目标的新问题合并"""
+        scheduler = CorrectionScheduler()
+        assert scheduler.submit("layer", "services", ["问题1"])
+        assert not scheduler.submit("layer", "services", ["问题1"])
+        assert scheduler.submit("layer", "services", ["问题2"])
+        handler = AsyncMock()
+        await scheduler.drain(handler)
+        handler.assert_called_once()
+        assert handler.call_args.args[1][0]["issues"] == ["问题1", "问题2"]
+        assert not scheduler.submit("layer", "services", ["问题1"])
+
+    @pytest.mark.asyncio
+    async def test_call_budgets(self):
+        """测试每个目标和全局的调用次数预算"""
+        scheduler = CorrectionScheduler(max_calls=3, max_calls_per_target=1, batch_size=1)
+        handler = AsyncMock()
+        scheduler.submit("module", "A", {"naming": ["x"]})
+        await scheduler.drain(handler)
+        assert not scheduler.submit("module", "A", {"naming": ["y"]})
+
+        for name in ["B", "C", "D"]:
+            scheduler.submit("module", name, {"naming": ["x"]})
+        await scheduler.drain(handler)
+        assert handler.call_count == 3
+        assert [item["target"] for item in scheduler.skipped] == ["A", "D"]
+        assert scheduler.skipped[1]["reason"] == "global"
+
+    @pytest.mark.asyncio
+    async def test_time_budgets(self):
+        """测试每个目标累计时间和全局时间预算"""
+        clock = FakeClock()
+        scheduler = CorrectionScheduler(max_seconds=100, max_seconds_per_target=10, max_calls_per_target=5, clock=clock)
+
+        async def slow(kind, entries):
+            clock.now += 20
+
+        scheduler.submit("layer", "services", ["问题1"])
+        await scheduler.drain(slow)
+        assert not scheduler.submit("layer", "services", ["问题2"])
+        assert scheduler.skipped[-1]["reason"] == "target"
+
+        clock.now = 200
+        assert not scheduler.submit("layer", "models", ["问题1"])
+        assert scheduler.skipped[-1]["reason"] == "global"
+
+
+class TestReasonerCorrections:
+    """ArchitectureReasoner 修正流程使用调度器"""
+
+    @pytest.fixture
+    def reasoner(self, tmp_path):
+        with patch('pathlib.Path.mkdir'):
+            manager = ArchitectureManager()
+        return ArchitectureReasoner(architecture_manager=manager, output_path=tmp_path)
+
+    @pytest.mark.asyncio
+    async def test_layer_correction_runs_once(self, reasoner):
+        """测试相同的层级问题不会重复修正"""
+        with patch.object(reasoner, '_attempt_layer_correction', new_callable=AsyncMock, return_value=None) as mock_correct:
+            await reasoner._handle_layer_issues("services", ["组件设计存在问题"])
+            await reasoner._handle_layer_issues("services", ["组件设计存在问题"])
+        mock_correct.assert_called_once_with("services", ["组件设计存在问题"])
+
+    @pytest.mark.asyncio
+    async def test_module_corrections_batched(self, reasoner):
+        """测试同一层级多个模块的修正合并为一次 LLM 调用"""
+        scheduler = reasoner.correction_scheduler
+        for name in ["UserService", "OrderService"]:
+            scheduler.submit("module", name, {"naming": ["x"]}, payload={"name": name}, group="module:services")
+        response = {
+            "UserService": {"name": "UserService", "layer": "services"},
+            "OrderService": {"name": "OrderService", "layer": "services"},
+        }
+        with patch.object(reasoner, '_get_llm_response', new_callable=AsyncMock, return_value=response) as mock_llm, \
+             patch.object(reasoner.arch_manager, 'process_new_modules', new_callable=AsyncMock,
+                          return_value=[{"status": "success"}, {"status": "validation_failed"}]) as mock_process:
+            results = await reasoner._run_corrections()
+        mock_llm.assert_called_once()
+        assert mock_process.call_args.args[0] == [(response["UserService"], []), (response["OrderService"], [])]
+        assert results[0][1] == [True, False]
@@ -0,0 +1,98 @@
+from unittest.mock import patch
+
+from core.clarifier.cycle_analysis import (
+    analyze_dependency_cycles, elementary_cycles, format_cycles, shortest_cycle, strongly_connected_components
+)
+from core.clarifier.architecture_manager import ArchitectureManager
+from core.clarifier.architecture_reasoner import ArchitectureReasoner
+
+
+def graph_of(edges):
+    graph = {}
+    for source, targets in edges.items():
+        graph.setdefault(source, {"depends_on": set()})["depends_on"].update(targets)
+        for target in targets:
+            graph.setdefault(target, {"depends_on": set()})
+    return graph
+
+
+class TestStronglyConnectedComponents:
+    """迭代 Tarjan 单元测试"""
+
+    def test_components(self):
+        """测试分量划分及逆拓扑序"""
+        components = strongly_connected_components([[1], [2], [0, 3], [4], [3], []])
+        assert sorted(sorted(c) for c in components) == [[0, 1, 2], [3, 4], [5]]
+        ordered = [sorted(c) for c in components]
+        assert ordered.index([3, 4]) < ordered.index([0, 1, 2])
+
+    def test_deep_chain_without_recursion(self):
+        """测试超长依赖链不受递归深度限制"""
+        n = 50000
+        succ = [[i + 1] for i in range(n - 1)] + [[0]]
+        assert [len(c) for c in strongly_connected_components(succ)] == [n]
+
+
+class TestCycleEnumeration:
+    """最短环和 Johnson 枚举单元测试"""
+
+    def test_shortest_cycle(self):
+        """测试在分量内找到最短环"""
+        succ = [[1], [2], [3, 0], [0]]
+        assert shortest_cycle(succ, [0, 1, 2, 3]) == [0, 1, 2, 0]
+        assert shortest_cycle([[0]], [0]) == [0, 0]
+
+    def test_complete_graph_cycle_count(self):
+        """测试 4 个节点的完全有向图共有 20 个基本环"""
+        succ = [[j for j in range(4) if j != i] for i in range(4)]
+        cycles = elementary_cycles(succ, range(4), limit=100)
+        assert len(cycles) == 20
+        assert len({tuple(c) for c in cycles}) == 20
+        assert all(c[0] == c[-1] and len(set(c[:-1])) == len(c) - 1 for c in cycles)
+
+    def test_limit(self):
+        """测试枚举数量上限"""
+        succ = [[j for j in range(4) if j != i] for i in range(4)]
+        assert len(elementary_cycles(succ, range(4), limit=5)) == 5
+
+
+class TestAnalyzeDependencyCycles:
+    """analyze_dependency_cycles 单元测试"""
+
+    def test_every_cyclic_component_is_reported(self):
+        """测试每个含环分量都被报告，忽略图外依赖"""
+        graph = graph_of({
+            "A": ["B"], "B": ["C", "A"], "C": ["A"],
+            "D": ["E"], "E": ["D", "Missing"],
+            "F": ["F"], "G": ["A"]
+        })
+        del graph["Missing"]
+        components = analyze_dependency_cycles(graph)
+        assert [c["modules"] for c in components] == [["A", "B", "C"], ["D", "E"], ["F"]]
+        assert format_cycles(components) == ["A -> B -> A", "D -> E -> D", "F -> F"]
+
+    def test_bounded_enumeration(self):
+        """测试按分量枚举基本环并标记截断"""
+        graph = graph_of({"A": ["B", "C"], "B": ["A", "C"], "C": ["A"]})
+        full = analyze_dependency_cycles(graph, max_cycles_per_component=10)[0]
+        assert len(full["cycles"]) == 3
+        assert full["truncated"] is False
+
+        limited = analyze_dependency_cycles(graph, max_cycles_per_component=2)[0]
+        assert len(limited["cycles"]) == 2
+        assert limited["truncated"] is True
+        assert len(format_cycles([limited])) == 2
+
+
+class TestReasonerCycleCheck:
+    """ArchitectureReasoner 全局循环依赖检查"""
+
+    def test_check_global_circular_dependencies(self, tmp_path):
+        with patch('pathlib.Path.mkdir'):
+            manager = ArchitectureManager()
+        for name, deps in [("A", ["B"]), ("B", ["C"]), ("C", ["A"]), ("D", ["A"])]:
+            manager.index.add_module({"name": name, "dependencies": deps}, [])
+
+        reasoner = ArchitectureReasoner(architecture_manager=manager, output_path=tmp_path)
+        assert reasoner._check_global_circular_dependencies() == ["A -> B -> C -> A"]
+        assert reasoner.analyze_circular_dependencies()[0]["modules"] == ["A", "B", "C"]
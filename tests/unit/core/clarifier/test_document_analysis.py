@@ -0,0 +1,121 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from core.clarifier.document_analysis import (
+    DocumentAnalysisCache, map_documents, merge_analyses, merge_module_lists, read_text_files
+)
+from core.clarifier.document_processor import DocumentProcessor
+
+
+class TestMapDocuments:
+    """map_documents 单元测试"""
+
+    @pytest.mark.asyncio
+    async def test_bounded_and_cached(self, tmp_path):
+        """测试逐文档并发分析受限，新增文档只分析新文档"""
+        running = 0
+        peak = 0
+        analyzed = []
+
+        async def analyze(name, content):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            analyzed.append(name)
+            return {"doc": name}
+
+        documents = {f"doc{i}.md": f"内容 {i}" for i in range(9)}
+        results = await map_documents(documents, analyze, DocumentAnalysisCache(tmp_path), "requirements",
+                                      max_concurrency=3)
+        assert peak == 3
+        assert list(results) == list(documents)
+        assert sorted(analyzed) == sorted(documents)
+
+        analyzed.clear()
+        documents["doc9.md"] = "内容 9"
+        results = await map_documents(documents, analyze, DocumentAnalysisCache(tmp_path), "requirements")
+        assert analyzed == ["doc9.md"]
+        assert results["doc0.md"] == {"doc": "doc0.md"}
+
+        # 分析类型或参数不同时不复用
+        await map_documents({"doc0.md": "内容 0"}, analyze, DocumentAnalysisCache(tmp_path), "requirements", params="x")
+        assert analyzed == ["doc9.md", "doc0.md"]
+
+    @pytest.mark.asyncio
+    async def test_errors_not_cached(self):
+        cache = DocumentAnalysisCache()
+        analyze = AsyncMock(return_value={"error": "失败"})
+        for _ in range(2):
+            await map_documents({"a.md": "A"}, analyze, cache, "requirements",
+                                cacheable=lambda result: "error" not in result)
+        assert analyze.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_read_text_files(self, tmp_path):
+        (tmp_path / "a.md").write_text("A", encoding="utf-8")
+        results = await read_text_files([tmp_path / "a.md", tmp_path / "missing.md"])
+        assert results[0] == (tmp_path / "a.md", "A")
+        assert isinstance(results[1][1], Exception)
+
+
+class TestMerge:
+    """结构化合并单元测试"""
+
+    def test_merge_analyses(self):
+        """测试按名称合并功能和模式，字符串去重，出错的文档被忽略"""
+        merged = merge_analyses({
+            "a.md": {
+                "system_overview": {"core_purpose": "学习平台", "main_features": ["登录", "课程"]},
+                "functional_requirements": {"core_features": [{"name": "登录", "user_stories": ["用户登录"]}]},
+            },
+            "b.md": {
+                "system_overview": {"core_purpose": "", "main_features": ["课程", "考试"]},
+                "functional_requirements": {"core_features": [
+                    {"name": "登录", "user_stories": ["用户登录", "找回密码"]},
+                    {"name": "考试", "user_stories": []},
+                ]},
+            },
+            "c.md": {"error": "分析失败"},
+        })
+        assert merged["system_overview"] == {"core_purpose": "学习平台", "main_features": ["登录", "课程", "考试"]}
+        features = merged["functional_requirements"]["core_features"]
+        assert [f["name"] for f in features] == ["登录", "考试"]
+        assert features[0]["user_stories"] == ["用户登录", "找回密码"]
+        assert "error" not in merged
+
+    def test_merge_module_lists(self):
+        """测试同名模块合并并记录来源文档"""
+        modules = merge_module_lists({
+            "a.md": [{"module_name": "UserService", "responsibilities": ["管理用户"], "dependencies": ["UserRepository"]}],
+            "b.md": [
+                {"module_name": "userservice", "responsibilities": ["管理用户", "发送通知"], "dependencies": []},
+                {"module_name": "OrderService", "responsibilities": ["处理订单"]},
+            ],
+        })
+        assert [m["module_name"] for m in modules] == ["UserService", "OrderService"]
+        assert modules[0]["responsibilities"] == ["管理用户", "发送通知"]
+        assert modules[0]["dependencies"] == ["UserRepository"]
+        assert modules[0]["source_documents"] == ["a.md", "b.md"]
+        assert modules[1]["source_documents"] == ["b.md"]
+
+
+class TestDocumentProcessorAnalysis:
+    """DocumentProcessor.analyze_all_documents 逐文档分析"""
+
+    @pytest.mark.asyncio
+    async def test_one_call_per_document(self, tmp_path):
+        processor = DocumentProcessor(input_path=tmp_path / "input", cache_dir=tmp_path / "cache")
+        llm_call = AsyncMock(side_effect=lambda prompt: {
+            "architecture_design": {"patterns": [{"name": "分层架构", "layers": [{"name": "表现层" if "a.md" in prompt else "数据层"}]}]}
+        })
+        result = await processor.analyze_all_documents({"a.md": "A", "b.md": "B"}, llm_call)
+        assert llm_call.call_count == 2
+        assert all("=== 文档分隔符 ===" not in call.args[0] for call in llm_call.call_args_list)
+        layers = result["architecture_design"]["patterns"][0]["layers"]
+        assert [layer["name"] for layer in layers] == ["表现层", "数据层"]
+
+        await processor.analyze_all_documents({"a.md": "A", "b.md": "B", "c.md": "C"}, llm_call)
+        assert llm_call.call_count == 3
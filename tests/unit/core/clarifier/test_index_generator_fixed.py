@@ -2,7 +2,7 @@
 单元测试 - MultiDimensionalIndexGenerator
 """
 import unittest
-from unittest.mock import patch, MagicMock, mock_open, call
+from unittest.mock import patch, MagicMock
 import json
 import tempfile
 import shutil
@@ -287,10 +287,8 @@ class TestMultiDimensionalIndexGenerator(unittest.TestCase):
         self.assertIn("UIModule", self.generator.dimensions["cross_cutting_index"]["Security"])
         self.assertIn("ServiceModule", self.generator.dimensions["cross_cutting_index"]["Logging"])
 
-    @patch('json.dump')
-    @patch('builtins.open', new_callable=mock_open)
-    def test_save_indices(self, mock_file, mock_json_dump):
-        """测试保存索引"""
+    def test_save_indices(self):
+        """测试保存索引（不再写出重复的 all_indices.json）"""
         self.generator.dimensions = {
             "layer_index": {"presentation": ["UIModule"]},
             "domain_index": {"UI": ["UIModule"]},
@@ -301,17 +299,33 @@ class TestMultiDimensionalIndexGenerator(unittest.TestCase):
         
         self.generator._save_indices()
         
-        self.assertEqual(mock_file.call_count, 6)
-        self.assertEqual(mock_json_dump.call_count, 6)
+        indices_dir = self.output_dir / "indices"
+        for name, data in self.generator.dimensions.items():
+            with open(indices_dir / f"{name}.json", "r", encoding="utf-8") as f:
+                self.assertEqual(json.load(f), data)
+        self.assertFalse((indices_dir / "all_indices.json").exists())
+
+    def test_generate_indices_incremental(self):
+        """测试重新生成时只更新变化的模块和索引文件，并支持组合查询"""
+        for name, layer, domain in [("UIModule", "presentation", "UI"), ("ServiceModule", "business", "服务")]:
+            module_dir = self.modules_dir / name
+            module_dir.mkdir(parents=True, exist_ok=True)
+            with open(module_dir / "full_summary.json", "w", encoding="utf-8") as f:
+                json.dump({"module_name": name, "layer": layer, "domain": domain,
+                           "responsibilities": ["Logging记录"], "requirements": ["REQ-001"]}, f, ensure_ascii=False)
+        self.generator.generate_indices()
+        self.assertEqual(self.generator.query(layer="business", requirement="REQ-001", cross_cutting="Logging"),
+                         ["ServiceModule"])
         
         indices_dir = self.output_dir / "indices"
-        expected_calls = [
-            call(indices_dir / "layer_index.json", "w", encoding="utf-8"),
-            call(indices_dir / "domain_index.json", "w", encoding="utf-8"),
-            call(indices_dir / "responsibility_index.json", "w", encoding="utf-8"),
-            call(indices_dir / "requirement_module_index.json", "w", encoding="utf-8"),
-            call(indices_dir / "cross_cutting_index.json", "w", encoding="utf-8"),
-            call(indices_dir / "all_indices.json", "w", encoding="utf-8")
-        ]
+        layer_mtime = os.stat(indices_dir / "layer_index.json").st_mtime_ns
+        with open(self.modules_dir / "UIModule" / "full_summary.json", "w", encoding="utf-8") as f:
+            json.dump({"module_name": "UIModule", "layer": "presentation", "domain": "UI",
+                       "responsibilities": ["Logging记录"], "requirements": ["REQ-002"]}, f, ensure_ascii=False)
         
-        mock_file.assert_has_calls(expected_calls, any_order=True)
+        generator = MultiDimensionalIndexGenerator(modules_dir=self.modules_dir, output_dir=self.output_dir)
+        dimensions = generator.generate_indices()
+        self.assertEqual(dimensions["requirement_module_index"], {"REQ-001": ["ServiceModule"], "REQ-002": ["UIModule"]})
+        self.assertEqual(os.stat(indices_dir / "layer_index.json").st_mtime_ns, layer_mtime)
+        with open(indices_dir / "requirement_module_index.json", "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), dimensions["requirement_module_index"])
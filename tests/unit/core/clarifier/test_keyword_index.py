@@ -0,0 +1,106 @@
+import pytest
+from unittest.mock import patch
+
+from core.clarifier.keyword_index import KeywordIndex, tokenize
+from core.clarifier.architecture_manager import ArchitectureManager
+from core.clarifier.architecture_reasoner import ArchitectureReasoner
+
+
+class TestTokenize:
+    """tokenize 单元测试"""
+
+    def test_removes_stopwords(self):
+        """测试去除中英文停用词"""
+        assert tokenize("the user and the order") == ["user", "order"]
+        assert tokenize("用户的订单和支付") == ["用户", "订单", "支付"]
+
+    def test_splits_identifiers(self):
+        """测试按驼峰和下划线拆分标识符"""
+        assert tokenize("HTTPClient user_profile v2") == ["http", "client", "user", "profile", "v2"]
+
+    def test_cjk_bigrams(self):
+        """测试长汉字片段按二元组切分，保留重复以统计词频"""
+        assert tokenize("权限管理 权限") == ["权限", "限管", "管理", "权限"]
+
+
+class TestKeywordIndex:
+    """KeywordIndex 单元测试"""
+
+    @pytest.fixture
+    def index(self):
+        index = KeywordIndex()
+        index.add("AuthService", "负责用户认证和登录令牌")
+        index.add("UserService", "管理用户资料")
+        index.add("OrderService", "处理订单和支付")
+        index.add("PaymentGateway", "对接第三方支付渠道 支付回调")
+        return index
+
+    def test_query_ranks_by_tfidf(self, index):
+        """测试按 TF-IDF 排序，罕见关键字权重更高"""
+        results = index.query("用户认证")
+        assert [name for name, _, _ in results] == ["AuthService", "UserService"]
+        assert "认证" in results[0][2]
+
+    def test_query_top_k_and_predicate(self, index):
+        """测试 top_k 和过滤条件"""
+        assert [name for name, _, _ in index.query("支付", top_k=1)] == ["PaymentGateway"]
+        results = index.query("支付", predicate=lambda name: name != "PaymentGateway")
+        assert [name for name, _, _ in results] == ["OrderService"]
+        assert index.query("不存在的词") == []
+
+    def test_re_add_replaces_terms(self, index):
+        """测试重复添加模块时替换其关键字"""
+        index.add("UserService", "用户画像")
+        assert "资料" not in index.mapping
+        assert "UserService" in index.mapping["画像"]
+
+        index.remove("UserService")
+        assert "画像" not in index.mapping
+        assert "UserService" not in index.mapping["用户"]
+
+    def test_load_mapping(self, index):
+        """测试从关键字映射恢复后仍可查询"""
+        restored = KeywordIndex()
+        restored.load_mapping({k: sorted(v) for k, v in index.mapping.items()})
+        assert restored.mapping == index.mapping
+        assert restored.query("认证")[0][0] == "AuthService"
+
+
+class TestFindRelatedComponents:
+    """ArchitectureReasoner._find_related_components 按关键字查找的单元测试"""
+
+    @pytest.mark.asyncio
+    async def test_by_keyword_is_ranked_and_limited(self, tmp_path):
+        with patch('pathlib.Path.mkdir'):
+            manager = ArchitectureManager()
+        for i in range(30):
+            manager.index.add_module({
+                "name": f"Generic{i}",
+                "description": "the service for the system",
+                "pattern": "backend",
+                "layer": "services"
+            }, [])
+        manager.index.add_module({
+            "name": "SessionStore",
+            "description": "session cache for the system",
+            "pattern": "backend",
+            "layer": "repositories"
+        }, [])
+        manager.index.add_module({
+            "name": "LoginPage",
+            "description": "session login page",
+            "pattern": "frontend",
+            "layer": "pages"
+        }, [])
+
+        reasoner = ArchitectureReasoner(architecture_manager=manager, output_path=tmp_path)
+        related = await reasoner._find_related_components({
+            "name": "frontend",
+            "description": "session aware pages for the system"
+        })
+
+        by_keyword = related["by_keyword"]
+        assert len(by_keyword) == 10
+        assert by_keyword[0]["module"] == "SessionStore"
+        assert by_keyword[0]["keyword"] == "session"
+        assert all(item["pattern"] != "frontend" for item in by_keyword)
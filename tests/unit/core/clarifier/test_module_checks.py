@@ -0,0 +1,115 @@
+import pytest
+from unittest.mock import patch
+
+from core.clarifier.compact_graph import CompactDependencyGraph
+from core.clarifier.module_checks import ArchitectureIssue, ModuleIssueChecker
+from core.clarifier.architecture_manager import ArchitectureManager
+from core.clarifier.architecture_reasoner import ArchitectureReasoner
+
+
+@pytest.fixture
+def reasoner(tmp_path):
+    with patch('pathlib.Path.mkdir'):
+        manager = ArchitectureManager()
+    for name, layer, deps in [
+        ("UserRepository", "repositories", []),
+        ("UserService", "services", ["UserRepository"]),
+        ("User", "controllers", ["UserService"]),
+        ("OrderService", "services", ["User"]),
+    ]:
+        manager.index.add_module({"name": name, "pattern": "backend", "layer": layer, "dependencies": deps}, [])
+    return ArchitectureReasoner(architecture_manager=manager, output_path=tmp_path)
+
+
+class TestChangedSince:
+    """CompactDependencyGraph.changed_since 单元测试"""
+
+    def test_reports_modified_modules(self):
+        graph = CompactDependencyGraph({"A": {"depends_on": set()}, "B": {"depends_on": set()}})
+        _, stamp = graph.changed_since(0)
+
+        graph["C"] = {"depends_on": {"A"}}
+        graph["B"]["responsibilities"] = ["职责"]
+        changed, new_stamp = graph.changed_since(stamp)
+        assert sorted(changed) == ["A", "B", "C"]
+        assert graph.changed_since(new_stamp) == ([], new_stamp)
+
+        del graph["C"]
+        assert "C" in graph.changed_since(new_stamp)[0]
+
+
+class TestModuleIssues:
+    """check_module_issues 增量检查单元测试"""
+
+    @pytest.mark.asyncio
+    async def test_exact_module_matching(self, reasoner):
+        """测试按模块名精确匹配，不会匹配到名称包含它的其他模块"""
+        issues = await reasoner.check_module_issues("User")
+        violations = issues["layer_violations"]
+        assert all(isinstance(issue, ArchitectureIssue) for issue in violations)
+        assert [issue.modules for issue in violations] == [["OrderService", "User"]]
+        assert "User" in violations[0]
+        assert "UserService" not in violations[0]
+        assert str(violations[0]) == "模块 'OrderService' (services) 依赖了不允许的层级 'controllers' 中的模块 'User'"
+        assert str(violations[0]) in reasoner._check_layer_violations()
+
+    @pytest.mark.asyncio
+    async def test_cycles_through_module(self, reasoner):
+        """测试只报告经过该模块的环，无环时不做遍历"""
+        assert (await reasoner.check_module_issues("User"))["circular_dependencies"] == []
+
+        reasoner.arch_manager.index.add_module({
+            "name": "UserRepository", "pattern": "backend", "layer": "repositories", "dependencies": ["User"]
+        }, [])
+        cycles = (await reasoner.check_module_issues("User"))["circular_dependencies"]
+        assert [str(c) for c in cycles] == ["User -> UserService -> UserRepository -> User"]
+        assert (await reasoner.check_module_issues("OrderService"))["circular_dependencies"] == []
+
+    @pytest.mark.asyncio
+    async def test_naming_matches_global_check(self, reasoner):
+        """测试命名问题与全局检查的描述一致"""
+        reasoner.arch_manager.index.add_module({"name": "order_helper", "pattern": "backend", "layer": "services"}, [])
+        issues = (await reasoner.check_module_issues("order_helper"))["naming_inconsistencies"]
+        assert [str(issue) for issue in issues] == ["模块 'order_helper' 不符合帕斯卡命名法"]
+        assert str(issues[0]) in reasoner._check_naming_inconsistencies()
+
+    @pytest.mark.asyncio
+    async def test_responsibility_overlaps_follow_changes(self, reasoner):
+        """测试职责倒排表随模块修改增量更新"""
+        graph = reasoner.arch_manager.index.dependency_graph
+        graph["UserService"]["responsibilities"] = ["manage user accounts"]
+        graph["OrderService"]["responsibilities"] = ["Manage user accounts"]
+        graph["User"]["responsibilities"] = ["manage user accounts data"]
+
+        overlaps = (await reasoner.check_module_issues("UserService"))["responsibility_overlaps"]
+        assert [issue.kind for issue in overlaps] == ["duplicate_responsibility", "similar_responsibility"]
+        assert overlaps[0].modules == ["UserService", "OrderService"]
+        assert overlaps[1].modules == ["OrderService", "User", "UserService"]
+
+        graph["OrderService"]["responsibilities"] = ["process orders"]
+        graph["User"]["responsibilities"] = ["route requests"]
+        assert (await reasoner.check_module_issues("UserService"))["responsibility_overlaps"] == []
+
+    def test_checker_only_visits_changed_modules(self, reasoner):
+        """测试同步时只处理修改过的模块"""
+        checker = ModuleIssueChecker(reasoner.arch_manager.index)
+        checker.sync()
+        reasoner.arch_manager.index.add_module({"name": "Audit", "pattern": "backend", "layer": "services"}, [])
+        with patch.object(checker, '_update_module', wraps=checker._update_module) as mock_update:
+            checker.check("Audit")
+        assert [call.args[0] for call in mock_update.call_args_list] == ["Audit"]
+
+    @pytest.mark.asyncio
+    async def test_missing_dependencies_match_global_check(self, reasoner):
+        """测试依赖了不存在的模块时与全局一致性检查的描述一致"""
+        reasoner.arch_manager.index.add_module({
+            "name": "Audit", "pattern": "backend", "layer": "services", "dependencies": ["Ghost"]
+        }, [])
+        issues = (await reasoner.check_module_issues("Audit"))["consistency_issues"]
+        assert [issue.kind for issue in issues] == ["missing_dependency"]
+        assert str(issues[0]) in reasoner._check_issues("consistency_issues")
+
+    @pytest.mark.asyncio
+    async def test_missing_module(self, reasoner):
+        issues = await reasoner.check_module_issues("Missing")
+        assert all(value == [] for value in issues.values())
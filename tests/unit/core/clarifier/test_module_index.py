@@ -0,0 +1,143 @@
+import random
+import tracemalloc
+
+import pytest
+
+from core.clarifier.module_index import ModuleIndex, module_facets
+
+
+def _modules():
+    return {
+        "UserService": {"layer": "services", "domain": ["user", "auth"], "requirements": ["REQ-1"],
+                        "responsibilities": ["管理用户", "Logging 操作日志"]},
+        "UserRepository": {"layer": "repositories", "domain": "user", "requirements": [{"id": "REQ-1"}],
+                           "dependencies": ["CachingClient"]},
+        "OrderService": {"layer": "services", "domain": "order", "requirements": ["REQ-2"],
+                         "cross_cutting_concerns": ["Logging"]},
+    }
+
+
+class TestModuleFacets:
+    """module_facets 单元测试"""
+
+    def test_values_normalized(self):
+        facets = module_facets({"domain": [{"name": "user"}, "user"], "requirements": "REQ-1",
+                                "responsibilities": ["Security 校验"], "dependencies": ["AuthenticationService"]})
+        assert facets["layer"] == ["Unknown"]
+        assert facets["domain"] == ["user"]
+        assert facets["requirement"] == ["REQ-1"]
+        assert facets["cross_cutting"] == ["Security", "Authentication"]
+
+
+class TestModuleIndex:
+    """ModuleIndex 单元测试"""
+
+    def test_compound_queries_and_facets(self):
+        index = ModuleIndex()
+        assert index.sync(_modules()) == {"added": 3, "updated": 0, "removed": 0}
+
+        assert index.query(layer="services") == ["UserService", "OrderService"]
+        assert index.query(layer="services", domain="user", requirement="REQ-1") == ["UserService"]
+        assert index.query(domain=["user", "order"], cross_cutting="Logging") == ["UserService", "OrderService"]
+        assert index.query(cross_cutting="Caching") == ["UserRepository"]
+        assert index.query(layer="services", domain="payment") == []
+        assert index.count(requirement="REQ-1") == 2
+        assert index.facets("layer", domain="user") == {"services": 1, "repositories": 1}
+        with pytest.raises(ValueError):
+            index.query(colour="red")
+
+    def test_incremental_update_and_remove(self):
+        index = ModuleIndex()
+        index.sync(_modules())
+        index.changed_dimensions = set()
+
+        assert not index.upsert("UserService", _modules()["UserService"])
+        assert index.changed_dimensions == set()
+
+        index.upsert("UserService", {**_modules()["UserService"], "requirements": ["REQ-2"]})
+        assert index.changed_dimensions == {"requirement"}
+        assert index.query(requirement="REQ-1") == ["UserRepository"]
+        assert index.export("requirement") == {"REQ-1": ["UserRepository"], "REQ-2": ["UserService", "OrderService"]}
+
+        assert index.sync({"UserService": _modules()["UserService"]}) == {"added": 0, "updated": 1, "removed": 2}
+        assert index.values("layer") == ["services"]
+        # 删除后空出的槽位被复用
+        index.upsert("PaymentService", {"layer": "services"})
+        assert index.slots == ["UserService", "PaymentService", None]
+        assert len(index) == 2
+
+    def test_mixed_filters_match_brute_force(self):
+        """测试位图维度与集合维度混合查询、分面统计与逐个模块比对的结果一致"""
+        rng = random.Random(7)
+        modules = {
+            f"Module{i}": {"layer": rng.choice(["services", "api", "models"]),
+                           "domain": rng.sample(["user", "order", "payment"], rng.randint(1, 2)),
+                           "requirements": [f"REQ-{rng.randrange(40)}" for _ in range(rng.randint(0, 3))],
+                           "responsibilities": [f"职责{rng.randrange(60)}"]}
+            for i in range(300)
+        }
+        index = ModuleIndex()
+        index.sync(modules)
+        for key in rng.sample(sorted(modules), 50):
+            index.remove(key)
+            del modules[key]
+        facets = {key: module_facets(module) for key, module in modules.items()}
+
+        for filters in ({"layer": "api"}, {"requirement": "REQ-3"}, {"requirement": ["REQ-1", "REQ-2"], "layer": "services"},
+                        {"domain": "user", "responsibility": ["职责1", "职责2", "职责3"]}, {}):
+            expected = [key for key in index.slots if key in facets and all(
+                set([wanted] if isinstance(wanted, str) else wanted) & set(facets[key][dimension])
+                for dimension, wanted in filters.items())]
+            assert index.query(**filters) == expected
+            assert index.count(**filters) == len(expected)
+            for dimension in ("layer", "requirement"):
+                counts = {}
+                for key in expected:
+                    for value in facets[key][dimension]:
+                        counts[value] = counts.get(value, 0) + 1
+                assert index.facets(dimension, **filters) == counts
+
+    def test_memory_grows_linearly(self):
+        """测试需求、职责几乎各不相同时，每个模块占用的内存不随模块总数增长"""
+        def bytes_per_module(size):
+            modules = {f"Module{i}": {"layer": "services", "requirements": [f"REQ-{i}-{j}" for j in range(4)],
+                                      "responsibilities": [f"职责 {i}"]} for i in range(size)}
+            tracemalloc.start()
+            index = ModuleIndex()
+            index.sync(modules)
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            return memory / size
+
+        assert bytes_per_module(4000) < bytes_per_module(1000) * 1.2
+
+    def test_incremental_persistence(self, tmp_path):
+        path = tmp_path / "module_index.json"
+        index = ModuleIndex(path, compact_threshold=4)
+        index.sync(_modules())
+        index.save()
+        assert path.exists() and not index.log_path.exists()
+
+        index.remove("UserRepository")
+        index.upsert("OrderService", {**_modules()["OrderService"], "layer": "api"})
+        index.save()
+        assert len(index.log_path.read_text(encoding="utf-8").splitlines()) == 2
+
+        restored = ModuleIndex(path, compact_threshold=4)
+        assert restored.slots == index.slots
+        assert restored.query(layer="api") == ["OrderService"]
+        assert restored.export("domain") == index.export("domain")
+
+        # 不完整的最后一条日志被跳过；日志超过阈值时合并进快照
+        with open(index.log_path, "a", encoding="utf-8") as f:
+            f.write('{"op": "remove", "key": "Use')
+        restored = ModuleIndex(path, compact_threshold=4)
+        assert "UserService" in restored
+        restored.upsert("A", {"layer": "services"})
+        restored.save()
+        assert ModuleIndex(path).query(layer="services") == ["UserService", "A"]
+        for name in ("B", "C"):
+            restored.upsert(name, {"layer": "services"})
+        restored.save()
+        assert not restored.log_path.exists()
+        assert ModuleIndex(path).query(layer="services") == ["UserService", "A", "B", "C"]
@@ -0,0 +1,158 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from core.clarifier.module_pipeline import ModulePipeline
+from core.clarifier.architecture_manager import ArchitectureManager
+from core.clarifier.architecture_reasoner import ArchitectureReasoner
+
+
+class Recorder:
+    """记录生成阶段的并发数和应用阶段的批次"""
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.running = 0
+        self.peak = 0
+        self.batches = []
+        self.applying = False
+
+    async def generate(self, item):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delays.get(item["name"], 0.01))
+        finally:
+            self.running -= 1
+        if item.get("fail"):
+            raise RuntimeError(f"{item['name']} failed")
+        return {"name": item["name"]}
+
+    async def apply(self, specs):
+        assert not self.applying, "应用阶段不应并发执行"
+        self.applying = True
+        await asyncio.sleep(0)
+        self.applying = False
+        self.batches.append([spec["name"] for spec in specs])
+        return [{"status": "success", "module": spec} for spec in specs]
+
+
+class TestModulePipeline:
+    """ModulePipeline 单元测试"""
+
+    @pytest.mark.asyncio
+    async def test_bounded_generation_and_ordered_apply(self):
+        """测试生成阶段并发受限，应用阶段按输入顺序单写者执行"""
+        recorder = Recorder(delays={"M0": 0.05})
+        items = [{"name": f"M{i}"} for i in range(8)]
+        results = await ModulePipeline(recorder.generate, recorder.apply, max_concurrency=3).run(items)
+        assert recorder.peak == 3
+        assert [r["module"]["name"] for r in results] == [f"M{i}" for i in range(8)]
+        assert [name for batch in recorder.batches for name in batch] == [f"M{i}" for i in range(8)]
+
+    @pytest.mark.asyncio
+    async def test_generation_errors(self):
+        """测试生成出错的模块不影响其他模块"""
+        recorder = Recorder()
+        items = [{"name": "A"}, {"name": "B", "fail": True}, {"name": "C"}]
+        results = await ModulePipeline(recorder.generate, recorder.apply).run(items)
+        assert [r["status"] for r in results] == ["success", "error", "success"]
+        assert results[1]["message"] == "B failed"
+
+    @pytest.mark.asyncio
+    async def test_cancel_module(self):
+        """测试取消生成中和尚未开始的模块"""
+        recorder = Recorder(delays={"Slow": 1})
+        items = [{"name": "Slow"}, {"name": "Fast"}, {"name": "Later"}]
+        pipeline = ModulePipeline(recorder.generate, recorder.apply, max_concurrency=1)
+        run = asyncio.ensure_future(pipeline.run(items))
+        await asyncio.sleep(0.01)
+        assert pipeline.cancel("Slow")
+        assert pipeline.cancel("Later")
+        assert not pipeline.cancel("Unknown")
+        results = await asyncio.wait_for(run, 0.5)
+        assert [r["status"] for r in results] == ["cancelled", "success", "cancelled"]
+        assert recorder.batches == [["Fast"]]
+
+
+class TestProcessLayerModules:
+    """ArchitectureReasoner._process_layer_modules 单元测试"""
+
+    @pytest.fixture
+    def reasoner(self, tmp_path):
+        with patch('pathlib.Path.mkdir'):
+            manager = ArchitectureManager()
+        return ArchitectureReasoner(architecture_manager=manager, output_path=tmp_path)
+
+    @pytest.mark.asyncio
+    async def test_bounded_spec_generation(self, reasoner):
+        """测试模块规范生成受并发上限约束，验证失败的模块使用生成的规范处理"""
+        recorder = Recorder()
+        reasoner.module_concurrency = 2
+        reasoner.module_pack_size = 1
+        components = [{"name": f"Module{i}"} for i in range(5)]
+
+        async def generate(module, layer_info):
+            return await recorder.generate(module)
+
+        async def process(batch):
+            return [
+                {"status": "validation_failed", "issues": {"x": ["y"]}} if spec["name"] == "Module3"
+                else {"status": "success", "module": spec}
+                for spec, _ in batch
+            ]
+
+        with patch.object(reasoner, '_generate_module_spec', side_effect=generate), \
+             patch.object(reasoner.arch_manager, 'process_new_modules', side_effect=process), \
+             patch.object(reasoner, '_handle_validation_issues', new_callable=AsyncMock) as mock_handle:
+            results = await reasoner._process_layer_modules("services", {"components": components})
+        assert recorder.peak == 2
+        assert [r["status"] for r in results].count("success") == 4
+        mock_handle.assert_called_once_with({"x": ["y"]}, {"name": "Module3"})
+
+    @pytest.mark.asyncio
+    async def test_packed_spec_generation(self, reasoner):
+        """测试多个模块规范打包生成，层级信息每次请求只出现一次，缺失的模块逐个生成"""
+        reasoner.module_pack_size = 3
+        components = [{"name": f"Module{i}"} for i in range(5)]
+        prompts = []
+
+        async def respond(prompt):
+            prompts.append(prompt)
+            return {name: {"name": name, "layer": "services"} for name in ["Module0", "Module1", "Module3", "Module4"]
+                    if f'"{name}"' in prompt}
+
+        async def process(batch):
+            return [{"status": "success", "module": spec} for spec, _ in batch]
+
+        with patch.object(reasoner, '_get_llm_response', side_effect=respond), \
+             patch.object(reasoner, '_generate_module_spec', new_callable=AsyncMock,
+                          return_value={"name": "Module2", "layer": "services"}) as mock_single, \
+             patch.object(reasoner.arch_manager, 'process_new_modules', side_effect=process):
+            results = await reasoner._process_layer_modules("services", {"name": "services", "components": components})
+        assert len(prompts) == 2
+        assert all(prompt.count("层级信息") == 1 for prompt in prompts)
+        mock_single.assert_called_once_with({"name": "Module2"}, {"name": "services", "components": components})
+        assert [r["module"]["name"] for r in results] == [f"Module{i}" for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_manager_writes_are_serialized(self, reasoner, monkeypatch):
+        """测试并发调用 process_new_module 时写入串行执行"""
+        manager = reasoner.arch_manager
+        active = []
+
+        async def validate(module_spec, requirements):
+            active.append(module_spec["name"])
+            assert len(active) == 1
+            await asyncio.sleep(0.01)
+            active.remove(module_spec["name"])
+            return {}
+
+        monkeypatch.setattr(manager.validator, 'validate_new_module', validate)
+        monkeypatch.setattr(manager, '_write_module_summary', lambda *args: None)
+        monkeypatch.setattr(manager, '_save_architecture_state', AsyncMock())
+        results = await asyncio.gather(*(
+            manager.process_new_module({"name": f"Module{i}", "layer": "services"}, []) for i in range(3)
+        ))
+        assert [r["status"] for r in results] == ["success"] * 3
+        assert len(manager.index.dependency_graph) == 3
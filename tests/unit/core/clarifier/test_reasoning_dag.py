@@ -0,0 +1,125 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from core.clarifier.reasoning_dag import ReasoningDAG
+from core.clarifier.architecture_manager import ArchitectureManager
+from core.clarifier.architecture_reasoner import ArchitectureReasoner
+
+
+class ConcurrencyProbe:
+    """记录同时运行的步骤数"""
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+
+    async def step(self, value, delay=0.01):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(delay)
+        self.running -= 1
+        return value
+
+
+class TestReasoningDAG:
+    """ReasoningDAG 单元测试"""
+
+    @pytest.mark.asyncio
+    async def test_results_flow_to_dependants(self):
+        """测试依赖步骤的结果按顺序传给下游步骤"""
+        dag = ReasoningDAG()
+        a = dag.add("a", AsyncMock(return_value=1))
+        b = dag.add("b", AsyncMock(return_value=2))
+
+        async def join(x, y):
+            return x * 10 + y
+
+        dag.add("join", join, [b, a])
+        assert await dag.run() == {"a": 1, "b": 2, "join": 21}
+
+    @pytest.mark.asyncio
+    async def test_bounded_concurrency(self):
+        """测试独立步骤并发执行且不超过并发上限"""
+        probe = ConcurrencyProbe()
+        dag = ReasoningDAG()
+        for i in range(6):
+            dag.add(f"step{i}", lambda i=i: probe.step(i))
+        await dag.run(max_concurrency=3)
+        assert probe.peak == 3
+
+        probe = ConcurrencyProbe()
+        dag = ReasoningDAG()
+        for i in range(6):
+            dag.add(f"step{i}", lambda i=i: probe.step(i))
+        await dag.run()
+        assert probe.peak == 6
+
+    def test_unknown_dependency(self):
+        dag = ReasoningDAG()
+        with pytest.raises(ValueError):
+            dag.add("a", AsyncMock(), ["missing"])
+        dag.add("a", AsyncMock())
+        with pytest.raises(ValueError):
+            dag.add("a", AsyncMock())
+
+    @pytest.mark.asyncio
+    async def test_failure_cancels_remaining_steps(self):
+        """测试步骤出错时抛出异常并取消其余步骤"""
+        finished = []
+
+        async def slow():
+            await asyncio.sleep(1)
+            finished.append("slow")
+
+        dag = ReasoningDAG()
+        dag.add("fail", AsyncMock(side_effect=RuntimeError("boom")))
+        dag.add("slow", slow)
+        dag.add("after", AsyncMock(), ["fail"])
+        with pytest.raises(RuntimeError):
+            await dag.run()
+        assert finished == []
+
+
+class TestDeepReasoningDAG:
+    """ArchitectureReasoner 深度推理并发执行"""
+
+    @pytest.fixture
+    def reasoner(self, tmp_path):
+        with patch('pathlib.Path.mkdir'):
+            manager = ArchitectureManager()
+        return ArchitectureReasoner(architecture_manager=manager, output_path=tmp_path)
+
+    @pytest.mark.asyncio
+    async def test_pattern_docs_generated_concurrently(self, reasoner):
+        """测试所有模式的文档并发生成，各模式的推理按顺序执行"""
+        probe = ConcurrencyProbe()
+        reasoned = []
+
+        async def reason(pattern, docs):
+            assert set(docs) == {"overview", "layers", "interfaces", "dependencies"}
+            reasoned.append(pattern["name"])
+
+        patterns = [
+            {"name": name, "layers": [], "interfaces": [], "dependencies": {}}
+            for name in ["frontend", "backend", "shared"]
+        ]
+        with patch.object(reasoner, 'populate_architecture_index', new_callable=AsyncMock), \
+             patch.object(reasoner, '_reason_by_pattern', side_effect=reason), \
+             patch.object(reasoner, '_validate_overall_architecture', new_callable=AsyncMock), \
+             patch.object(reasoner, '_save_final_architecture', new_callable=AsyncMock, return_value={}):
+            await reasoner.start_deep_reasoning(
+                {"architecture_design": {"patterns": patterns}},
+                get_llm_response=lambda prompt: probe.step({})
+            )
+        assert probe.peak == reasoner.reasoning_concurrency
+        assert reasoned == ["frontend", "backend", "shared"]
+
+    @pytest.mark.asyncio
+    async def test_architecture_docs_generated_concurrently(self, reasoner):
+        """测试四份架构文档并发生成"""
+        probe = ConcurrencyProbe()
+        reasoner._get_llm_response = lambda prompt: probe.step("# doc")
+        await reasoner._generate_architecture_docs()
+        assert probe.peak == 4
+        assert (reasoner.output_path / "04_deployment.md").read_text() == "# doc"
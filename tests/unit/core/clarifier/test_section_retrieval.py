@@ -0,0 +1,41 @@
+from core.clarifier.clarification_manifest import split_sections
+from core.clarifier.section_retrieval import SectionRetriever
+
+
+DOCUMENT = """# 技术架构
+## 认证
+### 登录流程
+用户通过 JWT 令牌登录，Authentication 服务校验密码。
+### 权限
+基于角色的访问控制。
+## 仪表盘
+Dashboard 展示学习进度统计图表。
+## 性能
+Performance: 缓存热点数据，页面加载小于两秒。
+"""
+
+
+class TestSectionRetriever:
+    """SectionRetriever 单元测试"""
+
+    def test_split_deeper_headings(self):
+        sections = split_sections("arch.md", DOCUMENT, max_level=3)
+        assert [s["title"] for s in sections] == [
+            "技术架构/认证/登录流程", "技术架构/认证/权限", "技术架构/仪表盘", "技术架构/性能"
+        ]
+
+    def test_retrieve_relevant_sections(self):
+        """测试只返回相关章节，并按文档顺序拼接"""
+        retriever = SectionRetriever(DOCUMENT, "arch.md")
+        context = retriever.retrieve("Authentication 登录 Services")
+        assert "JWT" in context
+        assert "Dashboard" not in context
+
+        context = retriever.retrieve("Performance Dashboard", max_chars=10000)
+        assert context.index("Dashboard") < context.index("Performance")
+
+    def test_budget_and_fallback(self):
+        """测试总长度上限，以及没有命中时退回到文档开头"""
+        retriever = SectionRetriever(DOCUMENT, "arch.md")
+        assert len(retriever.retrieve("Dashboard Performance 登录", max_chars=60)) <= 60
+        assert retriever.retrieve("完全无关的查询词 xyzzy", max_chars=60).startswith("# 技术架构")
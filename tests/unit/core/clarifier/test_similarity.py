@@ -0,0 +1,70 @@
+import random
+import pytest
+from unittest.mock import patch
+
+from core.clarifier.similarity import overlap_similarity, similar_pairs
+from core.clarifier.architecture_manager import ArchitectureManager
+from core.clarifier.architecture_reasoner import ArchitectureReasoner
+
+
+def brute_force_pairs(word_sets, threshold):
+    return [
+        (i, j)
+        for i in range(len(word_sets))
+        for j in range(i + 1, len(word_sets))
+        if overlap_similarity(word_sets[i], word_sets[j]) > threshold
+    ]
+
+
+class TestSimilarPairs:
+    """similar_pairs 单元测试"""
+
+    def test_basic(self):
+        """测试重叠系数超过阈值的职责对"""
+        word_sets = [set("manage user accounts".split()), set("manage user".split()),
+                     set("process orders".split()), set()]
+        assert similar_pairs(word_sets, 0.7) == [(0, 1)]
+        assert similar_pairs(word_sets, 1.0) == []
+
+    @pytest.mark.parametrize("threshold", [0.0, 0.3, 0.5, 0.7, 0.9])
+    def test_matches_pairwise_comparison(self, threshold):
+        """测试随机数据上与两两比较结果一致"""
+        rng = random.Random(42)
+        vocabulary = [f"w{i}" for i in range(30)]
+        word_sets = [set(rng.sample(vocabulary, rng.randint(0, 6))) for _ in range(300)]
+        assert similar_pairs(word_sets, threshold) == brute_force_pairs(word_sets, threshold)
+
+
+class TestResponsibilityOverlaps:
+    """ArchitectureReasoner._check_responsibility_overlaps 单元测试"""
+
+    @pytest.fixture
+    def reasoner(self, tmp_path):
+        with patch('pathlib.Path.mkdir'):
+            manager = ArchitectureManager()
+        graph = manager.index.dependency_graph
+        for name, responsibilities in [
+            ("UserService", ["Manage user accounts", "Send email"]),
+            ("AccountService", ["manage user accounts"]),
+            ("ProfileService", ["manage user profile"]),
+            ("NotifyService", ["send email notifications"]),
+            ("OrderService", ["process orders"]),
+        ]:
+            graph[name] = {"depends_on": set(), "pattern": "backend", "layer": "services"}
+            graph[name]["responsibilities"] = responsibilities
+        return ArchitectureReasoner(architecture_manager=manager, output_path=tmp_path)
+
+    def test_duplicates_and_similar(self, reasoner):
+        """测试重复职责和高度相似职责"""
+        issues = reasoner._check_responsibility_overlaps()
+        assert issues[0] == "职责 'manage user accounts' 在多个模块中重复: UserService, AccountService"
+        assert len(issues) == 2
+        assert "'send email' 和 'send email notifications' 高度相似" in issues[1]
+
+    def test_configurable_threshold(self, reasoner):
+        """测试阈值可配置"""
+        assert len(reasoner._check_responsibility_overlaps(threshold=1.0)) == 1
+        reasoner.responsibility_similarity_threshold = 0.6
+        issues = reasoner._check_responsibility_overlaps()
+        assert len(issues) == 3
+        assert "'manage user accounts' 和 'manage user profile' 高度相似" in issues[1]
@@ -0,0 +1,31 @@
+import json
+from unittest.mock import patch
+
+from core.clarifier.state_journal import StateJournal
+
+
+class TestStateJournal:
+    """StateJournal 单元测试"""
+
+    def test_records_serialized_when_submitted(self, tmp_path):
+        """测试提交后再修改模块字典不影响已提交的记录和快照"""
+        journal = StateJournal(tmp_path / "architecture_snapshot", tmp_path / "architecture_journal.jsonl")
+        module = {"name": "UserService", "dependencies": []}
+        state = {"modules": [module]}
+
+        # 写盘线程暂不启动，提交后先修改，再手动写出队列中的内容
+        with patch.object(journal, '_ensure_writer'):
+            journal.write_snapshot(state)
+            module["dependencies"].append("UserRepository")
+            journal.append({"op": "add_module", "module": module})
+            module["layer"] = "services"
+        journal._write_batch([journal._queue.get_nowait() for _ in range(journal._queue.qsize())])
+
+        snapshot, records = StateJournal(tmp_path / "architecture_snapshot",
+                                         tmp_path / "architecture_journal.jsonl").load()
+        assert snapshot["modules"] == [{"name": "UserService", "dependencies": []}]
+        assert [record["module"] for record in records] == [
+            {"name": "UserService", "dependencies": ["UserRepository"]}
+        ]
+        line = (tmp_path / "architecture_journal.jsonl").read_text(encoding="utf-8")
+        assert json.loads(line)["seq"] == 1
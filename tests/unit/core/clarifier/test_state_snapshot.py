@@ -0,0 +1,123 @@
+import json
+import os
+import pytest
+from unittest.mock import patch, AsyncMock
+
+from core.clarifier import state_snapshot
+from core.clarifier.state_snapshot import (
+    build_architecture_state, core_sections, export_state_json, read_state, write_state
+)
+from core.clarifier.architecture_manager import ArchitectureManager
+from core.clarifier.architecture_reasoner import ArchitectureReasoner
+
+
+@pytest.fixture
+def manager(tmp_path):
+    with patch('pathlib.Path.mkdir'):
+        manager = ArchitectureManager()
+    manager.output_path = tmp_path
+    manager.index.add_module({
+        "name": "UserService", "responsibilities": ["用户管理"], "dependencies": ["UserRepository"],
+        "pattern": "backend", "layer": "services"
+    }, ["需求1"])
+    manager.index.add_module({
+        "name": "UserRepository", "responsibilities": ["用户数据访问"], "dependencies": [],
+        "pattern": "backend", "layer": "repositories"
+    }, ["需求1"])
+    return manager
+
+
+class TestBuildArchitectureState:
+    """build_architecture_state 单元测试"""
+
+    def test_sorted_and_sections(self, manager):
+        """测试集合排序输出，核心部分不含恢复用数据"""
+        state = build_architecture_state(manager.index, [{"name": "UserService"}])
+        assert state["requirement_module_index"]["需求1"] == ["UserRepository", "UserService"]
+        assert state["dependency_graph"]["UserRepository"]["depended_by"] == ["UserService"]
+        assert state["modules"] == [{"name": "UserService"}]
+        assert "keyword_mapping" in state
+
+        core = core_sections(state)
+        assert set(core) == set(state_snapshot.CORE_SECTIONS)
+        assert core["dependency_graph"] is state["dependency_graph"]
+
+        assert "keyword_mapping" not in build_architecture_state(manager.index, include_keywords=False)
+
+
+class TestSerialization:
+    """快照读写单元测试"""
+
+    def test_json_fallback_without_msgpack(self, tmp_path, monkeypatch):
+        """测试未安装 msgpack 时写出紧凑 JSON"""
+        monkeypatch.setattr(state_snapshot, "_load_msgpack", lambda: None)
+        path = write_state({"a": [1, 2], "journal_seq": 0}, tmp_path / "state")
+        assert path.name == "state.json"
+        assert path.read_text(encoding="utf-8") == '{"a":[1,2],"journal_seq":0,"snapshot_version":1}'
+        assert read_state(tmp_path / "state") == {"a": [1, 2], "journal_seq": 0, "snapshot_version": 1}
+
+    def test_msgpack_roundtrip(self, tmp_path):
+        """测试 msgpack（可选 zstd 压缩）往返"""
+        pytest.importorskip("msgpack")
+        state = {"名称": ["模块1"], "journal_seq": 3}
+        path = write_state(state, tmp_path / "state")
+        assert path.name.startswith("state.msgpack")
+        assert read_state(tmp_path / "state") == {**state, "snapshot_version": 1}
+
+        path = write_state(state, tmp_path / "plain", compress=False)
+        assert path.name == "plain.msgpack"
+        assert read_state(tmp_path / "plain") == {**state, "snapshot_version": 1}
+
+    def test_reads_newest_and_skips_undecodable(self, tmp_path, monkeypatch):
+        """测试读取最新的快照，无法解码的文件被跳过"""
+        monkeypatch.setattr(state_snapshot, "_load_msgpack", lambda: None)
+        write_state({"v": 1, "journal_seq": 2}, tmp_path / "state")
+        (tmp_path / "state.msgpack").write_bytes(b"\xc1")
+        os.utime(tmp_path / "state.json", ns=(1, 1))
+        assert read_state(tmp_path / "state")["v"] == 1
+        assert read_state(tmp_path / "missing") is None
+
+    def test_skips_files_that_are_not_snapshots(self, tmp_path, monkeypatch):
+        """测试缺少快照版本或 journal_seq 的文件（包括 JSON 导出）不被当作快照"""
+        monkeypatch.setattr(state_snapshot, "_load_msgpack", lambda: None)
+        write_state({"v": 1, "journal_seq": 2}, tmp_path / "state")
+        snapshot = read_state(tmp_path / "state")
+        assert snapshot["v"] == 1
+
+        (tmp_path / "state.json").write_text(json.dumps({"v": 1, "snapshot_version": 1}), encoding="utf-8")
+        assert read_state(tmp_path / "state") is None
+
+        export_state_json(snapshot, tmp_path / "state.json")
+        assert read_state(tmp_path / "state") is None
+
+    def test_export_json_is_indented(self, tmp_path):
+        """测试按需导出带缩进的 JSON"""
+        path = export_state_json({"a": 1}, tmp_path / "out.json")
+        assert path.read_text(encoding="utf-8") == '{\n  "a": 1\n}'
+
+
+class TestSnapshotReuse:
+    """状态文件、架构文档和推理结果共用一份快照"""
+
+    @pytest.mark.asyncio
+    async def test_export_architecture_state_json(self, manager):
+        """测试管理器按需导出 JSON"""
+        path = manager.export_architecture_state_json()
+        state = json.loads(path.read_text(encoding="utf-8"))
+        assert path.name == "architecture_snapshot_export.json"
+        assert state["journal_seq"] == 0
+        assert "snapshot_version" not in state
+        assert "UserService" in state["dependency_graph"]
+
+    @pytest.mark.asyncio
+    async def test_final_architecture_built_once(self, manager, tmp_path):
+        """测试最终保存只构建一次快照，并原样传给文档生成"""
+        reasoner = ArchitectureReasoner(architecture_manager=manager, output_path=tmp_path)
+        with patch('core.clarifier.architecture_manager.build_architecture_state',
+                   wraps=build_architecture_state) as mock_build, \
+             patch.object(reasoner, '_generate_architecture_docs', new_callable=AsyncMock) as mock_docs:
+            state = await reasoner._save_final_architecture()
+
+        mock_build.assert_called_once()
+        mock_docs.assert_awaited_once_with(state)
+        assert read_state(tmp_path / "architecture_snapshot")["dependency_graph"] == state["dependency_graph"]
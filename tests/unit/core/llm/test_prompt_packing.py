@@ -0,0 +1,64 @@
+import json
+import pytest
+
+from core.llm.prompt_packing import PromptPacker, match_keyed_response, pack_groups
+
+
+def keys_in(prompt):
+    return list(json.loads(prompt))
+
+
+class TestPackGroups:
+    """pack_groups 单元测试"""
+
+    def test_budget_size_and_partition(self):
+        tasks = {f"m{i}": "x" * 40 for i in range(7)}
+        assert [len(group) for group in pack_groups(tasks, token_budget=100, output_tokens=20)] == [3, 3, 1]
+        assert [len(group) for group in pack_groups(tasks, token_budget=10_000, max_group_size=4)] == [4, 3]
+        groups = pack_groups({"a-1": "", "b-1": "", "a-2": ""}, partition=lambda key: key.split("-")[1])
+        assert groups == [["a-1", "b-1"], ["a-2"]]
+
+    def test_match_keyed_response(self):
+        assert match_keyed_response({" UserService ": 1, "x": 2}, ["UserService", "Other"]) == {"UserService": 1}
+        assert match_keyed_response("not json", ["UserService"]) == {}
+
+
+class TestPromptPacker:
+    """PromptPacker 单元测试"""
+
+    @pytest.mark.asyncio
+    async def test_one_call_per_group(self):
+        """测试每组一次请求，共享上下文每组只出现一次"""
+        prompts = []
+
+        async def call(prompt):
+            prompts.append(prompt)
+            return {key: {"name": key} for key in keys_in(prompt)}
+
+        packer = PromptPacker({f"m{i}": {} for i in range(5)}, json.dumps, call, max_group_size=2)
+        results = await packer.run()
+        assert list(results) == [f"m{i}" for i in range(5)]
+        assert results["m3"] == {"name": "m3"}
+        assert packer.calls == 3 and packer.single_calls == 0
+
+    @pytest.mark.asyncio
+    async def test_missing_keys_fall_back(self):
+        """测试缺少的键拆成更小的组重试，单个任务仍失败时逐个生成"""
+        async def call(prompt):
+            keys = keys_in(prompt)
+            if len(keys) > 2:
+                raise ValueError("无法解析响应")
+            return {key: {"name": key} for key in keys if key != "m3"}
+
+        async def single(key, task):
+            return {"name": key, "single": True}
+
+        packer = PromptPacker({f"m{i}": {} for i in range(4)}, json.dumps, call, single=single)
+        results = await packer.run()
+        assert [results[f"m{i}"]["name"] for i in range(4)] == ["m0", "m1", "m2", "m3"]
+        assert results["m3"]["single"] is True
+        assert packer.single_calls == 1
+
+        packer = PromptPacker({"m3": {}}, json.dumps, call)
+        with pytest.raises(ValueError):
+            await packer.get("m3")
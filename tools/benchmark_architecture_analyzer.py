@@ -0,0 +1,61 @@
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.clarifier.architecture_analyzer import ArchitectureAnalyzer
+from core.clarifier.architecture_manager import ArchitectureIndex
+from core.clarifier.compact_graph import CompactDependencyGraph
+
+VERBS = ["manage", "process", "validate", "render", "store", "load", "send", "sync"]
+NOUNS = ["user", "order", "payment", "account", "profile", "report", "email", "session"]
+
+
+def build_index(size: int, seed: int = 42, avg_degree: int = 3) -> ArchitectureIndex:
+    """生成 size 个模块的合成依赖图（分层依赖为主，少量违规边和环）"""
+    rng = random.Random(seed)
+    index = ArchitectureIndex()
+    layers = [(pattern, layer) for pattern, info in index.architecture_patterns.items() for layer in info["layers"]]
+    graph = CompactDependencyGraph()
+    names = []
+    for i in range(size):
+        pattern, layer = layers[i % len(layers)]
+        name = f"{layer.capitalize()}{i}" if i % 10 else f"{layer}_{i}"
+        deps = {names[rng.randrange(i)] for _ in range(rng.randint(0, avg_degree * 2)) if i}
+        if i and rng.random() < 0.001:
+            deps.add(name)  # 自环
+        graph[name] = {
+            "depends_on": deps,
+            "depended_by": set(),
+            "pattern": pattern,
+            "layer": layer,
+            "responsibilities": [f"{rng.choice(VERBS)} {rng.choice(NOUNS)} {rng.choice(NOUNS)}"]
+        }
+        names.append(name)
+    index.dependency_graph = graph
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ArchitectureAnalyzer 单次遍历检查的性能测试")
+    parser.add_argument("sizes", nargs="*", type=int, default=[1000, 10000, 100000], help="模块数量")
+    parser.add_argument("--repeat", type=int, default=3, help="每个规模重复次数，取最短时间")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        index = build_index(size)
+        analyzer = ArchitectureAnalyzer(index)
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results = analyzer.analyze()
+            best = min(best, time.perf_counter() - start)
+        counts = ", ".join(f"{check}={len(issues)}" for check, issues in results.items())
+        print(f"⏱️ {size} 个模块: {best:.3f}s ({counts})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.clarifier.module_index import CROSS_CUTTING_CONCERNS, ModuleIndex
+
+LAYERS = ["controllers", "services", "repositories", "models", "components", "pages"]
+DOMAINS = ["user", "order", "payment", "account", "profile", "report", "email", "session"]
+
+
+def build_modules(size: int, seed: int = 42) -> dict:
+    """生成 size 个模块：层级、领域取值少，职责和需求几乎每个模块都不同"""
+    rng = random.Random(seed)
+    modules = {}
+    for i in range(size):
+        modules[f"Module{i}"] = {
+            "layer": LAYERS[i % len(LAYERS)],
+            "domain": rng.sample(DOMAINS, rng.randint(1, 2)),
+            "responsibilities": [f"responsibility {i}", f"{rng.choice(CROSS_CUTTING_CONCERNS)} shared {i % 50}"],
+            "requirements": [f"REQ-{i}", f"REQ-{rng.randrange(size)}"],
+        }
+    return modules
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def best_of(func, repeat: int) -> float:
+    return min(timed(func)[1] for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ModuleIndex 构建、查询和分面统计的性能测试")
+    parser.add_argument("sizes", nargs="*", type=int, default=[1000, 10000, 100000], help="模块数量")
+    parser.add_argument("--repeat", type=int, default=3, help="查询重复次数，取最短时间")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        modules = build_modules(size)
+        _, build = timed(lambda: ModuleIndex().sync(modules))
+        # 内存单独统计，tracemalloc 会明显拖慢构建
+        index = ModuleIndex()
+        tracemalloc.start()
+        index.sync(modules)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        query = best_of(lambda: index.query(layer="services", domain="user"), args.repeat)
+        sparse_query = best_of(lambda: index.query(requirement=["REQ-1", "REQ-2"], layer="services"), args.repeat)
+        facets = best_of(lambda: index.facets("requirement"), args.repeat)
+        filtered_facets = best_of(lambda: index.facets("requirement", layer="services", domain="user"), args.repeat)
+        _, update = timed(lambda: index.upsert("Module0", {**modules["Module0"], "requirements": ["REQ-X"]}))
+        print(f"⏱️ {size} 个模块: 构建 {build:.3f}s，内存 {memory / 2 ** 20:.1f} MB，"
+              f"查询 {query * 1000:.1f}ms，需求查询 {sparse_query * 1000:.2f}ms，"
+              f"需求分面 {facets * 1000:.1f}ms，带条件需求分面 {filtered_facets * 1000:.1f}ms，"
+              f"单模块更新 {update * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
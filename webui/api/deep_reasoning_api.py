@@ -227,9 +227,11 @@ async def check_dependencies(
             arch_manager = clarifier.architecture_manager
             
             from core.clarifier.architecture_reasoner import ArchitectureReasoner
+            from core.clarifier.cycle_analysis import format_cycles
             reasoner = ArchitectureReasoner(architecture_manager=arch_manager)
             
-            cycles = reasoner._check_global_circular_dependencies()
+            cyclic_components = reasoner.analyze_circular_dependencies()
+            cycles = format_cycles(cyclic_components)
             
             validation_issues = {}
             if hasattr(arch_manager, 'get_validation_issues'):
@@ -245,6 +247,7 @@ async def check_dependencies(
             return {
                 "status": "success",
                 "circular_dependencies": cycles,
+                "cyclic_components": cyclic_components,
                 "validation_issues": validation_issues
             }
         else:
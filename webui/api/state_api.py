@@ -2,8 +2,8 @@
 状态API模块，提供获取全局状态的接口
 """
 
-from fastapi import APIRouter, Depends
-from typing import Dict, List, Any
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Dict, List, Any, Optional
 import os
 from services.state_service import StateService, get_state_service
 
@@ -24,6 +24,25 @@ async def get_mode(state_service: StateService = Depends(get_state_service)) ->
     """获取当前模式"""
     return {"mode": state_service.get_current_mode()}
 
+@router.get("/modules/query")
+async def query_modules(
+    layer: Optional[List[str]] = Query(None),
+    domain: Optional[List[str]] = Query(None),
+    requirement: Optional[List[str]] = Query(None),
+    responsibility: Optional[List[str]] = Query(None),
+    cross_cutting: Optional[List[str]] = Query(None),
+    facets: Optional[List[str]] = Query(None),
+    state_service: StateService = Depends(get_state_service)
+) -> Dict[str, Any]:
+    """按层级、领域、需求、职责、横切关注点组合查询模块，facets 指定需要返回分面计数的维度"""
+    try:
+        return state_service.query_modules(
+            facet_dimensions=facets, layer=layer, domain=domain, requirement=requirement,
+            responsibility=responsibility, cross_cutting=cross_cutting
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/get_global_state")
 @router.get("/state/get_global_state")
 async def get_global_state(state_service: StateService = Depends(get_state_service)) -> Dict[str, Any]: